@@ -53,6 +53,15 @@ class AutoCutsBase:
         # TODO: find a cleaner way to update these
         self.__dict__.update(param_dict)
 
+    def get_params_key(self):
+        """Return a hashable key for the algorithm and the values of its
+        parameters, e.g. to tell whether cut levels calculated earlier
+        would be calculated the same way now.
+        """
+        return (self.kind,) + tuple((param.name,
+                                     str(getattr(self, param.name, None)))
+                                    for param in self.get_params_metadata())
+
     def get_algorithms(self):
         """Return the list of autocuts algorithms.
 
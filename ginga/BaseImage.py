@@ -211,6 +211,8 @@ class BaseImage(ViewerObjectBase):
 
         if metadata:
             self.update_metadata(metadata)
+        # cut levels calculated ahead are for the old data
+        self.metadata.pop('cut_levels_hint', None)
 
         self._set_minmax()
 
@@ -382,6 +382,11 @@ class BindingMapper(Callback.Callbacks):
     logical events, plugins and other event handling code doesn't need to
     care about the physical controls bindings.  The bindings can be changed
     and everything continues to work.
+
+    It also coalesces the effects of rapid events: a handler of scroll or
+    motion events can defer the (possibly costly) update of the viewer by
+    :meth:`coalesce`, merging it with the updates from the other events
+    that arrive before the next frame is drawn.
     """
 
     def __init__(self, logger, btnmap=None, mode_map=None, modifier_map=None):
@@ -429,6 +434,13 @@ class BindingMapper(Callback.Callbacks):
         self._empty_set = frozenset([])
         self.mode_tbl = dict()
 
+        # for coalescing updates: viewer -> Bunch(timer, pending), where
+        # pending is an ordered dict of key -> (func, args)
+        self._coalesce = {}
+        # seconds to coalesce updates for; None means the viewer's
+        # redraw lag time (i.e. once per frame)
+        self.coalesce_interval = None
+
         # For callbacks
         for name in ('mode-set', ):
             self.enable_callback(name)
@@ -537,6 +549,60 @@ class BindingMapper(Callback.Callbacks):
     def clear_event_map(self):
         self.eventmap = {}
 
+    def coalesce(self, viewer, key, func, *args):
+        """Arrange for ``func(*args)`` to be called before the next frame
+        is drawn in `viewer`, replacing any call pending with the same
+        `key`.
+
+        A handler can accumulate the effect of several events (e.g. zoom
+        factors or pan offsets) in its own state and apply them in `func`.
+        Pending calls are made in the order their keys were first added,
+        and before any other kind of event is dispatched to the viewer.
+        If the viewer cannot make timers, or coalescing is turned off
+        (interval 0), the call is made right away.
+        """
+        interval = self.coalesce_interval
+        if interval is None:
+            interval = (viewer.defer_lagtime
+                        if getattr(viewer, 'defer_redraw', False) else 0.0)
+        st = self._coalesce.get(viewer, None)
+        if st is None:
+            timer = viewer.make_timer() if interval > 0 else None
+            if timer is None:
+                func(*args)
+                return
+            timer.add_callback('expired',
+                               lambda t: self.flush_pending(viewer))
+            st = Bunch.Bunch(timer=timer, pending={})
+            self._coalesce[viewer] = st
+
+        if interval <= 0:
+            self.flush_pending(viewer)
+            func(*args)
+            return
+        start_timer = len(st.pending) == 0
+        st.pending[key] = (func, args)
+        if start_timer:
+            st.timer.set(interval)
+
+    def flush_pending(self, viewer):
+        """Make any calls pending for `viewer` from :meth:`coalesce` now."""
+        st = self._coalesce.get(viewer, None)
+        if st is None or len(st.pending) == 0:
+            return
+        st.timer.clear()
+        pending, st.pending = st.pending, {}
+        for key, (func, args) in pending.items():
+            try:
+                func(*args)
+            except Exception as e:
+                self.logger.error("Error applying coalesced '%s': %s" % (
+                    key, str(e)), exc_info=True)
+
+    def has_pending(self, viewer):
+        st = self._coalesce.get(viewer, None)
+        return st is not None and len(st.pending) > 0
+
     def map_event(self, mode, modifiers, trigger, eventname):
         self.eventmap[(mode, frozenset(tuple(modifiers)),
                        trigger)] = Bunch.Bunch(name=eventname)
@@ -644,6 +710,8 @@ class BindingMapper(Callback.Callbacks):
         return False
 
     def window_key_press(self, viewer, keyname):
+        # apply updates pending from earlier events first
+        self.flush_pending(viewer)
         self.logger.debug("keyname=%s" % (keyname))
         # Is this a modifer key?
         if keyname in self.modifier_map:
@@ -707,6 +775,8 @@ class BindingMapper(Callback.Callbacks):
         return res
 
     def window_key_release(self, viewer, keyname):
+        # apply updates pending from earlier events first
+        self.flush_pending(viewer)
         self.logger.debug("keyname=%s" % (keyname))
 
         # Is this a modifer key?
@@ -768,6 +838,8 @@ class BindingMapper(Callback.Callbacks):
         return res
 
     def window_button_press(self, viewer, btncode, data_x, data_y):
+        # apply updates pending from earlier events first
+        self.flush_pending(viewer)
         self.logger.debug("x,y=%s,%s btncode=%s" % (data_x, data_y,
                                                     hex(btncode)))
         self._button |= btncode
@@ -849,6 +921,8 @@ class BindingMapper(Callback.Callbacks):
         return res
 
     def window_button_release(self, viewer, btncode, data_x, data_y):
+        # apply updates pending from earlier events first
+        self.flush_pending(viewer)
         self.logger.debug("x,y=%s,%s button=%s" % (data_x, data_y,
                                                    hex(btncode)))
         self._button &= ~btncode
@@ -925,6 +999,8 @@ class BindingMapper(Callback.Callbacks):
         return res
 
     def window_pinch(self, viewer, state, rot_deg, scale):
+        # apply updates pending from earlier events first
+        self.flush_pending(viewer)
         btncode = 0
         button = self.get_button(btncode)
         if button is None:
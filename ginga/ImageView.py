@@ -20,7 +20,7 @@ from ginga import RGBMap, AutoCuts, ColorDist, zoom
 from ginga import colors, trcalc
 from ginga.canvas import coordmap, transform
 from ginga.canvas.types.layer import DrawingCanvas
-from ginga.util import addons, vip
+from ginga.util import addons, profiler, vip
 from ginga.util.viewer import ViewerBase
 from ginga.fonts import font_asst
 
@@ -284,6 +284,7 @@ class ImageViewBase(ViewerBase):
         # set up basic transforms
         self.trcat = transform.get_catalog()
         self.tform = {}
+        self._tform_serial = 0
         self.recalc_transforms(self.trcat)
 
         self.coordmap = {
@@ -352,6 +353,22 @@ class ImageViewBase(ViewerBase):
             self.rf_timer.add_callback('expired', self.refresh_timer_cb,
                                        self.rf_flags)
 
+        # for asynchronous rendering.  Frames are rendered on a worker
+        # thread and only the latest completed frame is presented on the
+        # GUI thread.  Subclasses that can hand a frame back to the GUI
+        # thread (see schedule_present_frame()) set `supports_async_render`.
+        self.t_.add_defaults(render_async=False)
+        self.supports_async_render = False
+        self._render_lock = threading.RLock()
+        self._rframe = Bunch.Bunch(cond=threading.Condition(),
+                                   thread=None, gen=0, render_gen=0,
+                                   whence=None, frame=None, frame_gen=0,
+                                   frame_whence=self._defer_whence_reset,
+                                   frame_start=0.0, frame_elapsed=0.0,
+                                   presented_gen=0,
+                                   rendered=0, presented=0,
+                                   abandoned=0, dropped=0)
+
     def set_window_size(self, width, height):
         """Report the size of the window to display the image.
 
@@ -381,7 +398,8 @@ class ImageViewBase(ViewerBase):
         self._imgwin_ht = height
         self.logger.debug("widget resized to %dx%d" % (width, height))
 
-        self.renderer.resize((width, height))
+        with self._render_lock:
+            self.renderer.resize((width, height))
 
         self.make_callback('configure', width, height)
 
@@ -456,6 +474,7 @@ class ImageViewBase(ViewerBase):
         """Set and initialize the renderer used by this instance.
         """
         self.renderer = renderer
+        self.invalidate_transforms()
         width, height = self.get_window_size()
         if width > 0 and height > 0:
             renderer.resize((width, height))
@@ -1266,8 +1285,16 @@ class ImageViewBase(ViewerBase):
 
         Returns
         -------
-        stats : float
-            The measured rate of actual back end updates in frames per second.
+        stats : dict
+            Keys ``fps``, ``jitter``, ``early_avg``, ``early_pct``,
+            ``late_avg``, ``late_pct`` and ``balance`` report on the timed
+            refresh (``fps`` is the measured rate of actual back end updates
+            in frames per second).  Keys ``frames_rendered``,
+            ``frames_presented``, ``frames_abandoned`` and ``frames_dropped``
+            count frames handled by asynchronous rendering (see
+            :meth:`is_render_async`): abandoned frames were superseded by
+            newer viewer state while being rendered, dropped frames were
+            completed but replaced by a newer frame before being presented.
 
         """
         if self.rf_draw_count == 0:
@@ -1286,10 +1313,16 @@ class ImageViewBase(ViewerBase):
 
         balance = self.rf_late_total - self.rf_early_total
 
+        rf = self._rframe
         stats = dict(fps=fps, jitter=jitter,
                      early_avg=early_avg, early_pct=early_pct,
                      late_avg=late_avg, late_pct=late_pct,
-                     balance=balance)
+                     balance=balance,
+                     # asynchronous rendering
+                     frames_rendered=rf.rendered,
+                     frames_presented=rf.presented,
+                     frames_abandoned=rf.abandoned,
+                     frames_dropped=rf.dropped)
         return stats
 
     def refresh_timer_cb(self, timer, flags):
@@ -1315,6 +1348,9 @@ class ImageViewBase(ViewerBase):
         self.rf_deadline += self.rf_rate
 
         self.rf_timer_count += 1
+        # in asynchronous rendering mode draws are counted when the frame
+        # is presented (see present_frame())
+        count_draw = not self.is_render_async()
         delta = abs(start_time - deadline)
         self.rf_delta_total += delta
         adjust = 0.0
@@ -1327,7 +1363,8 @@ class ImageViewBase(ViewerBase):
             adjust = - (late_avg / 2.0)
             self.rf_skip_total += delta
             if self.rf_skip_total < self.rf_rate:
-                self.rf_draw_count += 1
+                if count_draw:
+                    self.rf_draw_count += 1
                 # TODO: can we optimize whence?
                 self.redraw_now(whence=0)
             else:
@@ -1343,7 +1380,8 @@ class ImageViewBase(ViewerBase):
                 early_avg = self.rf_early_total / self.rf_early_count
                 adjust = early_avg / 4.0
 
-            self.rf_draw_count += 1
+            if count_draw:
+                self.rf_draw_count += 1
             # TODO: can we optimize whence?
             self.redraw_now(whence=0)
 
@@ -1359,18 +1397,29 @@ class ImageViewBase(ViewerBase):
             See :meth:`redraw`.
 
         """
+        if self.is_render_async():
+            self._request_async_render(whence)
+            return
+
         try:
             time_start = time.time()
-            self.renderer.initialize()
+            prof = profiler.active
+            if prof is not None:
+                t1 = time.perf_counter()
+            with self._render_lock:
+                self.renderer.initialize()
 
-            self.redraw_data(whence=whence)
+                self.redraw_data(whence=whence)
 
-            self.renderer.finalize()
+                self.renderer.finalize()
 
-            # finally update the window drawable from the offscreen surface
-            self.update_widget()
+                # finally update the window drawable from the offscreen surface
+                self.update_widget()
 
             time_done = time.time()
+            if prof is not None:
+                prof.record('redraw', str(self.name), t1, time.perf_counter(),
+                            args=dict(whence=whence))
             time_delta = time_start - self.time_last_redraw
             time_elapsed = time_done - time_start
             self.time_last_redraw = time_done
@@ -1399,16 +1448,208 @@ class ImageViewBase(ViewerBase):
             # window has not been realized yet
             return
 
+        self._render_data(whence)
+
+        self._redraw_data_done(whence)
+
+    def _render_data(self, whence):
         self._whence = whence
         self.renderer.render_whence(whence)
 
         self.private_canvas.draw(self)
 
+    def _redraw_data_done(self, whence):
         self.make_callback('redraw', whence)
 
         if whence < 3:
             self.check_cursor_location()
 
+    def is_render_async(self):
+        """Indicates whether frames are being rendered asynchronously.
+
+        When the ``render_async`` setting is True, and both the viewer
+        and its renderer support it, :meth:`redraw_now` hands frame
+        rendering to a worker thread and returns immediately.  The worker
+        renders into the renderer's (back) surface and publishes a copy
+        of the completed frame, which is presented on the GUI thread by
+        :meth:`present_frame`.  A render that is in flight when newer
+        viewer state (pan, zoom, etc.) arrives is abandoned in favor of
+        rendering the latest state.
+
+        Returns
+        -------
+        tf : bool
+            True if rendering is asynchronous, False otherwise.
+
+        """
+        return (self.t_.get('render_async', False) and
+                self.supports_async_render and
+                getattr(self.renderer, 'async_capable', False))
+
+    def _request_async_render(self, whence):
+        rf = self._rframe
+        with rf.cond:
+            # bumping the generation marks any in-flight render as stale
+            rf.gen += 1
+            rf.whence = whence if rf.whence is None else min(rf.whence,
+                                                             whence)
+            if rf.thread is None:
+                rf.thread = threading.Thread(target=self._async_render_loop,
+                                             name='render-{}'.format(self.name),
+                                             daemon=True)
+                pipeline = getattr(self.renderer, 'pipeline', None)
+                if pipeline is not None:
+                    pipeline.add_callback('stage-done',
+                                          self._async_stage_done_cb)
+                rf.thread.start()
+            rf.cond.notify()
+
+    def _async_stage_done_cb(self, pipeline, stage):
+        # stop a stale render in the worker at the next stage boundary
+        rf = self._rframe
+        if (threading.current_thread() is rf.thread and
+                rf.render_gen != rf.gen):
+            pipeline.stop()
+
+    def _async_render_loop(self):
+        rf = self._rframe
+        while True:
+            with rf.cond:
+                while rf.whence is None:
+                    rf.cond.wait()
+                whence, gen = rf.whence, rf.gen
+                rf.whence = None
+                rf.render_gen = gen
+
+            frame = None
+            time_start = time.time()
+            prof = profiler.active
+            if prof is not None:
+                t1 = time.perf_counter()
+            try:
+                with self._render_lock:
+                    if self._imgwin_set:
+                        self.renderer.initialize()
+                        self._render_data(whence)
+                        self.renderer.finalize()
+
+                        # snapshot the back surface as the completed frame
+                        frame = np.array(self.renderer.get_surface_as_array(
+                            order=self.rgb_order))
+                if prof is not None:
+                    prof.record('redraw', str(self.name), t1,
+                                time.perf_counter(),
+                                args=dict(whence=whence, background=True))
+
+            except Exception as e:
+                if gen == rf.gen:
+                    self.logger.error("Error rendering image: %s" % (str(e)),
+                                      exc_info=True)
+
+            with rf.cond:
+                if gen != rf.gen:
+                    # newer viewer state arrived while rendering--abandon
+                    # this frame and make sure the next render redoes any
+                    # stages that this one may have skipped
+                    rf.abandoned += 1
+                    rf.whence = whence if rf.whence is None else min(
+                        rf.whence, whence)
+                    continue
+
+                if frame is None:
+                    continue
+
+                if rf.frame_gen > rf.presented_gen:
+                    # previous frame was never presented
+                    rf.dropped += 1
+                rf.frame = frame
+                rf.frame_gen = gen
+                rf.frame_start = time_start
+                rf.frame_elapsed = time.time() - time_start
+                rf.frame_whence = min(rf.frame_whence, whence)
+                rf.rendered += 1
+
+            self.schedule_present_frame()
+
+    def schedule_present_frame(self):
+        """Arrange for :meth:`present_frame` to be called on the GUI thread.
+
+        This is called from the rendering worker thread when a new frame
+        has been completed in asynchronous rendering mode.  Subclasses that
+        set `supports_async_render` must override this if their widget
+        cannot be updated from a non-GUI thread.
+
+        """
+        self.present_frame()
+
+    def present_frame(self):
+        """Present the latest frame completed by asynchronous rendering.
+
+        .. note::
+
+            This must be called from the GUI thread.  It is normally only
+            called as a result of :meth:`schedule_present_frame`.
+
+        """
+        rf = self._rframe
+        with rf.cond:
+            if rf.frame_gen <= rf.presented_gen:
+                # already presented the latest frame
+                return
+            rf.presented_gen = rf.frame_gen
+            whence = rf.frame_whence
+            rf.frame_whence = self._defer_whence_reset
+            rf.presented += 1
+            time_start, time_render = rf.frame_start, rf.frame_elapsed
+
+        try:
+            # blit the front buffer to the window
+            self.update_widget()
+
+            time_done = time.time()
+            if not self.rf_flags.get('done', True):
+                # timed refresh is running
+                self.rf_draw_count += 1
+            time_delta = time_start - self.time_last_redraw
+            time_elapsed = time_done - time_start
+            self.time_last_redraw = time_done
+            self.logger.debug(
+                "widget '%s' presented frame %d (whence=%d) delta=%.4f "
+                "render=%.4f elapsed=%.4f sec" % (
+                    self.name, rf.presented_gen, whence, time_delta,
+                    time_render, time_elapsed))
+
+            self._redraw_data_done(whence)
+
+        except Exception as e:
+            self.logger.error("Error presenting image: %s" % (str(e)),
+                              exc_info=True)
+
+    def get_frame_as_array(self, order=None):
+        """Get the latest frame completed by asynchronous rendering.
+
+        Parameters
+        ----------
+        order : str or None
+            The desired RGB channel order (defaults to the viewer's order)
+
+        Returns
+        -------
+        arr : ndarray or None
+            The frame, or None if no frame has been completed yet
+
+        """
+        rf = self._rframe
+        with rf.cond:
+            frame = rf.frame
+        if frame is None:
+            return None
+        if order is None:
+            order = self.rgb_order
+        if order != self.rgb_order:
+            frame = trcalc.reorder_image(order, frame, self.rgb_order)
+        return frame
+
     def check_cursor_location(self):
         """Check whether the data location of the last known position
         of the cursor has changed.  If so, issue a callback.
@@ -2667,7 +2908,11 @@ class ImageViewBase(ViewerBase):
             #image = self.vip
             return
 
-        loval, hival = autocuts.calc_cut_levels(image)
+        cuts = self._get_cut_levels_hint(autocuts)
+        if cuts is None:
+            cuts = autocuts.calc_cut_levels(image)
+        loval, hival = cuts
+        self._set_auto_cut_levels(autocuts, cuts)
 
         # this will invoke cut_levels_cb()
         self.t_.set(cuts=(loval, hival))
@@ -2677,6 +2922,54 @@ class ImageViewBase(ViewerBase):
         if self.t_['autocuts'] == 'once':
             self.t_.set(autocuts='off')
 
+    def calc_cut_levels_hint(self, image):
+        """Calculate the auto cut levels of an image ahead of showing it.
+
+        The levels are calculated with the viewer's current auto cuts
+        algorithm and kept in the image, to be used (once) instead of
+        calculating them again when auto levels are next applied to it.
+        May be called from a non-GUI thread.
+
+        Parameters
+        ----------
+        image : `~ginga.BaseImage.BaseImage`
+            The image to be shown.
+
+        """
+        autocuts = self.autocuts
+        cuts = autocuts.calc_cut_levels(image)
+        image.set(cut_levels_hint=(autocuts.get_params_key(), cuts))
+
+    def _set_auto_cut_levels(self, autocuts, cuts):
+        # keep the auto cut levels with the image shown (as the metadata
+        # item 'auto_cut_levels'), e.g. to be saved for the next time it
+        # is loaded
+        image = self.get_image()
+        if image is None:
+            return
+        if len(self.get_vip().get_images([], self.get_canvas())) != 1:
+            # levels are calculated from all images shown
+            return
+        image.set(auto_cut_levels=(autocuts.get_params_key(), tuple(cuts)))
+
+    def _get_cut_levels_hint(self, autocuts):
+        # return the cut levels calculated ahead for the image shown, if
+        # they still apply
+        image = self.get_image()
+        if image is None:
+            return None
+        hint = image.get('cut_levels_hint', None)
+        if hint is None:
+            return None
+        image.set(cut_levels_hint=None)
+        key, cuts = hint
+        if key != autocuts.get_params_key():
+            return None
+        if len(self.get_vip().get_images([], self.get_canvas())) != 1:
+            # levels are calculated from all images shown
+            return None
+        return cuts
+
     def autocut_params_cb(self, setting, value):
         """Handle callback related to changes in auto-cut levels."""
         # Did we change the method?
@@ -2826,12 +3119,14 @@ class ImageViewBase(ViewerBase):
 
     def transform_cb(self, setting, value):
         """Handle callback related to changes in transformations."""
+        self.invalidate_transforms()
         self.make_callback('transform')
 
         state = (self.t_['flip_x'], self.t_['flip_y'], self.t_['swap_xy'])
         self.renderer.transform_2d(state)
 
-    def copy_attributes(self, dst_fi, attrlist, share=False, whence=0):
+    def copy_attributes(self, dst_fi, attrlist, share=False, whence=0,
+                        only_changed=False):
         """Copy interesting attributes of our configuration to another
         image view.
 
@@ -2849,6 +3144,16 @@ class ImageViewBase(ViewerBase):
         share : bool
             If True, the designated settings will be shared, otherwise the
             values are simply copied.
+
+        only_changed : bool
+            If True (and `share` is False), only the settings whose values
+            differ in `dst_fi` are copied, so that settings that did not
+            change do not cause `dst_fi` to be redrawn.
+
+        Returns
+        -------
+        keylist : list of str
+            The names of the settings copied or shared.
         """
         # TODO: change API to just go with settings names?
         keylist = []
@@ -2907,6 +3212,15 @@ class ImageViewBase(ViewerBase):
 
         whence = max(_whence, whence)
 
+        if only_changed and not share:
+            dst_t = dst_fi.get_settings()
+            keylist = [key for key in keylist
+                       if not _same_value(self.t_.get(key, None),
+                                          dst_t.get(key, None))]
+
+            if len(keylist) == 0:
+                return keylist
+
         with dst_fi.suppress_redraw:
             if share:
                 self.t_.share_settings(dst_fi.get_settings(),
@@ -2914,6 +3228,7 @@ class ImageViewBase(ViewerBase):
             else:
                 self.t_.copy_settings(dst_fi.get_settings(),
                                       keylist=keylist)
+        return keylist
 
     def get_rotation(self):
         """Get image rotation angle.
@@ -2962,6 +3277,7 @@ class ImageViewBase(ViewerBase):
 
     def rotation_change_cb(self, setting, value):
         """Handle callback related to changes in rotation angle."""
+        self.invalidate_transforms()
         self.renderer.rotate_2d(value)
 
     def get_center(self):
@@ -3083,42 +3399,66 @@ class ImageViewBase(ViewerBase):
         """
         if trcat is None:
             trcat = self.trcat
+        self.invalidate_transforms()
+
+        # chains of linear transforms are compiled to affine matrices,
+        # which are cached per view state (see get_transform_state)
+        data_to_native = trcat.AffineTransform(
+            self, (trcat.DataCartesianTransform(self) +
+                   trcat.ScaleTransform(self) +
+                   trcat.RotationFlipTransform(self) +
+                   trcat.CartesianNativeTransform(self, as_int=False)),
+            as_int=True)
+        data_to_window = trcat.AffineTransform(
+            self, (trcat.DataCartesianTransform(self) +
+                   trcat.ScaleTransform(self) +
+                   trcat.RotationFlipTransform(self) +
+                   trcat.CartesianWindowTransform(self, as_int=False)),
+            as_int=True)
 
         self.tform = {
             'window_to_native': trcat.WindowNativeTransform(self),
             'cartesian_to_window': trcat.CartesianWindowTransform(self),
             'cartesian_to_native': (trcat.RotationFlipTransform(self) +
                                     trcat.CartesianNativeTransform(self)),
-            'data_to_cartesian': (trcat.DataCartesianTransform(self) +
-                                  trcat.ScaleTransform(self)),
-            'data_to_scrollbar': (trcat.DataCartesianTransform(self) +
-                                  trcat.RotationFlipTransform(self)),
-            'mouse_to_data': (
-                trcat.InvertedTransform(trcat.DataCartesianTransform(self) +
-                                        trcat.ScaleTransform(self) +
-                                        trcat.RotationFlipTransform(self) +
-                                        trcat.CartesianNativeTransform(self))),
-            'data_to_window': (trcat.DataCartesianTransform(self) +
-                               trcat.ScaleTransform(self) +
-                               trcat.RotationFlipTransform(self) +
-                               trcat.CartesianWindowTransform(self)),
-            'data_to_percentage': (trcat.DataCartesianTransform(self) +
-                                   trcat.ScaleTransform(self) +
-                                   trcat.RotationFlipTransform(self) +
-                                   trcat.CartesianWindowTransform(self) +
+            'data_to_cartesian': trcat.AffineTransform(
+                self, (trcat.DataCartesianTransform(self) +
+                       trcat.ScaleTransform(self))),
+            'data_to_scrollbar': trcat.AffineTransform(
+                self, (trcat.DataCartesianTransform(self) +
+                       trcat.RotationFlipTransform(self))),
+            'mouse_to_data': trcat.InvertedTransform(data_to_native),
+            'data_to_window': data_to_window,
+            'data_to_percentage': (data_to_window +
                                    trcat.WindowPercentageTransform(self)),
-            'data_to_native': (trcat.DataCartesianTransform(self) +
-                               trcat.ScaleTransform(self) +
-                               trcat.RotationFlipTransform(self) +
-                               trcat.CartesianNativeTransform(self)),
+            'data_to_native': data_to_native,
             'wcs_to_data': trcat.WCSDataTransform(self),
             'wcs_to_native': (trcat.WCSDataTransform(self) +
-                              trcat.DataCartesianTransform(self) +
-                              trcat.ScaleTransform(self) +
-                              trcat.RotationFlipTransform(self) +
-                              trcat.CartesianNativeTransform(self)),
+                              data_to_native),
         }
 
+    def get_transform_state(self):
+        """Get the state of the viewer that its transforms depend on.
+
+        Returns
+        -------
+        state : int
+            A serial number that changes whenever the scale, pan position,
+            window size, flip/swap or rotation changes; transforms compiled
+            for one state are valid as long as it is the same
+
+        """
+        return self._tform_serial
+
+    def invalidate_transforms(self):
+        """Note a change of state that the transforms depend on (see
+        `get_transform_state`).  Called by the renderer and the transform
+        and rotation callbacks; only needed by subclasses that change that
+        state in other ways.
+
+        """
+        self._tform_serial += 1
+
     def set_bg(self, r, g, b):
         """Set the background color.
 
@@ -3407,6 +3747,10 @@ class ImageViewBase(ViewerBase):
         """
         if order is None:
             order = self.rgb_order
+        if self.is_render_async():
+            arr = self.get_frame_as_array(order=order)
+            if arr is not None:
+                return arr
         return self.renderer.get_surface_as_array(order=order)
 
     def get_image_as_buffer(self, output=None, order=None):
@@ -3693,6 +4037,15 @@ class ImageViewBase(ViewerBase):
     get_datarect = get_data_rect
 
 
+def _same_value(val1, val2):
+    # compare two setting values, which may be arrays or otherwise not
+    # comparable; treated as different if we can't tell
+    try:
+        return bool(val1 == val2)
+    except Exception:
+        return False
+
+
 class SuppressRedraw:
     def __init__(self, viewer):
         self.viewer = viewer
@@ -14,6 +14,12 @@ from ginga.misc import Bunch
 class LayerImage:
     """Mixin class for BaseImage subclasses.  Adds layers and alpha/rgb
     compositing.
+
+    The composition is done in float32 and kept between compositions:
+    when only some layers change (an alpha value, or a layer inserted,
+    replaced or deleted), only the contributions of those layers are
+    updated, in place.  After ``max_incremental`` such updates the layers
+    are composed again from scratch, to keep rounding errors small.
     """
 
     def __init__(self):
@@ -21,6 +27,9 @@ class LayerImage:
         self.cnt = 0
         self.compose_types = ('alpha', 'rgb')
         self.compose = 'alpha'
+        self.max_incremental = 50
+        # state of the last composition (see _reset_composition)
+        self._reset_composition()
 
     def _insert_layer(self, idx, image, alpha=None, name=None):
         if alpha is None:
@@ -114,22 +123,80 @@ class LayerImage:
             res[:, :, 2] = data[:, :, 2] * alpha
             return res
 
+    def _reset_composition(self):
+        # result: the composed array, updated in place
+        # entries: (layer, image, alpha) of the layers in the result
+        self._composed = Bunch.Bunch(compose=None, result=None,
+                                     entries=[], count=0)
+
+    def _get_layer_data(self, image):
+        # the layer data as float32 (not copied if it is already)
+        return np.asarray(image.get_data(), dtype=np.float32)
+
+    def _get_layer_alpha(self, layer):
+        alpha = layer.alpha
+        if isinstance(alpha, BaseImage.BaseImage):
+            alpha = np.asarray(alpha.get_data(), dtype=np.float32)
+        return alpha
+
+    def _is_incremental(self, compose, shape, dtype):
+        # True if the last composition can be updated for the changes
+        comp = self._composed
+        if (comp.compose != compose or comp.result is None or
+                comp.result.shape != shape or comp.result.dtype != dtype or
+                comp.count >= self.max_incremental):
+            return False
+        # alphas that are arrays may have been changed in place
+        return (all(np.isscalar(layer.alpha) for layer in self._layer) and
+                all(np.isscalar(entry[2]) for entry in comp.entries))
+
+    def _find_entry(self, entries, layer, image):
+        for entry in entries:
+            if entry[0] is layer and entry[1] is image:
+                return entry
+        return None
+
+    def _add_layer(self, result, image, alpha):
+        # add the contribution of a layer image to the alpha composition
+        data = self._get_layer_data(image)
+        # alpha * data, without an intermediate float64 array
+        contrib = np.multiply(data, alpha, dtype=np.float32)
+        if contrib.ndim < result.ndim:
+            # monochrome layer of a color composition
+            contrib = contrib[..., np.newaxis]
+        result += contrib
+
     def alpha_compose(self):
         start_time = time.time()
-        shape = self.get_max_shape()
-
-        # result holds the result of the composition
-        result = np.zeros(shape)
+        shape = tuple(self.get_max_shape())
+        comp = self._composed
+        entries = [(layer, layer.image, layer.alpha)
+                   for layer in self._layer]
+
+        if self._is_incremental('alpha', shape, np.float32):
+            # update the contributions of the layers that changed
+            result = comp.result
+            old = comp.entries
+            for layer, image, alpha in old:
+                if self._find_entry(entries, layer, image) is None:
+                    # layer deleted or image replaced
+                    self._add_layer(result, image, -alpha)
+            for layer, image, alpha in entries:
+                entry = self._find_entry(old, layer, image)
+                if entry is None:
+                    self._add_layer(result, image, alpha)
+                elif entry[2] != alpha:
+                    self._add_layer(result, image, alpha - entry[2])
+            comp.count += 1
 
-        cnt = 0
-        for layer in self._layer:
-            alpha = layer.alpha
-            if isinstance(alpha, BaseImage.BaseImage):
-                alpha = alpha.get_data()
-            data = layer.image.get_data()
-            result += self.alpha_multiply(alpha, data, shape=shape)
-            cnt += 1
+        else:
+            result = np.zeros(shape, dtype=np.float32)
+            for layer in self._layer:
+                self._add_layer(result, layer.image,
+                                self._get_layer_alpha(layer))
+            comp.setvals(compose='alpha', result=result, count=0)
 
+        comp.entries = entries
         self.set_data(result)
         end_time = time.time()
         self.logger.debug("alpha compose=%.4f sec" % (end_time - start_time))
@@ -139,18 +206,38 @@ class LayerImage:
         num = 3
         layer = self.get_layer(0)
         wd, ht = layer.image.get_size()
-        result = np.empty((ht, wd, num), dtype=np.uint8)
+        shape = (ht, wd, num)
+        comp = self._composed
 
         start_time = time.time()
-        for i in range(len(self._layer)):
-            layer = self.get_layer(i)
-            alpha = layer.alpha
-            if isinstance(alpha, BaseImage.BaseImage):
-                alpha = alpha.get_data()
-            data = self.alpha_multiply(alpha, layer.image.get_data())
-            result[:, :, i] = data[:, :]
+        entries = [(layer, layer.image, layer.alpha)
+                   for layer in self._layer]
+        if self._is_incremental('rgb', shape, np.uint8):
+            result = comp.result
+        else:
+            result = np.zeros(shape, dtype=np.uint8)
+            comp.setvals(compose='rgb', result=result, count=0, entries=[])
+
+        # only the planes of the layers that changed are composed again
+        old = comp.entries
+        for i in range(num):
+            entry = entries[i] if i < len(entries) else None
+            old_entry = old[i] if i < len(old) else None
+            if entry is None:
+                if old_entry is not None:
+                    result[:, :, i] = 0
+                continue
+            layer, image, alpha = entry
+            if (old_entry is not None and
+                    self._find_entry([old_entry], layer, image) is not None and
+                    old_entry[2] == alpha):
+                continue
+            data = self._get_layer_data(image)
+            alpha = self._get_layer_alpha(layer)
+            result[:, :, i] = np.multiply(data, alpha, dtype=np.float32)
         end_time = time.time()
 
+        comp.entries = entries
         self.set_data(result)
         self.logger.debug("rgb_compose  total=%.4f sec" % (
             end_time - start_time))
@@ -201,7 +288,19 @@ class LayerImage:
 
         self.compose_layers()
 
-    def compose_layers(self):
+    def compose_layers(self, incremental=True):
+        """Compose the layers into the data of this image.
+
+        Parameters
+        ----------
+        incremental : bool
+            If True, only the layers that changed since the last
+            composition are composed again; pass False if the data of a
+            layer image was changed in place
+        """
+        if not incremental:
+            self._reset_composition()
+
         if self.compose == 'rgb':
             self.rgb_compose()
         else:
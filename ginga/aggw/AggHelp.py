@@ -12,6 +12,9 @@ Geometry rasterizer that ships inside matplotlib
 ``aggdraw`` wrapped, but via a well maintained dependency that Ginga
 already requires.
 """
+import math
+
+import numpy as np
 from matplotlib.backends.backend_agg import RendererAgg
 from matplotlib.font_manager import FontProperties
 
@@ -117,4 +120,62 @@ class AggContext:
             text, prop, False)
         return wd, ht
 
+    def text_tile(self, text, fontkey, prop, rgba, rot_deg):
+        """Return ``(arr, ox, oy)``: an RGBA array of ``text`` drawn in
+        color `rgba`, rotated by `rot_deg` degrees about the bottom-left
+        of its box, and the offset of the array's top-left from that
+        anchor.  Tiles are kept in the shared text cache (see
+        `~ginga.fonts.font_asst.TextCache`) under `fontkey`, the name and
+        size of the font.
+        """
+        key = ('agg', text, fontkey, rgba, rot_deg)
+        cache = font_asst.get_text_cache()
+        res = cache.get(key)
+        if res is not None:
+            return res
+
+        wd, ht, descent = _meas_renderer.get_text_width_height_descent(
+            text, prop, False)
+        pad = 2
+        if rot_deg == 0.0:
+            # anchor at the bottom-left of the box
+            ax, ay = pad, pad + int(math.ceil(ht))
+            side_x, side_y = int(math.ceil(wd)) + 2 * pad, ay + pad
+        else:
+            # square tile big enough to hold the string at any rotation,
+            # with the anchor at the center
+            ax = ay = int(math.ceil(math.hypot(wd, ht))) + pad
+            side_x = side_y = 2 * ax
+
+        tile = RendererAgg(side_x, side_y, dpi)
+        tile.clear()
+        gc = tile.new_gc()
+        gc.set_foreground(rgba, isRGBA=True)
+        # as in CanvasRenderAgg.draw_text: glyphs are positioned by the
+        # baseline, in y-down coordinates
+        tile.draw_text(gc, ax, ay - descent, text, prop, rot_deg,
+                       ismath=False)
+        arr = np.asarray(tile.buffer_rgba())
+
+        # crop to the drawn part, to keep the cached tile small
+        rows = np.flatnonzero(arr[:, :, 3].any(axis=1))
+        cols = np.flatnonzero(arr[:, :, 3].any(axis=0))
+        if len(rows) == 0:
+            res = (None, 0, 0)
+        else:
+            y1, y2, x1, x2 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            arr = np.ascontiguousarray(arr[y1:y2, x1:x2])
+            res = (arr, x1 - ax, y1 - ay)
+        cache.put(key, res, 0 if res[0] is None else res[0].nbytes)
+        return res
+
+    def blit(self, arr, x, y):
+        """Blend RGBA array `arr` onto the surface with its top-left at
+        (`x`, `y`) in window (y-down) coordinates."""
+        gc = self.canvas.new_gc()
+        # draw_image takes the array bottom row first, placed at y from
+        # the bottom of the surface
+        y_bot = self.canvas.height - (y + arr.shape[0])
+        self.canvas.draw_image(gc, x, y_bot, arr[::-1])
+
 # END
@@ -123,21 +123,18 @@ class RenderContext(render.RenderContextBase):
         prop = font.render.prop
         rgba = (fill.render.rgba if fill is not None else (0, 0, 0, 1))
 
-        gc = self.ctx.canvas.new_gc()
-        gc.set_foreground(rgba, isRGBA=True)
-
-        # Unlike draw_path (which we feed y-up coords via self.flip),
+        # The text is drawn once onto a tile that is kept in the shared
+        # text cache, and the tile is blended onto the surface.  Unlike
+        # draw_path (which we feed y-up coords via self.flip),
         # RendererAgg.draw_text positions glyphs in top-left/y-down window
-        # space directly (buffer row ~= the y passed in), so we do NOT apply
-        # the flip here.  Ginga's (cx, cy) anchors the bottom-left of the
-        # text box; matplotlib positions by the baseline, so drop by the
-        # descent to put the box bottom on the anchor (matching the other
-        # backends).
-        _wd, _ht, descent = self.ctx.canvas.get_text_width_height_descent(
-            text, prop, False)
-        y = cy - descent
-        self.ctx.canvas.draw_text(gc, cx, y, text, prop, rot_deg,
-                                  ismath=False)
+        # space directly (buffer row ~= the y passed in).  Ginga's (cx, cy)
+        # anchors the bottom-left of the text box; matplotlib positions by
+        # the baseline, so the tile drops by the descent to put the box
+        # bottom on the anchor (matching the other backends).
+        arr, ox, oy = self.ctx.text_tile(text, (font.fontname, font.fontsize),
+                                         prop, rgba, rot_deg)
+        if arr is not None:
+            self.ctx.blit(arr, int(round(cx)) + ox, int(round(cy)) + oy)
 
     def draw_polygon(self, cpoints, line=None, fill=None):
         cpoints = trcalc.strip_z(cpoints)
@@ -236,6 +233,8 @@ class CanvasRenderer(render.StandardPipelineRenderer):
         render.StandardPipelineRenderer.__init__(self, viewer)
 
         self.kind = 'agg'
+        # surface is a plain offscreen buffer
+        self.async_capable = True
         self.rgb_order = 'RGBA'
         self.surface = None
         # color-mapped background image (RGBA, top-left origin), composited
@@ -45,7 +45,7 @@ class CanvasMixin:
             #print("%s subcanvas %s was updated" % (self.name, canvas.name))
             self.make_callback('modified', whence)
 
-    def add(self, obj, tag=None, tagpfx=None, belowThis=None, redraw=True):
+    def _make_tag(self, tag, tagpfx):
         self.count += 1
         if tag:
             # user supplied a tag
@@ -60,6 +60,10 @@ class CanvasMixin:
             else:
                 # make up our own tag
                 tag = '@%d' % (self.count)
+        return tag
+
+    def add(self, obj, tag=None, tagpfx=None, belowThis=None, redraw=True):
+        tag = self._make_tag(tag, tagpfx)
 
         obj.tag = tag
         self.tags[tag] = obj
@@ -73,6 +77,71 @@ class CanvasMixin:
             self.update_canvas(whence=3)
         return tag
 
+    def add_objects(self, objs, tags=None, tagpfx=None, redraw=True):
+        """Add many objects to the canvas at once.
+
+        This is like calling `add` for each object, but faster for large
+        numbers of objects, and the canvas is updated only once at the end.
+
+        Parameters
+        ----------
+        objs : sequence of `~ginga.canvas.CanvasObject.CanvasObjectBase`
+            The objects to add, on top of the objects already on the canvas
+
+        tags : sequence of str or None
+            Tags for the objects (a None tag is made up, as in `add`);
+            if None, all tags are made up
+
+        tagpfx : str or None
+            Prefix of the tags made up
+
+        redraw : bool
+            True if the viewers of the canvas should be updated
+
+        Returns
+        -------
+        tags : list of str
+            The tags of the objects
+        """
+        objs = list(objs)
+        if tags is None:
+            tags = [None] * len(objs)
+        else:
+            tags = list(tags)
+            if len(tags) != len(objs):
+                raise CanvasError("Number of tags does not match objects")
+
+        # check everything before changing the canvas
+        ids = set(map(id, self.objects))
+        given = set()
+        for obj, tag in zip(objs, tags):
+            if id(obj) in ids:
+                raise ValueError("object is already in this compound object")
+            ids.add(id(obj))
+            if tag:
+                if tag in self.tags or tag in given:
+                    raise CanvasError("Tag already used: '%s'" % (tag))
+                given.add(tag)
+        if tagpfx and tagpfx.startswith('@'):
+            raise CanvasError("Tag prefix may not begin with '@'")
+
+        res = []
+        for obj, tag in zip(objs, tags):
+            tag = self._make_tag(tag, tagpfx)
+            obj.tag = tag
+            self.tags[tag] = obj
+            # already checked above, so skip the scan of add_object
+            self._insert_object(obj)
+
+            # propagate change notification on this canvas
+            if obj.has_callback('modified'):
+                obj.add_callback('modified', self.subcanvas_updated_cb)
+            res.append(tag)
+
+        if redraw:
+            self.update_canvas(whence=3)
+        return res
+
     def delete_objects_by_tag(self, tags, redraw=True):
         for tag in tags:
             try:
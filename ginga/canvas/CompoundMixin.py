@@ -174,6 +174,11 @@ class CompoundMixin:
         if obj in self.objects:
             raise ValueError("object is already in this compound object")
 
+        self._insert_object(obj, belowThis=belowThis)
+
+    def _insert_object(self, obj, belowThis=None):
+        # add an object known not to be here already (see add_object);
+        # subclasses keeping their objects elsewhere override this
         obj.initialize(self, self.viewer, self.logger)
 
         if belowThis is None:
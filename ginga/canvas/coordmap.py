@@ -66,6 +66,15 @@ class NativeMapper(BaseMapper):
         data_arr = np.asarray(data_pts)
         return viewer.tform['data_to_native'].to_(data_arr)
 
+    def get_matrix(self, viewer=None):
+        """Return the 2x3 affine matrix mapping data coordinates to native
+        coordinates (before rounding) in the current state of the viewer.
+        """
+        if viewer is None:
+            viewer = self.viewer
+
+        return viewer.tform['data_to_native'].get_matrix()
+
     def offset_pt(self, pts, offset):
         return np.add(pts, offset)
 
@@ -95,6 +104,15 @@ class WindowMapper(BaseMapper):
         data_arr = np.asarray(data_pts)
         return viewer.tform['data_to_window'].to_(data_arr)
 
+    def get_matrix(self, viewer=None):
+        """Return the 2x3 affine matrix mapping data coordinates to window
+        coordinates (before rounding) in the current state of the viewer.
+        """
+        if viewer is None:
+            viewer = self.viewer
+
+        return viewer.tform['data_to_window'].get_matrix()
+
     def offset_pt(self, pts, offset):
         return np.add(pts, offset)
 
@@ -227,6 +227,9 @@ class RendererBase:
         self.viewer = viewer
         self.logger = viewer.get_logger()
         self.surface = None
+        # True if the renderer can render a frame off the GUI thread
+        # (see ImageViewBase.is_render_async())
+        self.async_capable = False
 
     def initialize(self):
         #raise RenderError("subclass should override this method!")
@@ -517,6 +520,7 @@ class StandardPipelineRenderer(RendererBase):
                                  win_dim=(0, 0),
                                  order=self.std_order)
         self.pipeline.set(state=self.state)
+        self.viewer.invalidate_transforms()
         # initialize pipeline
         self.pipeline.invalidate()
 
@@ -613,6 +617,7 @@ class StandardPipelineRenderer(RendererBase):
         ctr = (wd // 2, ht // 2)
         self.state.setvals(win_dim=dims[:2], ctr=ctr,
                            order=self.std_order)
+        self.viewer.invalidate_transforms()
 
         # update pan and scale values in pipeline
         pan_x, pan_y = self.viewer.get_pan(coord='data')[:2]
@@ -632,6 +637,7 @@ class StandardPipelineRenderer(RendererBase):
 
         self.state.setvals(org_pan=(org_x, org_y, 0.0),
                            org_scale=(org_scale_x, org_scale_y, org_scale_z))
+        self.viewer.invalidate_transforms()
 
     def _confirm_pan_and_scale(self, scale_x, scale_y, pan_x, pan_y,
                                win_wd, win_ht):
@@ -15,7 +15,8 @@ __all__ = ['TransformError', 'BaseTransform', 'ComposedTransform',
            'CartesianNativeTransform', 'AsIntegerTransform',
            'RotationTransform', 'ScaleTransform',
            'DataCartesianTransform', 'OffsetDataTransform',
-           'WCSDataTransform', 'ScaleOffsetTransform', 'get_catalog'
+           'WCSDataTransform', 'ScaleOffsetTransform', 'AffineTransform',
+           'get_catalog'
            ]
 
 
@@ -713,6 +714,84 @@ class ScaleOffsetTransform(BaseTransform):
         self.y_offset = y_offset
 
 
+class AffineTransform(BaseTransform):
+    """
+    A transform that does the work of a chain of linear transforms of a
+    viewer (e.g. data to native coordinates, without WCS) as one 2x3
+    affine matrix.
+
+    The matrix is compiled from the chain the first time it is needed for
+    each state of the viewer (pan, scale, rotation, flip/swap and window
+    size, see ``ImageViewBase.get_transform_state``) and reused until the
+    state changes.  Points with a Z coordinate are passed to the chain.
+
+    Parameters
+    ----------
+    viewer : `~ginga.ImageView.ImageViewBase`
+        The viewer whose state the chain depends on
+
+    tform : `BaseTransform`
+        The (floating point) chain of transforms; it must be affine
+
+    as_int : bool
+        If True, round the results of `to_` to integers
+    """
+
+    def __init__(self, viewer, tform, as_int=False):
+        super(AffineTransform, self).__init__()
+        self.viewer = viewer
+        self.tform = tform
+        self.as_int = as_int
+        self._state = None
+        self._mtx = None
+        self._inv_mtx = None
+
+    def get_matrix(self):
+        """Return the 2x3 matrix mapping ``(x, y, 1)`` to transformed
+        ``(x, y)`` in the current state of the viewer."""
+        state = self.viewer.get_transform_state()
+        if state != self._state:
+            # the images of the origin and unit vectors give the matrix
+            pts = self.tform.to_(np.array([(0.0, 0.0), (1.0, 0.0),
+                                           (0.0, 1.0)]))
+            org = pts[0]
+            mtx = np.array([[pts[1][0] - org[0], pts[2][0] - org[0], org[0]],
+                            [pts[1][1] - org[1], pts[2][1] - org[1], org[1]]])
+            self._mtx, self._inv_mtx = mtx, None
+            self._state = state
+        return self._mtx
+
+    def get_inverse_matrix(self):
+        """Return the 2x3 matrix of the inverse transform."""
+        mtx = self.get_matrix()
+        if self._inv_mtx is None:
+            a = np.linalg.inv(mtx[:, :2])
+            self._inv_mtx = np.hstack((a, -a.dot(mtx[:, 2:])))
+        return self._inv_mtx
+
+    def _apply(self, mtx, pts):
+        return pts.dot(mtx[:, :2].T) + mtx[:, 2]
+
+    def to_(self, pts):
+        pts = np.asarray(pts, dtype=float)
+        if pts.shape[-1] != 2:
+            res = self.tform.to_(pts)
+        else:
+            res = self._apply(self.get_matrix(), pts)
+
+        # round to pixel units, if asked
+        if self.as_int:
+            res = np.rint(res).astype(int, copy=False)
+        return res
+
+    def from_(self, pts):
+        """Reverse of :meth:`to_`."""
+        pts = np.asarray(pts, dtype=float)
+        if pts.shape[-1] != 2:
+            return self.tform.from_(pts)
+        return self._apply(self.get_inverse_matrix(), pts)
+
+
 def get_catalog():
     """Returns a catalog of available transforms.  These are used to
     build chains for rendering with different back ends.
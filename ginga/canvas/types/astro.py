@@ -7,6 +7,9 @@
 #
 
 import math
+import weakref
+from collections import OrderedDict
+
 import numpy as np
 
 from ginga.canvas.CanvasObject import (CanvasObjectBase, _bool, _color,
@@ -1070,6 +1073,15 @@ class Annulus2R(Annulus2RP):
 class WCSAxes(CompoundObject):
     """
     Special compound object to draw WCS axes.
+
+    The grid lines are calculated once per image, with all of their
+    points transformed from WCS in one batch, and kept (for the last few
+    images).  Each time the object is drawn, only the lines that cross
+    the displayed area are drawn, and when the image is zoomed in so far
+    that the segments between the points of a line would be visibly
+    straight, the parts of the lines in view are calculated in more
+    detail.  Changes of rotation or swapping of axes only change the
+    angles of the labels.
     """
     @classmethod
     def get_params_metadata(cls):
@@ -1103,6 +1115,13 @@ class WCSAxes(CompoundObject):
         self.num_ra = 10
         self.num_dec = 10
         self._pix_res = 10
+        # range of the number of points per grid line
+        self._min_pts = 16
+        self._max_pts = 256
+        # longest segment (in screen pixels) before a line is refined
+        self._max_seg = 25
+        # number of segments of a line refined together
+        self._chunk_size = 16
         self.txt_off = 4
         self.ra_angle = None
         self.dec_angle = None
@@ -1111,6 +1130,9 @@ class WCSAxes(CompoundObject):
         self._cur_swap = None
         self._cur_limits = ((0.0, 0.0), (0.0, 0.0))
         self._cur_images = set([])
+        # grids of recent images (with the refined parts of their lines)
+        self._grid = None
+        self._grid_cache = OrderedDict()
 
         CompoundObject.__init__(self,
                                 color=color, alpha=alpha,
@@ -1122,8 +1144,16 @@ class WCSAxes(CompoundObject):
         self.opaque = True
         self.kind = 'wcsaxes'
 
+    def reset_grid(self):
+        """Forget the calculated grids, so that they are calculated again
+        (e.g. with a new number of lines) the next time the axes are drawn.
+        """
+        self.objects = []
+        self._cur_images = set([])
+        self._grid = None
+        self._grid_cache.clear()
+
     def _calc_axes(self, viewer, images, rot_deg, swapxy, limits):
-        self.logger.debug("recalculating axes...")
         self._cur_images = images
         self._cur_rot = rot_deg
         self._cur_swap = swapxy
@@ -1133,14 +1163,37 @@ class WCSAxes(CompoundObject):
         if image is None or not image.has_valid_wcs():
             self.logger.debug(
                 'WCSAxes can only be displayed for image with valid WCS')
+            self._grid = None
             return []
 
+        key = (id(image), tuple(np.asarray(limits).flat))
+        grid = self._grid_cache.get(key, None)
+        if grid is not None and grid.image_ref() is image:
+            self._grid_cache.move_to_end(key)
+        else:
+            self.logger.debug("recalculating axes...")
+            grid = self._calc_grid(image, limits)
+            if grid is None:
+                self._grid = None
+                return []
+            self._grid_cache[key] = grid
+            while len(self._grid_cache) > 4:
+                self._grid_cache.popitem(last=False)
+
+        self._grid = grid
+        objs = []
+        for line in grid.lines:
+            objs.extend(self._make_objs(viewer, line))
+        self._update_labels()
+        return objs
+
+    def _calc_grid(self, image, limits):
         x1, y1 = limits[0][:2]
         x2, y2 = limits[1][:2]
         min_imsize = min(x2 - x1, y2 - y1)
         if min_imsize <= 0:
             self.logger.debug('Cannot draw WCSAxes on image with 0 dim')
-            return []
+            return None
 
         # Approximate bounding box in RA/DEC space
         try:
@@ -1149,7 +1202,7 @@ class WCSAxes(CompoundObject):
                 naxispath=image.naxispath)
         except Exception as e:
             self.logger.warning('WCSAxes failed: {}'.format(str(e)))
-            return []
+            return None
         ra_min, dec_min = radec.ra.min().deg, radec.dec.min().deg
         ra_max, dec_max = radec.ra.max().deg, radec.dec.max().deg
         ra_size = ra_max - ra_min
@@ -1161,75 +1214,127 @@ class WCSAxes(CompoundObject):
         ra_arr = np.arange(ra_min + d_ra, ra_max - d_ra * 0.5, d_ra)
         dec_arr = np.arange(dec_min + d_dec, dec_max - d_dec * 0.5, d_dec)
 
-        # RA/DEC step size for each vector
-        d_ra_step = ra_size * self._pix_res / min_imsize
-        d_dec_step = dec_size * self._pix_res / min_imsize
-
-        # Create Path objects
-        objs = []
+        # number of points along each line: one every _pix_res pixels,
+        # within limits (details are added when zoomed in)
+        num_pts = int(np.clip(min_imsize / self._pix_res,
+                              self._min_pts, self._max_pts))
+        ras = np.linspace(ra_min, ra_max, num_pts)
+        decs = np.linspace(dec_min, dec_max, num_pts)
 
+        lines = []
         for cur_ra in ra_arr:
-            crds = [[cur_ra, cur_dec] for cur_dec in
-                    np.arange(dec_min, dec_max + d_dec_step, d_dec_step)]
-            lbl = ra_deg_to_str(cur_ra)
-            objs += self._get_path(viewer, image, crds, lbl, 1)
+            crds = np.array([np.full(num_pts, cur_ra), decs]).T
+            lines.append(Bunch.Bunch(axis=1, crds=crds,
+                                     lbl=ra_deg_to_str(cur_ra)))
         for cur_dec in dec_arr:
-            crds = [[cur_ra, cur_dec] for cur_ra in
-                    np.arange(ra_min, ra_max + d_ra_step, d_ra_step)]
-            lbl = dec_deg_to_str(cur_dec)
-            objs += self._get_path(viewer, image, crds, lbl, 0)
-
-        return objs
-
-    def _get_path(self, viewer, image, crds, lbl, axis):
-        from ginga.canvas.types.basic import Path, Text
+            crds = np.array([ras, np.full(num_pts, cur_dec)]).T
+            lines.append(Bunch.Bunch(axis=0, crds=crds,
+                                     lbl=dec_deg_to_str(cur_dec)))
+        if len(lines) == 0:
+            return None
 
+        # transform the points of all lines at once
         try:
-            pts = image.wcs.wcspt_to_datapt(crds, naxispath=image.naxispath)
+            pts = self._wcs_to_data(image, [line.crds for line in lines])
         except Exception as e:
             self.logger.warning('WCSAxes failed: {}'.format(str(e)))
-            return []
-
-        (x1, y1), (x2, y2) = viewer.get_limits()
+            return None
+
+        limits = ((x1, y1), (x2, y2))
+        for line, line_pts in zip(lines, pts):
+            line.pts = line_pts
+            line.bbox = self._get_bbox(line_pts[self._inside(line_pts,
+                                                             limits)])
+
+        return Bunch.Bunch(image_ref=weakref.ref(image), limits=limits,
+                           lines=lines, num_pts=num_pts,
+                           seg_len=min_imsize / (num_pts - 1),
+                           refined=OrderedDict())
+
+    def _wcs_to_data(self, image, crds_list):
+        # transform a list of arrays of WCS points in one call
+        lens = [len(crds) for crds in crds_list]
+        pts = image.wcs.wcspt_to_datapt(np.concatenate(crds_list),
+                                        naxispath=image.naxispath)
+        pts = np.asarray(pts, dtype=float)[:, :2]
+        return np.split(pts, np.cumsum(lens)[:-1])
+
+    def _inside(self, pts, limits):
         # Don't draw outside image area
-        mask = ((pts[:, 0] >= x1) & (pts[:, 0] <= x2) &
+        (x1, y1), (x2, y2) = limits
+        return ((pts[:, 0] >= x1) & (pts[:, 0] <= x2) &
                 (pts[:, 1] >= y1) & (pts[:, 1] <= y2))
-        pts = pts[mask]
 
+    def _get_bbox(self, pts):
         if len(pts) == 0:
+            return None
+        return (pts[:, 0].min(), pts[:, 1].min(),
+                pts[:, 0].max(), pts[:, 1].max())
+
+    def _make_objs(self, viewer, line):
+        from ginga.canvas.types.basic import Path, Text
+
+        if line.bbox is None:
             self.logger.debug(
-                'All WCSAxes coords ({}) out of bound in {}x{} '
-                'image'.format(crds, image.width, image.height))
+                'All WCSAxes coords ({}) out of bound in image'.format(
+                    line.lbl))
             return []
 
+        pts = line.pts[self._inside(line.pts, self._grid.limits)]
         path_obj = Path(
             points=pts, coords='data', linewidth=self.linewidth,
             linestyle=self.linestyle, color=self.color,
             alpha=self.alpha)
         # this is necessary because we are not actually adding to a canvas
         path_obj.crdmap = viewer.get_coordmap('data')
+        path_obj.grid_line = line
+        line.path_obj = path_obj
+        line.text_obj = None
 
-        if self.show_label:
-            # Calculate label orientation
-            x1, y1 = pts[0]
-            x2, y2 = pts[-1]
-            dx = x2 - x1
-            dy = y2 - y1
+        if not self.show_label:
+            return [path_obj]
+
+        # Calculate label position
+        x1, y1 = pts[0]
+        x2, y2 = pts[-1]
+        dx = x2 - x1
+        dy = y2 - y1
+        with np.errstate(divide='ignore', invalid='ignore'):
             m = dy / dx
-            c = y1 - m * x1
-
-            if abs(m) < 1:  # x axis varying
-                x = min(x1, x2) + abs(dx) * 0.45
-                y = m * x + c + self.txt_off
-            else:  # y axis varying
-                y = min(y1, y2) + abs(dy) * 0.45
-                if np.isfinite(m):
-                    x = (y - c) / m
-                else:
-                    x = min(x1, x2)
-                x += self.txt_off
+        c = y1 - m * x1
+        line.slope = m
+
+        if abs(m) < 1:  # x axis varying
+            x = min(x1, x2) + abs(dx) * 0.45
+            y = m * x + c + self.txt_off
+        else:  # y axis varying
+            y = min(y1, y2) + abs(dy) * 0.45
+            if np.isfinite(m):
+                x = (y - c) / m
+            else:
+                x = min(x1, x2)
+            x += self.txt_off
+
+        text_obj = Text(x, y, text=line.lbl, font=self.font,
+                        fontsize=self.fontsize, color=self.color,
+                        alpha=self.alpha, coord='data')
+        text_obj.crdaxis = line.axis
+        text_obj.grid_line = line
+        # this is necessary because we are not actually adding to a canvas
+        text_obj.crdmap = viewer.get_coordmap('data')
+        line.text_obj = text_obj
+
+        return [path_obj, text_obj]
 
-            if axis == 0:  # DEC
+    def _update_labels(self):
+        # set the angles of the labels for the current rotation and swap
+        if self._grid is None:
+            return
+        for line in self._grid.lines:
+            text_obj = line.get('text_obj', None)
+            if text_obj is None:
+                continue
+            if line.axis == 0:  # DEC
                 user_angle = self.dec_angle
                 default_rot = 0
             else:  # RA
@@ -1238,7 +1343,7 @@ class WCSAxes(CompoundObject):
 
             if user_angle is None:
                 try:
-                    rot = math.atan(m) * 180 / math.pi
+                    rot = math.atan(line.slope) * 180 / math.pi
                 except ValueError:
                     rot = default_rot
                 rot = self._cur_rot + rot
@@ -1248,18 +1353,81 @@ class WCSAxes(CompoundObject):
             if self._cur_swap:
                 # axes are swapped
                 rot -= 90
-
-            text_obj = Text(x, y, text=lbl, font=self.font,
-                            fontsize=self.fontsize, color=self.color,
-                            alpha=self.alpha, rot_deg=rot, coord='data')
-            text_obj.crdaxis = axis
-            # this is necessary because we are not actually adding to a canvas
-            text_obj.crdmap = viewer.get_coordmap('data')
-
-            return [path_obj, text_obj]
-
-        else:
-            return [path_obj]
+            text_obj.rot_deg = rot
+
+    def _refine(self, viewer, image, view):
+        # Replace the points of the paths in view by more detailed ones,
+        # if the segments between the points of the lines are long on
+        # the screen.  Lines are refined in chunks of segments, which are
+        # kept with the grid for reuse while panning.
+        grid = self._grid
+        refined = grid.refined
+        scale = max(viewer.get_scale_xy())
+        seg_px = grid.seg_len * scale
+        level = 0
+        if seg_px > self._max_seg:
+            level = min(int(np.ceil(np.log2(seg_px / self._max_seg))), 8)
+
+        vx1, vy1, vx2, vy2 = view
+        ch = self._chunk_size
+        todo = []
+        for i, line in enumerate(grid.lines):
+            path_obj = line.get('path_obj', None)
+            if path_obj is None:
+                continue
+            if level == 0:
+                if line.get('refined', False):
+                    path_obj.points = line.pts[self._inside(line.pts,
+                                                            grid.limits)]
+                    line.refined = False
+                continue
+
+            # segments that may cross the view
+            a, b = line.pts[:-1], line.pts[1:]
+            seg_vis = ((np.minimum(a[:, 0], b[:, 0]) <= vx2) &
+                       (np.maximum(a[:, 0], b[:, 0]) >= vx1) &
+                       (np.minimum(a[:, 1], b[:, 1]) <= vy2) &
+                       (np.maximum(a[:, 1], b[:, 1]) >= vy1))
+            segs = np.flatnonzero(seg_vis)
+            if len(segs) == 0:
+                continue
+            chunks = range(segs[0] // ch, segs[-1] // ch + 1)
+            keys = [(i, level, k) for k in chunks]
+            todo.append((line, keys))
+
+        # calculate the missing chunks in one batch
+        missing = [key for line, keys in todo for key in keys
+                   if key not in refined]
+        if len(missing) > 0:
+            crds_list = []
+            for i, level, k in missing:
+                crds = grid.lines[i].crds
+                i1 = k * ch
+                i2 = min(i1 + ch, len(crds) - 1)
+                idx = np.linspace(i1, i2, (i2 - i1) * 2**level + 1)
+                src = np.arange(len(crds))
+                crds_list.append(np.array([np.interp(idx, src, crds[:, 0]),
+                                           np.interp(idx, src, crds[:, 1])]).T)
+            try:
+                pts_list = self._wcs_to_data(image, crds_list)
+            except Exception as e:
+                self.logger.warning('WCSAxes failed: {}'.format(str(e)))
+                return
+            for key, pts in zip(missing, pts_list):
+                refined[key] = pts
+        for line, keys in todo:
+            for key in keys:
+                refined.move_to_end(key)
+        while len(refined) > 512:
+            refined.popitem(last=False)
+
+        for line, keys in todo:
+            # consecutive chunks share their end points
+            pts = [refined[key][0 if n == 0 else 1:]
+                   for n, key in enumerate(keys)]
+            pts = np.concatenate(pts)
+            line.path_obj.points = pts[self._inside(pts, grid.limits)]
+            line.refined = True
 
     def sync_state(self):
         for obj in self.objects:
@@ -1292,19 +1460,6 @@ class WCSAxes(CompoundObject):
         diff = images.difference(self._cur_images)
         update = len(diff) > 0
 
-        cur_swap = viewer.get_transforms()[2]
-        if cur_swap != self._cur_swap:
-            # axes have been swapped
-            update = True
-
-        cur_rot = viewer.get_rotation()
-        if cur_rot != self._cur_rot and self.show_label:
-            # rotation has changed
-            # TODO: for a rotation or swap axes change, it would be
-            # sufficient to simply calculate the new rotation angles
-            # and update all the text objects in self.objects
-            update = True
-
         cur_limits = viewer.get_limits()
         if not np.all(np.isclose(cur_limits, self._cur_limits)):
             # limits have changed
@@ -1314,6 +1469,8 @@ class WCSAxes(CompoundObject):
             # initial time
             update = True
 
+        cur_swap = viewer.get_transforms()[2]
+        cur_rot = viewer.get_rotation()
         if update:
             # only expensive recalculation of grid if needed
             self.ra_angle = None
@@ -1321,7 +1478,27 @@ class WCSAxes(CompoundObject):
             self.objects = self._calc_axes(viewer, images, cur_rot, cur_swap,
                                            cur_limits)
 
-        super(WCSAxes, self).draw(viewer)
+        elif cur_swap != self._cur_swap or cur_rot != self._cur_rot:
+            # axes have been swapped or rotated: only the label angles
+            # change
+            self._cur_rot = cur_rot
+            self._cur_swap = cur_swap
+            if self.show_label:
+                self._update_labels()
+
+        if self._grid is None:
+            return
+
+        # draw the lines crossing the displayed area
+        vx1, vy1, vx2, vy2 = viewer.get_data_rect()
+        image = viewer.get_image()
+        if image is not None:
+            self._refine(viewer, image, (vx1, vy1, vx2, vy2))
+        for obj in self.objects:
+            bbox = obj.grid_line.bbox
+            if (bbox[0] <= vx2 and bbox[2] >= vx1 and
+                    bbox[1] <= vy2 and bbox[3] >= vy1):
+                obj.draw(viewer)
 
 
 register_canvas_types(dict(ruler=Ruler, compass=Compass,
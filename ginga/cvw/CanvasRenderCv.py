@@ -86,6 +86,8 @@ class CanvasRenderer(render.StandardPipelineRenderer):
         render.StandardPipelineRenderer.__init__(self, viewer)
 
         self.kind = 'opencv'
+        # surface is a plain offscreen buffer
+        self.async_capable = True
         # According to OpenCV documentation:
         # "If you are using your own image rendering and I/O functions,
         # you can use any channel ordering. The drawing functions process
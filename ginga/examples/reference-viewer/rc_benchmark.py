@@ -0,0 +1,130 @@
+"""
+Measure the throughput of sending images to Ginga by remote control.
+
+Images are sent with each of the ways supported by the ``RemoteClient``
+in ``ginga.util.grc``: XML-RPC, shared memory and the binary socket
+protocol (uncompressed and with each available codec).
+
+To measure against a running reference viewer, start Ginga with the RC
+plugin (set ``data_port`` in ``plugin_RC.cfg`` to also measure the binary
+protocol), then run:
+
+    $ python rc_benchmark.py --port=11771 --data-port=11772
+
+To measure just the transports, without a viewer:
+
+    $ python rc_benchmark.py --local
+
+"""
+import sys
+import time
+import threading
+from argparse import ArgumentParser
+
+import numpy as np
+
+from ginga.misc import log
+from ginga.util import grc
+
+
+class NullReceiver:
+    """Receives images like the RC plugin, but does not display them."""
+
+    def load_buffer(self, imname, chname, img_buf, dims, dtype,
+                    header, metadata, compressed):
+        decompress = metadata.get('decompress', None)
+        if decompress is not None:
+            img_buf = grc.decompress_buffer(img_buf, decompress)
+        np.frombuffer(img_buf, dtype=dtype).reshape(dims)
+        return 0
+
+    def load_shm(self, imname, chname, shm_name, dims, dtype,
+                 header, metadata):
+        grc.read_shared_array(shm_name, tuple(dims), dtype)
+        return 0
+
+
+def start_local_servers(logger):
+    robj = NullReceiver()
+    ports = []
+    for klass in (grc.RemoteServer, grc.BinaryServer):
+        server = klass(robj, host='localhost', port=0, logger=logger)
+        server.server = server.make_server()
+        if hasattr(server.server, 'logRequests'):
+            server.server.logRequests = False
+        ports.append(server.server.server_address[1])
+        t = threading.Thread(target=server.server.serve_forever,
+                             daemon=True)
+        t.start()
+    return ports
+
+
+def bench(client, chname, data, num):
+    ch = client.channel(chname)
+    # warm up (connect, allocate shared memory)
+    ch.load_np('bench', data, 'fits', {})
+    t1 = time.time()
+    for i in range(num):
+        ch.load_np('bench', data, 'fits', {})
+    return (time.time() - t1) / num
+
+
+def main(options, args):
+    logger = log.get_logger("rc_benchmark", log_stderr=options.debug)
+
+    host, port, data_port = options.host, options.port, options.data_port
+    if options.local:
+        port, data_port = start_local_servers(logger)
+
+    ht, wd = options.size
+    # a noisy frame, like a detector readout
+    data = np.random.RandomState(0).normal(1000.0, 10.0, (ht, wd))
+    data = data.astype(np.float32)
+    mb = data.nbytes / 1e6
+    print("sending {}x{} float32 image ({:.1f} MB) x {}".format(
+        wd, ht, mb, options.num))
+
+    tests = [('xmlrpc', None)]
+    if grc.have_shm and host in grc.local_hosts:
+        tests.append(('shm', None))
+    if data_port is not None:
+        tests.append(('binary', None))
+        tests.extend([('binary', codec) for codec in grc.get_codecs()])
+
+    for transport, codec in tests:
+        client = grc.RemoteClient(host, port, transport=transport,
+                                  data_port=data_port, codec=codec)
+        try:
+            sec = bench(client, options.chname, data, options.num)
+        finally:
+            client.close()
+        label = transport if codec is None else transport + '+' + codec
+        print("{:12s} {:8.1f} ms/image {:8.1f} MB/s".format(
+            label, sec * 1000, mb / sec))
+
+
+if __name__ == "__main__":
+    argprs = ArgumentParser(description="Benchmark of Ginga RC transports")
+    argprs.add_argument("--host", dest="host", default="localhost",
+                        help="Connect to server at HOST")
+    argprs.add_argument("--port", dest="port", type=int,
+                        default=grc.default_rc_port,
+                        help="Connect to RC server at PORT")
+    argprs.add_argument("--data-port", dest="data_port", type=int,
+                        default=None,
+                        help="Connect to RC binary data server at PORT")
+    argprs.add_argument("--chname", dest="chname", default="Image",
+                        help="Load images into channel CHNAME")
+    argprs.add_argument("--local", dest="local", default=False,
+                        action="store_true",
+                        help="Run servers here, without a viewer")
+    argprs.add_argument("-n", "--num", dest="num", type=int, default=5,
+                        help="Send NUM images with each transport")
+    argprs.add_argument("--size", dest="size", type=int, nargs=2,
+                        default=(4096, 4096), metavar=('HT', 'WD'),
+                        help="Size of the images")
+    argprs.add_argument("--debug", dest="debug", default=False,
+                        action="store_true", help="Log to stderr")
+
+    (options, args) = argprs.parse_known_args(sys.argv[1:])
+    main(options, args)
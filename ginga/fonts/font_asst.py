@@ -6,7 +6,8 @@
 #
 import os
 import re
-from collections import namedtuple
+import threading
+from collections import namedtuple, OrderedDict
 
 from ginga.misc import Bunch
 
@@ -120,6 +121,100 @@ def add_cache(font_key, font):
     font_cache[font_key] = font
 
 
+class TextCache:
+    """An LRU cache of rendered text bitmaps, limited by their size.
+
+    Renderers store the bitmap of a string drawn with a given font, size,
+    color and rotation under a key of those attributes, and reuse it when
+    the same text is drawn again, instead of rasterizing it anew.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Total size (in bytes) of the bitmaps to keep; the least recently
+        used bitmaps are dropped to stay within it
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # key -> (bitmap, number of bytes)
+        self._cache = OrderedDict()
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the bitmap stored under `key`, or None if there is none.
+        """
+        with self.lock:
+            item = self._cache.get(key, None)
+            if item is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return item[0]
+
+    def put(self, key, bitmap, num_bytes):
+        """Store `bitmap`, which uses `num_bytes` bytes, under `key`."""
+        if num_bytes > self.max_bytes:
+            return
+        with self.lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self.num_bytes -= old[1]
+            self._cache[key] = (bitmap, num_bytes)
+            self.num_bytes += num_bytes
+            while self.num_bytes > self.max_bytes:
+                _key, (_bitmap, nb) = self._cache.popitem(last=False)
+                self.num_bytes -= nb
+
+    def set_limit(self, max_bytes):
+        """Change the size limit (in bytes) of the cache."""
+        with self.lock:
+            self.max_bytes = max_bytes
+            while self.num_bytes > self.max_bytes:
+                _key, (_bitmap, nb) = self._cache.popitem(last=False)
+                self.num_bytes -= nb
+
+    def clear(self):
+        """Drop all bitmaps and reset the counters."""
+        with self.lock:
+            self._cache.clear()
+            self.num_bytes = 0
+            self.hits = self.misses = 0
+
+    def get_stats(self):
+        """Return the usage of the cache.
+
+        Returns
+        -------
+        stats : `~ginga.misc.Bunch.Bunch`
+            With attributes ``hits``, ``misses``, ``hit_rate`` (fraction
+            of lookups found, or None before any lookups), ``count``
+            (number of bitmaps), ``num_bytes`` and ``max_bytes``
+        """
+        with self.lock:
+            total = self.hits + self.misses
+            hit_rate = self.hits / total if total > 0 else None
+            return Bunch.Bunch(hits=self.hits, misses=self.misses,
+                               hit_rate=hit_rate, count=len(self._cache),
+                               num_bytes=self.num_bytes,
+                               max_bytes=self.max_bytes)
+
+
+# cache of rendered text, shared by the renderers of all viewers
+text_cache = TextCache()
+
+
+def get_text_cache():
+    """Return the cache of rendered text bitmaps shared by the renderers
+    (see `TextCache`).
+    """
+    return text_cache
+
+
 def add_loadable_font(font_file, family, style='normal', weight='normal'):
     """Add a font description to our directory of externally loadable fonts.
     `font_file` is the path to the font, and `family` is the name to register
@@ -16,6 +16,7 @@ from ginga.canvas import render
 from gi.repository import Gtk
 from gi.repository import Gdk
 from gi.repository import GdkPixbuf
+from gi.repository import GLib
 import cairo
 
 have_opengl = False
@@ -119,6 +120,10 @@ class ImageViewGtk(ImageView.ImageViewBase):
         self.possible_renderers = [preferred] + renderers
         self.choose_best_renderer()
 
+        # frames rendered off the GUI thread are handed back to it
+        # (see schedule_present_frame())
+        self.supports_async_render = (self.wtype != 'opengl')
+
     def get_widget(self):
         return self.imgwin
 
@@ -178,6 +183,9 @@ class ImageViewGtk(ImageView.ImageViewBase):
         self._defer_task.stop()
         self._defer_task.start(time_sec)
 
+    def schedule_present_frame(self):
+        GLib.idle_add(self.present_frame)
+
     def _renderer_to_surface(self):
 
         if isinstance(self.renderer.surface, cairo.ImageSurface):
@@ -187,7 +195,7 @@ class ImageViewGtk(ImageView.ImageViewBase):
 
         else:
             # create a new surface from rendered array
-            arr = self.renderer.get_surface_as_array(order=self.rgb_order)
+            arr = self.get_image_as_array(order=self.rgb_order)
             arr = np.ascontiguousarray(arr)
 
             daht, dawd, depth = arr.shape
@@ -14,6 +14,7 @@ from ginga.misc import Task, Future, Callback
 from ginga.misc.aio_compat import get_event_loop as aio_get_event_loop
 from ginga.toolkit import toolkit
 from ginga.misc import log
+from ginga.util import profiler
 from collections import deque
 
 import queue as Queue
@@ -97,6 +98,24 @@ class GwMain(Callback.Callbacks):
         self.gui_thread_id = threading.get_ident()
 
     def _execute_future(self, future):
+        prof = profiler.active
+        if prof is None:
+            self._thaw_future(future)
+            return
+        start = time.perf_counter()
+        try:
+            self._thaw_future(future)
+        finally:
+            end = time.perf_counter()
+            args = None
+            queued = getattr(future, 'time_queued', None)
+            if queued is not None:
+                # how long the task waited for the GUI thread
+                args = dict(wait_ms=round((start - queued) * 1000, 3))
+            prof.record('gui', profiler.get_name(getattr(future, 'method', None)), start, end,
+                        args=args)
+
+    def _thaw_future(self, future):
         # Execute the GUI method
         try:
             try:
@@ -190,6 +209,8 @@ class GwMain(Callback.Callbacks):
         """
         future = Future.Future(priority=priority)
         future.freeze(method, *args, **kwdargs)
+        if profiler.active is not None:
+            future.time_queued = time.perf_counter()
         self.priority_gui_queue.put(future)
 
         my_id = threading.get_ident()
@@ -199,6 +220,8 @@ class GwMain(Callback.Callbacks):
     def gui_do(self, method, *args, **kwdargs):
         future = Future.Future(priority=0)
         future.freeze(method, *args, **kwdargs)
+        if profiler.active is not None:
+            future.time_queued = time.perf_counter()
         self.gui_queue.put(future)
 
         my_id = threading.get_ident()
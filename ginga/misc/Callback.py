@@ -5,8 +5,11 @@
 # Please see the file LICENSE.txt for details.
 #
 import sys
+import time
 import traceback
 
+from ginga.util import profiler
+
 
 class CallbackError(Exception):
     pass
@@ -149,7 +152,18 @@ class Callbacks:
 
             try:
                 # print("calling %s(%s, %s)" % (method, cb_args, cb_kwargs))
-                res = method(*cb_args, **cb_kwargs)
+                prof = profiler.active
+                if prof is None:
+                    res = method(*cb_args, **cb_kwargs)
+                else:
+                    start = time.perf_counter()
+                    try:
+                        res = method(*cb_args, **cb_kwargs)
+                    finally:
+                        prof.record('callback', '%s -> %s' % (
+                            name, profiler.get_name(method)), start,
+                            time.perf_counter(),
+                            args=dict(source=self.__class__.__name__))
                 if res:
                     # result = True
                     result = res
@@ -0,0 +1,130 @@
+#
+# render.py -- Ginga headless batch renderer
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""Render quick-look previews of many files, without a GUI.
+
+See ``ginga.util.render`` for the Python interface.
+
+Example usage::
+
+    $ ginga-render -o previews --cmap=heat --overlay=name *.fits
+    $ find /data -name '*.fits' | ginga-render -o previews --files=- -j 8
+
+"""
+
+import sys
+from argparse import ArgumentParser
+
+from ..misc import log
+from ..util import render as _render
+
+
+def main(options, args):
+
+    logger = log.get_logger("ginga-render", options=options)
+
+    filespecs = list(args)
+    if options.files is not None:
+        if options.files == '-':
+            lines = sys.stdin.readlines()
+        else:
+            with open(options.files, 'r') as in_f:
+                lines = in_f.readlines()
+        filespecs.extend([line.strip() for line in lines
+                          if len(line.strip()) > 0])
+    if len(filespecs) == 0:
+        print("No files to render")
+        return 1
+
+    profile = {}
+    if options.profile is not None:
+        profile.update(_render.load_profile(options.profile))
+    if options.cmap is not None:
+        profile['color_map'] = options.cmap
+    if options.imap is not None:
+        profile['intensity_map'] = options.imap
+    if options.calg is not None:
+        profile['color_algorithm'] = options.calg
+    if options.autocuts is not None:
+        profile['autocut_method'] = options.autocuts
+
+    zoom = options.zoom
+    if zoom is not None and zoom != 'fit':
+        zoom = float(zoom)
+
+    def progress_cb(filespec, outpath, error):
+        # errors are also listed in the summary
+        if error is not None:
+            logger.info("error rendering '%s': %s" % (filespec, error))
+        else:
+            logger.info("rendered '%s' to '%s'" % (filespec, outpath))
+
+    stats = _render.render_files(
+        filespecs, options.outdir, num_workers=options.workers,
+        progress_cb=progress_cb, profile=profile, size=tuple(options.size),
+        zoom=zoom, cuts=options.cuts, overlays=options.overlays,
+        format=options.format, quality=options.quality,
+        backend=options.backend, fitspkg=options.fitspkg)
+    print(_render.format_stats(stats))
+    return 1 if len(stats.errors) > 0 else 0
+
+
+def _main():
+    """Run from command line."""
+    argprs = ArgumentParser("Ginga headless batch renderer")
+
+    argprs.add_argument("-o", "--outdir", dest="outdir", metavar="DIR",
+                        default=".", help="Write previews to DIR")
+    argprs.add_argument("--files", dest="files", metavar="FILE",
+                        default=None,
+                        help="Read file names from FILE ('-' for stdin)")
+    argprs.add_argument("-j", "--workers", dest="workers", type=int,
+                        default=None, metavar="NUM",
+                        help="Render with NUM worker processes "
+                        "(default: number of CPUs; 0: no workers)")
+    argprs.add_argument("--format", dest="format", default="png",
+                        choices=['png', 'jpeg'], help="Output format")
+    argprs.add_argument("--quality", dest="quality", type=int, default=90,
+                        help="Quality of JPEG output")
+    argprs.add_argument("--size", dest="size", type=int, nargs=2,
+                        default=(512, 512), metavar=('WD', 'HT'),
+                        help="Size of the previews")
+    argprs.add_argument("--profile", dest="profile", metavar="FILE",
+                        default=None,
+                        help="Use viewer settings from FILE "
+                        "(e.g. a copy of channel_Image.cfg)")
+    argprs.add_argument("--cmap", dest="cmap", metavar="NAME",
+                        default=None, help="Use color map NAME")
+    argprs.add_argument("--imap", dest="imap", metavar="NAME",
+                        default=None, help="Use intensity map NAME")
+    argprs.add_argument("--calg", dest="calg", metavar="NAME",
+                        default=None,
+                        help="Use color distribution algorithm NAME")
+    argprs.add_argument("--autocuts", dest="autocuts", metavar="NAME",
+                        default=None, help="Use auto cuts algorithm NAME")
+    argprs.add_argument("--cuts", dest="cuts", type=float, nargs=2,
+                        default=None, metavar=('LO', 'HI'),
+                        help="Use fixed cut levels")
+    argprs.add_argument("--zoom", dest="zoom", metavar="LEVEL",
+                        default=None,
+                        help="Zoom to LEVEL (default: 'fit')")
+    argprs.add_argument("--overlay", dest="overlays", action="append",
+                        default=[], choices=_render.overlay_names,
+                        help="Draw an overlay (may be repeated)")
+    argprs.add_argument("--backend", dest="backend", default="pil",
+                        choices=['pil', 'agg'], help="Rendering backend")
+    argprs.add_argument("--fitspkg", dest="fitspkg", metavar="NAME",
+                        default=None,
+                        help="Prefer FITS I/O module NAME")
+    argprs.add_argument("filespecs", nargs='*', metavar="FILE",
+                        help="Files to render")
+    log.addlogopts(argprs)
+
+    options = argprs.parse_args(sys.argv[1:])
+
+    sys.exit(main(options, options.filespecs))
+
+# END
@@ -7,6 +7,7 @@
 import math
 
 from ginga.ImageView import ImageViewBase
+from ginga.misc import Bunch
 from ginga.modes.mode_base import Mode
 
 
@@ -120,6 +121,9 @@ class PanMode(Mode):
             #pan_min_scroll_thumb_pct=0.0,
             #pan_max_scroll_thumb_pct=0.9,
             zoom_scroll_reverse=False,
+            # merge the zooming and panning from rapid scroll and motion
+            # events, applying them once per frame
+            coalesce_events=True,
 
             mouse_zoom_acceleration=1.085,
             # pct of a window of data to move with pan key commands
@@ -138,6 +142,8 @@ class PanMode(Mode):
 
         self._start_scale_x = 0
         self._start_scale_y = 0
+        # zooming and panning accumulated from events, not yet applied
+        self._pending = None
 
         self._save = {}
 
@@ -261,6 +267,96 @@ class PanMode(Mode):
             self.onscreen_message(viewer.get_scale_text(),
                                   delay=0.4)
 
+    def _get_pending(self):
+        if self._pending is None:
+            self._pending = Bunch.Bunch(pan_xy=None, pan_pct=None, zoom=1.0,
+                                        zoom_steps=0.0, origin=None,
+                                        msg=False)
+        return self._pending
+
+    def _schedule_pending(self, viewer):
+        """Apply the pending zoom and pan once per frame, or now if
+        event coalescing is off."""
+        bindmap = getattr(viewer, 'get_bindmap', None)
+        if bindmap is None or not self.settings.get('coalesce_events', True):
+            self.apply_pending(viewer)
+            return
+        bindmap().coalesce(viewer, 'pan', self.apply_pending, viewer)
+
+    def apply_pending(self, viewer):
+        """Apply the zooming and panning accumulated from events."""
+        p, self._pending = self._pending, None
+        if p is None:
+            return
+        with viewer.suppress_redraw:
+            if p.pan_xy is not None:
+                viewer.panset_xy(*p.pan_xy)
+
+            if p.pan_pct is not None:
+                res = viewer.calc_pan_pct(pad=0)
+                viewer.pan_by_pct(res.pan_pct_x + p.pan_pct[0],
+                                  res.pan_pct_y + p.pan_pct[1])
+
+            if p.zoom == 1.0 and p.zoom_steps == 0:
+                return
+
+            if p.origin is not None:
+                # get cartesian canvas coords of data item under cursor
+                data_x, data_y = p.origin[:2]
+                off_x, off_y = viewer.data_to_offset(data_x, data_y)
+                # set the pan position to the data item
+                viewer.set_pan(data_x, data_y)
+
+            if p.zoom != 1.0:
+                scale_x, scale_y = viewer.get_scale_xy()
+                scale = max(scale_x * p.zoom, scale_y * p.zoom)
+                viewer.scale_to(scale, scale)
+            if p.zoom_steps > 0:
+                viewer.zoom_in(p.zoom_steps)
+            elif p.zoom_steps < 0:
+                viewer.zoom_out(-p.zoom_steps)
+
+            if p.origin is not None:
+                # now adjust the pan position to keep the offset
+                data_x2, data_y2 = viewer.offset_to_data(off_x, off_y)
+                dx, dy = data_x2 - data_x, data_y2 - data_y
+                viewer.panset_xy(data_x - dx, data_y - dy)
+
+            if p.msg:
+                self.onscreen_message(viewer.get_scale_text(),
+                                      delay=0.4)
+
+    def _zoom_by(self, viewer, direction, factor, msg=True, origin=None):
+        # like _scale_image(), but accumulates the zoom (see apply_pending)
+        msg = self.settings.get('msg_zoom', msg)
+        rev = self.settings.get('zoom_scroll_reverse', False)
+        direction = self.get_direction(direction, rev=rev)
+        p = self._get_pending()
+        if direction == 'up':
+            p.zoom *= factor
+        elif direction == 'down':
+            p.zoom /= factor
+        p.origin = origin
+        p.msg = p.msg or msg
+        self._schedule_pending(viewer)
+
+    def _pan_by_pct(self, viewer, dx_pct, dy_pct):
+        # accumulates a pan by a fraction of the range (see apply_pending)
+        p = self._get_pending()
+        if p.pan_pct is None:
+            p.pan_pct = (dx_pct, dy_pct)
+        else:
+            p.pan_pct = (p.pan_pct[0] + dx_pct, p.pan_pct[1] + dy_pct)
+        self._schedule_pending(viewer)
+
+    def _pan_to(self, viewer, data_x, data_y):
+        # pan to a position (see apply_pending); only the last one counts
+        p = self._get_pending()
+        p.pan_xy = (data_x, data_y)
+        # a later absolute pan supersedes any relative ones before it
+        p.pan_pct = None
+        self._schedule_pending(viewer)
+
     def _scale_adjust(self, factor, event_amt, zoom_accel, max_limit=None):
         # adjust scale by factor, amount encoded in event and zoom acceleration value
         amount = factor - ((factor - 1.0) * (1.0 - min(event_amt, 15.0) / 15.0) *
@@ -278,7 +374,7 @@ class PanMode(Mode):
         if delta < 0.0:
             direction = 180.0
         self._start_x = x
-        self._scale_image(viewer, direction, factor, msg=msg)
+        self._zoom_by(viewer, direction, factor, msg=msg)
 
     def _get_pct_xy(self, viewer, x, y):
         win_wd, win_ht = viewer.get_window_size()
@@ -301,42 +397,32 @@ class PanMode(Mode):
         self._pantype = 1
 
     def zoom_step(self, viewer, event, msg=True, origin=None, adjust=1.5):
-        with viewer.suppress_redraw:
-
-            if origin is not None:
-                # get cartesian canvas coords of data item under cursor
-                data_x, data_y = origin[:2]
-                off_x, off_y = viewer.data_to_offset(data_x, data_y)
-                # set the pan position to the data item
-                viewer.set_pan(data_x, data_y)
-
-            # scale by the desired means
-            if self.settings.get('scroll_zoom_direct_scale', True):
-                zoom_accel = self.settings.get('scroll_zoom_acceleration', 1.0)
-                # change scale by 50%
-                amount = self._scale_adjust(adjust, event.amount, zoom_accel,
-                                            max_limit=4.0)
-                self._scale_image(viewer, event.direction, amount, msg=msg)
+        # the zoom steps from rapid scroll events are accumulated and
+        # applied once per frame (see apply_pending)
+
+        # scale by the desired means
+        if self.settings.get('scroll_zoom_direct_scale', True):
+            zoom_accel = self.settings.get('scroll_zoom_acceleration', 1.0)
+            # change scale by 50%
+            amount = self._scale_adjust(adjust, event.amount, zoom_accel,
+                                        max_limit=4.0)
+            self._zoom_by(viewer, event.direction, amount, msg=msg,
+                          origin=origin)
 
-            else:
-                rev = self.settings.get('zoom_scroll_reverse', False)
-                direction = self.get_direction(event.direction, rev=rev)
-
-                if direction == 'up':
-                    viewer.zoom_in()
+        else:
+            rev = self.settings.get('zoom_scroll_reverse', False)
+            direction = self.get_direction(event.direction, rev=rev)
 
-                elif direction == 'down':
-                    viewer.zoom_out()
+            p = self._get_pending()
+            if direction == 'up':
+                p.zoom_steps += 1
 
-                if msg:
-                    self.onscreen_message(viewer.get_scale_text(),
-                                          delay=0.4)
+            elif direction == 'down':
+                p.zoom_steps -= 1
 
-            if origin is not None:
-                # now adjust the pan position to keep the offset
-                data_x2, data_y2 = viewer.offset_to_data(off_x, off_y)
-                dx, dy = data_x2 - data_x, data_y2 - data_y
-                viewer.panset_xy(data_x - dx, data_y - dy)
+            p.origin = origin
+            p.msg = p.msg or msg
+            self._schedule_pending(viewer)
 
     def _sc_zoom(self, viewer, event, msg=True, origin=None):
         if not self.canzoom:
@@ -686,7 +772,7 @@ class PanMode(Mode):
         zoom_accel = self.settings.get('scroll_zoom_acceleration', 1.0)
         # change scale by 20%
         amount = self._scale_adjust(1.2, event.amount, zoom_accel, max_limit=4.0)
-        self._scale_image(viewer, event.direction, amount, msg=msg)
+        self._zoom_by(viewer, event.direction, amount, msg=msg)
 
     def sc_zoom_fine(self, viewer, event, msg=True):
         """Interactively zoom the image by scrolling motion.
@@ -699,7 +785,7 @@ class PanMode(Mode):
         zoom_accel = self.settings.get('scroll_zoom_acceleration', 1.0)
         # change scale by 5%
         amount = self._scale_adjust(1.05, event.amount, zoom_accel, max_limit=4.0)
-        self._scale_image(viewer, event.direction, amount, msg=msg)
+        self._zoom_by(viewer, event.direction, amount, msg=msg)
 
     def sc_pan(self, viewer, event, msg=True):
         """Interactively pan the image by scrolling motion.
@@ -723,8 +809,17 @@ class PanMode(Mode):
 
         lock_x = self.settings.get('scroll_pan_lock_x', False)
         lock_y = self.settings.get('scroll_pan_lock_y', False)
+        if lock_x and lock_y:
+            # nothing to do
+            return
 
-        viewer.pan_omni(direction, amount, lock_x=lock_x, lock_y=lock_y)
+        # as ImageViewBase.pan_omni(), but accumulated per frame
+        res = viewer.calc_pan_pct(pad=0)
+        ang_rad = math.radians(90.0 - direction)
+        amt_x = 0 if lock_x else math.cos(ang_rad) * amount
+        amt_y = 0 if lock_y else math.sin(ang_rad) * amount
+        self._pan_by_pct(viewer, amt_x * res.vis_x / res.rng_x,
+                         amt_y * res.vis_y / res.rng_y)
 
     def sc_pan_coarse(self, viewer, event, msg=True):
         if not self.canpan:
@@ -777,7 +872,7 @@ class PanMode(Mode):
         if event.state == 'move':
             data_x, data_y = self.get_new_pan(viewer, x, y,
                                               ptype=self._pantype)
-            viewer.panset_xy(data_x, data_y)
+            self._pan_to(viewer, data_x, data_y)
 
         elif event.state == 'down':
             self.pan_set_origin(viewer, x, y, data_x, data_y)
@@ -833,11 +928,8 @@ class PanMode(Mode):
                 amt_x = float(dx) / res.rng_x * pan_accel
                 amt_y = float(dy) / res.rng_y * pan_accel
 
-                pct_x = res.pan_pct_x - amt_x
-                pct_y = res.pan_pct_y + amt_y
-
                 # update the pan position by pct
-                viewer.pan_by_pct(pct_x, pct_y)
+                self._pan_by_pct(viewer, -amt_x, amt_y)
 
             elif method == 2:
                 # METHOD 2
@@ -846,7 +938,7 @@ class PanMode(Mode):
 
                 data_x, data_y = self.get_new_pan(viewer, x, y,
                                                   ptype=self._pantype)
-                viewer.panset_xy(data_x, data_y)
+                self._pan_to(viewer, data_x, data_y)
 
             elif method == 3:
                 # METHOD 3
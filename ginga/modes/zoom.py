@@ -92,7 +92,7 @@ class ZoomMode(PanMode):
         if event.state == 'move':
             data_x, data_y = self.get_new_pan(viewer, x, y,
                                               ptype=self._pantype)
-            viewer.panset_xy(data_x, data_y)
+            self._pan_to(viewer, data_x, data_y)
 
         elif event.state == 'down':
             self.pan_start(viewer, ptype=1)
@@ -9,6 +9,7 @@ import os.path
 import numpy as np
 import ctypes
 import threading
+import zlib
 from packaging.version import parse as parse_version
 
 from OpenGL import GL as gl
@@ -20,6 +21,7 @@ from ginga.vec.VecHelp import IMAGE, LINE, CIRCLE, POLYGON, PATH, TEXT
 from ginga.canvas import render, transform, stroke, coordmap
 from ginga.pilw import PilHelp
 from ginga import trcalc, RGBMap
+from ginga.misc import Bunch
 from ginga.util import rgb_cms
 
 # Local imports
@@ -178,6 +180,16 @@ class CanvasRenderer(vec.VectorRenderMixin, render.StandardPipelineRenderer):
         # (4096 entries saturates an 8-bit display)
         self._cmap_len_max = 4096
         self.max_texture_dim = 0
+        # images are uploaded as tiles no larger than this (clipped to
+        # max_texture_dim), each with a full set of mipmap levels; only
+        # tiles whose content changed are re-uploaded
+        t_ = self.viewer.get_settings()
+        t_.add_defaults(gl_texture_tile_size=2048, gl_texture_mipmaps=True)
+        # tile sets, keyed by image_id
+        self._tile_cache = dict()
+        # texels of neighboring data around each tile, so that the
+        # interpolation in the image shader is seamless across tiles
+        self._tile_pad = 2
         self.image_uploads = []
         self.cmap_uploads = []
 
@@ -325,17 +337,10 @@ class CanvasRenderer(vec.VectorRenderMixin, render.StandardPipelineRenderer):
             else:
                 cache.interp = 0
 
-            # We are limited by maximum texture size supported for the
-            # OpenGl implementation.  Images larger than the maximum
-            # in any dimension need to be downsampled to fit.
-            ht, wd = data.shape[:2]
-            extra = max(wd, ht) - self.max_texture_dim
-            if extra > 0:
-                new_wd, new_ht = wd - extra, ht - extra
-                tup = trcalc.get_scaled_cutout_wdht(data, 0, 0, wd, ht,
-                                                    new_wd, new_ht,
-                                                    logger=self.logger)
-                data = tup[0]
+            # NOTE: images larger than the maximum texture size supported
+            # by the OpenGL implementation are uploaded as a set of tiled
+            # textures (see gl_set_image_tiles()), so no downsampling is
+            # needed here
 
             if cvs_img.flipy:
                 data = np.flipud(data)
@@ -608,88 +613,179 @@ class CanvasRenderer(vec.VectorRenderMixin, render.StandardPipelineRenderer):
         gl.glFrontFace(gl.GL_CCW)
         self._initialized = True
 
-    def gl_set_image(self, tex_id, img_arr, image_type):
-        """NOTE: this is a slow operation--downloading a texture."""
-        #context = self.viewer.make_context_current()
-
-        ht, wd = img_arr.shape[:2]
-
-        gl.glBindTexture(gl.GL_TEXTURE_2D, tex_id)
-        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER,
-                           gl.GL_NEAREST)
-        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER,
-                           gl.GL_NEAREST)
-        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_R,
-                           gl.GL_CLAMP_TO_EDGE)
-        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S,
-                           gl.GL_CLAMP_TO_EDGE)
-        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T,
-                           gl.GL_CLAMP_TO_EDGE)
-
+    def _gl_tex_format(self, img_arr, image_type):
+        """Return the (internal_format, format, type, unpack_alignment)
+        needed to upload `img_arr` as a texture of `image_type`.
+        """
         # see image_type in image fragment shader
         if image_type & 0x1 == 0:
             # "native" image colors--3 color image, no RGBMAP
             if img_arr.dtype == np.dtype(np.uint8):
                 if img_arr.shape[2] == 3:
                     # 8bpp RGB
-                    gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
-                    gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB, wd, ht, 0,
-                                    gl.GL_RGB, gl.GL_UNSIGNED_BYTE, img_arr)
-                    self.logger.debug("uploaded 8 bpp RGB as texture {}".format(tex_id))
+                    return (gl.GL_RGB, gl.GL_RGB, gl.GL_UNSIGNED_BYTE, 1)
                 elif img_arr.shape[2] == 4:
                     # 8bpp RGBA
-                    gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
-                    gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA, wd, ht, 0,
-                                    gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, img_arr)
-                    self.logger.debug("uploaded 8 bpp RGBA as texture {}".format(tex_id))
+                    return (gl.GL_RGBA, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, 1)
             elif img_arr.dtype == np.dtype(np.uint16):
                 if img_arr.shape[2] == 3:
                     # 16bpp RGB
-                    gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 2)
-                    gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB16, wd, ht, 0,
-                                    gl.GL_RGB, gl.GL_UNSIGNED_SHORT, img_arr)
-                    self.logger.debug("uploaded 16 bpp RGB as texture {}".format(tex_id))
+                    return (gl.GL_RGB16, gl.GL_RGB, gl.GL_UNSIGNED_SHORT, 2)
                 elif img_arr.shape[2] == 4:
                     # 16bpp RGBA
-                    gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 2)
-                    gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA16, wd, ht, 0,
-                                    gl.GL_RGBA, gl.GL_UNSIGNED_SHORT, img_arr)
-                    self.logger.debug("uploaded 16 bpp RGBA as texture {}".format(tex_id))
-            else:
-                raise ValueError("unknown image type: {}".format(hex(image_type)))
-
-            self.logger.debug("uploaded rgbarr as texture {}".format(tex_id))
+                    return (gl.GL_RGBA16, gl.GL_RGBA, gl.GL_UNSIGNED_SHORT, 2)
 
         else:
             if len(img_arr.shape) < 3 or img_arr.shape[2] == 1:
                 # mono, no alpha
-                gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 4)
-                gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_R32F, wd, ht, 0,
-                                gl.GL_RED, gl.GL_FLOAT, img_arr)
-                self.logger.debug("uploaded mono as texture {}".format(tex_id))
+                return (gl.GL_R32F, gl.GL_RED, gl.GL_FLOAT, 4)
             elif len(img_arr.shape) == 3 and img_arr.shape[2] == 2:
                 # mono, with alpha
-                gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 4)
-                gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RG32F, wd, ht, 0,
-                                gl.GL_RG, gl.GL_FLOAT, img_arr)
-                self.logger.debug("uploaded mono w/alpha as texture {}".format(tex_id))
+                return (gl.GL_RG32F, gl.GL_RG, gl.GL_FLOAT, 4)
             elif len(img_arr.shape) == 3 and img_arr.shape[2] == 3:
                 # RGB, no alpha
-                gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 4)
-                gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB32F, wd, ht, 0,
-                                gl.GL_RGB, gl.GL_FLOAT, img_arr)
-                self.logger.debug("uploaded RGB as texture {}".format(tex_id))
+                return (gl.GL_RGB32F, gl.GL_RGB, gl.GL_FLOAT, 4)
             elif len(img_arr.shape) == 3 and img_arr.shape[2] == 4:
                 # RGBA
-                gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 4)
-                gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA32F, wd, ht, 0,
-                                gl.GL_RGBA, gl.GL_FLOAT, img_arr)
-                self.logger.debug("uploaded RGBA as texture {}".format(tex_id))
+                return (gl.GL_RGBA32F, gl.GL_RGBA, gl.GL_FLOAT, 4)
+
+        raise ValueError("unknown image type: {}".format(hex(image_type)))
 
+    def _gl_set_tex_params(self, mipmaps=False):
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER,
+                           gl.GL_NEAREST)
+        if mipmaps:
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER,
+                               gl.GL_NEAREST_MIPMAP_NEAREST)
+        else:
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER,
+                               gl.GL_NEAREST)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_R,
+                           gl.GL_CLAMP_TO_EDGE)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S,
+                           gl.GL_CLAMP_TO_EDGE)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T,
+                           gl.GL_CLAMP_TO_EDGE)
+
+    def gl_set_image(self, tex_id, img_arr, image_type):
+        """NOTE: this is a slow operation--downloading a texture."""
+        #context = self.viewer.make_context_current()
+
+        ht, wd = img_arr.shape[:2]
+        ifmt, fmt, typ, align = self._gl_tex_format(img_arr, image_type)
+
+        gl.glBindTexture(gl.GL_TEXTURE_2D, tex_id)
+        self._gl_set_tex_params()
+
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, align)
+        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, ifmt, wd, ht, 0,
+                        fmt, typ, img_arr)
+        self.logger.debug("uploaded {}x{} image as texture {}".format(
+            wd, ht, tex_id))
+
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+
+    def get_tile_size(self):
+        """Return the (square) size of the texture tiles used for images."""
+        t_ = self.viewer.get_settings()
+        tile_size = t_.get('gl_texture_tile_size', 2048)
+        if self.max_texture_dim > 0:
+            # leave room for the padding around each tile
+            max_dim = self.max_texture_dim - 2 * self._tile_pad
+            tile_size = min(tile_size, max_dim)
+        return max(1, tile_size)
+
+    def _make_tiles(self, img_arr, tile_size):
+        """Lay out a grid of tiles over `img_arr`, each described by its
+        interior (the part of the image it draws) and its padded extent
+        (the part uploaded as a texture).
+        """
+        ht, wd = img_arr.shape[:2]
+        pad = self._tile_pad
+        tiles = []
+        for y0 in range(0, ht, tile_size):
+            y1 = min(y0 + tile_size, ht)
+            py0, py1 = max(0, y0 - pad), min(ht, y1 + pad)
+            for x0 in range(0, wd, tile_size):
+                x1 = min(x0 + tile_size, wd)
+                px0, px1 = max(0, x0 - pad), min(wd, x1 + pad)
+                pw, ph = px1 - px0, py1 - py0
+                # texture coordinates of the interior within the tile
+                s0, s1 = (x0 - px0) / pw, (x1 - px0) / pw
+                t0, t1 = (y0 - py0) / ph, (y1 - py0) / ph
+                texcoord = np.array([(s0, t0), (s1, t0),
+                                     (s1, t1), (s0, t1)], dtype=np.float32)
+                # fractional position of the interior within the image
+                frac = np.array([(x0 / wd, y0 / ht), (x1 / wd, y0 / ht),
+                                 (x1 / wd, y1 / ht), (x0 / wd, y1 / ht)],
+                                dtype=np.float32)
+                tiles.append(Bunch.Bunch(tex_id=None, crc=None,
+                                         padded=(px0, py0, px1, py1),
+                                         texcoord=texcoord, frac=frac))
+        return tiles
+
+    def _delete_tiles(self, tileset):
+        tex_ids = [tile.tex_id for tile in tileset.tiles
+                   if tile.tex_id is not None]
+        if len(tex_ids) > 0:
+            gl.glDeleteTextures(tex_ids)
+
+    def gl_set_image_tiles(self, image_id, img_arr, image_type):
+        """Upload an image as a set of tiled textures.
+
+        Images of any size are split into tiles no larger than the tile
+        size (see `get_tile_size`), so images bigger than the maximum
+        texture size of the OpenGL implementation can be displayed at
+        full resolution.  A checksum of each tile is kept, and when the
+        same image is uploaded again only tiles whose contents changed
+        are transferred.  Mipmap levels are regenerated for each uploaded
+        tile, if enabled.
+        """
+        t_ = self.viewer.get_settings()
+        mipmaps = t_.get('gl_texture_mipmaps', True)
+        tile_size = self.get_tile_size()
+        ifmt, fmt, typ, align = self._gl_tex_format(img_arr, image_type)
+        layout = (img_arr.shape, img_arr.dtype, image_type, tile_size,
+                  mipmaps)
+
+        tileset = self._tile_cache.get(image_id, None)
+        if tileset is None or tileset.layout != layout:
+            if tileset is not None:
+                self._delete_tiles(tileset)
+            tileset = Bunch.Bunch(layout=layout,
+                                  tiles=self._make_tiles(img_arr, tile_size),
+                                  uploads=0)
+            self._tile_cache[image_id] = tileset
+
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, align)
+        num_uploaded = 0
+        for tile in tileset.tiles:
+            px0, py0, px1, py1 = tile.padded
+            tile_arr = np.ascontiguousarray(img_arr[py0:py1, px0:px1])
+            crc = zlib.crc32(tile_arr)
+            if tile.tex_id is not None and crc == tile.crc:
+                # contents of this tile unchanged since last upload
+                continue
+
+            if tile.tex_id is None:
+                tile.tex_id = gl.glGenTextures(1)
+                gl.glBindTexture(gl.GL_TEXTURE_2D, tile.tex_id)
+                self._gl_set_tex_params(mipmaps=mipmaps)
+                gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, ifmt,
+                                px1 - px0, py1 - py0, 0, fmt, typ, tile_arr)
             else:
-                raise ValueError("unknown image type: {}".format(hex(image_type)))
+                gl.glBindTexture(gl.GL_TEXTURE_2D, tile.tex_id)
+                gl.glTexSubImage2D(gl.GL_TEXTURE_2D, 0, 0, 0,
+                                   px1 - px0, py1 - py0, fmt, typ, tile_arr)
+            if mipmaps:
+                gl.glGenerateMipmap(gl.GL_TEXTURE_2D)
+            tile.crc = crc
+            num_uploaded += 1
 
         gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        tileset.uploads += num_uploaded
+        self.logger.debug("uploaded {}/{} tiles of image {}".format(
+            num_uploaded, len(tileset.tiles), image_id))
 
     def gl_set_cmap(self, rgbmap):
         # TODO: this does not yet work with 'histeq' color distribution
@@ -740,8 +836,10 @@ class CanvasRenderer(vec.VectorRenderMixin, render.StandardPipelineRenderer):
             return
 
         cache = cvs_img.get_cache(self.viewer)
-        # TODO: put tex_id in cache?
-        tex_id = self.get_texture_id(cvs_img.image_id)
+        tileset = self._tile_cache.get(cvs_img.image_id, None)
+        if tileset is None:
+            # image not uploaded yet
+            return
 
         # if image has fixed cut levels, use those
         cuts = getattr(cvs_img, 'cuts', None)
@@ -750,16 +848,25 @@ class CanvasRenderer(vec.VectorRenderMixin, render.StandardPipelineRenderer):
         else:
             loval, hival = self._levels
 
-        self._gl_draw_textured_quad(tex_id, cp, cache.image_type,
-                                    interp=cache.interp,
-                                    loval=loval, hival=hival)
+        # corners of each tile are interpolated from the image corners
+        cp = trcalc.pad_z(cp, dtype=np.float32)
+        org, du, dv = cp[0], cp[1] - cp[0], cp[3] - cp[0]
+        for tile in tileset.tiles:
+            frac = tile.frac
+            tile_cp = (org + frac[:, 0:1] * du + frac[:, 1:2] * dv)
+            self._gl_draw_textured_quad(tile.tex_id, tile_cp,
+                                        cache.image_type,
+                                        interp=cache.interp,
+                                        loval=loval, hival=hival,
+                                        texcoord=tile.texcoord)
 
     def _gl_draw_textured_quad(self, tex_id, cp, image_type, interp=0,
-                               loval=0.0, hival=0.0, screen=False):
+                               loval=0.0, hival=0.0, screen=False,
+                               texcoord=None):
         """Draw a textured quad (image shader) over the 4 corner points ``cp``,
-        with texcoords (0,0),(1,0),(1,1),(0,1).  Shared by image and text
-        drawing.  `screen` selects the 2D ortho projection (window-fixed) over
-        the camera."""
+        with texcoords ``texcoord`` (default (0,0),(1,0),(1,1),(0,1)).  Shared
+        by image and text drawing.  `screen` selects the 2D ortho projection
+        (window-fixed) over the camera."""
         rgbmap = self.viewer.get_rgbmap()
         map_id = self.get_texture_id(rgbmap.mapper_id)
         self.pgm_mgr.setup_program('image')
@@ -794,8 +901,9 @@ class CanvasRenderer(vec.VectorRenderMixin, render.StandardPipelineRenderer):
         vertices = trcalc.pad_z(cp, dtype=np.float32)
 
         # Send the data over to the buffer
-        texcoord = np.array([(0.0, 0.0), (1.0, 0.0),
-                             (1.0, 1.0), (0.0, 1.0)], dtype=np.float32)
+        if texcoord is None:
+            texcoord = np.array([(0.0, 0.0), (1.0, 0.0),
+                                 (1.0, 1.0), (0.0, 1.0)], dtype=np.float32)
         data = np.concatenate((vertices, texcoord), axis=1)
 
         gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.vbo_img)
@@ -975,8 +1083,7 @@ class CanvasRenderer(vec.VectorRenderMixin, render.StandardPipelineRenderer):
             # perform any necessary image updates
             uploads, self.image_uploads = self.image_uploads, []
             for image_id, img_arr, image_type in uploads:
-                tex_id = self.get_texture_id(image_id)
-                self.gl_set_image(tex_id, img_arr, image_type)
+                self.gl_set_image_tiles(image_id, img_arr, image_type)
 
             # perform any necessary rgbmap updates
             rgbmap = self.viewer.get_rgbmap()
@@ -85,7 +85,7 @@ class RenderContext(render.RenderContextBase):
         wd, ht = self.ctx.text_extents(text, font=font)
 
         if rot_deg == 0.0:
-            # fast path: draw directly onto the surface
+            # cached text masks are blended onto the surface
             self.ctx.text((cx, cy - ht), text, font, line, fill)
         else:
             # rotate about the anchor (cx, cy) via a scratch tile
@@ -126,6 +126,8 @@ class CanvasRenderer(render.StandardPipelineRenderer):
         render.StandardPipelineRenderer.__init__(self, viewer)
 
         self.kind = 'pil'
+        # surface is a plain offscreen buffer
+        self.async_capable = True
         self.rgb_order = 'RGBA'
         self.surface = None
         self.dims = ()
@@ -26,6 +26,8 @@ class ImageViewPil(ImageView.ImageViewBase):
         self.rgb_order = 'RGB'
 
         self.renderer = CanvasRenderer(self)
+        # no widget, so frames can be presented from the render thread
+        self.supports_async_render = True
 
     def reschedule_redraw(self, time_sec):
         # subclass implements this method to call delayed_redraw() after
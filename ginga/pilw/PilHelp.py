@@ -177,8 +177,7 @@ class PilContext:
 
         self.surface.paste(p_image)
 
-    def text(self, pt, text, font, line, fill):
-        x, y = pt
+    def _text_kwargs(self, font, line, fill):
         kwargs = dict()
         if font is not None:
             kwargs['font'] = font.render.font
@@ -187,50 +186,135 @@ class PilContext:
         if line is not None:
             kwargs['stroke_width'] = int(line.linewidth)
             kwargs['stroke_fill'] = line.render.color
-        self.ctx.text((x, y), text, **kwargs)
+        return kwargs
+
+    def _text_key(self, text, font, line, fill, rot_deg):
+        # everything that determines the rendered masks
+        return ('pil', text,
+                None if font is None else (font.fontname, font.fontsize),
+                None if line is None else int(line.linewidth),
+                rot_deg)
+
+    def _text_masks(self, size, pos, text, kwargs):
+        # Render the coverage masks ('L' images) of the stroke (None if
+        # there is none) and of the fill of the text.  Drawing with full
+        # ink on a black 'L' image leaves exactly the coverage that
+        # ImageDraw.text blends the ink with.
+        font = kwargs.get('font', None)
+        stroke_width = kwargs.get('stroke_width', 0)
+        stroke_mask = None
+        if stroke_width > 0:
+            stroke_mask = Image.new('L', size, 0)
+            ImageDraw.Draw(stroke_mask).text(pos, text, font=font, fill=255,
+                                             stroke_width=stroke_width,
+                                             stroke_fill=255)
+        # with a stroke of ink 0 the fill lands where it does when stroked
+        fill_mask = Image.new('L', size, 0)
+        ImageDraw.Draw(fill_mask).text(pos, text, font=font, fill=255,
+                                       stroke_width=stroke_width,
+                                       stroke_fill=0)
+        return stroke_mask, fill_mask
+
+    def _cache_masks(self, key, masks, ox, oy):
+        wd, ht = masks[1].size
+        nbytes = wd * ht * (1 if masks[0] is None else 2)
+        font_asst.get_text_cache().put(key, (masks, ox, oy), nbytes)
+
+    def _draw_masks(self, xy, masks, line, fill):
+        # blend the colors through the masks, in the same order and with
+        # the same operation as ImageDraw.text, so that the result is
+        # identical to drawing the text directly (translucent colors too)
+        stroke_mask, fill_mask = masks
+        # (ImageDraw's default ink is white)
+        fill_color = get_color(None) if fill is None else fill.render.color
+        if stroke_mask is not None:
+            stroke_color = line.render.color
+            if stroke_color is None:
+                stroke_color = fill_color
+            self.ctx.bitmap(xy, stroke_mask, fill=stroke_color)
+            if stroke_color == fill_color:
+                return
+        self.ctx.bitmap(xy, fill_mask, fill=fill_color)
+
+    def text(self, pt, text, font, line, fill):
+        """Draw ``text`` with the top-left of its box at ``pt``.
+
+        The coverage masks of the string are kept in the shared text cache
+        (see `~ginga.fonts.font_asst.TextCache`), independent of the colors,
+        and the colors are blended onto the surface through them.
+        """
+        x, y = int(round(pt[0])), int(round(pt[1]))
+        key = self._text_key(text, font, line, fill, 0.0)
+        res = font_asst.get_text_cache().get(key)
+        if res is None:
+            kwargs = self._text_kwargs(font, line, fill)
+            dummy = ImageDraw.Draw(Image.new('L', (1, 1)))
+            l, t, r, b = dummy.textbbox(
+                (0, 0), text, font=kwargs.get('font', None),
+                stroke_width=kwargs.get('stroke_width', 0))
+            if r <= l or b <= t:
+                # nothing to draw
+                return
+            masks = self._text_masks((r - l, b - t), (-l, -t), text, kwargs)
+            res = (masks, l, t)
+            self._cache_masks(key, *res)
+
+        masks, ox, oy = res
+        self._draw_masks((x + ox, y + oy), masks, line, fill)
 
     def text_rotated(self, pt, wd, ht, text, font, line, fill, rot_deg):
         """Draw ``text`` rotated by ``rot_deg`` degrees about the anchor
         ``pt`` (the bottom-left of the unrotated text box).
 
-        PIL's ``ImageDraw.text`` cannot rotate, so we render the string onto
-        a transparent square scratch tile with the anchor at the tile's
-        center, rotate the tile about that center (``expand=False`` keeps the
-        center fixed), and paste it so the center lands on the anchor.  Only
-        used when a rotation is actually requested; unrotated text takes the
-        fast direct-draw path in :meth:`text`.
+        PIL's ``ImageDraw.text`` cannot rotate, so we render the coverage
+        masks of the string onto square scratch tiles with the anchor at
+        the tile's center, rotate the tiles about that center
+        (``expand=False`` keeps the center fixed), and blend the colors
+        through them so the center lands on the anchor.  The masks are kept
+        in the shared text cache, as in :meth:`text`.
         """
         cx, cy = pt
-        kwargs = dict()
-        if font is not None:
-            kwargs['font'] = font.render.font
-        if fill is not None:
-            kwargs['fill'] = fill.render.color
-        if line is not None:
-            kwargs['stroke_width'] = int(line.linewidth)
-            kwargs['stroke_fill'] = line.render.color
-
-        # Square tile big enough to hold the string at any rotation.  The
-        # anchor sits at the tile center and the text box extends up to
-        # hypot(wd, ht) away from it (its far corner), so the tile radius
-        # must be that far corner distance, plus a margin for the stroke.
-        pad = int(line.linewidth) + 2 if line is not None else 2
-        radius = int(math.ceil(math.hypot(wd, ht))) + pad
-        side = 2 * radius
-        ctr = radius
-
-        tile = Image.new('RGBA', (side, side), (0, 0, 0, 0))
-        # place the text box so its bottom-left (the anchor) is at the center
-        ImageDraw.Draw(tile, 'RGBA').text((ctr, ctr - ht), text, **kwargs)
-
-        # PIL rotates counter-clockwise for a positive angle, matching Ginga's
-        # rot_deg convention (cf. the cairo/agg backends).  expand=False keeps
-        # the tile size (and thus the center) fixed.
-        tile = tile.rotate(rot_deg, resample=Image.BICUBIC, expand=False)
-
-        # paste so the tile center (= the anchor) lands on (cx, cy)
-        self.surface.paste(tile, (int(round(cx - ctr)), int(round(cy - ctr))),
-                           tile)
+        key = self._text_key(text, font, line, fill, rot_deg)
+        res = font_asst.get_text_cache().get(key)
+        if res is None:
+            kwargs = self._text_kwargs(font, line, fill)
+
+            # Square tile big enough to hold the string at any rotation.
+            # The anchor sits at the tile center and the text box extends
+            # up to hypot(wd, ht) away from it (its far corner), so the
+            # tile radius must be that far corner distance, plus a margin
+            # for the stroke.
+            pad = int(line.linewidth) + 2 if line is not None else 2
+            radius = int(math.ceil(math.hypot(wd, ht))) + pad
+            side = 2 * radius
+            ctr = radius
+
+            # place the text box so its bottom-left (the anchor) is at the
+            # center
+            masks = self._text_masks((side, side), (ctr, ctr - ht), text,
+                                     kwargs)
+
+            # PIL rotates counter-clockwise for a positive angle, matching
+            # Ginga's rot_deg convention (cf. the cairo/agg backends).
+            # expand=False keeps the tile size (and thus the center) fixed.
+            masks = [None if mask is None else
+                     mask.rotate(rot_deg, resample=Image.BICUBIC,
+                                 expand=False)
+                     for mask in masks]
+
+            # crop to the drawn part, to keep the cached masks small
+            bbox = masks[0 if masks[0] is not None else 1].getbbox()
+            if bbox is None:
+                return
+            masks = [None if mask is None else mask.crop(bbox)
+                     for mask in masks]
+            res = (masks, bbox[0] - ctr, bbox[1] - ctr)
+            self._cache_masks(key, *res)
+
+        # blend so the tile center (= the anchor) lands on (cx, cy)
+        masks, ox, oy = res
+        self._draw_masks((int(round(cx)) + ox, int(round(cy)) + oy), masks,
+                         line, fill)
 
     def line(self, pt1, pt2, line):
         if line is not None:
@@ -16,7 +16,7 @@ from ginga.canvas import render
 from ginga.cursors import cursor_info
 from ginga.qtw.QtHelp import (QtGui, QtCore, QImage, QPixmap, QCursor,
                               QPainter, QOpenGLWidget, QSurfaceFormat,
-                              Timer, get_scroll_info, get_painter)
+                              Timer, GuiCaller, get_scroll_info, get_painter)
 from ginga.qtw import QtHelp
 
 from .CanvasRenderQt import CanvasRenderer
@@ -216,6 +216,9 @@ class ImageViewQt(ImageView.ImageViewBase):
                 renderers.remove(preferred)
             self.possible_renderers = [preferred] + renderers
             self.choose_best_renderer()
+            # frames rendered off the GUI thread are handed back to it
+            self._gui_caller = GuiCaller()
+            self.supports_async_render = True
 
         self.msgtimer = Timer()
         self.msgtimer.add_callback('expired',
@@ -310,6 +313,9 @@ class ImageViewQt(ImageView.ImageViewBase):
         self._defer_task.stop()
         self._defer_task.start(time_sec)
 
+    def schedule_present_frame(self):
+        self._gui_caller.call(self.present_frame)
+
     def make_context_current(self):
         ctx = self.imgwin.context()
         self.imgwin.makeCurrent()
@@ -349,7 +355,7 @@ class ImageViewQt(ImageView.ImageViewBase):
                 # otherwise, get the render surface as an array and
                 # convert to a QImage
                 try:
-                    arr = self.renderer.get_surface_as_array(order='BGRA')
+                    arr = self.get_image_as_array(order='BGRA')
                     qimage = self._get_qimage(arr, QImage.Format_RGB32)
 
                 except Exception as e:
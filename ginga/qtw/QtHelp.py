@@ -421,6 +421,25 @@ class Timer(Callback.Callbacks):
     clear = cancel
 
 
+class GuiCaller(QtCore.QObject):
+    """Calls functions on the thread that created this object (normally
+    the GUI thread), from any thread.
+    """
+    _call_sig = QtCore.Signal(object)
+
+    def __init__(self):
+        super().__init__()
+
+        self._call_sig.connect(self._call_cb, QtCore.Qt.QueuedConnection)
+
+    def _call_cb(self, fn):
+        fn()
+
+    def call(self, fn):
+        """Queue `fn` (a callable taking no arguments) to be called."""
+        self._call_sig.emit(fn)
+
+
 def cmap2pixmap(cmap, steps=50):
     """Convert a Ginga colormap into a QPixmap
     """
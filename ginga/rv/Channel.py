@@ -8,6 +8,7 @@ import time
 
 from ginga.misc import Bunch, Datasrc, Callback, Future, Settings
 from ginga.util import viewer as gviewer
+from ginga.util.prefetch import Prefetcher
 
 
 class ChannelError(Exception):
@@ -62,6 +63,9 @@ class Channel(Callback.Callbacks):
         self.image_index = {}
         # external entities can attach stuff via this attribute
         self.extdata = Bunch.Bunch()
+        # for loading the images next to the current one ahead
+        self.prefetcher = None
+        self._nav_dir = 1
 
         self._configure_sort()
         self.settings.get_setting('sort_order').add_callback(
@@ -154,6 +158,8 @@ class Channel(Callback.Callbacks):
         """
         info = self.image_index[imname]
         self.remove_history(imname)
+        if self.prefetcher is not None:
+            self.prefetcher.discard(imname)
 
         if imname in self.datasrc:
             image = self.datasrc[imname]
@@ -244,6 +250,9 @@ class Channel(Callback.Callbacks):
         profile = self.get_image_profile(image)
         info.profile = profile
 
+        self._set_indexed_cut_levels(image)
+        self._add_to_file_index(image)
+
         if not silent:
             self.add_image_update(image, info,
                                   update_viewer=not bulk_add)
@@ -390,9 +399,130 @@ class Channel(Callback.Callbacks):
             # object still in memory
             data_obj = self.datasrc[info.name]
             self.switch_image(data_obj)
+            return
 
-        else:
+        if self.prefetcher is not None:
+            # was it loaded ahead?
+            def _prefetched_cb(image):
+                # this will be executed in a non-gui thread
+                self.fv.gui_do(self._switch_prefetched, info, image)
+
+            image = self.prefetcher.get(info.name, callback=_prefetched_cb)
+            if image is not None:
+                self._switch_reloaded(info, image)
+                return
+            if self.prefetcher.is_pending(info.name):
+                # still loading; switch when done
+                return
+
+        self.switch_name(info.name)
+
+    def _switch_prefetched(self, info, image):
+        # called in the gui thread when an image we moved to while it was
+        # being prefetched is loaded
+        if self.cursor < 0 or self.history[self.cursor] is not info:
+            # user has moved on
+            if image is not None:
+                self.add_image(image, silent=True)
+            return
+        if image is None:
+            # prefetch failed, try again the usual way
             self.switch_name(info.name)
+            return
+        self._switch_reloaded(info, image)
+
+    def prefetch_images(self, direction=None):
+        """Start loading, in the background, the images next to the
+        current one in the channel that are not in memory.
+
+        The number of images loaded ahead in the direction of navigation
+        and behind it are given by the channel settings `prefetch_ahead`
+        and `prefetch_behind`, within a memory budget (`prefetch_limit_mb`).
+        If `prefetch_autocuts` is set, their auto cut levels are also
+        calculated ahead.
+
+        Parameters
+        ----------
+        direction : int or None
+            1 if the user is moving forward through the images, -1 if
+            backward; if None, the last direction of navigation is used
+        """
+        if direction is not None:
+            self._nav_dir = direction
+        num_ahead = self.settings.get('prefetch_ahead', 2)
+        num_behind = self.settings.get('prefetch_behind', 1)
+        num = len(self.history)
+        if num_ahead + num_behind <= 0 or num < 2 or self.cursor < 0:
+            return
+
+        if self.prefetcher is None:
+            self.prefetcher = Prefetcher(self.logger, self._reload_image,
+                                         prepare_fn=self._prepare_image)
+        limit_mb = self.settings.get('prefetch_limit_mb', 256)
+        self.prefetcher.max_bytes = limit_mb * 1024**2
+
+        # positions of images wanted, in order of priority
+        offsets = [self._nav_dir * i for i in range(1, num_ahead + 1)]
+        offsets.extend([-self._nav_dir * i for i in range(1, num_behind + 1)])
+        items = []
+        for offset in offsets:
+            info = self.history[(self.cursor + offset) % num]
+            if (info.name in self.datasrc or
+                    info.name in [key for key, _info in items]):
+                continue
+            if info.image_future is None:
+                # no way to load it
+                continue
+            items.append((info.name, info))
+        self.prefetcher.prefetch(items)
+
+    def get_prefetch_stats(self):
+        """Return the counts of images loaded ahead and used.
+
+        Returns
+        -------
+        stats : `~ginga.misc.Bunch.Bunch` or None
+            See `~ginga.util.prefetch.Prefetcher.get_stats`; None if no
+            images have been loaded ahead in this channel
+        """
+        if self.prefetcher is None:
+            return None
+        return self.prefetcher.get_stats()
+
+    def _prepare_image(self, image):
+        # this will be executed in a non-gui thread
+        if (self.settings.get('prefetch_autocuts', True) and
+                self.fitsimage is not None and
+                hasattr(image, 'get_minmax') and
+                not self._set_indexed_cut_levels(image)):
+            self.fitsimage.calc_cut_levels_hint(image)
+
+    def _set_indexed_cut_levels(self, image):
+        # use the auto cut levels kept in the file index for the image,
+        # if they were calculated the way the viewer would; returns True
+        # if they were found
+        index = self.fv.get_file_index()
+        path = image.get('path', None)
+        if (index is None or path is None or self.fitsimage is None or
+                not hasattr(image, 'get_minmax')):
+            return False
+        if image.get('cut_levels_hint', None) is not None:
+            return True
+        key = self.fitsimage.autocuts.get_params_key()
+        cuts = index.get_cut_levels(path, key, idx=image.get('idx', None))
+        if cuts is None:
+            return False
+        image.set(cut_levels_hint=(key, cuts))
+        return True
+
+    def _add_to_file_index(self, image):
+        # keep the metadata of an image loaded from a file in the file
+        # index (if it is turned on)
+        index = self.fv.get_file_index()
+        if (index is None or image.get('path', None) is None or
+                not hasattr(image, 'get_minmax')):
+            return
+        self.fv.nongui_do(index.add_image, image)
 
     def prev_image(self, loop=True):
         """Move the channel cursor to the previous data object in this
@@ -415,6 +545,7 @@ class Channel(Callback.Callbacks):
             self.cursor -= 1
 
         self.refresh_cursor_image()
+        self.prefetch_images(-1)
         return True
 
     def next_image(self, loop=True):
@@ -438,6 +569,7 @@ class Channel(Callback.Callbacks):
             self.cursor += 1
 
         self.refresh_cursor_image()
+        self.prefetch_images(1)
         return True
 
     def _add_info(self, info):
@@ -643,6 +775,8 @@ class Channel(Callback.Callbacks):
         # and load the data
         if self.viewer.get_dataobj() is not dataobj:
             self.viewer.set_dataobj(dataobj)
+            # save the auto cut levels calculated for it
+            self._add_to_file_index(dataobj)
 
         obj_name = dataobj.get('name')
         if obj_name in self.image_index:
@@ -698,37 +832,12 @@ class Channel(Callback.Callbacks):
             self.logger.info("Image '%s' is no longer in memory; attempting "
                              "image future" % (imname))
 
-            # TODO: recode this--it's a bit messy
-            def _switch(image):
-                # this will be executed in the gui thread
-                self.add_image(image, silent=True)
-                self.switch_image(image)
-
-                # reset modified timestamp
-                info.time_modified = None
-                self.fv.make_async_gui_callback('add-image-info', self, info)
-
-            def _load_n_switch(imname, path, image_future):
+            def _load_n_switch(info):
                 # this will be executed in a non-gui thread
-                # reconstitute the image
-                image = self.fv.error_wrap(image_future.thaw)
-                if isinstance(image, Exception):
-                    errmsg = "Error reconstituting image: %s" % (str(image))
-                    self.logger.error(errmsg)
-                    raise image
-
-                profile = info.get('profile', None)
-                if profile is None:
-                    profile = self.get_image_profile(image)
-                    info.profile = profile
-                # perpetuate some of the image metadata
-                image.set(image_future=image_future, name=imname, path=path,
-                          image_info=info, profile=profile)
-
-                self.fv.gui_do(_switch, image)
-
-            self.fv.nongui_do(_load_n_switch, imname, info.path,
-                              info.image_future)
+                image = self._reload_image(info)
+                self.fv.gui_do(self._switch_reloaded, info, image)
+
+            self.fv.nongui_do(_load_n_switch, info)
 
         elif info.path is not None:
             # Do we have a path? We can try to reload it
@@ -741,6 +850,36 @@ class Channel(Callback.Callbacks):
         else:
             raise ChannelError("No way to recreate image '%s'" % (imname))
 
+    def _reload_image(self, info):
+        """Reconstitute the image described by `info` from its future.
+        Called in a non-gui thread.
+        """
+        image = self.fv.error_wrap(info.image_future.thaw)
+        if isinstance(image, Exception):
+            errmsg = "Error reconstituting image: %s" % (str(image))
+            self.logger.error(errmsg)
+            raise image
+
+        profile = info.get('profile', None)
+        if profile is None:
+            profile = self.get_image_profile(image)
+            info.profile = profile
+        # perpetuate some of the image metadata
+        image.set(image_future=info.image_future, name=info.name,
+                  path=info.path, image_info=info, profile=profile)
+        return image
+
+    def _switch_reloaded(self, info, image):
+        """Add a reconstituted image back to the channel and view it.
+        Called in the gui thread.
+        """
+        self.add_image(image, silent=True)
+        self.switch_image(image)
+
+        # reset modified timestamp
+        info.time_modified = None
+        self.fv.make_async_gui_callback('add-image-info', self, info)
+
     def _configure_sort(self):
         self.hist_sort = lambda info: info.time_added
         # set sorting function
@@ -17,7 +17,8 @@ from collections import OrderedDict
 # Local application imports
 from ginga import cmap, imap
 from ginga.misc import Bunch, Timer, Future
-from ginga.util import catalog, iohelper, loader
+from ginga.util import (catalog, iohelper, loader, download, bulkload,
+                        fileindex)
 from ginga.util import viewer as gviewer
 from ginga.canvas.CanvasObject import drawCatalog
 from ginga.modes import modeinfo
@@ -86,6 +87,12 @@ class GingaShell(GenericShell):
                               cursor_interval=0.050,
                               confirm_shutdown=True,
                               download_folder=None,
+                              download_max_concurrent=4,
+                              download_cache=True,
+                              bulk_open_workers=4,
+                              bulk_open_batch=16,
+                              file_index=False,
+                              file_index_path=None,
                               save_layout=False,
                               channel_prefix="Image")
         settings.load(onError='silent')
@@ -124,6 +131,11 @@ class GingaShell(GenericShell):
         # Initialize catalog and image server bank
         self.imgsrv = catalog.ServerBank(self.logger)
 
+        # download manager, created on first use
+        self.dlmgr = None
+        # index of metadata about files loaded, opened on first use
+        self.file_index = None
+
         # state for implementing field-info callback
         self._cursor_task = self.get_backend_timer()
         self._cursor_task.add_callback('expired', self._cursor_timer_cb)
@@ -437,7 +449,79 @@ class GingaShell(GenericShell):
             self.show_error("Please activate the 'Downloads' plugin to"
                             " enable download functionality")
 
-    def download_file(self, url, localpath, future, progress_cb=None):
+    def get_download_manager(self):
+        """Get the download manager used by `download_file`.
+
+        Returns
+        -------
+        dlmgr : `~ginga.util.download.DownloadManager`
+            The download manager
+        """
+        if self.dlmgr is None:
+            cache_dir = None
+            if self.settings.get('download_cache', True):
+                cache_dir = self.settings.get('download_folder', None)
+                if cache_dir is None:
+                    cache_dir = os.path.join(self.tmpdir, 'ginga-downloads')
+            self.dlmgr = download.DownloadManager(
+                self.logger, cache_dir=cache_dir,
+                max_concurrent=self.settings.get('download_max_concurrent', 4),
+                use_cache=self.settings.get('download_cache', True))
+        return self.dlmgr
+
+    def get_file_index(self):
+        """Get the index of metadata about files loaded.
+
+        If the ``file_index`` setting is True, the header keywords, shape,
+        minimum and maximum values and auto cut levels of images loaded
+        from files are kept in an index (at ``file_index_path``, by
+        default ``fileindex.sqlite`` in the Ginga home folder), and used
+        (e.g. by the Contents and Thumbs plugins) for images that are
+        not in memory, and for the cut levels of images loaded again.
+
+        Returns
+        -------
+        index : `~ginga.util.fileindex.FileIndex` or None
+            The index, or None if it is turned off
+        """
+        if self.file_index is None and self.settings.get('file_index', False):
+            dbpath = self.settings.get('file_index_path', None)
+            if dbpath is None:
+                dbpath = os.path.join(self.prefs.get_baseFolder(),
+                                      'fileindex.sqlite')
+            try:
+                self.file_index = fileindex.FileIndex(self.logger, dbpath)
+            except Exception as e:
+                self.logger.error("Error opening file index '{}': {}".format(
+                    dbpath, e))
+                self.settings.set(file_index=False)
+        return self.file_index
+
+    def get_file_index_entry(self, path, idx=None):
+        """Get the metadata kept in the file index about an image in a
+        file (see `get_file_index`).
+
+        Parameters
+        ----------
+        path : str
+            Path of the file; may end with an index in brackets
+
+        idx : int, str, tuple or None
+            Index of the image in the file
+
+        Returns
+        -------
+        entry : `~ginga.misc.Bunch.Bunch` or None
+            See `~ginga.util.fileindex.FileIndex.get`; None if the index
+            is turned off or has nothing about the image
+        """
+        index = self.get_file_index()
+        if index is None or path is None:
+            return None
+        return index.get(path, idx=idx)
+
+    def download_file(self, url, localpath, future, progress_cb=None,
+                      stats=None):
         """Download *url* to *localpath*, resolving *future* when done.
 
         This is the low-level file downloader (the Downloads plugin is a
@@ -449,12 +533,20 @@ class GingaShell(GenericShell):
           CORS proxy.  A coroutine is returned; in-situ always uses the
           async task pool, so nongui_do awaits it on the event loop.
         * everywhere else (desktop, or pg driving a remote browser over a
-          websocket) -> a synchronous download on a worker thread.
-
-        On success *future* is resolved with *localpath*; on failure it is
-        resolved with the exception (so ``future.get_value()`` re-raises
-        it).  *progress_cb*, if given, is called as ``progress_cb(fraction)``
-        with a value in [0.0, 1.0] as the download proceeds.
+          websocket) -> a synchronous download on a worker thread, by the
+          download manager (see `get_download_manager`).  This limits the
+          number of concurrent transfers (setting
+          ``download_max_concurrent``), reuses connections, resumes
+          interrupted transfers and, unless the ``download_cache`` setting
+          is False, does not transfer a URL again if the previously
+          downloaded copy is still current.
+
+        On success *future* is resolved with the path of the local file
+        (normally *localpath*, but it may be the path of an existing
+        download of the same content); on failure it is resolved with the
+        exception (so ``future.get_value()`` re-raises it).  *progress_cb*,
+        if given, is called as ``progress_cb(fraction)`` with a value in
+        [0.0, 1.0] as the download proceeds.
 
         Parameters
         ----------
@@ -470,23 +562,24 @@ class GingaShell(GenericShell):
 
         progress_cb : callable, optional
             Called as ``progress_cb(fraction)`` as the download proceeds.
+
+        stats : `~ginga.misc.Bunch.Bunch`, optional
+            If given, updated with statistics of the transfer (bytes
+            transferred, rate, etc.; see
+            `ginga.util.download.DownloadManager.download`).
         """
         if self.is_web_backend() and self.is_in_situ():
             return self._download_file_async(url, localpath, future,
                                              progress_cb)
-        return self._download_file_sync(url, localpath, future, progress_cb)
-
-    def _download_file_sync(self, url, localpath, future, progress_cb):
-        def _dl_indicator(count, blksize, totalsize):
-            if progress_cb is not None and totalsize > 0:
-                nbytes = int(count * blksize)
-                progress_cb(min(1.0, float(nbytes) / float(totalsize)))
+        return self._download_file_sync(url, localpath, future, progress_cb,
+                                        stats)
 
+    def _download_file_sync(self, url, localpath, future, progress_cb,
+                            stats):
         try:
-            # press our generic URL server into use as a file downloader
-            dl = catalog.URLServer(self.logger, "downloader", "dl", url, "")
-            filepath = dl.retrieve(url, filepath=localpath,
-                                   cb_fn=_dl_indicator)
+            dlmgr = self.get_download_manager()
+            filepath = dlmgr.download(url, localpath, progress_cb=progress_cb,
+                                      stats=stats)
             self.logger.info("download of '%s' finished" % (filepath))
             future.resolve(filepath)
 
@@ -768,6 +861,19 @@ class GingaShell(GenericShell):
             If given, called as ``download_cb(fraction)`` with a value in
             [0.0, 1.0] as each URI that needs downloading proceeds.
 
+        Returns
+        -------
+        bulk_loader : `~ginga.util.bulkload.BulkLoader` or None
+            If several local files are opened, the loader opening them
+            (e.g. for its progress), otherwise None.
+
+        Notes
+        -----
+        Several local files are opened together, sorted by path, by a
+        limited number of worker threads (setting ``bulk_open_workers``),
+        and added to the channel in batches (setting ``bulk_open_batch``).
+        Remote URIs are downloaded and opened one by one.
+
         """
         if len(uris) == 0:
             return
@@ -792,6 +898,22 @@ class GingaShell(GenericShell):
         def load_file(filepath):
             self.nongui_do(self.open_file_cont, filepath, show_dataobj)
 
+        if len(uris) > 1 and not self.async_mode:
+            # open the local files together
+            local, remote = [], []
+            for uri in uris:
+                info = iohelper.get_fileinfo(uri)
+                if info.ondisk:
+                    local.append(info.filepath + info.idx)
+                else:
+                    remote.append(uri)
+            if len(local) > 1:
+                for uri in remote:
+                    self.open_uri_cont(uri, load_file_bulk,
+                                       download_cb=download_cb)
+                return self._open_files_bulk(channel, sorted(local),
+                                             bulk_add=bulk_add)
+
         # determine whether first file is loaded as a bulk load
         if bulk_add:
             self.open_uri_cont(uris[0], load_file_bulk, download_cb=download_cb)
@@ -804,6 +926,85 @@ class GingaShell(GenericShell):
             self.open_uri_cont(uri, load_file_bulk, download_cb=download_cb)
             self.update_pending()
 
+    def _open_files_bulk(self, channel, pathspecs, bulk_add=False):
+        """Open local files with a `~ginga.util.bulkload.BulkLoader` and
+        add their data objects to `channel` in batches, in order.
+        """
+        num_workers = self.settings.get('bulk_open_workers', 4)
+        batch_size = self.settings.get('bulk_open_batch', 16)
+        bl = bulkload.BulkLoader(self.logger, self._load_file_bulk,
+                                 num_workers=num_workers,
+                                 batch_size=batch_size)
+        state = Bunch.Bunch(show_first=not bulk_add)
+
+        def show_dataobj_bulk(data_obj):
+            self.gui_do(channel.add_image, data_obj, bulk_add=True)
+
+        def add_batch(results):
+            # this will be executed in the gui thread
+            for pathspec, ok, data_objs in results:
+                if not ok:
+                    self.show_error("Error opening '%s': %s" % (
+                        pathspec, data_objs), raisetab=False)
+                    continue
+                if data_objs is None:
+                    # needs the user to choose how to open it
+                    self.nongui_do(self.open_file_cont, pathspec,
+                                   show_dataobj_bulk)
+                    continue
+                for data_obj in data_objs:
+                    channel.add_image(data_obj,
+                                      bulk_add=not state.show_first)
+                    state.show_first = False
+
+        def batch_cb(bl, results):
+            self.gui_do(add_batch, results)
+            stats = bl.get_stats()
+            self.gui_do(self.show_status,
+                        "Opened %d/%d files (%.1f files/s, %.1f MB/s)" % (
+                            stats.loaded + stats.failed, stats.num_files,
+                            stats.rate, stats.byte_rate / 1024**2))
+
+        def done_cb(bl, stats):
+            self.logger.info("opened %d files (%d failed) in %.2f sec "
+                             "(%.1f files/s, %.1f MB/s)" % (
+                                 stats.num_files, stats.failed,
+                                 stats.elapsed, stats.rate,
+                                 stats.byte_rate / 1024**2))
+
+        bl.add_callback('batch', batch_cb)
+        bl.add_callback('done', done_cb)
+        bl.start(pathspecs)
+        return bl
+
+    def _load_file_bulk(self, pathspec):
+        """Load the data objects named by `pathspec` for a bulk open.
+        Called in a worker thread.  Returns None if the file type does not
+        determine a single opener.
+        """
+        info = iohelper.get_fileinfo(pathspec)
+        filepath = info.filepath
+        try:
+            typ, subtyp = iohelper.guess_filetype(filepath)
+        except Exception as e:
+            self.logger.warning("Couldn't determine file type of '{0:}': "
+                                "{1:}".format(filepath, str(e)))
+            return None
+        openers = loader.get_openers("{}/{}".format(typ, subtyp))
+        if len(openers) != 1:
+            return None
+
+        kwargs = dict(
+            save_primary_header=self.settings.get('save_primary_header',
+                                                  False),
+            inherit_primary_header=self.settings.get('inherit_primary_header',
+                                                     False))
+        data_objs = []
+        opener = openers[0].opener(self.logger)
+        with opener.open_file(filepath) as io_f:
+            io_f.load_idx_cont(info.idx, data_objs.append, **kwargs)
+        return data_objs
+
     def open_blobs(self, blobs, chname=None, bulk_add=False):
         """Open a set of data blobs.
 
@@ -1367,7 +1568,10 @@ class GingaShell(GenericShell):
                                   raisenew=True, genthumb=True,
                                   renderer=self.settings.get('renderer', None),
                                   focus_indicator=False,
-                                  sort_order='loadtime')
+                                  sort_order='loadtime',
+                                  prefetch_ahead=2, prefetch_behind=1,
+                                  prefetch_limit_mb=256,
+                                  prefetch_autocuts=True)
 
             self.logger.debug("Adding channel '%s'" % (chname))
             channel = Channel(chname, self, datasrc=None,
@@ -1436,6 +1640,8 @@ class GingaShell(GenericShell):
 
             # Close local plugins open on this channel
             self.close_plugins(channel)
+            if channel.prefetcher is not None:
+                channel.prefetcher.shutdown()
 
             try:
                 idx = self.channel_names.index(chname)
@@ -2146,6 +2352,10 @@ class GingaShell(GenericShell):
 
         self.timer_factory.quit()
 
+        if self.file_index is not None:
+            self.file_index.close()
+            self.file_index = None
+
         super().stop()
 
     ####################################################
@@ -14,7 +14,7 @@ import webbrowser
 
 # Local application imports
 from ginga.misc import Bunch
-from ginga.util import toolbox
+from ginga.util import toolbox, profiler
 from ginga.doc import download_doc
 
 # GUI imports
@@ -432,6 +432,67 @@ class GenericShell(GwMain.GwMain, Widgets.Application):
         for hdlr in handlers:
             hdlr.setLevel(level)
 
+    def start_profiler(self, max_events=100000, window=1000):
+        """Start recording the time taken by callbacks, pipeline stages,
+        GUI tasks and redraws (see `ginga.util.profiler`).
+
+        Parameters
+        ----------
+        max_events : int
+            Number of the most recent events kept for the trace
+
+        window : int
+            Number of the most recent events per callback, stage, etc.
+            used for the statistics
+        """
+        profiler.enable(max_events=int(max_events), window=int(window))
+        self.logger.info("profiler started")
+        return 0
+
+    def stop_profiler(self):
+        """Stop recording timing events.  The events recorded so far can
+        still be saved with `save_profile_trace`."""
+        self._last_profiler = profiler.disable()
+        self.logger.info("profiler stopped")
+        return 0
+
+    def _get_profiler(self):
+        prof = profiler.get_profiler()
+        if prof is None:
+            prof = getattr(self, '_last_profiler', None)
+        if prof is None:
+            raise ValueError("profiler has not been started")
+        return prof
+
+    def get_profile_report(self, cat=None, limit=20):
+        """Return a table of timing statistics (in msec) for the
+        callbacks, stages, etc. taking the most total time.
+
+        Parameters
+        ----------
+        cat : str or None
+            Category ('callback', 'stage', 'gui' or 'redraw'), or None
+            for all
+
+        limit : int
+            Maximum number of rows
+        """
+        return self._get_profiler().report(cat=cat, limit=int(limit))
+
+    def save_profile_trace(self, path):
+        """Save the recorded timing events as a Chrome trace JSON file
+        (for ``chrome://tracing`` or https://ui.perfetto.dev).
+
+        Parameters
+        ----------
+        path : str
+            Path of the file to write
+        """
+        path = os.path.expanduser(path)
+        n = self._get_profiler().save_trace(path)
+        self.logger.info("saved {} trace events to '{}'".format(n, path))
+        return 0
+
     def set_layout(self, layout, layout_file=None, save_layout=False,
                    main_wsname=None):
         self.layout = layout
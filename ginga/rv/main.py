@@ -169,6 +169,9 @@ plugins = [
     Bunch(module='Log', tab='Log', workspace='right', start=False,
           menu="Logger Info [G]", category='Debug', ptype='global',
           enabled=True),
+    Bunch(module='Profiler', tab='Profiler', workspace='right', start=False,
+          menu="Profiler [G]", category='Debug', ptype='global',
+          enabled=True),
     Bunch(module='MultiDim', workspace='lleft', category='Navigation',
           ptype='local', exclusive=False, enabled=True),
     Bunch(module='RC', tab='RC', workspace='right', start=False,
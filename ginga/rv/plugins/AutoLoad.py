@@ -25,6 +25,15 @@ An instance can be opened for each channel.
   uncheck the box, files that arrived in the intervening period will not be
   loaded.
 
+A new file is loaded only once it is complete: when it is closed after
+being written, or when its size has not changed for ``settle_time``
+seconds.  Completed files are read by a pool of ``num_workers`` threads,
+so that a burst of files is loaded in parallel, and are added to the
+channel in the order they were completed.  The status line shows the
+number of files still being written ("settling"), waiting to be read,
+being read and done, and the typical and maximum time from the arrival
+of a file to its display.
+
 .. note:: Monitoring folders that reside on network drives may or may not
           work.
 
@@ -36,15 +45,9 @@ import re
 
 from ginga import GingaPlugin
 from ginga.gw import Widgets
-
-# pip install watchdog
-have_watchdog = False
-try:
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
-    have_watchdog = True
-except ImportError:
-    pass
+from ginga.misc import Future
+from ginga.util import iohelper
+from ginga.util.watcher import FolderWatcher, have_watchdog
 
 __all__ = ['AutoLoad']
 
@@ -59,11 +62,14 @@ class AutoLoad(GingaPlugin.LocalPlugin):
         prefs = self.fv.get_preferences()
         self.settings = prefs.create_category('plugin_AutoLoad')
         self.settings.add_defaults(watch_folder=None, filename_regex=None,
-                                   start_paused=False)
+                                   start_paused=False, settle_time=1.0,
+                                   num_workers=4, use_polling=False,
+                                   status_interval=1.0)
         self.settings.load(onError='silent')
 
-        self.observer = None
-        self._watch = None
+        self.watcher = None
+        self.status_timer = fv.get_timer()
+        self.status_timer.set_callback('expired', self._status_cb)
         self.data_dir = self.settings.get('watch_folder', None)
         self.regex = self.settings.get('filename_regex', None)
         self.regex_c = None
@@ -85,6 +91,7 @@ class AutoLoad(GingaPlugin.LocalPlugin):
         captions = (("Watched folder:", 'label', 'folder', 'entryset'),
                     ("Match regex:", 'label', 'regex', 'entryset'),
                     ("Pause", 'checkbox'),
+                    ("Status:", 'label', 'status', 'llabel'),
                     )
         w, b = Widgets.build_info(captions, orientation='vertical')
         self.w.update(b)
@@ -100,6 +107,8 @@ class AutoLoad(GingaPlugin.LocalPlugin):
         b.pause.set_tooltip(_tr("Pause auto loading"))
         b.pause.set_state(self.pause_flag)
         b.pause.add_callback('activated', self.set_pause_cb)
+        b.status.set_tooltip(_tr("Files settling/queued/loading/done, "
+                                 "and latency of recent files"))
 
         top.add_widget(w, stretch=0)
         # for customization by subclasses
@@ -130,17 +139,13 @@ class AutoLoad(GingaPlugin.LocalPlugin):
     def set_folder(self, data_dir):
         if self.data_dir is not None:
             # remove old watch
-            if self._watch is not None:
-                self.observer.unschedule(self._watch)
+            self.watcher.unwatch(self.data_dir)
 
         if data_dir is None or len(data_dir) == 0:
             self.data_dir = None
             return
         # add new watch folder
-        event_handler = FileSystemEventHandler()
-        event_handler.on_closed = self._file_detected_cb
-        self._watch = self.observer.schedule(event_handler, data_dir,
-                                             recursive=False)
+        self.watcher.watch(data_dir)
         self.data_dir = data_dir
 
     def set_regex_cb(self, w):
@@ -164,6 +169,8 @@ class AutoLoad(GingaPlugin.LocalPlugin):
 
     def set_pause_cb(self, w, tf):
         self.pause_flag = tf
+        if self.watcher is not None:
+            self.watcher.paused = tf
 
     def close(self):
         self.fv.stop_local_plugin(self.chname, str(self))
@@ -172,27 +179,57 @@ class AutoLoad(GingaPlugin.LocalPlugin):
     def start(self):
         if self.regex is not None:
             self.set_regex(self.regex)
-        self.observer = Observer()
+        self.watcher = FolderWatcher(
+            self.logger, self.read_file,
+            num_workers=self.settings.get('num_workers', 4),
+            settle_time=self.settings.get('settle_time', 1.0),
+            use_polling=self.settings.get('use_polling', False),
+            check_fn=self._file_detected_cb)
+        self.watcher.paused = self.pause_flag
+        self.watcher.add_callback('loaded', self._file_loaded_cb)
+        self.watcher.add_callback('failed', self._file_failed_cb)
+        self.watcher.start()
 
         if self.data_dir is not None:
             self.set_folder(self.data_dir)
 
-        self.observer.start()
+        self.status_timer.set(self.settings.get('status_interval', 1.0))
 
     def stop(self):
-        self.observer.stop()
-        self._watch = None
-        self.observer.join()
+        self.status_timer.clear()
+        self.watcher.stop()
+        self.watcher = None
         self.gui_up = False
 
-    def _file_detected_cb(self, event):
-        if self.pause_flag:
-            return
-        filepath = event.src_path
+    def _file_detected_cb(self, filepath):
+        # called for the first event about a new file (or new version)
+        if not self.check_file(filepath):
+            return False
         self.logger.info(f"new file detected: {filepath}")
+        return True
+
+    def _file_loaded_cb(self, watcher, filepath, image):
+        # called in file completion order from a worker thread
+        self.load_file(filepath, image)
 
-        if self.check_file(filepath):
-            self.load_file(filepath)
+    def _file_failed_cb(self, watcher, filepath, errmsg):
+        errmsg = "Failed to load '{}': {}".format(filepath, errmsg)
+        self.fv.gui_do(self.fv.show_error, errmsg, raisetab=False)
+
+    def _status_cb(self, timer):
+        # called from the timer thread
+        if self.watcher is None:
+            return
+        if self.gui_up:
+            st = self.watcher.get_stats()
+            text = "{} settling, {} queued, {} loading, {} done".format(
+                st.settling, st.queued, st.loading + st.waiting,
+                st.loaded + st.failed)
+            if st.latency_p50 is not None:
+                text += ", latency {:.2f}s (max {:.2f}s)".format(
+                    st.latency_p50, st.latency_max)
+            self.fv.gui_do(self.w.status.set_text, text)
+        timer.set(self.settings.get('status_interval', 1.0))
 
     def check_file(self, filepath):
         """Check path and return True if we should load it.
@@ -208,9 +245,30 @@ class AutoLoad(GingaPlugin.LocalPlugin):
         # file did not fail any checks we set for it
         return True
 
-    def load_file(self, filepath):
-        """Subclass can override to change behavior."""
-        self.fv.nongui_do(self.fv.load_file, filepath)
+    def read_file(self, filepath):
+        """Read a completed file in a worker thread and return the data
+        object.  Subclass can override to change behavior.
+        """
+        image_loader = self.fv.load_image
+        image = image_loader(filepath, show_error=False)
+
+        # as in load_file() of the reference viewer, save a future for
+        # the image to reload it later if it is removed from memory
+        future = Future.Future()
+        future.freeze(image_loader, filepath)
+        image.set(loader=image_loader, image_future=future)
+        if image.get('path', None) is None:
+            image.set(path=filepath)
+        if image.get('name', None) is None:
+            image.set(name=iohelper.name_image_from_path(filepath))
+        return image
+
+    def load_file(self, filepath, image):
+        """Add the data object read from a completed file to the channel.
+        Subclass can override to change behavior.
+        """
+        self.fv.gui_do(self.fv.add_image, image.get('name'), image,
+                       chname=self.chname)
 
     def redo(self):
         pass
@@ -62,11 +62,18 @@ When search results are available, they will be displayed on the image and
 also listed in a table on the plugin GUI. You can click on either the table
 or the image to highlight selection.
 
+Catalog search results are cached on disk (under ``$HOME/.ginga/catalog_cache``
+by default), so repeating a search, or searching a smaller cone within one
+that was already searched on the same server, does not query the server
+again.  Caching is controlled by the ``cache_queries``, ``cache_dir``,
+``cache_ttl_sec`` and ``cache_size_mb`` settings.
+
 **User Configuration**
 
 """
 import os
 import math
+import itertools
 from collections import OrderedDict
 
 import numpy as np
@@ -74,7 +81,7 @@ import numpy as np
 from ginga.misc import Bunch
 from ginga import GingaPlugin
 from ginga import cmap, imap
-from ginga.util import wcs, catalog
+from ginga.util import wcs, catalog, paths
 from ginga.gw import ColorBar, Widgets
 from ginga.misc import ParamSet
 
@@ -95,7 +102,10 @@ class Catalogs(GingaPlugin.LocalPlugin):
                                    image_channel='',
                                    name_sources=catalog.default_name_sources,
                                    catalog_sources=catalog.default_catalog_sources,
-                                   image_sources=catalog.default_image_sources)
+                                   image_sources=catalog.default_image_sources,
+                                   cache_queries=True, cache_dir=None,
+                                   cache_ttl_sec=86400.0, cache_size_mb=100,
+                                   query_timeout_sec=60.0)
         self.settings.load(onError='silent')
 
         self.limit_stars_to_area = False
@@ -143,6 +153,20 @@ class Catalogs(GingaPlugin.LocalPlugin):
 
         bank = self.fv.get_server_bank()
 
+        if bank.cache is None and self.settings.get('cache_queries', True):
+            cache_dir = self.settings.get('cache_dir', None)
+            if cache_dir is None:
+                cache_dir = os.path.join(paths.ginga_home, 'catalog_cache')
+            size_mb = self.settings.get('cache_size_mb', 100)
+            try:
+                bank.set_cache(catalog.CatalogCache(
+                    self.logger, cache_dir,
+                    ttl_sec=self.settings.get('cache_ttl_sec', 86400.0),
+                    max_bytes=(None if size_mb is None
+                               else int(size_mb * 1024 ** 2))))
+            except Exception as e:
+                self.logger.warning("can't create catalog cache: {}".format(e))
+
         # add name services found in configuration file
         name_sources = self.settings.get('name_sources', [])
         for d in name_sources:
@@ -781,7 +805,9 @@ class Catalogs(GingaPlugin.LocalPlugin):
 
     def _get_catalog(self, srvbank, key, params):
         try:
-            starlist, info = srvbank.get_catalog(key, None, **params)
+            timeout = self.settings.get('query_timeout_sec', None)
+            starlist, info = srvbank.get_catalog(key, None, timeout=timeout,
+                                                 **params)
             return starlist, info
 
         except Exception as e:
@@ -822,8 +848,9 @@ class Catalogs(GingaPlugin.LocalPlugin):
         if filter_obj:
             num_cat = len(starlist)
             self.logger.debug("number of incoming stars=%d" % (num_cat))
-            coords = np.asarray([(star['ra_deg'], star['dec_deg'])
-                                 for star in starlist])
+            coords = np.array([(star['ra_deg'], star['dec_deg'])
+                               for star in starlist],
+                              dtype=float).reshape((num_cat, 2))
 
             # vectorized wcs transform to data coords
             coords = image.wcs.wcspt_to_datapt(coords)
@@ -832,9 +859,8 @@ class Catalogs(GingaPlugin.LocalPlugin):
             res = filter_obj.contains_pts(coords)
             self.logger.debug("res.shape = %s" % str(res.shape))
 
-            stars = np.array(starlist)[np.flatnonzero(res)]
-            self.logger.debug("number of filtered stars=%d" % (len(stars)))
-            starlist = list(stars)
+            starlist = list(itertools.compress(starlist, res))
+            self.logger.debug("number of filtered stars=%d" % (len(starlist)))
 
         return starlist
 
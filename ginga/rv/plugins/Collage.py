@@ -54,6 +54,10 @@ The "Num Threads" box assigns how many threads will be used from the thread
 pool to load the data.  Using several threads will usually speed up loading
 of many files.
 
+When zoomed out so that many tiles are in view, the collage is drawn from
+flattened copies of the tiles at reduced resolution, which are made when
+first needed; see the "flatten_*" settings in the plugin configuration.
+
 **Difference from `Mosaic` plugin**
 
 - Doesn't allocate a large array to hold all the mosaic contents
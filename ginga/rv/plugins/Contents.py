@@ -242,7 +242,10 @@ class Contents(GingaPlugin.GlobalPlugin):
         if image is not None:
             header = image.get_header()
         else:
-            header = {}
+            # from the file index, if the image was loaded before
+            entry = self.fv.get_file_index_entry(info.get('path', None),
+                                                 idx=info.get('idx', None))
+            header = {} if entry is None else entry.header
 
         for hdr, key in self.columns:
             dct[key] = str(header.get(key, 'N/A'))
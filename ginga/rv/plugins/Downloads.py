@@ -22,6 +22,13 @@ by clicking the "Clear All" button at the bottom.
 
 Currently, it is not possible to cancel a download in progress.
 
+Each entry shows the amount of data transferred and the transfer rate.
+The line at the bottom shows the number of active and queued downloads,
+the current total transfer rate and the number of downloads that were
+answered from the download cache.  If the same URI is downloaded again
+and the previously downloaded copy is still current, the copy is used
+instead of transferring the file again.
+
 **Settings**
 
 The ``auto_clear_download`` option, if set to `True`, will cause a download
@@ -31,7 +38,10 @@ It does not remove any downloaded file(s).
 The download folder can be user-defined by assigning a value to the
 "download_folder" setting in ~/.ginga/general.cfg.  If unassigned, it
 defaults to a folder in the platform-specific default temp directory
-(as told by the Python 'tempfile' module).
+(as told by the Python 'tempfile' module).  The maximum number of
+concurrent transfers is set by the "download_max_concurrent" setting, and
+the download cache can be turned off with the "download_cache" setting
+in the same file.
 
 """
 import time
@@ -89,6 +99,9 @@ class Downloads(GingaPlugin.GlobalPlugin):
         btn.add_callback('activated', lambda w: self.gui_clear_all())
         btns.add_widget(btn, stretch=0)
         btns.add_widget(Widgets.Label(''), stretch=1)
+
+        self.w.totals = Widgets.Label('')
+        vbox.add_widget(self.w.totals, stretch=0)
         vbox.add_widget(btns, stretch=0)
 
         container.add_widget(vbox, stretch=1)
@@ -105,8 +118,10 @@ class Downloads(GingaPlugin.GlobalPlugin):
         time_lbl = Widgets.Label(track.elapsed)
         prog_bar = Widgets.ProgressBar()
         prog_bar.set_value(track.progress)
+        rate_lbl = Widgets.Label(self._format_stats(track.stats))
         hbox.add_widget(time_lbl)
         hbox.add_widget(prog_bar, stretch=1)
+        hbox.add_widget(rate_lbl)
         rmv = Widgets.Button(_tr('Clear'))
 
         def _clear_download(w):
@@ -117,7 +132,8 @@ class Downloads(GingaPlugin.GlobalPlugin):
         vbox.add_widget(hbox, stretch=0)
         self.dlbox.add_widget(vbox)
         w_track = Bunch.Bunch(container=vbox, time_lbl=time_lbl,
-                              prog_bar=prog_bar, track=track)
+                              prog_bar=prog_bar, rate_lbl=rate_lbl,
+                              track=track)
         self.w_track[track.key] = w_track
         self.w_scroll.scroll_to_end(vertical=True)
 
@@ -142,6 +158,8 @@ class Downloads(GingaPlugin.GlobalPlugin):
         # create tracker for this download
         track = Bunch.Bunch(key=key, info=info, time_start=add_time,
                             elapsed='00:00:00', progress=0.0,
+                            stats=Bunch.Bunch(status='queued', nbytes=0,
+                                              rate=0.0),
                             future=future, download_cb=download_cb)
         self.downloads.append(track)
 
@@ -169,14 +187,17 @@ class Downloads(GingaPlugin.GlobalPlugin):
         dl_future = Future.Future()
         dl_future.add_callback('resolved', self._download_complete, track)
         return self.fv.download_file(url, localpath, dl_future,
-                                     progress_cb=_progress)
+                                     progress_cb=_progress,
+                                     stats=track.stats)
 
     def _download_complete(self, dl_future, track):
         try:
             filepath = dl_future.get_value(block=False)
         except Exception as e:
             self._download_failed(track.info.url, e)
+            self._update_stats(track)
             return
+        self._update_stats(track)
         self._download_finished(track, filepath)
 
     def _update_track(self, track, progress):
@@ -199,6 +220,40 @@ class Downloads(GingaPlugin.GlobalPlugin):
                 return
             self.fv.gui_do(w_track.time_lbl.set_text, track.elapsed)
             self.fv.gui_do(w_track.prog_bar.set_value, track.progress)
+        self._update_stats(track)
+
+    def _format_bytes(self, nbytes):
+        for unit in ('B', 'KB', 'MB'):
+            if nbytes < 1024:
+                return "%.1f %s" % (nbytes, unit)
+            nbytes /= 1024.0
+        return "%.1f GB" % (nbytes)
+
+    def _format_stats(self, stats):
+        status = stats.get('status', 'queued')
+        if status in ('queued', 'cached', 'failed'):
+            return _tr(status)
+        text = self._format_bytes(stats.get('nbytes', 0))
+        if status == 'downloading':
+            text += " (%s/s)" % self._format_bytes(stats.get('rate', 0.0))
+        return text
+
+    def _update_stats(self, track):
+        # update transfer statistics for a download, and the totals
+        if not self.gui_up:
+            return
+        w_track = self.w_track.get(track.key, None)
+        if w_track is not None:
+            self.fv.gui_do(w_track.rate_lbl.set_text,
+                           self._format_stats(track.stats))
+
+        if self.fv.is_web_backend() and self.fv.is_in_situ():
+            return
+        stats = self.fv.get_download_manager().get_stats()
+        text = _tr("Active: {} Queued: {} Rate: {}/s Cached: {}").format(
+            stats['active'], stats['queued'],
+            self._format_bytes(stats['rate']), stats['cache_hits'])
+        self.fv.gui_do(self.w.totals.set_text, text)
 
     def _download_finished(self, track, filepath):
         # call the future
@@ -517,8 +517,7 @@ class Drawing(GingaPlugin.LocalPlugin):
     def _import_regions_files(self, w, paths):
         for path in paths:
             objs = ap_region.import_regions(path, logger=self.logger)
-            for obj in objs:
-                self.canvas.add(obj, redraw=False)
+            self.canvas.add_objects(objs, redraw=False)
 
         self.canvas.update_canvas()
 
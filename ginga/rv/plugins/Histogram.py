@@ -26,6 +26,14 @@ Unless disabled in the settings file for the histogram plugin, a line of
 simple statistics for the box is calculated and shown in a line below the
 plot.
 
+While the region is dragged across a monochrome image, the plot and
+statistics are updated from an index of the histograms of tiles of the
+image, which is built in the background the first time a region is
+measured in each image.  Values are binned over the range of the whole
+image during the drag; the histogram of the region alone is calculated
+when the button is released.  This is controlled by the ``live_update``
+setting.
+
 **UI Controls**
 
 Three radio buttons at the bottom of the UI are used to control the
@@ -65,11 +73,15 @@ by the plugin configuration file setting ``scroll_pct``.  The default is 10%.
 **User Configuration**
 
 """
+import time
+
 import numpy as np
 
 from ginga.gw import Widgets
 from ginga import GingaPlugin, BaseImage
 from ginga import AutoCuts
+from ginga.misc import Bunch
+from ginga.util.histindex import TiledHistogram
 from ginga.util.toolbox import calc_float_strings
 
 try:
@@ -100,7 +112,9 @@ class Histogram(GingaPlugin.LocalPlugin):
         self.settings = prefs.create_category('plugin_Histogram')
         self.settings.add_defaults(draw_then_move=True, num_bins=2048,
                                    hist_color='aquamarine', show_stats=True,
-                                   maxdigits=7, scroll_pct=0.10)
+                                   maxdigits=7, scroll_pct=0.10,
+                                   live_update=True, tile_size=256,
+                                   live_interval=0.05)
         self.settings.load(onError='silent')
 
         # Set up histogram control parameters
@@ -115,6 +129,13 @@ class Histogram(GingaPlugin.LocalPlugin):
         maxdigits = self.settings.get('maxdigits', 7)
         self.fmt_cell = '{:< %d.%dg}' % (maxdigits - 1, maxdigits // 2)
 
+        # tiled histogram index of the channel image, for updates while
+        # the box is dragged
+        self._index = None
+        self._index_key = None
+        self._index_building = None
+        self._live_time = 0.0
+
         self.dc = self.fv.get_draw_classes()
 
         canvas = self.dc.DrawingCanvas()
@@ -355,46 +376,54 @@ class Histogram(GingaPlugin.LocalPlugin):
         if obj.kind != 'compound':
             return True
         bbox = obj.objects[0]
+        x1, y1, x2, y2 = (int(bbox.x1), int(bbox.y1),
+                          int(bbox.x2), int(bbox.y2))
 
         # Do histogram on the points within the rect
         image = self.fitsimage.get_vip()
-        self.plot.clear()
-
         numbins = self.numbins
 
         depth = image.get_depth()
         if depth != 3:
-            data_np = self.get_data(image, int(bbox.x1), int(bbox.y1),
-                                    int(bbox.x2), int(bbox.y2))
+            data_np = self.get_data(image, x1, y1, x2, y2)
             res = self.histogram_data(data_np, pct=1.0, numbins=numbins)
+            hists = [(res, 'blue', 1.0)]
+        else:
+            colors = ('red', 'green', 'blue')
+            hists = []
+            for z in range(depth):
+                data_np = self.get_data(image, x1, y1, x2, y2, z=z)
+                res = self.histogram_data(data_np, pct=1.0, numbins=numbins)
+                hists.append((res, colors[z], 0.33))
+        self.plot_histograms(hists)
+
+        if self.show_stats:
+            # calculate statistics on finite elements in box
+            self.show_stats_line(self.calc_stats(data_np))
+
+        # get the index ready for fast updates while the box is dragged
+        self.get_index()
+
+        self.fv.show_status("Click or drag left mouse button to move region")
+        return True
+
+    def plot_histograms(self, hists):
+        """Plot histograms, given as a list of ``(res, color, alpha)``
+        where `res` is a result of `histogram_data`."""
+        self.plot.clear()
+        for res, color, alpha in hists:
+            if 'dist' not in res:
+                # no finite data elements
+                continue
             # used with 'steps-post' drawstyle, this x and y assignment
             # gives correct histogram-steps
             x = res.bins
             y = np.append(res.dist, res.dist[-1])
-            ymax = y.max()
             if self.plot.logy:
                 y = np.choose(y > 0, (.1, y))
             self.plot.plot(x, y, xtitle=_tr("Pixel value"), ytitle=_tr("Number"),
                            title=_tr("Pixel Value Distribution"),
-                           color='blue', alpha=1.0, drawstyle='steps-post')
-        else:
-            colors = ('red', 'green', 'blue')
-            ymax = 0
-            for z in range(depth):
-                data_np = self.get_data(image, int(bbox.x1), int(bbox.y1),
-                                        int(bbox.x2), int(bbox.y2), z=z)
-                res = self.histogram_data(data_np, pct=1.0, numbins=numbins)
-                # used with 'steps-post' drawstyle, this x and y assignment
-                # gives correct histogram-steps
-                x = res.bins
-                y = np.append(res.dist, res.dist[-1])
-                ymax = max(ymax, y.max())
-                if self.plot.logy:
-                    y = np.choose(y > 0, (.1, y))
-                self.plot.plot(x, y, xtitle=_tr("Pixel value"), ytitle=_tr("Number"),
-                               title=_tr("Pixel Value Distribution"),
-                               color=colors[z], alpha=0.33,
-                               drawstyle='steps-post')
+                           color=color, alpha=alpha, drawstyle='steps-post')
 
         # show cut levels
         loval, hival = self.fitsimage.get_cut_levels()
@@ -419,23 +448,78 @@ class Histogram(GingaPlugin.LocalPlugin):
         self.w.cut_high.set_text(hi_str)
         self.plot.redraw()
 
-        if self.show_stats:
-            # calculate statistics on finite elements in box
-            i = np.isfinite(data_np)
-            if np.any(i):
-                maxval = np.max(data_np[i])
-                minval = np.min(data_np[i])
-                meanval = np.mean(data_np[i])
-                rmsval = np.sqrt(np.mean(np.square(data_np[i])))
-                fmt_stat = "  Min: %s  Max: %s  Mean: %s  Rms: %s" % (
-                    self.fmt_cell, self.fmt_cell, self.fmt_cell, self.fmt_cell)
-                sum_text = fmt_stat.format(minval, maxval, meanval, rmsval)
-            else:
-                sum_text = "No finite data elements in cutout"
-            self.w.stats1.set_text(sum_text)
+    def calc_stats(self, data):
+        """Calculate statistics of the finite elements of `data`, returned
+        like those of `~ginga.util.histindex.TiledHistogram.stats`."""
+        data = data[np.isfinite(data)]
+        if len(data) == 0:
+            return Bunch.Bunch(count=0)
+        return Bunch.Bunch(count=len(data), minval=np.min(data),
+                           maxval=np.max(data), mean=np.mean(data),
+                           rms=np.sqrt(np.mean(np.square(data))))
+
+    def show_stats_line(self, stats):
+        if stats.count > 0:
+            fmt_stat = "  Min: %s  Max: %s  Mean: %s  Rms: %s" % (
+                self.fmt_cell, self.fmt_cell, self.fmt_cell, self.fmt_cell)
+            sum_text = fmt_stat.format(stats.minval, stats.maxval,
+                                       stats.mean, stats.rms)
+        else:
+            sum_text = "No finite data elements in cutout"
+        self.w.stats1.set_text(sum_text)
+
+    def get_index(self):
+        """Return the tiled histogram index of the channel image, or None
+        if the image cannot be indexed or its index is not built yet (in
+        which case it is started in the background)."""
+        if not self.settings.get('live_update', True):
+            return None
+        image = self.fitsimage.get_image()
+        if image is None:
+            return None
+        data = image.get_data()
+        if data is None or data.ndim != 2:
+            return None
+        key = (id(data), data.shape, self.numbins)
+        if self._index_key == key:
+            return self._index
+        if self._index_building != key:
+            self._index_building = key
+            self.fv.nongui_do(self._build_index, key, data)
+        return None
+
+    def _build_index(self, key, data):
+        try:
+            index = TiledHistogram(data, numbins=self.numbins,
+                                   tile_size=self.settings.get('tile_size', 256))
+        except Exception as e:
+            self.logger.error("Error building histogram index: {}".format(e),
+                              exc_info=True)
+            return
+        if self._index_building == key:
+            self._index, self._index_key = index, key
+            self._index_building = None
 
-        self.fv.show_status("Click or drag left mouse button to move region")
-        return True
+    def redo_live(self, x1, y1, x2, y2):
+        """Update the histogram and statistics for a box being dragged,
+        from the tiled histogram index (if it is ready)."""
+        if not self.gui_up:
+            return
+        cur_time = time.time()
+        if cur_time - self._live_time < self.settings.get('live_interval',
+                                                          0.05):
+            return
+        index = self.get_index()
+        if index is None:
+            return
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        res = index.histogram(x1, y1, x2, y2)
+        self.plot_histograms([(res, 'blue', 1.0)])
+        if self.show_stats:
+            self.show_stats_line(index.stats(x1, y1, x2, y2))
+        # pace updates by the time they take
+        self._live_time = time.time() + (time.time() - cur_time)
 
     def update(self, canvas, event, data_x, data_y, viewer):
 
@@ -508,6 +592,9 @@ class Histogram(GingaPlugin.LocalPlugin):
             bbox.x1, bbox.y1, bbox.x2, bbox.y2 = x1, y1, x2, y2
             canvas.redraw(whence=3)
 
+        # approximate update from the index; the exact histogram is
+        # calculated when the button is released
+        self.redo_live(int(x1), int(y1), int(x2), int(y2))
         return True
 
     def draw_cb(self, canvas, tag):
@@ -20,8 +20,14 @@ HDUs.
 
 For a data cube, you can save a slice as an image using the "Save Slice"
 button or create a movie using the "Save Movie" button by entering the
-"Start" and "End" slice indices. This feature requires ``mencoder`` to be
-installed.
+"Start" and "End" slice indices (both inclusive).  The slices are rendered
+with the current cut levels and color map, a few at a time, so that even
+cubes larger than memory can be saved.  If "Use viewer" is checked, the
+frames are rendered as shown in the viewer (with its zoom, pan and
+rotation); otherwise each frame is the full slice.  The movie is encoded
+with ``ffmpeg`` or ``mencoder`` if one is installed; if the file name has
+an image extension (e.g. ``.png``), or no encoder is installed, the frames
+are saved as a numbered sequence of images instead.
 
 For a FITS table, its data are read in using Astropy table.
 Column units are displayed right under the main header ("None" if no unit).
@@ -43,21 +49,14 @@ to step through the planes in that axis.
 import time
 import re
 import os
-from shutil import which
-from contextlib import contextmanager
 
 from ginga.gw import Widgets
 from ginga.misc import Future
 from ginga import GingaPlugin
-from ginga.util import iohelper
-from ginga.util.videosink import VideoSink
+from ginga.util import iohelper, movie, videosink
 
 import numpy as np
 
-have_mencoder = False
-if which("mencoder") is not None:
-    have_mencoder = True
-
 __all__ = ['MultiDim']
 
 
@@ -92,7 +91,9 @@ class MultiDim(GingaPlugin.LocalPlugin):
         prefs = self.fv.get_preferences()
         self.settings = prefs.create_category('plugin_MultiDim')
         self.settings.add_defaults(sort_keys=['index'],
-                                   sort_reverse=False)
+                                   sort_reverse=False,
+                                   movie_fps=10, movie_workers=2,
+                                   movie_use_viewer=False)
         self.settings.load(onError='silent')
 
         self.gui_up = False
@@ -178,24 +179,23 @@ class MultiDim(GingaPlugin.LocalPlugin):
         vbox.add_widget(w, stretch=0)
 
         fr = Widgets.Frame(_tr("Movie"))
-        if have_mencoder:
-            captions = [("Start:", 'label', "Start Slice", 'entry',
-                         "End:", 'label', "End Slice", 'entry',
-                         'Save Movie', 'button')]
-            w, b = Widgets.build_info(captions, orientation=orientation)
-            self.w.update(b)
-            b.start_slice.set_tooltip(_tr("Starting slice"))
-            b.end_slice.set_tooltip(_tr("Ending slice"))
-            b.start_slice.set_length(6)
-            b.end_slice.set_length(6)
-            b.save_movie.add_callback(
-                'activated', lambda w: self.save_movie_cb())
-            b.save_movie.set_enabled(False)
-            fr.set_widget(w)
-        else:
-            infolbl = Widgets.Label()
-            infolbl.set_text("Please install 'mencoder' to save as movie")
-            fr.set_widget(infolbl)
+        captions = [("Start:", 'label', "Start Slice", 'entry',
+                     "End:", 'label', "End Slice", 'entry'),
+                    ("Use viewer", 'checkbutton', 'Save Movie', 'button'),
+                    ("Progress", 'progress'),
+                    ]
+        w, b = Widgets.build_info(captions, orientation=orientation)
+        self.w.update(b)
+        b.start_slice.set_tooltip(_tr("Starting slice"))
+        b.end_slice.set_tooltip(_tr("Ending slice"))
+        b.start_slice.set_length(6)
+        b.end_slice.set_length(6)
+        b.use_viewer.set_state(self.settings.get('movie_use_viewer', False))
+        b.use_viewer.set_tooltip(_tr("Render frames as shown in the viewer"))
+        b.save_movie.add_callback(
+            'activated', lambda w: self.save_movie_cb())
+        b.save_movie.set_enabled(False)
+        fr.set_widget(w)
         vbox.add_widget(fr, stretch=0)
 
         # spacer = Widgets.Label('')
@@ -369,8 +369,7 @@ class MultiDim(GingaPlugin.LocalPlugin):
         self.w.interval.set_enabled(is_dc)
 
         self.w.save_slice.set_enabled(is_dc)
-        if have_mencoder:
-            self.w.save_movie.set_enabled(is_dc)
+        self.w.save_movie.set_enabled(is_dc)
 
     def close(self):
         self.fv.stop_local_plugin(self.chname, str(self))
@@ -712,38 +711,59 @@ class MultiDim(GingaPlugin.LocalPlugin):
             self.fv.show_status("Wrong slice order")
             return
 
-        start, end = start - 1, end - 1
-
         w = Widgets.SaveDialog(title='Save Movie',
-                               selectedfilter='*.avi')
+                               selectedfilter='*.mp4')
         target = w.get_path()
         if target is not None:
-            self.save_movie(start, end, target)
+            # slices in the entries are 1-based and inclusive
+            self.save_movie(start - 1, end, target)
 
     def save_movie(self, start, end, target_file):
+        """Save slices `start` up to (not including) `end` along the
+        current play axis as a movie in `target_file`.
+        """
         image = self.fitsimage.get_image()
-        loval, hival = self.fitsimage.get_cut_levels()
-        data = np.array(image.get_mddata()).clip(loval, hival)
+        use_viewer = self.w.use_viewer.get_state()
+        exporter = movie.MovieExporter(
+            self.logger, self.fitsimage,
+            num_workers=self.settings.get('movie_workers', 2),
+            use_viewer=use_viewer)
+        sink = videosink.get_video_sink(exporter.get_frame_size(image),
+                                        target_file,
+                                        rate=self.settings.get('movie_fps', 10))
+        axis, naxispath = self.play_axis, list(self.naxispath)
+
+        self.w.save_movie.set_enabled(False)
+        self.w.progress.set_value(0.0)
+        self.fv.show_status("Saving movie...")
+        self.fv.nongui_do(self._save_movie, exporter, image, sink,
+                          start, end, axis, naxispath)
+
+    def _save_movie(self, exporter, image, sink, start, end, axis,
+                    naxispath):
+        def _progress(pct):
+            self.fv.gui_do(self.w.progress.set_value, pct)
 
-        # http://stackoverflow.com/questions/7042190/plotting-directly-to-movie-with-numpy-and-mencoder
-        data_rescaled = ((data - loval) * 255 / (hival - loval)).astype(
-            np.uint8, copy=False)
+        try:
+            t1 = time.time()
+            count = exporter.export(image, sink, start, end, axis=axis,
+                                    naxispath=naxispath,
+                                    progress_cb=_progress)
+            msg = "Saved movie ({} frames in {:.2f} sec)".format(
+                count, time.time() - t1)
+            if isinstance(sink, videosink.FrameSequenceSink):
+                msg += " as images '{}'".format(sink.template)
 
-        W, H = image.get_data_size()
-        with self.video_writer(VideoSink((H, W), target_file)) as video:
-            for i in range(start, end):
-                video.write(np.flipud(data_rescaled[i]))
+        except Exception as e:
+            msg = "Error saving movie: {}".format(e)
+            self.logger.error(msg, exc_info=True)
 
-        self.fv.show_status("Successfully saved movie")
+        self.fv.gui_do(self._save_movie_done, msg)
 
-    @contextmanager
-    def video_writer(self, v):
-        v.open()
-        try:
-            yield v
-        finally:
-            v.close()
-        return
+    def _save_movie_done(self, msg):
+        self.fv.show_status(msg)
+        if self.gui_up:
+            self.w.save_movie.set_enabled(True)
 
     def __str__(self):
         return 'multidim'
@@ -23,6 +23,13 @@ channel image.
 
 The color/intensity map and cut levels of the ``Pan`` image are updated
 when they are changed in the corresponding channel image.
+
+For large images, the ``Pan`` image is drawn from a smaller copy of the
+channel image (every Nth pixel), which is made once per image and shared
+by the ``Pan`` images of all channels showing it; the "overview_size"
+setting gives the largest width or height of this copy.  Panning and
+zooming the channel image only moves the pan rectangle.
+
 The ``Pan`` image also displays the World Coordinate System (WCS) compass, if
 valid WCS metadata is present in the FITS HDU being viewed in the
 channel.
@@ -41,6 +48,7 @@ import math
 
 from ginga.gw import Widgets, Viewers
 from ginga.util import wcs
+from ginga.util.overview import OverviewCanvas
 from ginga import GingaPlugin
 
 __all__ = ['Pan']
@@ -102,7 +110,8 @@ class PanChild(GingaPlugin.ChildPlugin):
         self.settings.add_defaults(pan_position_color='yellow',
                                    pan_rectangle_color='red',
                                    compass_color='skyblue',
-                                   rotate_pan_image=True)
+                                   rotate_pan_image=True,
+                                   overview_size=1024)
         self.settings.load(onError='silent')
 
         self._wd = 200
@@ -144,8 +153,11 @@ class PanChild(GingaPlugin.ChildPlugin):
         my_canvas.set_drawtype('rectangle', linestyle='dash', color='green')
         my_canvas.set_callback('draw-event', self.draw_cb)
 
-        # we share a canvas with the main channel image viewer
-        canvas = self.fitsimage.get_canvas()
+        # we show the canvas of the main channel image viewer, with an
+        # overview in place of the image
+        canvas = OverviewCanvas(self.fitsimage.get_canvas(),
+                                max_size=self.settings.get('overview_size',
+                                                           1024))
         pi.set_canvas(canvas)
 
         bd = pi.get_bindings()
@@ -218,9 +230,15 @@ class PanChild(GingaPlugin.ChildPlugin):
         if not self.gui_up:
             return
         if whence < 3:
-            self.fitsimage.copy_attributes(self.panimage, self.copy_attrs,
-                                           whence=whence)
-            self.panimage.zoom_fit()
+            # only settings that changed cause the pan image to be redrawn;
+            # a pan or zoom of the channel image just moves the rectangle
+            keys = self.fitsimage.copy_attributes(self.panimage,
+                                                  self.copy_attrs,
+                                                  whence=whence,
+                                                  only_changed=True)
+            if len(set(keys) & set(['limits', 'flip_x', 'flip_y',
+                                    'swap_xy', 'rot_deg'])) > 0:
+                self.panimage.zoom_fit()
             self.panset()
         else:
             # nothing except a graphical overlay change, so simply
@@ -323,6 +323,11 @@ class Pick(GingaPlugin.LocalPlugin):
         self._textlabel = self.ident.capitalize()
 
         self.contour_image = None
+        self.contour_engine = None
+        # data and cache key of the contours shown in contour_image
+        self.contour_data = None
+        self.contour_key = None
+        self.contour_grps = None
         self.contour_plot = None
         self.fwhm_plot = None
         self.radial_plot = None
@@ -567,6 +572,10 @@ class Pick(GingaPlugin.LocalPlugin):
                 ci.set_color_map('pastel')
             ci.show_color_bar(True)
             self.contour_image = ci
+            self.contour_engine = contour.ContourEngine()
+            # simplify the contours again for the new scale on zoom
+            t_.get_setting('scale').add_callback('set',
+                                                 self.contour_scale_cb)
 
             bd = ci.get_bindings()
             bd.enable_pan(True)
@@ -1177,11 +1186,18 @@ class Pick(GingaPlugin.LocalPlugin):
 
         else:
             data = self.pick_data
+            x1, y1 = self.pick_x1, self.pick_y1
+            x2, y2 = x1 + wd - 1, y1 + ht - 1
             x, y = self.pickcenter.x, self.pickcenter.y
 
         try:
             if self.contour_image is not None:
                 cv = self.contour_image
+                # each pick makes a new cutout array, so key the cached
+                # contours by the image and the bounds of the cutout
+                self.contour_data = data
+                self.contour_key = (image.get('name', None), x1, y1, x2, y2)
+                self.contour_grps = None
                 with cv.suppress_redraw:
                     cv.set_data(data)
                     # copy orientation of main image, so that contour will
@@ -1193,20 +1209,7 @@ class Pick(GingaPlugin.LocalPlugin):
 
                     cv.panset_xy(x, y)
 
-                    canvas = self.contour_canvas
-                    try:
-                        canvas.delete_object_by_tag('_$cntr', redraw=False)
-                    except KeyError:
-                        pass
-
-                    # calculate contour polygons
-                    contour_grps = contour.calc_contours(data, self.num_contours)
-
-                    # get compound polygons object
-                    c_obj = contour.create_contours_obj(canvas, contour_grps,
-                                                        colors=['black'],
-                                                        linewidth=2)
-                    canvas.add(c_obj, tag='_$cntr')
+                    self.draw_contours()
 
             elif self.contour_plot is not None:
                 self.contour_plot.plot_contours_data(
@@ -1216,8 +1219,44 @@ class Pick(GingaPlugin.LocalPlugin):
             self.logger.error("Error making contour plot: %s" % (
                 str(e)))
 
+    def draw_contours(self):
+        # draw the contour paths, simplified to the resolution of the
+        # contour viewer
+        if self.contour_data is None or self.contour_engine is None:
+            return
+        cv = self.contour_image
+        tol = contour.get_display_tolerance(cv)
+        contour_grps = self.contour_engine.calc_contours(
+            self.contour_data, self.num_contours, tolerance=tol,
+            key=self.contour_key)
+        if contour_grps is self.contour_grps:
+            # same simplification as the one shown
+            return
+        self.contour_grps = contour_grps
+
+        canvas = self.contour_canvas
+        try:
+            canvas.delete_object_by_tag('_$cntr', redraw=False)
+        except KeyError:
+            pass
+
+        # get compound object of the paths of each level
+        c_obj = contour.create_contour_levels_obj(
+            canvas, contour_grps, colors=['black'], linewidth=2)
+        canvas.add(c_obj, tag='_$cntr')
+
+    def contour_scale_cb(self, setting, value):
+        try:
+            self.draw_contours()
+
+        except Exception as e:
+            self.logger.error("Error making contour plot: %s" % (
+                str(e)))
+
     def clear_contours(self):
         if self.contour_image is not None:
+            self.contour_data = None
+            self.contour_grps = None
             self.contour_canvas.delete_all_objects()
         elif self.contour_plot is not None:
             self.contour_plot.clear()
@@ -1307,6 +1346,11 @@ class Pick(GingaPlugin.LocalPlugin):
             p_canvas.delete_object_by_tag(self.layertag)
         except Exception:
             pass
+        if self.contour_engine is not None:
+            self.contour_engine.shutdown()
+            self.contour_engine = None
+        self.contour_data = None
+        self.contour_grps = None
         self.fv.show_status("")
 
     def redo_manual(self):
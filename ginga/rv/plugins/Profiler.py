@@ -0,0 +1,217 @@
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+"""
+See where time goes in the reference viewer.
+
+**Plugin Type: Global**
+
+``Profiler`` is a global plugin.  Only one instance can be opened.
+
+**Usage**
+
+Press "Start" to start recording the time taken by every callback handler,
+pipeline stage, task run on the GUI thread and viewer redraw (see
+``ginga.util.profiler``), and "Stop" to stop recording.  Profiling is off
+until it is started here, or by the ``start_profiler`` command of the
+``RC`` plugin.
+
+The table shows, for each callback handler, stage, etc., the category,
+the number of times it ran, the total time and the 50th, 90th and 99th
+percentile and maximum of the time (in msec) over the most recent runs.
+The rows taking the most total time are shown.  The table is refreshed
+periodically while the plugin is open; the "Category" box selects the
+category shown.
+
+"Clear" forgets everything recorded so far.  "Save Trace" saves the
+recorded events as a Chrome trace JSON file, which can be opened in
+``chrome://tracing`` or https://ui.perfetto.dev to see the timeline of
+events in each thread.
+
+The same can be done remotely with the ``RC`` plugin, e.g.::
+
+    $ ggrc ginga start_profiler
+    $ ggrc ginga get_profile_report
+    $ ggrc ginga save_profile_trace /tmp/ginga-trace.json
+    $ ggrc ginga stop_profiler
+
+**Settings**
+
+``max_events`` is the number of the most recent events kept for the
+trace, ``window`` the number of the most recent runs the percentiles are
+computed from, ``refresh_interval`` the number of seconds between updates
+of the table and ``max_rows`` the number of rows shown.
+
+"""
+from ginga import GingaPlugin
+from ginga.gw import Widgets
+from ginga.util import profiler
+from ginga.locale.localize import _tr
+
+__all__ = ['Profiler']
+
+
+class Profiler(GingaPlugin.GlobalPlugin):
+
+    def __init__(self, fv):
+        # superclass defines some variables for us, like logger
+        super(Profiler, self).__init__(fv)
+
+        prefs = self.fv.get_preferences()
+        self.settings = prefs.create_category('plugin_Profiler')
+        self.settings.add_defaults(max_events=100000, window=1000,
+                                   refresh_interval=2.0, max_rows=50)
+        self.settings.load(onError='silent')
+
+        self.categories = ['All', 'callback', 'stage', 'gui', 'redraw']
+        self.category = 'All'
+        self.columns = [("Name", 'name'),
+                        ("Category", 'cat'),
+                        ("Count", 'count'),
+                        ("Total", 'total'),
+                        ("p50", 'p50'),
+                        ("p90", 'p90'),
+                        ("p99", 'p99'),
+                        ("Max", 'max')]
+
+        self.timer = fv.get_timer()
+        self.timer.set_callback('expired', self._refresh_cb)
+        self.gui_up = False
+
+    def build_gui(self, container):
+        vbox = Widgets.VBox()
+        vbox.set_spacing(1)
+
+        tv = Widgets.TreeView(sortable=True, use_alt_row_color=True)
+        tv.setup_table(self.columns, 1, 'name')
+        self.w.table = tv
+        vbox.add_widget(tv, stretch=1)
+
+        captions = (('Start', 'button', 'Stop', 'button',
+                     'Clear', 'button', 'Save Trace', 'button'),
+                    ('Category:', 'label', 'category', 'combobox',
+                     'status', 'llabel'),
+                    )
+        w, b = Widgets.build_info(captions)
+        self.w.update(b)
+
+        b.start.add_callback('activated', lambda w: self.start_profiler())
+        b.start.set_tooltip(_tr("Start recording timing events"))
+        b.stop.add_callback('activated', lambda w: self.stop_profiler())
+        b.stop.set_tooltip(_tr("Stop recording timing events"))
+        b.clear.add_callback('activated', lambda w: self.clear())
+        b.clear.set_tooltip(_tr("Forget the events recorded so far"))
+        b.save_trace.add_callback('activated', self.save_trace_cb)
+        b.save_trace.set_tooltip(_tr("Save the recorded events as a "
+                                     "Chrome trace file"))
+
+        combobox = b.category
+        for name in self.categories:
+            combobox.append_text(name)
+        combobox.set_index(self.categories.index(self.category))
+        combobox.add_callback('activated', self.set_category_cb)
+        combobox.set_tooltip(_tr("Category of events shown"))
+        vbox.add_widget(w, stretch=0)
+
+        btns = Widgets.HBox()
+        btns.set_border_width(4)
+        btns.set_spacing(4)
+
+        btn = Widgets.Button(_tr("Close"))
+        btn.add_callback('activated', lambda w: self.close())
+        btns.add_widget(btn)
+        btn = Widgets.Button(_tr("Help"))
+        btn.add_callback('activated', lambda w: self.help())
+        btns.add_widget(btn, stretch=0)
+        btns.add_widget(Widgets.Label(''), stretch=1)
+        vbox.add_widget(btns, stretch=0)
+
+        container.add_widget(vbox, stretch=1)
+        self.gui_up = True
+
+    def start_profiler(self):
+        self.fv.start_profiler(max_events=self.settings.get('max_events'),
+                               window=self.settings.get('window'))
+        self.refresh()
+
+    def stop_profiler(self):
+        self.fv.stop_profiler()
+        self.refresh()
+
+    def clear(self):
+        prof = self._get_profiler()
+        if prof is not None:
+            prof.clear()
+        self.refresh()
+
+    def _get_profiler(self):
+        try:
+            return self.fv._get_profiler()
+        except ValueError:
+            return None
+
+    def set_category_cb(self, w, index):
+        self.category = self.categories[index]
+        self.refresh()
+
+    def save_trace_cb(self, w):
+        if self._get_profiler() is None:
+            self.fv.show_error("Profiler has not been started")
+            return
+        w = Widgets.SaveDialog(title='Save Trace',
+                               selectedfilter='*.json')
+        path = w.get_path()
+        if path is not None:
+            self.fv.save_profile_trace(path)
+
+    def refresh(self):
+        if not self.gui_up:
+            return
+        prof = self._get_profiler()
+        if profiler.get_profiler() is not None:
+            status = "recording"
+        elif prof is not None:
+            status = "stopped"
+        else:
+            status = "not started"
+
+        tree_dict = dict()
+        if prof is not None:
+            cat = None if self.category == 'All' else self.category
+            stats = prof.get_stats(cat=cat)
+            status += ", {} events".format(sum([st.count for st in stats]))
+            for st in stats[:self.settings.get('max_rows', 50)]:
+                key = "{}: {}".format(st.cat, st.name)
+                tree_dict[key] = dict(
+                    name=st.name, cat=st.cat, count=st.count,
+                    total="{:.1f}".format(st.total * 1000),
+                    p50="{:.2f}".format(st.p50 * 1000),
+                    p90="{:.2f}".format(st.p90 * 1000),
+                    p99="{:.2f}".format(st.p99 * 1000),
+                    max="{:.2f}".format(st.max * 1000))
+        self.w.status.set_text(status)
+        self.w.table.set_tree(tree_dict)
+
+    def _refresh_cb(self, timer):
+        # called from the timer thread
+        if not self.gui_up:
+            return
+        self.fv.gui_do(self.refresh)
+        timer.set(self.settings.get('refresh_interval', 2.0))
+
+    def start(self):
+        self.refresh()
+        self.w.table.set_optimal_column_widths()
+        self.timer.set(self.settings.get('refresh_interval', 2.0))
+
+    def stop(self):
+        self.timer.clear()
+        self.gui_up = False
+
+    def close(self):
+        self.fv.stop_global_plugin(str(self))
+        return True
+
+    def __str__(self):
+        return 'profiler'
+
+# END
@@ -181,9 +181,29 @@ of points defined by two Numpy arrays::
 
 This will draw a red line on the image.
 
+*Fast Image Transport*
+
+Sending large images by XML-RPC is slow.  If Ginga is running on the same
+host, ``RemoteClient`` instead puts the image data in a shared memory
+block and passes only its name in the call (the default for a local
+host).  For a producer of many frames, filling an array obtained from
+``viewer.get_shared_array(shape, dtype)`` and passing that to
+``ch.load_np()`` avoids the copy into the shared memory (Ginga still
+copies the data out of it).
+
+For a remote host, set ``data_port`` in the plugin configuration to start
+a server for a binary socket protocol, and connect with::
+
+        viewer = grc.RemoteClient(host, port, data_port=data_port,
+                                  codec='lz4')
+
+The codec can be None (no compression), 'bz2', 'lz4' (requires the
+``lz4`` package) or 'zstd' (requires the ``zstandard`` package).
+Frames larger than the ``data_max_frame_size`` setting (in bytes) are
+refused.
+
 """
 import sys
-import bz2
 from io import BytesIO
 
 from ginga import GingaPlugin
@@ -206,9 +226,10 @@ class RC(GingaPlugin.GlobalPlugin):
         # get RC preferences
         prefs = self.fv.get_preferences()
         self.settings = prefs.create_category('plugin_RC')
-        self.settings.add_defaults(bind_host='localhost',
-                                   bind_port=grc.default_rc_port,
-                                   start_server=True)
+        self.settings.add_defaults(
+            bind_host='localhost', bind_port=grc.default_rc_port,
+            start_server=True, data_port=None,
+            data_max_frame_size=grc.default_max_frame_size)
         self.settings.load(onError='silent')
 
         # What port to listen for requests
@@ -220,6 +241,8 @@ class RC(GingaPlugin.GlobalPlugin):
         self.robj = None
         # this will hold the remote object server
         self.server = None
+        # this will hold the binary data server
+        self.data_server = None
 
         self.ev_quit = fv.ev_quit
 
@@ -281,19 +304,43 @@ class RC(GingaPlugin.GlobalPlugin):
             self.fv.show_error(errmsg, raisetab=True)
             self.logger.error(errmsg, exc_info=True)
 
+        data_port = self.settings.get('data_port', None)
+        if data_port is None:
+            return
+        max_frame_size = self.settings.get('data_max_frame_size',
+                                           grc.default_max_frame_size)
+        self.data_server = grc.BinaryServer(self.robj,
+                                            host=self.host, port=data_port,
+                                            ev_quit=self.fv.ev_quit,
+                                            logger=self.logger,
+                                            max_frame_size=max_frame_size)
+        try:
+            self.data_server.start(thread_pool=self.fv.get_threadPool())
+
+        except Exception as e:
+            self.data_server = None
+            errmsg = f"RC plugin: data server failed to start: {e}"
+            self.fv.show_error(errmsg, raisetab=True)
+            self.logger.error(errmsg, exc_info=True)
+
     def start(self):
         if self.settings.get('start_server', False):
             self.start_server()
 
-    def stop(self):
+    def stop_server(self):
         if self.server is not None:
             self.server.stop()
         self.server = None
+        if self.data_server is not None:
+            self.data_server.stop()
+        self.data_server = None
+
+    def stop(self):
+        self.stop_server()
 
     def restart_cb(self, w):
         # restart server
-        if self.server is not None:
-            self.server.stop()
+        self.stop_server()
         self.start_server()
 
     def set_addr_cb(self, w):
@@ -374,7 +421,9 @@ class GingaWrapper:
         header : dict
             fits file header as a dictionary
         metadata : dict
-            other metadata about image to attach to image
+            other metadata about image to attach to image; if it has a
+            "decompress" item the buffer is decompressed with that codec
+            ("bz2", "lz4" or "zstd")
         compressed : bool
             decompress buffer using "bz2"
 
@@ -397,8 +446,10 @@ class GingaWrapper:
         try:
             # Uncompress data if necessary
             decompress = metadata.get('decompress', None)
-            if compressed or (decompress == 'bz2'):
-                img_buf = bz2.decompress(img_buf)
+            if compressed:
+                decompress = 'bz2'
+            if decompress is not None:
+                img_buf = grc.decompress_buffer(img_buf, decompress)
 
             # dtype string works for most instances
             if dtype == '':
@@ -420,6 +471,56 @@ class GingaWrapper:
             self.logger.error(errmsg)
             raise GingaPlugin.PluginError(errmsg)
 
+        self._add_image(imname, chname, image)
+        return 0
+
+    def load_shm(self, imname, chname, shm_name, dims, dtype,
+                 header, metadata):
+        """Display an image from a shared memory block.
+
+        This is used by `ginga.util.grc.RemoteClient` for a local server.
+
+        Parameters
+        ----------
+        imname : string
+            a name to use for the image in Ginga
+        chname : string
+            channel in which to load the image
+        shm_name : string
+            name of the shared memory block (see
+            `multiprocessing.shared_memory`) holding the image data
+        dims : tuple
+            image dimensions in pixels (usually (height, width))
+        dtype : string
+            numpy data type of encoding (e.g. '<f4')
+        header : dict
+            fits file header as a dictionary
+        metadata : dict
+            other metadata about image to attach to image
+
+        Returns
+        -------
+        0
+        """
+        try:
+            data = grc.read_shared_array(shm_name, tuple(dims), dtype)
+            self.logger.info("received image data len=%d" % (data.nbytes))
+
+            image = AstroImage.AstroImage(logger=self.logger)
+            image.load_data(data, metadata=metadata)
+            image.update_keywords(header)
+            image.set(name=imname, path=None)
+
+        except Exception as e:
+            errmsg = "Error creating image data for '%s': %s" % (
+                imname, str(e))
+            self.logger.error(errmsg)
+            raise GingaPlugin.PluginError(errmsg)
+
+        self._add_image(imname, chname, image)
+        return 0
+
+    def _add_image(self, imname, chname, image):
         # Display the image
         channel = self.fv.gui_call(self.fv.get_channel_on_demand, chname)
 
@@ -429,7 +530,6 @@ class GingaWrapper:
 
         self.fv.gui_do(self.fv.add_image, imname, image,
                        chname=channel.name)
-        return 0
 
     def load_fits_buffer(self, imname, chname, file_buf, num_hdu,
                          metadata):
@@ -439,8 +539,8 @@ class GingaWrapper:
         try:
             # Uncompress data if necessary
             decompress = metadata.get('decompress', None)
-            if decompress == 'bz2':
-                file_buf = bz2.decompress(file_buf)
+            if decompress is not None:
+                file_buf = grc.decompress_buffer(file_buf, decompress)
 
             self.logger.info("received data: len=%d num_hdu=%d" % (
                 len(file_buf), num_hdu))
@@ -461,15 +561,7 @@ class GingaWrapper:
             self.logger.error(errmsg)
             raise GingaPlugin.PluginError(errmsg)
 
-        # Display the image
-        channel = self.fv.gui_call(self.fv.get_channel_on_demand, chname)
-
-        # Note: this little hack needed to let window resize in time for
-        # file to auto-size properly
-        self.fv.gui_do(self.fv.change_channel, channel.name)
-
-        self.fv.gui_do(self.fv.add_image, imname, image,
-                       chname=channel.name)
+        self._add_image(imname, chname, image)
         return 0
 
     def channel(self, chname, method_name, *args, **kwdargs):
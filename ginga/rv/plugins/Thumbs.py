@@ -870,6 +870,12 @@ class Thumbs(GingaPlugin.GlobalPlugin):
         header = {}
         if image is not None:
             header = image.get_header()
+        else:
+            # from the file index, if the image was loaded before
+            entry = self.fv.get_file_index_entry(info.get('path', None),
+                                                 idx=info.get('idx', None))
+            if entry is not None:
+                header = entry.header
 
         if keywords is None:
             keywords = self.keywords
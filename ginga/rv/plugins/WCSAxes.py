@@ -218,7 +218,7 @@ class WCSAxes(LocalPlugin):
             self.w.num_ra.set_text(str(self.axes.num_ra))
         else:
             self.axes.num_ra = n
-            self.axes._cur_image = None  # Force redraw
+            self.axes.reset_grid()  # Force redraw
             self.canvas.update_canvas()
         return True
 
@@ -231,7 +231,7 @@ class WCSAxes(LocalPlugin):
             self.w.num_dec.set_text(str(self.axes.num_dec))
         else:
             self.axes.num_dec = n
-            self.axes._cur_image = None  # Force redraw
+            self.axes.reset_grid()  # Force redraw
             self.canvas.update_canvas()
         return True
 
@@ -243,7 +243,7 @@ class WCSAxes(LocalPlugin):
         # rebuild.
         if (val and not np.any([obj.kind == 'text'
                                 for obj in self.axes.objects])):
-            self.axes._cur_image = None  # Force redraw
+            self.axes.reset_grid()  # Force redraw
         else:
             self.axes.sync_state()
 
@@ -271,7 +271,7 @@ class WCSAxes(LocalPlugin):
             self.w.text_offset.set_text(str(self.axes.txt_off))
         else:
             self.axes.txt_off = val
-            self.axes._cur_image = None  # Force redraw
+            self.axes.reset_grid()  # Force redraw
             self.canvas.update_canvas()
         return True
 
@@ -324,7 +324,7 @@ class WCSAxes(LocalPlugin):
 
     def stop(self):
         # so we don't hang on to a large image
-        self.axes._cur_image = None
+        self.axes.reset_grid()
 
         # remove the canvas from the image
         p_canvas = self.fitsimage.get_canvas()
@@ -18,6 +18,201 @@ class AstroTableHeader(Header):
     pass
 
 
+class TableColumns:
+    """Column-oriented table data, with columns loaded lazily.
+
+    Each column is fetched by calling ``loader(colname)`` the first time
+    it is accessed and is cached thereafter, so opening a table with many
+    columns and millions of rows only costs what is actually used.  When
+    the loader returns views of a memory-mapped file (see
+    :meth:`from_fits_hdu`) only the pages touched are read from disk.
+
+    This provides the subset of the `astropy.table.Table` interface used
+    by Ginga (``colnames``, ``len()``, ``masked`` and ``tab[colname]``
+    returning an `astropy.table.Column`).
+
+    Parameters
+    ----------
+    colnames : list of str
+        Names of the columns
+
+    nrows : int
+        Number of rows
+
+    loader : callable
+        Function taking a column name and returning a 1D array-like
+
+    units : dict or None
+        Optional units of the columns, keyed by name
+
+    """
+    masked = False
+
+    def __init__(self, colnames, nrows, loader, units=None):
+        self.colnames = list(colnames)
+        self.nrows = nrows
+        self.loader = loader
+        if units is None:
+            units = dict()
+        self.units = units
+        self._cols = dict()
+
+    @classmethod
+    def from_fits_hdu(cls, hdu):
+        """Make a columnar table from a FITS (binary) table HDU.
+
+        If the HDU was opened with ``memmap=True`` the columns are views
+        of the memory-mapped file.
+        """
+        # NOTE: accessing hdu.data here sets up the (possibly memory-mapped)
+        # record array, but does not read any column data
+        data = hdu.data
+        cols = hdu.columns
+        units = {col.name: col.unit for col in cols if col.unit}
+        if data is None:
+            # no rows
+            nrows = 0
+
+            def loader(colname):
+                return np.empty(0, dtype=cols[colname].dtype)
+        else:
+            nrows = len(data)
+            loader = data.field
+        return cls(cols.names, nrows, loader, units=units)
+
+    def __len__(self):
+        return self.nrows
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            from astropy.table import Column
+            return Column(self.get_column(key), name=key,
+                          unit=self.units.get(key, None), copy=False)
+
+        # <-- row index array, boolean mask or slice
+        return self.take(key)
+
+    def get_column(self, colname):
+        """Return the named column as a numpy array, loading it if needed.
+        """
+        arr = self._cols.get(colname, None)
+        if arr is None:
+            if colname not in self.colnames:
+                raise KeyError(colname)
+            arr = np.asarray(self.loader(colname))
+            self._cols[colname] = arr
+        return arr
+
+    def is_loaded(self, colname):
+        """Return True if the named column has been loaded."""
+        return colname in self._cols
+
+    def take(self, rows):
+        """Return a new `TableColumns` of the selected rows.
+
+        The columns of the new table are gathered lazily from this one.
+        """
+        if isinstance(rows, slice):
+            nrows = len(range(*rows.indices(self.nrows)))
+        else:
+            rows = np.asarray(rows)
+            if rows.dtype == np.dtype(bool):
+                rows = np.flatnonzero(rows)
+            nrows = len(rows)
+
+        def _loader(colname):
+            return self.get_column(colname)[rows]
+
+        return TableColumns(self.colnames, nrows, _loader, units=self.units)
+
+
+class SortedIndex:
+    """Index on a table column, sorted by value.
+
+    Answers equality and range queries in ``O(log n + k)`` by binary
+    search, returning the matching row numbers.
+    """
+    kind = 'sorted'
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        self.order = np.argsort(values, kind='stable')
+        self.values = values[self.order]
+
+    def range(self, lo, hi, inclusive=(True, True)):
+        """Rows with values between `lo` and `hi` (None for unbounded)."""
+        i = 0
+        j = len(self.values)
+        if lo is not None:
+            side = 'left' if inclusive[0] else 'right'
+            i = np.searchsorted(self.values, lo, side=side)
+        if hi is not None:
+            side = 'right' if inclusive[1] else 'left'
+            j = np.searchsorted(self.values, hi, side=side)
+        return self.order[i:max(i, j)]
+
+    def equal(self, value):
+        """Rows with values equal to `value`."""
+        return self.range(value, value)
+
+    def isin(self, values):
+        """Rows with values in the sequence `values`."""
+        return np.concatenate([self.equal(value) for value in values] +
+                              [self.order[:0]])
+
+
+class BucketIndex:
+    """Index on a table column, grouping rows by distinct value.
+
+    Best for columns with few distinct values (e.g. flags, categories),
+    where equality and membership queries are answered by a lookup.
+    """
+    kind = 'bucket'
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        self.keys, inverse = np.unique(values, return_inverse=True)
+        self.order = np.argsort(inverse, kind='stable')
+        counts = np.bincount(inverse.ravel(), minlength=len(self.keys))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def _bucket(self, k):
+        return self.order[self.offsets[k]:self.offsets[k + 1]]
+
+    def equal(self, value):
+        """Rows with values equal to `value`."""
+        k = np.searchsorted(self.keys, value)
+        if k >= len(self.keys) or self.keys[k] != value:
+            return self.order[:0]
+        return self._bucket(k)
+
+    def isin(self, values):
+        """Rows with values in the sequence `values`."""
+        return np.concatenate([self.equal(value) for value in values] +
+                              [self.order[:0]])
+
+    def range(self, lo, hi, inclusive=(True, True)):
+        """Rows with values between `lo` and `hi` (None for unbounded)."""
+        i, j = 0, len(self.keys)
+        if lo is not None:
+            side = 'left' if inclusive[0] else 'right'
+            i = np.searchsorted(self.keys, lo, side=side)
+        if hi is not None:
+            side = 'right' if inclusive[1] else 'left'
+            j = np.searchsorted(self.keys, hi, side=side)
+        return self.order[self.offsets[i]:self.offsets[max(i, j)]]
+
+
+index_kinds = dict(sorted=SortedIndex, bucket=BucketIndex)
+
+# comparison operators usable in filter conditions
+_range_ops = {'<': (None, False), '<=': (None, True),
+              '>': (False, None), '>=': (True, None)}
+_cmp_ops = {'==': np.equal, '!=': np.not_equal,
+            '<': np.less, '<=': np.less_equal,
+            '>': np.greater, '>=': np.greater_equal}
+
+
 class AstroTable(ViewerObjectBase):
     """Abstraction of an astronomical data (table).
 
@@ -45,6 +240,8 @@ class AstroTable(ViewerObjectBase):
         self._data = data_ap
         self.naxispath = []
         self.colnames = []
+        # column indexes, keyed by column name
+        self._indexes = dict()
 
         # TODO: How to handle table with WCS data? For example, spectrum
         #       table may store dispersion solution as WCS.
@@ -115,18 +312,178 @@ class AstroTable(ViewerObjectBase):
         """Use this method to SHARE (not copy) the incoming table.
         """
         self._data = data_ap
+        self._indexes = dict()
 
         if metadata:
             self.update_metadata(metadata)
 
         self.make_callback('modified')
 
+    def set_columns(self, columns, metadata=None):
+        """Set the table from a `TableColumns` object (columnar mode).
+        """
+        self.kind = 'table-columnar'
+        self.colnames = list(columns.colnames)
+        self.set_data(columns, metadata=metadata)
+
     def clear_all(self):
         # clear metadata
         super(AstroTable, self).clear_all()
 
         # unreference data
         self._data = None
+        self._indexes = dict()
+
+    def is_columnar(self):
+        """Return True if the table is stored in columnar mode."""
+        return isinstance(self._data, TableColumns)
+
+    def get_column(self, colname):
+        """Return the named column of the table as a numpy array."""
+        tab = self._get_data()
+        if isinstance(tab, TableColumns):
+            return tab.get_column(colname)
+        return np.asarray(tab[colname])
+
+    def create_index(self, colname, kind='sorted'):
+        """Create an index on a column to speed up filtering.
+
+        Parameters
+        ----------
+        colname : str
+            Name of the column to index
+
+        kind : str
+            'sorted' (general purpose, good for range queries) or 'bucket'
+            (for columns with few distinct values)
+
+        Returns
+        -------
+        index : `SortedIndex` or `BucketIndex`
+            The index
+
+        """
+        if kind not in index_kinds:
+            raise TableError("unknown index kind '{}'".format(kind))
+        index = index_kinds[kind](self.get_column(colname))
+        self._indexes[colname] = index
+        return index
+
+    def drop_index(self, colname):
+        """Remove the index on a column, if any."""
+        self._indexes.pop(colname, None)
+
+    def get_index(self, colname):
+        """Return the index on a column, or None if it is not indexed."""
+        return self._indexes.get(colname, None)
+
+    def _query_index(self, index, op, value):
+        # returns matching rows, or None if the index can't answer `op`
+        if op == '==':
+            return index.equal(value)
+        if op == 'in':
+            return index.isin(value)
+        if op == 'between':
+            lo, hi = value
+            return index.range(lo, hi)
+        if op in _range_ops:
+            lo_incl, hi_incl = _range_ops[op]
+            if lo_incl is None:
+                return index.range(None, value, inclusive=(True, hi_incl))
+            return index.range(value, None, inclusive=(lo_incl, True))
+        return None
+
+    def _eval_condition(self, cond, rows):
+        # evaluate a condition on `rows` (None for all rows), returning
+        # a boolean mask
+        if callable(cond):
+            idx = slice(None) if rows is None else rows
+            return np.asarray(cond(self, idx), dtype=bool)
+
+        colname, op, value = cond
+        col = self.get_column(colname)
+        if rows is not None:
+            col = col[rows]
+        if op == 'between':
+            lo, hi = value
+            return (col >= lo) & (col <= hi)
+        if op == 'in':
+            return np.isin(col, value)
+        if op not in _cmp_ops:
+            raise TableError("unknown filter operator '{}'".format(op))
+        return _cmp_ops[op](col, value)
+
+    def filter_rows(self, *conditions):
+        """Find the rows satisfying all the given conditions.
+
+        Each condition is either a tuple ``(colname, op, value)``, where
+        `op` is one of ``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=``,
+        ``between`` (`value` is a ``(lo, hi)`` pair, inclusive) or ``in``
+        (`value` is a sequence), or a callable ``cond(table, rows)``
+        returning a boolean mask over `rows` (an array of row numbers, or
+        ``slice(None)`` for all rows, usable to index a column).
+
+        Conditions are evaluated vectorized, over whole columns.  If a
+        condition is on an indexed column (see :meth:`create_index`),
+        the index is used to find the candidate rows and the remaining
+        conditions are only evaluated on those rows.
+
+        Returns
+        -------
+        rows : ndarray of int
+            Matching row numbers, in increasing order
+
+        """
+        rows = None
+        remaining = []
+        for cond in conditions:
+            if rows is None and not callable(cond):
+                colname, op, value = cond
+                index = self._indexes.get(colname, None)
+                if index is not None:
+                    res = self._query_index(index, op, value)
+                    if res is not None:
+                        rows = np.sort(res)
+                        continue
+            remaining.append(cond)
+
+        if rows is None:
+            mask = np.ones(self.rows, dtype=bool)
+            for cond in remaining:
+                mask &= self._eval_condition(cond, None)
+            return np.flatnonzero(mask)
+
+        for cond in remaining:
+            if len(rows) == 0:
+                break
+            rows = rows[self._eval_condition(cond, rows)]
+        return rows
+
+    def get_row_view(self, start, stop, rows=None):
+        """Return a bounded window of rows, as a dict of column arrays.
+
+        Parameters
+        ----------
+        start, stop : int
+            Range of rows in the window
+
+        rows : array of int or None
+            If given, the window is over these rows (e.g. the result of
+            :meth:`filter_rows`) instead of all the rows
+
+        Returns
+        -------
+        view : dict
+            Column arrays keyed by column name, each of length at most
+            ``stop - start``
+
+        """
+        if rows is not None:
+            rows = np.asarray(rows)[start:stop]
+        else:
+            rows = slice(max(0, start), min(stop, self.rows))
+        return {colname: self.get_column(colname)[rows]
+                for colname in self.colnames}
 
     def get_minmax(self, noinf=False):
         # TODO: what should this mean for a table?
@@ -46,7 +46,8 @@ class TableViewBase(ViewerBase):
         self._table = None
 
         self.settings.add_defaults(color_alternate_rows=True,
-                                   max_rows_for_col_resize=5000)
+                                   max_rows_for_col_resize=5000,
+                                   max_rows_display=10000)
 
         # no specific UI modes for this viewer
         self.set_allowed_modes([])
@@ -89,13 +90,37 @@ class TableViewGw(TableViewBase):
                                        sortable=True,
                                        use_alt_row_color=color_alternate)
 
+        # Paging controls, shown for columnar tables with more rows than
+        # are displayed at once
+        self._page_start = 0
+        self.w_page_prev = Widgets.Button("Prev")
+        self.w_page_prev.set_tooltip("Show the previous rows")
+        self.w_page_prev.add_callback('activated',
+                                      lambda w: self.page_rows(-1))
+        self.w_page_next = Widgets.Button("Next")
+        self.w_page_next.set_tooltip("Show the next rows")
+        self.w_page_next.add_callback('activated',
+                                      lambda w: self.page_rows(1))
+        self.w_page_info = Widgets.Label('')
+        self.w_pager = Widgets.HBox()
+        self.w_pager.set_spacing(4)
+        self.w_pager.add_widget(self.w_page_prev, stretch=0)
+        self.w_pager.add_widget(self.w_page_next, stretch=0)
+        self.w_pager.add_widget(self.w_page_info, stretch=1)
+        self.w_pager.hide()
+
+        vbox = Widgets.VBox()
+        vbox.add_widget(self.widget, stretch=1)
+        vbox.add_widget(self.w_pager, stretch=0)
+        self.w_top = vbox
+
         rgb_opener = io_rgb.RGBFileHandler(self.logger)
         tmp_path = os.path.join(icondir, 'fits.png')
         placeholder_image = rgb_opener.load_file(tmp_path)
         self._rgb_array_placeholder = placeholder_image.get_data()
 
     def get_widget(self):
-        return self.widget
+        return self.w_top
 
     def _get_table_type(self, val):
         if isinstance(val, numbers.Number):
@@ -110,7 +135,29 @@ class TableViewGw(TableViewBase):
 
     def set_table_cb(self, viewer, table):
         """Display the given table object."""
+        self._page_start = 0
+        self.show_table(table)
+
+    def page_rows(self, direction):
+        """Show the next (`direction` 1) or previous (-1) page of rows
+        of a columnar table.
+        """
+        table = self._table
+        if table is None or table.kind != 'table-columnar':
+            return
+        max_rows = self.settings.get('max_rows_display', 10000)
+        start = self._page_start + direction * max_rows
+        if start < 0 or start >= table.rows:
+            return
+        self._page_start = start
+        self.show_table(table)
+
+    def show_table(self, table):
+        """Display the given table object, starting with the current
+        page of rows for a columnar table.
+        """
         self.clear()
+        self.w_pager.hide()
         tree_dict = OrderedDict()
 
         # Extract data as astropy table
@@ -161,6 +208,40 @@ class TableViewGw(TableViewBase):
                 row_dct['_DISPLAY_ROW'] = i_str
                 tree_dict[i_str] = row_dct
 
+        elif table.kind == 'table-columnar':
+            # Only a bounded window of rows of a (potentially huge)
+            # columnar table is shown; the rest are reached by paging
+            max_rows = self.settings.get('max_rows_display', 10000)
+            start = self._page_start
+            view = table.get_row_view(start, start + max_rows)
+            colnames = table.colnames
+            units = a_tab.units
+
+            # Table header with units
+            for c_name in colnames:
+                unit = units.get(c_name, None)
+                col_str = '{0:^s}\n{1:^s}'.format(c_name, str(unit)) \
+                    if unit is not None else '{0:^s}'.format(c_name)
+                col = view[c_name]
+                _data_type = self._get_table_type(col[0].item()) \
+                    if len(col) > 0 else 'str'
+                columns.append((col_str, c_name, _data_type))
+
+            # Table contents
+            n_rows = len(view[colnames[0]]) if len(colnames) > 0 else 0
+            for i in range(n_rows):
+                row_dct = {c_name: view[c_name][i] for c_name in colnames}
+                i_str = i_fmt.format(start + i + 1)
+                row_dct['_DISPLAY_ROW'] = i_str
+                tree_dict[i_str] = row_dct
+
+            if n_rows < table.rows:
+                self.w_page_info.set_text("Rows {}-{} of {}".format(
+                    start + 1, start + n_rows, table.rows))
+                self.w_page_prev.set_enabled(start > 0)
+                self.w_page_next.set_enabled(start + n_rows < table.rows)
+                self.w_pager.show()
+
         else:
             raise ValueError(f"I don't know how to display tables of type '{table.kind}'")
 
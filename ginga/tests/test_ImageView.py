@@ -1,4 +1,5 @@
 import logging
+import time
 
 import numpy as np
 
@@ -93,3 +94,70 @@ class TestImageView:
         result = np.array([(x1, y1), (x2, y2)])
         expected = np.array([[376., 482.25], [426., 519.75]])
         assert np.all(np.isclose(expected, result))
+
+    def test_render_async(self):
+        import threading
+
+        viewer = CanvasView(logger=self.logger)
+        viewer.configure(200, 100)
+        viewer.enable_autocuts('off')
+        image = AstroImage.AstroImage(logger=self.logger)
+        image.set_data(np.arange(100 * 200, dtype=np.float32).reshape(100, 200))
+        viewer.set_image(image)
+        viewer.cut_levels(0, 20000)
+        sync_arr = viewer.get_image_as_array(order='RGB').copy()
+
+        presented = threading.Event()
+        viewer.add_callback('redraw', lambda v, whence: presented.set())
+        viewer.settings.set(render_async=True)
+        assert viewer.is_render_async()
+
+        # a burst of redraws should be coalesced (latest-wins)
+        for i in range(10):
+            viewer.redraw_now(whence=0)
+        assert presented.wait(10.0)
+        # wait for the worker to go idle
+        for i in range(100):
+            stats = viewer.get_refresh_stats()
+            if stats['frames_presented'] == stats['frames_rendered']:
+                with viewer._rframe.cond:
+                    if viewer._rframe.whence is None:
+                        break
+            presented.clear()
+            presented.wait(0.1)
+
+        stats = viewer.get_refresh_stats()
+        assert 1 <= stats['frames_rendered'] <= 10
+        assert (stats['frames_rendered'] + stats['frames_abandoned'] +
+                stats['frames_dropped']) >= 1
+
+        arr = viewer.get_image_as_array(order='RGB')
+        assert arr.shape == sync_arr.shape
+        assert np.array_equal(arr, sync_arr)
+
+    def test_render_async_stats(self):
+        import threading
+
+        viewer = CanvasView(logger=self.logger)
+        viewer.configure(200, 100)
+        image = AstroImage.AstroImage(logger=self.logger)
+        image.set_data(np.arange(100 * 200, dtype=np.float32).reshape(100, 200))
+        viewer.set_image(image)
+
+        presented = threading.Event()
+        viewer.add_callback('redraw', lambda v, whence: presented.set())
+        viewer.settings.set(render_async=True)
+
+        # pretend a timed refresh is running; draws are counted only
+        # when the frame is presented
+        viewer.rf_flags['done'] = False
+        viewer.rf_start_time = time.time()
+        viewer.rf_draw_count = 0
+        time_last = viewer.time_last_redraw
+        viewer.redraw_now(whence=0)
+        assert presented.wait(10.0)
+
+        stats = viewer.get_refresh_stats()
+        assert viewer.rf_draw_count >= 1
+        assert stats['fps'] > 0.0
+        assert viewer.time_last_redraw > time_last
@@ -10,8 +10,13 @@ from astropy import units as u
 from astropy.coordinates import SkyCoord
 
 from ginga.util.ap_region import (astropy_region_to_ginga_canvas_object as r2g,
-                                  ginga_canvas_object_to_astropy_region as g2r)
+                                  ginga_canvas_object_to_astropy_region as g2r,
+                                  astropy_regions_to_ginga_canvas_objects,
+                                  ginga_canvas_objects_to_astropy_regions,
+                                  add_regions, export_regions)
 from ginga.canvas.CanvasObject import get_canvas_types
+from ginga.canvas.types.layer import DrawingCanvas
+from ginga.pilw.ImageViewPil import CanvasView
 
 
 dc = get_canvas_types()
@@ -467,3 +472,93 @@ class Test_G2R:
         r = g2r(o, logger=logger)
         assert isinstance(r, regions.TextPixelRegion)
         assert np.all(np.isclose((o.x, o.y), (r.center.x, r.center.y)))
+
+
+def make_sky_regions():
+    center = SkyCoord(10.0, 20.0, unit='deg', frame='fk5')
+    regs = [regions.CircleSkyRegion(center=center, radius=0.1 * u.deg),
+            regions.EllipseSkyRegion(center=SkyCoord(10.1, 20.1, unit='deg'),
+                                     width=0.2 * u.deg, height=6 * u.arcmin,
+                                     angle=30 * u.deg),
+            regions.CirclePixelRegion(center=regions.PixCoord(5, 6),
+                                      radius=3.0),
+            regions.RectangleSkyRegion(center=SkyCoord(1.0, 2.0, unit='deg',
+                                                       frame='fk4'),
+                                       width=0.2 * u.deg, height=0.1 * u.deg,
+                                       angle=10 * u.deg),
+            regions.PointSkyRegion(center=center,
+                                   visual={'symbol': 'x', 'color': 'red'}),
+            regions.TextSkyRegion(center=center, text='text',
+                                  visual={'textangle': '15'}),
+            regions.CircleSkyRegion(center=SkyCoord(11.0, 21.0, unit='deg'),
+                                    radius=30 * u.arcsec,
+                                    meta={'name': 'circle2'})]
+    return regs
+
+
+def assert_same_objects(objs1, objs2):
+    assert len(objs1) == len(objs2)
+    for o1, o2 in zip(objs1, objs2):
+        assert type(o1) is type(o2)
+        assert o1.coord == o2.coord
+        for key in ('x', 'y', 'radius', 'xradius', 'yradius', 'rot_deg',
+                    'style', 'text', 'color', 'linewidth', 'fill'):
+            if hasattr(o1, key):
+                assert np.all(np.isclose(getattr(o1, key), getattr(o2, key))
+                              if isinstance(getattr(o1, key), float)
+                              else getattr(o1, key) == getattr(o2, key)), key
+        assert o1.get_data('name') == o2.get_data('name')
+
+
+class Test_Bulk:
+    """Test conversions of many regions and objects at once."""
+
+    def test_r2g(self):
+        regs = make_sky_regions()
+        objs = astropy_regions_to_ginga_canvas_objects(regs)
+        assert_same_objects(objs, [r2g(r) for r in regs])
+
+    def test_g2r(self):
+        objs = [dc.Circle(10.0, 20.0, 0.1, coord='wcs', color='red'),
+                dc.Box(11.0, 21.0, 0.1, 0.2, rot_deg=5.0, coord='wcs'),
+                dc.Circle(42, 43, 4.2),
+                dc.Ellipse(12.0, 22.0, 0.1, 0.2, rot_deg=15.0, coord='wcs'),
+                dc.Point(13.0, 23.0, 0.001, style='plus', coord='wcs'),
+                dc.Text(14.0, 24.0, text='text', coord='wcs'),
+                dc.Circle(15.0, 25.0, 0.2, coord='wcs')]
+        objs[-1].set_data(name='circle2')
+        regs = ginga_canvas_objects_to_astropy_regions(objs)
+        regs2 = [g2r(obj) for obj in objs]
+        assert len(regs) == len(regs2)
+        for r1, r2 in zip(regs, regs2):
+            assert type(r1) is type(r2)
+            assert r1.visual == r2.visual
+            assert r1.meta == r2.meta
+            if isinstance(r1, regions.SkyRegion):
+                assert r1.center.separation(r2.center).deg < 1e-10
+                assert r1.center.frame.name == 'icrs'
+            else:
+                assert r1.center == r2.center
+
+    def test_add_regions(self):
+        viewer = CanvasView(logger=logging.getLogger("test_ap_regions"))
+        canvas = DrawingCanvas()
+        viewer.get_canvas().add(canvas)
+        regs = make_sky_regions()
+        objs = add_regions(canvas, regs)
+        assert canvas.get_objects() == objs
+        assert canvas.get_object_by_tag('circle2') is objs[-1]
+        # nothing is added if any object can't be
+        with pytest.raises(Exception):
+            add_regions(canvas, regs[-1:])
+        assert len(canvas.get_objects()) == len(regs)
+
+    def test_export(self, tmp_path):
+        objs = astropy_regions_to_ginga_canvas_objects(make_sky_regions())
+        path = str(tmp_path / 'test.reg')
+        export_regions(objs, logger=logging.getLogger("test_ap_regions"))
+        export_regions(objs).write(path, format='ds9')
+        regs = regions.Regions.read(path, format='ds9')
+        assert len(regs) == len(objs)
+        assert_same_objects(astropy_regions_to_ginga_canvas_objects(regs),
+                            [r2g(r) for r in regs])
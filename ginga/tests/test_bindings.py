@@ -0,0 +1,122 @@
+import logging
+
+import numpy as np
+
+from ginga import AstroImage
+from ginga.Bindings import BindingMapper, ImageViewBindings
+from ginga.events import ScrollEvent
+from ginga.misc import Callback
+from ginga.modes.pan import PanMode
+from ginga.pilw.ImageViewPil import CanvasView
+
+logger = logging.getLogger("TestBindings")
+
+
+class ManualTimer(Callback.Callbacks):
+    """A timer that only expires when told to."""
+
+    def __init__(self):
+        super().__init__()
+        self.enable_callback('expired')
+        self.deadline = None
+
+    def set(self, time_sec):
+        self.deadline = time_sec
+
+    def clear(self):
+        self.deadline = None
+
+    def expire(self):
+        self.deadline = None
+        self.make_callback('expired')
+
+
+def make_viewer(timer):
+    viewer = CanvasView(logger=logger)
+    viewer.set_window_size(500, 400)
+    image = AstroImage.AstroImage(logger=logger)
+    image.set_data(np.zeros((1000, 1000)))
+    viewer.set_image(image)
+    viewer.scale_to(1.0, 1.0)
+    viewer.set_pan(500.0, 500.0)
+
+    bindmap = BindingMapper(logger)
+    bindmap.coalesce_interval = 0.02
+    bindings = ImageViewBindings(logger)
+    bindings.enable_all(True)
+    viewer.get_bindmap = lambda: bindmap
+    viewer.get_bindings = lambda: bindings
+    viewer.make_timer = lambda: timer
+    mode = PanMode(viewer)
+    return viewer, bindmap, mode
+
+
+def scroll(viewer, direction, amount=1.0):
+    return ScrollEvent(button='nobtn', state='scroll', mode='pan',
+                       modifiers=set(), direction=direction, amount=amount,
+                       data_x=400.0, data_y=300.0, viewer=viewer)
+
+
+class TestCoalesce:
+
+    def test_scroll_zoom(self):
+        timer = ManualTimer()
+        viewer, bindmap, mode = make_viewer(timer)
+        mode.settings.set(scroll_zoom_direct_scale=True)
+        scales = []
+        scale_to = viewer.scale_to
+
+        def count_scale_to(scale_x, scale_y, **kwargs):
+            scales.append(scale_x)
+            scale_to(scale_x, scale_y, **kwargs)
+
+        viewer.scale_to = count_scale_to
+
+        for i in range(5):
+            mode.sc_zoom_origin(viewer, scroll(viewer, 0.0))
+        # nothing applied until the frame timer expires
+        assert viewer.get_scale() == 1.0
+        assert bindmap.has_pending(viewer) and timer.deadline == 0.02
+
+        timer.expire()
+        assert not bindmap.has_pending(viewer)
+        assert len(scales) == 1
+
+        # same result as applying the events one at a time
+        viewer2, bindmap2, mode2 = make_viewer(None)
+        mode2.settings.set(scroll_zoom_direct_scale=True)
+        for i in range(5):
+            mode2.sc_zoom_origin(viewer2, scroll(viewer2, 0.0))
+        assert np.isclose(viewer.get_scale(), viewer2.get_scale())
+        assert np.allclose(viewer.get_pan(), viewer2.get_pan())
+
+    def test_zoom_steps_and_pan(self):
+        timer = ManualTimer()
+        viewer, bindmap, mode = make_viewer(timer)
+        mode.settings.set(scroll_zoom_direct_scale=False)
+        for direction in (0.0, 0.0, 180.0, 0.0):
+            mode.sc_zoom(viewer, scroll(viewer, direction))
+        pan_x, pan_y = viewer.get_pan()
+        mode.sc_pan(viewer, scroll(viewer, 90.0))
+        mode.sc_pan(viewer, scroll(viewer, 90.0))
+        assert viewer.get_zoom() == 0.0
+
+        # another kind of event applies the pending updates first
+        bindmap.window_key_press(viewer, 'shift_l')
+        assert not bindmap.has_pending(viewer) and timer.deadline is None
+        assert viewer.get_zoom() == 2.0
+        assert viewer.get_pan()[0] > pan_x
+
+    def test_no_coalescing(self):
+        timer = ManualTimer()
+        viewer, bindmap, mode = make_viewer(timer)
+        mode.settings.set(coalesce_events=False,
+                          scroll_zoom_direct_scale=False)
+        mode.sc_zoom(viewer, scroll(viewer, 0.0))
+        assert viewer.get_zoom() == 1.0
+        assert not bindmap.has_pending(viewer)
+
+        mode.settings.set(coalesce_events=True)
+        bindmap.coalesce_interval = 0
+        mode.sc_zoom(viewer, scroll(viewer, 0.0))
+        assert viewer.get_zoom() == 2.0
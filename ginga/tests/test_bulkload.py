@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+
+from ginga.util import bulkload
+
+logger = logging.getLogger("TestBulkLoad")
+
+
+class Collector:
+
+    def __init__(self, bl):
+        self.batches = []
+        self.stats = None
+        self.ev_done = threading.Event()
+        bl.add_callback('batch', self.batch_cb)
+        bl.add_callback('done', self.done_cb)
+
+    def batch_cb(self, bl, results):
+        self.batches.append(results)
+
+    def done_cb(self, bl, stats):
+        self.stats = stats
+        self.ev_done.set()
+
+
+def make_files(tmp_path, num):
+    paths = []
+    for i in range(num):
+        path = tmp_path / '{:03d}.fits'.format(i)
+        path.write_bytes(b'x' * (i + 1))
+        paths.append(str(path))
+    return paths
+
+
+def read_file(path):
+    if path.endswith('.bad'):
+        raise ValueError("bad file")
+    with open(path, 'rb') as in_f:
+        return in_f.read()
+
+
+class TestBulkLoader:
+
+    def test_order_and_batches(self, tmp_path):
+        paths = make_files(tmp_path, 40)
+        paths[5] = str(tmp_path / 'x.bad')
+
+        def load_fn(path):
+            if path.endswith('000.fits'):
+                # first file is the slowest
+                time.sleep(0.2)
+            return read_file(path)
+
+        bl = bulkload.BulkLoader(logger, load_fn, num_workers=4,
+                                 batch_size=8, batch_interval=10.0)
+        coll = Collector(bl)
+        bl.start(paths)
+        assert coll.ev_done.wait(10.0)
+        assert bl.is_done()
+
+        results = [res for batch in coll.batches for res in batch]
+        assert [res[0] for res in results] == paths
+        assert all(len(batch) <= 8 for batch in coll.batches)
+        assert len(coll.batches) == 5
+        assert results[5][1:] == (False, "bad file")
+        assert results[7][1:] == (True, b'x' * 8)
+
+        stats = coll.stats
+        assert (stats.num_files, stats.loaded, stats.failed) == (40, 39, 1)
+        assert stats.num_bytes == sum(range(1, 41)) - 6
+        assert stats.rate > 0
+
+    def test_backpressure(self, tmp_path):
+        paths = make_files(tmp_path, 20)
+        ev_go = threading.Event()
+        started = []
+
+        def load_fn(path):
+            started.append(path)
+            if path == paths[0]:
+                ev_go.wait(5.0)
+            return read_file(path)
+
+        bl = bulkload.BulkLoader(logger, load_fn, num_workers=2,
+                                 max_pending=4, batch_size=2)
+        coll = Collector(bl)
+        bl.start(paths)
+        time.sleep(0.2)
+        # later files wait for the first one to be delivered
+        stats = bl.get_stats()
+        assert len(started) == 4
+        assert (stats.loading, stats.waiting, stats.loaded) == (1, 3, 0)
+        ev_go.set()
+        assert coll.ev_done.wait(10.0)
+        assert [res[0] for batch in coll.batches
+                for res in batch] == paths
+
+    def test_empty(self):
+        bl = bulkload.BulkLoader(logger, read_file)
+        coll = Collector(bl)
+        bl.start([])
+        assert coll.ev_done.is_set()
+        assert coll.stats.num_files == 0
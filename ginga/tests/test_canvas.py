@@ -134,3 +134,41 @@ class TestCanvas:
         data = self._setup_cutout_test(self.dc.Ellipse(49.5, 49.5, 12.0, 30.0))
         assert data.shape == (61, 25)
         assert np.ma.count_masked(data) == 389
+
+    def test_add_objects_uses_insert_object(self):
+        """Test that adding objects in bulk goes through _insert_object."""
+        added = []
+
+        class MyCanvas(self.dc.DrawingCanvas):
+            def _insert_object(self, obj, belowThis=None):
+                added.append(obj)
+                super()._insert_object(obj, belowThis=belowThis)
+
+        canvas = MyCanvas()
+        self.viewer.get_canvas().add(canvas)
+        objs = [self.dc.Circle(10, 10, 5), self.dc.Point(20, 20, 3)]
+        tags = canvas.add_objects(objs, tagpfx='obj')
+        assert added == objs
+        assert [canvas.get_object_by_tag(tag) for tag in tags] == objs
+        assert all(obj in canvas for obj in objs)
+
+    def test_add_objects_many(self):
+        """Test that adding many objects does not scan the object list
+        for each one."""
+        num_cmp = [0]
+
+        class MyPoint(self.dc.Point):
+            def __eq__(self, other):
+                num_cmp[0] += 1
+                # fail fast instead of running for minutes if quadratic
+                assert num_cmp[0] <= 20000, "object list scanned"
+                return self is other
+
+            __hash__ = object.__hash__
+
+        canvas = self.dc.DrawingCanvas()
+        self.viewer.get_canvas().add(canvas)
+        objs = [MyPoint(i % 100, i // 100, 2) for i in range(20000)]
+        tags = canvas.add_objects(objs, redraw=False)
+        assert len(tags) == len(set(tags)) == 20000
+        assert canvas.objects == objs
@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pytest
+
+from ginga.util import catalog
+
+logger = logging.getLogger("TestCatalog")
+
+# a field of stars on a grid around (10, 20) deg
+_ra, _dec = np.meshgrid(np.linspace(9.9, 10.1, 41), np.linspace(19.9, 20.1, 41))
+field_ra, field_dec = _ra.ravel(), _dec.ravel()
+
+
+class StarHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        q = {key: val[0] for key, val in parse_qs(url.query).items()}
+        ra_deg, dec_deg = catalog._get_radec_deg(q['ra'], q['dec'])
+        self.server.requests.append(url.path)
+        if url.path == '/slow':
+            time.sleep(1.0)
+
+        sep = catalog._ang_sep_deg(ra_deg, dec_deg, field_ra, field_dec)
+        lines = ["name ra dec mag", "---- -- --- ---"]
+        for i in np.flatnonzero(sep <= float(q['r']) / 60.0):
+            lines.append("S{:d} {:.6f} {:.6f} {:.2f}".format(
+                i, field_ra[i], field_dec[i], 10 + i % 7))
+        data = '\n'.join(lines).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def http_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StarHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_bank(http_server, cache_dir, **kwargs):
+    port = http_server.server_address[1]
+    bank = catalog.ServerBank(logger)
+    for key in ('fast', 'slow'):
+        url = ("http://127.0.0.1:%d/%s" % (port, key) +
+               "?ra=%(ra)s&dec=%(dec)s&r=%(r)s")
+        srv = catalog.CatalogServer(logger, key, key, url, key)
+        srv.set_index(name=0, ra=1, dec=2, mag=3)
+        srv.set_cone_search(True)
+        bank.add_catalog_server(srv)
+    bank.set_cache(catalog.CatalogCache(logger, str(cache_dir), **kwargs))
+    return bank
+
+
+def names(starlist):
+    return sorted(star['name'] for star in starlist)
+
+
+class TestCatalogCache:
+
+    def test_exact_and_contained(self, http_server, tmp_path):
+        bank = make_bank(http_server, tmp_path)
+        del http_server.requests[:]
+
+        starlist, info = bank.get_catalog('fast', None, ra='10.0',
+                                          dec='20.0', r=5.0)
+        assert len(starlist) > 0 and len(http_server.requests) == 1
+        starlist2, info = bank.get_catalog('fast', None, ra='10.0',
+                                           dec='20.0', r=5.0)
+        assert names(starlist2) == names(starlist)
+        assert len(http_server.requests) == 1
+
+        # smaller, offset cone inside the cached one
+        small = dict(ra='00:40:01.2', dec='20:00:30', r=2.0)
+        starlist3, info = bank.get_catalog('fast', None, **small)
+        assert len(http_server.requests) == 1
+        stats = bank.cache.get_stats()
+        assert stats['hits'] == 1 and stats['contained_hits'] == 1
+
+        # same as querying the server
+        bank.set_cache(None)
+        expected, info = bank.get_catalog('fast', None, **small)
+        assert len(http_server.requests) == 2
+        assert 0 < len(expected) < len(starlist)
+        assert names(starlist3) == names(expected)
+
+    def test_not_contained(self, http_server, tmp_path):
+        bank = make_bank(http_server, tmp_path)
+        del http_server.requests[:]
+        bank.get_catalog('fast', None, ra='10.0', dec='20.0', r=2.0)
+        # larger cone, and cone sticking out of the cached one
+        bank.get_catalog('fast', None, ra='10.0', dec='20.0', r=3.0)
+        bank.get_catalog('fast', None, ra='10.05', dec='20.0', r=2.0)
+        assert len(http_server.requests) == 3
+
+    def test_persistent(self, http_server, tmp_path):
+        bank = make_bank(http_server, tmp_path)
+        del http_server.requests[:]
+        bank.get_catalog('fast', None, ra='10.0', dec='20.0', r=3.0)
+        bank = make_bank(http_server, tmp_path)
+        bank.get_catalog('fast', None, ra='10.0', dec='20.0', r=3.0)
+        assert len(http_server.requests) == 1
+
+    def test_ttl(self, http_server, tmp_path):
+        bank = make_bank(http_server, tmp_path, ttl_sec=0.2)
+        del http_server.requests[:]
+        bank.get_catalog('fast', None, ra='10.0', dec='20.0', r=3.0)
+        bank.get_catalog('fast', None, ra='10.0', dec='20.0', r=3.0)
+        assert len(http_server.requests) == 1
+        time.sleep(0.3)
+        bank.get_catalog('fast', None, ra='10.0', dec='20.0', r=3.0)
+        assert len(http_server.requests) == 2
+
+    def test_size_eviction(self, http_server, tmp_path):
+        bank = make_bank(http_server, tmp_path, max_bytes=None)
+        for dec in ('19.95', '20.0', '20.05'):
+            bank.get_catalog('fast', None, ra='10.0', dec=dec, r=1.0)
+        stats = bank.cache.get_stats()
+        assert stats['entries'] == 3
+
+        # touch the oldest entry, then shrink the cache
+        bank.get_catalog('fast', None, ra='10.0', dec='19.95', r=1.0)
+        bank.cache.max_bytes = stats['size'] // 2
+        bank.cache.prune()
+        assert bank.cache.get_stats()['entries'] == 1
+        del http_server.requests[:]
+        bank.get_catalog('fast', None, ra='10.0', dec='19.95', r=1.0)
+        assert len(http_server.requests) == 0
+
+
+class TestQueryTimeout:
+
+    def test_timeout(self, http_server, tmp_path):
+        bank = make_bank(http_server, tmp_path)
+        with pytest.raises(Exception):
+            bank.get_catalog('slow', None, timeout=0.3, ra='10.0',
+                             dec='20.0', r=4.0)
+        # the timeout was only for that query
+        assert bank.get_catalog_server('slow').timeout is None
+        starlist, info = bank.get_catalog('slow', None, ra='10.0',
+                                          dec='20.0', r=4.0)
+        assert len(starlist) > 0
@@ -0,0 +1,152 @@
+import logging
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from ginga import AstroImage, RGBImage
+from ginga.canvas.CanvasObject import get_canvas_types
+from ginga.canvas.types.layer import Canvas
+from ginga.pilw.ImageViewPil import CanvasView
+from ginga.util import wcs, wcsmod
+from ginga.util.mosaic import CollageTiles, CanvasMosaicer
+wcsmod.use('astropy')
+
+logger = logging.getLogger("TestCollage")
+
+
+def make_viewer():
+    viewer = CanvasView(logger=logger)
+    viewer.configure(200, 200)
+    viewer.set_autocut_params('minmax')
+    return viewer
+
+
+def add_tiles(canvas, num_x, num_y, size=100):
+    dc = get_canvas_types()
+    for j in range(num_y):
+        for i in range(num_x):
+            yi, xi = np.mgrid[0:size, 0:size]
+            data = (xi + i * size + yi + j * size).astype(np.float32)
+            image = AstroImage.AstroImage(data_np=data, logger=logger)
+            img = dc.NormImage(i * size, j * size, image)
+            img.is_data = True
+            canvas.add(img, redraw=False)
+
+
+def setup_viewer(tiles):
+    viewer = make_viewer()
+    viewer.get_canvas().add(tiles)
+    viewer.set_limits(((-0.5, -0.5), (799.5, 799.5)))
+    viewer.cut_levels(0.0, 1600.0)
+    return viewer
+
+
+def count_prepared(viewer):
+    # record the canvas images prepared by the viewer in a redraw
+    prepared = []
+    prepare_image = viewer.prepare_image
+
+    def _prepare_image(cvs_img, cache, whence):
+        if cache.visible or whence <= 0:
+            prepared.append(cvs_img)
+        return prepare_image(cvs_img, cache, whence)
+
+    viewer.prepare_image = _prepare_image
+    return prepared
+
+
+class TestCollageTiles:
+
+    def test_flattened(self):
+        tiles = CollageTiles(min_tiles=4)
+        add_tiles(tiles, 8, 8)
+        viewer = setup_viewer(tiles)
+        ref_tiles = Canvas()
+        add_tiles(ref_tiles, 8, 8)
+        ref_viewer = setup_viewer(ref_tiles)
+
+        for v in (viewer, ref_viewer):
+            v.scale_to(0.25, 0.25)
+            v.set_pan(400, 400)
+        prepared = count_prepared(viewer)
+        viewer.redraw_now(whence=0)
+        arr1 = viewer.get_image_as_array().astype(int)
+        arr2 = ref_viewer.get_image_as_array().astype(int)
+        # drawn from the copy with every 4th pixel
+        assert list(tiles._levels.keys()) == [4]
+        assert set(prepared) == set([tiles._levels[4].cvs_img])
+        assert np.max(np.abs(arr1 - arr2)) <= 2
+
+        # partly in view
+        for v in (viewer, ref_viewer):
+            v.set_pan(100, 700)
+        arr1 = viewer.get_image_as_array().astype(int)
+        arr2 = ref_viewer.get_image_as_array().astype(int)
+        assert np.max(np.abs(arr1 - arr2)) <= 2
+
+        # tiles added are copied into the existing copy
+        level = tiles._levels[4]
+        tiles.delete_object(tiles.get_tiles()[-1], redraw=False)
+        tiles.reset_levels()
+        viewer.redraw_now(whence=0)
+        level = tiles._levels[4]
+        assert len(level.tiles) == 63
+        add_tiles(tiles, 1, 1)
+        viewer.redraw_now(whence=0)
+        assert tiles._levels[4] is level
+        assert len(level.tiles) == 64
+
+    def test_per_tile(self):
+        tiles = CollageTiles(min_tiles=4)
+        add_tiles(tiles, 8, 8)
+        viewer = setup_viewer(tiles)
+
+        # zoomed in, with few tiles in view
+        viewer.scale_to(1.0, 1.0)
+        viewer.set_pan(450, 450)
+        prepared = count_prepared(viewer)
+        viewer.redraw_now(whence=0)
+        assert len(tiles._levels) == 0
+        assert len(set(prepared)) == 64
+        assert len([cvs_img for cvs_img in set(prepared)
+                    if cvs_img.get_cache(viewer).visible]) == 9
+
+    def test_color_tiles(self):
+        # color tiles are not flattened into a monochrome copy
+        tiles = CollageTiles(min_tiles=4)
+        add_tiles(tiles, 8, 8)
+        rgb = np.zeros((100, 100, 3), dtype=np.uint8)
+        rgb[..., 1] = 255
+        img = get_canvas_types().Image(0, 0, RGBImage.RGBImage(
+            data_np=rgb, order='RGB', logger=logger))
+        tiles.add(img, redraw=False)
+        viewer = setup_viewer(tiles)
+        viewer.scale_to(0.25, 0.25)
+        viewer.set_pan(400, 400)
+        arr = viewer.get_image_as_array()
+        assert len(tiles._levels) == 0
+        x, y = viewer.get_canvas_xy(50, 50)
+        assert tuple(arr[int(y), int(x), :3]) == (0, 255, 0)
+
+
+@pytest.mark.parametrize('flatten', [True, False])
+def test_mosaic(flatten):
+    images = []
+    for i in range(20):
+        hdu = fits.PrimaryHDU(np.full((50, 50), i, dtype=np.float32))
+        hdu.header.update(wcs.simple_wcs(25.0, 25.0, 10.0 + i * 0.01,
+                                         20.0, 0.0002, 0.0))
+        image = AstroImage.AstroImage(logger=logger)
+        image.load_hdu(hdu)
+        images.append(image)
+
+    viewer = make_viewer()
+    mosaicer = CanvasMosaicer(logger)
+    mosaicer.get_settings().set(flatten_tiles=flatten)
+    mosaicer.mosaic(viewer, images)
+    tiles = mosaicer.tiles
+    assert isinstance(tiles, CollageTiles) == flatten
+    assert len(tiles.get_objects()) == 19
+    viewer.zoom_fit()
+    assert viewer.get_image_as_array().shape[:2] == (200, 200)
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from ginga.canvas.types.all import DrawingCanvas
+from ginga.util import contour
+
+pytestmark = pytest.mark.skipif(not contour.have_skimage,
+                                reason="no scikit-image")
+
+
+@pytest.fixture
+def engine():
+    engine = contour.ContourEngine(num_workers=2, cache_size=4)
+    yield engine
+    engine.shutdown()
+
+
+@pytest.fixture
+def data():
+    y, x = np.mgrid[0:200, 0:300]
+    return np.hypot(x - 150.0, y - 100.0)
+
+
+def test_simplify_path():
+    # points along a line, with one bump
+    pts = np.array([(x, 0.0) for x in range(11)])
+    pts[5, 1] = 2.0
+    res = contour.simplify_path(pts, 0.5)
+    assert np.array_equal(res, pts[[0, 4, 5, 6, 10]])
+    res = contour.simplify_path(pts, 1.6)
+    assert np.array_equal(res, pts[[0, 5, 10]])
+    res = contour.simplify_path(pts, 3.0)
+    assert np.array_equal(res, pts[[0, 10]])
+    assert contour.simplify_path(pts, 0.0) is pts
+
+    # a closed circle keeps its shape
+    t = np.linspace(0, 2 * np.pi, 1001)
+    pts = np.array([np.cos(t), np.sin(t)]).T * 100
+    res = contour.simplify_path(pts, 1.0)
+    assert 10 < len(res) < 100
+    assert np.allclose(res[0], res[-1])
+    assert np.allclose(np.hypot(res[:, 0], res[:, 1]), 100)
+
+
+def test_get_contours(engine, data):
+    levels = [20.0, 50.0]
+    res = engine.get_contours(data, levels)
+    assert len(res) == 2
+    for level, contours in zip(levels, res):
+        assert len(contours) == 1
+        x, y = contours[0].T
+        # points are (x, y), on a circle around the center
+        assert np.allclose(np.hypot(x - 150, y - 100), level, atol=0.1)
+
+    # cached
+    assert engine.get_contours(data, levels) is res
+    # a different array
+    data2 = data.copy()
+    assert engine.get_contours(data2, levels) is not res
+    # copies of the data with the same key share the results
+    res = engine.get_contours(data, levels, key='img')
+    assert engine.get_contours(data2, levels, key='img') is res
+
+    # simplified
+    simp = engine.get_contours(data, levels, tolerance=0.5)
+    assert len(simp[1][0]) < len(res[1][0])
+    assert engine.get_contours(data, levels, tolerance=0.6) is simp
+
+    # region, in the coordinates of the whole array
+    reg = engine.get_contours(data, [20.0], region=(100, 50, 199, 149))
+    x, y = reg[0][0].T
+    assert np.allclose(np.hypot(x - 150, y - 100), 20, atol=0.1)
+
+
+def test_create_contour_levels_obj(engine, data):
+    canvas = DrawingCanvas()
+    res = engine.calc_contours(data, 4, tolerance=1.0)
+    obj = contour.create_contour_levels_obj(canvas, res,
+                                            colors=['red', 'blue'])
+    assert len(obj.objects) == 4
+    assert obj.objects[1].objects[0].kind == 'path'
+    assert obj.objects[1].objects[0].color == 'blue'
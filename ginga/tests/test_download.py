@@ -0,0 +1,260 @@
+import hashlib
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from ginga.misc import Bunch
+from ginga.util import download
+
+logger = logging.getLogger("TestDownload")
+
+content = np.random.RandomState(0).bytes(1000000)
+etag = '"%s"' % hashlib.sha1(content).hexdigest()
+
+
+class FileHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+        if self.path.startswith('/slow'):
+            time.sleep(0.3)
+        if self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', '/file.fits')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path == '/missing':
+            self.send_error(404)
+            return
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        start = 0
+        rng = self.headers.get('Range')
+        if rng is not None and self.headers.get('If-Range') == etag:
+            start = int(rng.split('=')[1].rstrip('-'))
+        data = content[start:]
+
+        self.send_response(206 if start > 0 else 200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(data)))
+        if start > 0:
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (
+                start, len(content) - 1, len(content)))
+        self.end_headers()
+
+        if self.path == '/flaky' and server.drops > 0:
+            # drop the connection partway through the body
+            server.drops -= 1
+            self.wfile.write(data[:len(data) // 3])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FileHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.drops = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = "http://127.0.0.1:%d" % (server.server_address[1])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def read(path):
+    with open(path, 'rb') as in_f:
+        return in_f.read()
+
+
+class TestDownloadManager:
+
+    def test_download_and_cache(self, http_server, tmp_path):
+        dlmgr = download.DownloadManager(logger, cache_dir=str(tmp_path))
+        progress = []
+        path = dlmgr.download(http_server.url + '/file.fits',
+                              str(tmp_path / 'file.fits'),
+                              progress_cb=progress.append)
+        assert read(path) == content
+        assert progress[-1] == 1.0 and len(progress) > 2
+
+        # revalidated, not downloaded again
+        stats = Bunch.Bunch()
+        path2 = dlmgr.download(http_server.url + '/file.fits',
+                               str(tmp_path / 'file_1.fits'), stats=stats)
+        assert path2 == path and stats.status == 'cached'
+        assert http_server.requests[-1][1]['If-None-Match'] == etag
+
+        # cache persists
+        dlmgr.close()
+        dlmgr = download.DownloadManager(logger, cache_dir=str(tmp_path))
+        path3 = dlmgr.download(http_server.url + '/file.fits',
+                               str(tmp_path / 'file_2.fits'))
+        assert path3 == path
+        assert dlmgr.get_stats()['cache_hits'] == 1
+        dlmgr.close()
+
+    def test_same_content(self, http_server, tmp_path):
+        # different URL with the same content shares the local file
+        dlmgr = download.DownloadManager(logger, cache_dir=str(tmp_path))
+        path = dlmgr.download(http_server.url + '/file.fits',
+                              str(tmp_path / 'file.fits'))
+        path2 = dlmgr.download(http_server.url + '/redirect',
+                               str(tmp_path / 'other.fits'))
+        assert path2 == path
+        assert not (tmp_path / 'other.fits').exists()
+        dlmgr.close()
+
+    def test_overwritten_file(self, http_server, tmp_path):
+        # the cached file of a URL was overwritten (e.g. by the download
+        # of another URL with the same file name)
+        dlmgr = download.DownloadManager(logger, cache_dir=str(tmp_path))
+        path = dlmgr.download(http_server.url + '/file.fits',
+                              str(tmp_path / 'file.fits'))
+        with open(path, 'wb') as out_f:
+            out_f.write(b'other')
+
+        stats = Bunch.Bunch()
+        path2 = dlmgr.download(http_server.url + '/file.fits',
+                               str(tmp_path / 'file.fits'), stats=stats)
+        assert stats.status != 'cached'
+        assert 'If-None-Match' not in http_server.requests[-1][1]
+        assert read(path2) == content
+
+        # the download of another URL to the same path is forgotten
+        # (here without a checksum, so the file is not shared)
+        dlmgr._update_entry(http_server.url + '/file.fits', sha256=None)
+        dlmgr.download(http_server.url + '/redirect', path2)
+        assert dlmgr._get_cached(http_server.url + '/file.fits') is None
+        dlmgr.close()
+
+    def test_connection_reuse(self, http_server, tmp_path):
+        dlmgr = download.DownloadManager(logger, use_cache=False)
+        for i in range(3):
+            dlmgr.download(http_server.url + '/file.fits',
+                           str(tmp_path / ('file%d.fits' % i)))
+        stats = dlmgr.get_stats()
+        assert stats['connections_created'] == 1
+        assert stats['connections_reused'] == 2
+        assert stats['downloads'] == 3 and stats['bytes'] == 3 * len(content)
+        dlmgr.close()
+
+    def test_resume(self, http_server, tmp_path):
+        http_server.drops = 2
+        dlmgr = download.DownloadManager(logger, cache_dir=str(tmp_path))
+        stats = Bunch.Bunch()
+        path = dlmgr.download(http_server.url + '/flaky',
+                              str(tmp_path / 'file.fits'), stats=stats)
+        assert read(path) == content
+        assert stats.resumed
+        ranges = [hdrs.get('Range') for url, hdrs in http_server.requests]
+        assert ranges[0] is None
+        assert ranges[1] == 'bytes=%d-' % (len(content) // 3)
+        assert len(ranges) == 3
+        # total transferred is less than 2 whole files
+        assert dlmgr.get_stats()['bytes'] < 2 * len(content)
+        dlmgr.close()
+
+    def test_resume_no_cache(self, http_server, tmp_path):
+        http_server.drops = 1
+        dlmgr = download.DownloadManager(logger, use_cache=False)
+        stats = Bunch.Bunch()
+        path = dlmgr.download(http_server.url + '/flaky',
+                              str(tmp_path / 'file.fits'), stats=stats)
+        assert read(path) == content
+        assert stats.resumed
+        ranges = [hdrs.get('Range') for url, hdrs in http_server.requests]
+        assert ranges == [None, 'bytes=%d-' % (len(content) // 3)]
+
+        # but a completed download is transferred again
+        dlmgr.download(http_server.url + '/flaky',
+                       str(tmp_path / 'file.fits'))
+        assert len(http_server.requests) == 3
+        assert 'If-None-Match' not in http_server.requests[-1][1]
+        dlmgr.close()
+
+    def test_resume_later(self, http_server, tmp_path):
+        # an interrupted transfer is resumed by a later download
+        http_server.drops = 1
+        dlmgr = download.DownloadManager(logger, cache_dir=str(tmp_path),
+                                         retries=0)
+        with pytest.raises(Exception):
+            dlmgr.download(http_server.url + '/flaky',
+                           str(tmp_path / 'file.fits'))
+        dlmgr.close()
+
+        dlmgr = download.DownloadManager(logger, cache_dir=str(tmp_path))
+        path = dlmgr.download(http_server.url + '/flaky',
+                              str(tmp_path / 'file_1.fits'))
+        assert path == str(tmp_path / 'file.fits')
+        assert read(path) == content
+        assert dlmgr.get_stats()['resumed'] == 1
+        dlmgr.close()
+
+    def test_concurrency_limit(self, http_server, tmp_path):
+        dlmgr = download.DownloadManager(logger, max_concurrent=2,
+                                         use_cache=False)
+        max_active = []
+
+        def _get(i):
+            dlmgr.download(http_server.url + '/slow?n=%d' % (i),
+                           str(tmp_path / ('file%d.fits' % i)))
+
+        def _poll():
+            while any(t.is_alive() for t in threads):
+                max_active.append(dlmgr.get_stats()['active'])
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=_get, args=(i,)) for i in range(5)]
+        for t in threads:
+            t.start()
+        _poll()
+        assert max(max_active) == 2
+        assert dlmgr.get_stats()['downloads'] == 5
+        dlmgr.close()
+
+    def test_shared_transfer(self, http_server, tmp_path):
+        dlmgr = download.DownloadManager(logger, cache_dir=str(tmp_path))
+        paths = []
+
+        def _get(i):
+            paths.append(dlmgr.download(http_server.url + '/slow',
+                                        str(tmp_path / ('file%d.fits' % i))))
+
+        threads = [threading.Thread(target=_get, args=(i,)) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(set(paths)) == 1
+        assert len(http_server.requests) == 1
+        assert dlmgr.get_stats()['shared'] == 2
+        dlmgr.close()
+
+    def test_error(self, http_server, tmp_path):
+        dlmgr = download.DownloadManager(logger)
+        with pytest.raises(download.DownloadError):
+            dlmgr.download(http_server.url + '/missing',
+                           str(tmp_path / 'file.fits'))
+        assert dlmgr.get_stats()['failed'] == 1
+        dlmgr.close()
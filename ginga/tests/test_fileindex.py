@@ -0,0 +1,93 @@
+import logging
+import os
+
+import numpy as np
+
+from ginga import AstroImage
+from ginga.pilw.ImageViewPil import CanvasView
+from ginga.util.fileindex import FileIndex
+
+logger = logging.getLogger("TestFileIndex")
+
+
+def make_image(path, value, idx=0):
+    image = AstroImage.AstroImage(logger=logger)
+    data = np.arange(20 * 30, dtype=np.float32).reshape((20, 30)) + value
+    image.set_data(data)
+    image.update_keywords(dict(OBJECT='M{}'.format(value), EXPTIME=1.5))
+    image.set(path=path, idx=idx)
+    return image
+
+
+def touch(path, content=b'x'):
+    with open(path, 'wb') as out_f:
+        out_f.write(content)
+
+
+class TestFileIndex:
+
+    def test_add_get(self, tmp_path):
+        path = str(tmp_path / 'a.fits')
+        touch(path)
+        dbpath = str(tmp_path / 'index' / 'fileindex.sqlite')
+        index = FileIndex(logger, dbpath)
+        assert index.get(path) is None
+
+        assert index.add_image(make_image(path, 1, idx=1))
+        image = make_image(path, 2, idx=('SCI', 2))
+        image.set(auto_cut_levels=(('minmax',), (2.0, 601.0)))
+        assert index.add_image(image)
+        assert not index.add_image(make_image(None, 3))
+        index.close()
+
+        # kept on disk
+        index = FileIndex(logger, dbpath)
+        assert len(index) == 2
+        entry = index.get(path + '[1]')
+        assert entry.header['OBJECT'] == 'M1'
+        assert entry.header['EXPTIME'] == 1.5
+        assert entry.shape == (20, 30)
+        assert entry.minmax == (1.0, 600.0)
+        # the image loaded by default
+        assert index.get(path).idx == '1'
+        assert index.get(path, idx=('SCI', 2)).header['OBJECT'] == 'M2'
+        assert index.get(path + '[SCI, 2]') is not None
+        assert index.get(path, idx=3) is None
+
+        assert index.get_cut_levels(path, ('minmax',),
+                                    idx='SCI,2') == (2.0, 601.0)
+        assert index.get_cut_levels(path, ('zscale',), idx='SCI,2') is None
+        assert index.add_cut_levels(path, ('zscale',), (3.0, 4.0),
+                                    idx='SCI,2')
+        assert not index.add_cut_levels(path, ('zscale',), (3.0, 4.0),
+                                        idx=3)
+        # other cut levels are kept when the image is added again
+        index.add_image(make_image(path, 2, idx=('SCI', 2)))
+        cuts = index.get(path, idx='SCI,2').cuts
+        assert len(cuts) == 2
+
+    def test_changed(self, tmp_path):
+        path = str(tmp_path / 'a.fits')
+        touch(path)
+        index = FileIndex(logger, ':memory:')
+        index.add_image(make_image(path, 1))
+        assert index.get(path) is not None
+
+        touch(path, b'xx')
+        assert index.get(path) is None
+        assert index.purge() == 1
+        assert len(index) == 0
+
+        index.add_image(make_image(path, 1))
+        os.remove(path)
+        assert index.get(path) is None
+        assert index.purge() == 1
+
+    def test_auto_cut_levels(self, tmp_path):
+        viewer = CanvasView(logger=logger)
+        viewer.configure(100, 100)
+        viewer.set_autocut_params('minmax')
+        image = make_image(str(tmp_path / 'a.fits'), 1)
+        viewer.set_image(image)
+        key = viewer.autocuts.get_params_key()
+        assert image.get('auto_cut_levels') == (key, (1.0, 600.0))
@@ -0,0 +1,161 @@
+import logging
+import socket
+import threading
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from ginga.misc import Bunch
+from ginga.util import grc
+
+logger = logging.getLogger("TestGRC")
+
+
+class Receiver:
+    """Stands in for the RC plugin's GingaWrapper."""
+
+    def __init__(self):
+        self.images = []
+
+    def load_buffer(self, imname, chname, img_buf, dims, dtype,
+                    header, metadata, compressed):
+        if imname == 'bad':
+            raise ValueError("bad image")
+        decompress = metadata.get('decompress', None)
+        if decompress is not None:
+            img_buf = grc.decompress_buffer(img_buf, decompress)
+        data = np.frombuffer(img_buf, dtype=dtype).reshape(dims)
+        self.images.append(('buffer', imname, chname, data, header))
+        return 0
+
+    def load_shm(self, imname, chname, shm_name, dims, dtype,
+                 header, metadata):
+        data = grc.read_shared_array(shm_name, tuple(dims), dtype)
+        self.images.append(('shm', imname, chname, data, header))
+        return 0
+
+    def load_fits_buffer(self, imname, chname, file_buf, num_hdu,
+                         metadata):
+        self.images.append(('fits', imname, chname, bytes(file_buf),
+                            num_hdu))
+        return 0
+
+
+def start_server(klass, robj):
+    server = klass(robj, host='127.0.0.1', port=0, logger=logger)
+    server.server = server.make_server()
+    server.port = server.server.server_address[1]
+    thread = threading.Thread(target=server.server.serve_forever,
+                              kwargs=dict(poll_interval=0.05), daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def servers():
+    robj = Receiver()
+    rpc_server = start_server(grc.RemoteServer, robj)
+    data_server = start_server(grc.BinaryServer, robj)
+    yield robj, rpc_server, data_server
+    for server in (rpc_server, data_server):
+        server.server.shutdown()
+        server.server.server_close()
+
+
+def make_client(servers, **kwargs):
+    robj, rpc_server, data_server = servers
+    return grc.RemoteClient('127.0.0.1', rpc_server.port,
+                            data_port=data_server.port, **kwargs)
+
+
+class TestRemoteClient:
+
+    data = np.random.RandomState(0).rand(100, 120).astype('>f4')
+
+    @pytest.mark.skipif(not grc.have_shm, reason="no shared memory")
+    def test_shm(self, servers):
+        robj = servers[0]
+        client = make_client(servers)
+        assert client.transport == 'shm'
+        ch = client.channel('Image')
+        ch.load_np('img1', self.data, 'fits', {'OBJECT': 'm31'})
+        kind, imname, chname, data, header = robj.images[-1]
+        assert (kind, imname, chname) == ('shm', 'img1', 'Image')
+        assert data.dtype == self.data.dtype
+        assert np.array_equal(data, self.data)
+        assert header == {'OBJECT': 'm31'}
+
+        # fill the shared array in place
+        arr = client.get_shared_array((50, 60), np.uint16)
+        arr[...] = 7
+        ch.load_np('img2', arr, 'fits', {})
+        data = robj.images[-1][3]
+        assert data.shape == (50, 60) and np.all(data == 7)
+        client.close()
+
+    @pytest.mark.skipif(not grc.have_shm, reason="no shared memory")
+    def test_shm_fallback(self, servers):
+        # server without shared memory support
+        robj = Receiver()
+        server = start_server(grc.RemoteServer,
+                              Bunch.Bunch(load_buffer=robj.load_buffer))
+        try:
+            client = grc.RemoteClient('127.0.0.1', server.port)
+            client.channel('Image').load_np('img', self.data, 'fits', {})
+            assert client.transport == 'xmlrpc'
+            assert np.array_equal(robj.images[-1][3], self.data)
+            client.close()
+        finally:
+            server.server.shutdown()
+            server.server.server_close()
+
+    @pytest.mark.parametrize('codec', [None] + grc.get_codecs())
+    def test_binary(self, servers, codec):
+        robj = servers[0]
+        client = make_client(servers, transport='binary', codec=codec)
+        ch = client.channel('Image')
+        for i in range(3):
+            ch.load_np('img%d' % i, self.data[:, i:], 'fits', {'N': i})
+            kind, imname, chname, data, header = robj.images[-1]
+            assert (kind, imname, header) == ('buffer', 'img%d' % i,
+                                              {'N': i})
+            assert np.array_equal(data, self.data[:, i:])
+
+        buf = BytesIO(b'SIMPLE  =                    T' * 100)
+        ch.load_fitsbuf('fits', buf.getvalue(), 0)
+        assert robj.images[-1][3] == buf.getvalue()
+        client.close()
+
+    def test_binary_error(self, servers):
+        client = make_client(servers, transport='binary')
+        with pytest.raises(grc.RemoteError):
+            client.load_array('bad', 'Image', self.data, {}, {})
+        # connection is still usable
+        client.load_array('img', 'Image', self.data, {}, {})
+        client.close()
+
+    def test_frame_too_large(self):
+        sock1, sock2 = socket.socketpair()
+        try:
+            # header claiming a huge payload, with no data following
+            sock1.sendall(grc._frame_hdr.pack(grc._frame_magic, 2, 1 << 60))
+            with pytest.raises(ValueError):
+                grc.recv_frame(sock2, max_size=1 << 20)
+            grc.send_frame(sock1, dict(a=1), b'12345')
+            info, payload = grc.recv_frame(sock2, max_size=1 << 20)
+            assert info == dict(a=1) and payload == b'12345'
+        finally:
+            sock1.close()
+            sock2.close()
+
+    def test_xmlrpc(self, servers):
+        robj = servers[0]
+        client = make_client(servers, transport='xmlrpc', codec='bz2')
+        client.channel('Image').load_np('img', self.data, 'fits', {})
+        assert np.array_equal(robj.images[-1][3], self.data)
+        client.close()
+
+    def test_bad_codec(self):
+        with pytest.raises(ValueError):
+            grc.RemoteClient('127.0.0.1', 0, codec='foo')
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from ginga.util.histindex import TiledHistogram
+
+
+def direct_histogram(index, data):
+    data = data[np.isfinite(data)]
+    dist, bins = np.histogram(data, bins=index.bins)
+    return dist
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(42)
+    data = rng.normal(100.0, 20.0, size=(203, 317))
+    data[10:20, 30:40] = np.nan
+    data[150, :] = np.inf
+    return data
+
+
+class TestTiledHistogram:
+
+    @pytest.mark.parametrize('box', [
+        (0, 0, 316, 202),            # whole image
+        (5, 7, 250, 180),            # whole tiles and edges
+        (32, 32, 95, 95),            # exactly whole tiles
+        (3, 4, 20, 25),              # within one tile
+        (300, 190, 400, 300),        # clipped at the edges
+        (-10, -10, 40, 40),
+        (28, 8, 45, 22),             # mostly NaN
+    ])
+    def test_histogram(self, data, box):
+        index = TiledHistogram(data, numbins=128, tile_size=32)
+        x1, y1, x2, y2 = box
+        cutout = data[max(0, y1):y2 + 1, max(0, x1):x2 + 1]
+
+        res = index.histogram(*box, trim=False)
+        assert np.array_equal(res.dist, direct_histogram(index, cutout))
+        assert np.array_equal(res.bins, index.bins)
+
+        res = index.histogram(*box)
+        assert len(res.bins) == len(res.dist) + 1
+        assert res.dist.sum() == np.isfinite(cutout).sum()
+
+        stats = index.stats(*box)
+        finite = cutout[np.isfinite(cutout)]
+        assert stats.count == len(finite)
+        assert stats.minval == finite.min()
+        assert stats.maxval == finite.max()
+        assert stats.mean == pytest.approx(finite.mean())
+        assert stats.rms == pytest.approx(np.sqrt(np.mean(finite ** 2)))
+
+    def test_empty(self, data):
+        index = TiledHistogram(data, numbins=64, tile_size=32)
+        stats = index.stats(32, 12, 38, 18)
+        assert stats.count == 0 and stats.mean is None
+        assert index.histogram(32, 12, 38, 18).dist.sum() == 0
+        # box outside of the image
+        assert index.stats(400, 0, 500, 10).count == 0
+
+        with pytest.raises(ValueError):
+            TiledHistogram(np.zeros((2, 3, 4)))
@@ -0,0 +1,93 @@
+import logging
+
+import numpy as np
+
+from ginga import AstroImage, RGBImage, LayerImage
+
+logger = logging.getLogger("TestLayerImage")
+
+
+class AlphaImage(AstroImage.AstroImage, LayerImage.LayerImage):
+    def __init__(self, *args, **kwargs):
+        AstroImage.AstroImage.__init__(self, *args, **kwargs)
+        LayerImage.LayerImage.__init__(self)
+
+
+class RGBLayerImage(RGBImage.RGBImage, LayerImage.LayerImage):
+    def __init__(self, *args, **kwargs):
+        RGBImage.RGBImage.__init__(self, *args, **kwargs)
+        LayerImage.LayerImage.__init__(self)
+
+
+def make_layer(value, shape=(20, 30)):
+    data = np.arange(shape[0] * shape[1]).reshape(shape) % 100 + value
+    return AstroImage.AstroImage(data_np=data.astype(np.float64),
+                                 logger=logger)
+
+
+def compose_all(limage):
+    # composition of the layers from scratch, for comparison
+    res = np.zeros(limage.get_max_shape(), dtype=np.float64)
+    for i in range(limage.num_layers()):
+        layer = limage.get_layer(i)
+        res += layer.alpha * layer.image.get_data()
+    return res
+
+
+class TestLayerImage:
+
+    def test_alpha_incremental(self):
+        limage = AlphaImage(logger=logger)
+        layers = [make_layer(i * 10) for i in range(3)]
+        for i, image in enumerate(layers):
+            limage.insert_layer(i, image, alpha=0.5, compose=False)
+        limage.compose_layers()
+        result = limage.get_data()
+        assert result.dtype == np.float32
+        assert np.allclose(result, compose_all(limage))
+
+        limage.set_alpha(1, 0.25)
+        limage.set_layer(2, make_layer(50), alpha=0.75)
+        limage.insert_layer(3, make_layer(5), alpha=1.0)
+        limage.delete_layer(0)
+        # updated in place
+        assert limage.get_data() is result
+        assert limage._composed.count == 4
+        assert np.allclose(result, compose_all(limage), rtol=1e-5)
+
+        # composed from scratch after max_incremental updates
+        limage.max_incremental = 4
+        limage.set_alphas([0.1, 0.2, 0.3])
+        assert limage.get_data() is not result
+        assert limage._composed.count == 0
+        assert np.allclose(limage.get_data(), compose_all(limage))
+
+    def test_alpha_array(self):
+        limage = AlphaImage(logger=logger)
+        limage.insert_layer(0, make_layer(0), alpha=1.0)
+        alpha = np.full((20, 30), 0.5)
+        limage.insert_layer(1, make_layer(10), alpha=alpha)
+        alpha[:] = 0.25
+        limage.set_alpha(0, 0.5)
+        assert np.allclose(limage.get_data(), compose_all(limage))
+
+    def test_rgb_incremental(self):
+        limage = RGBLayerImage(logger=logger, order='RGB')
+        limage.compose = 'rgb'
+        for i in range(2):
+            limage.insert_layer(i, make_layer(i * 50), alpha=1.0)
+        data = limage.get_data()
+        assert data.shape == (20, 30, 3)
+        assert np.all(data[:, :, 2] == 0)
+
+        green = limage.get_layer(1).image
+        green.get_data()[:] = 0
+        # the green plane did not change, so it is not composed again
+        limage.set_alpha(0, 0.5)
+        assert limage.get_data() is data
+        assert np.all(data[:, :, 1] != 0)
+        expected = (0.5 * limage.get_layer(0).image.get_data())
+        assert np.all(data[:, :, 0] == expected.astype(np.uint8))
+
+        limage.compose_layers(incremental=False)
+        assert np.all(limage.get_data()[:, :, 1] == 0)
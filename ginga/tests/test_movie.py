@@ -0,0 +1,125 @@
+import logging
+
+import numpy as np
+import pytest
+
+from ginga import AstroImage
+from ginga.pilw.ImageViewPil import CanvasView
+from ginga.util import movie, videosink
+
+logger = logging.getLogger("TestMovie")
+
+
+@pytest.fixture
+def cube_image():
+    rs = np.random.RandomState(0)
+    data = rs.rand(6, 40, 50).astype(np.float32) * 100
+    # make each slice distinguishable
+    data += np.arange(6, dtype=np.float32)[:, None, None] * 100
+    image = AstroImage.AstroImage(logger=logger)
+    image.load_nddata(_NDData(data))
+    return image
+
+
+class _NDData:
+    def __init__(self, data):
+        self.data = data
+        self.meta = {}
+        self.wcs = None
+        self.uncertainty = None
+        self.mask = None
+        self.unit = None
+
+
+def make_viewer(image):
+    viewer = CanvasView(logger=logger)
+    viewer.configure(64, 48)
+    viewer.enable_autocuts('off')
+    viewer.set_image(image)
+    viewer.set_color_map('viridis')
+    viewer.cut_levels(50.0, 600.0)
+    return viewer
+
+
+def read_raw(path, size, count):
+    ht, wd = size
+    arr = np.fromfile(path, dtype=np.uint8)
+    return arr.reshape((count, ht, wd, 3))
+
+
+class TestMovieExporter:
+
+    @pytest.mark.parametrize('num_workers', [1, 3])
+    def test_full_resolution(self, cube_image, tmp_path, num_workers):
+        viewer = make_viewer(cube_image)
+        viewer.transform(True, False, False)
+        exporter = movie.MovieExporter(logger, viewer,
+                                       num_workers=num_workers)
+        size = exporter.get_frame_size(cube_image)
+        assert size == (40, 50)
+
+        path = str(tmp_path / 'cube.raw')
+        sink = videosink.get_video_sink(size, path)
+        assert isinstance(sink, videosink.RawSink)
+        progress = []
+        count = exporter.export(cube_image, sink, 1, 6,
+                                progress_cb=progress.append)
+        assert count == 5
+        assert progress == [0.2, 0.4, 0.6, 0.8, 1.0]
+
+        frames = read_raw(path, size, 5)
+        rgbmap = viewer.get_rgbmap()
+        data = cube_image.get_mddata()
+        for i, frame in enumerate(frames):
+            idx = viewer.autocuts.cut_levels(data[i + 1], 50.0, 600.0,
+                                             vmin=0, vmax=255)
+            expected = rgbmap.get_rgb_array(idx.astype(np.uint), order='RGB')
+            expected = np.flipud(np.fliplr(expected))
+            assert np.array_equal(frame, expected)
+
+    def test_viewer_mode(self, cube_image, tmp_path):
+        viewer = make_viewer(cube_image)
+        viewer.scale_to(2.0, 2.0)
+        viewer.set_pan(20.0, 15.0)
+        exporter = movie.MovieExporter(logger, viewer, num_workers=2,
+                                       use_viewer=True)
+        size = exporter.get_frame_size(cube_image)
+        assert size == (48, 64)
+
+        path = str(tmp_path / 'cube.raw')
+        exporter.export(cube_image, videosink.RawSink(size, path), 0, 6)
+        frames = read_raw(path, size, 6)
+
+        # frames are as shown in the viewer
+        for i in (0, 3, 5):
+            cube_image.set_naxispath([i])
+            viewer.redraw_now(whence=0)
+            expected = viewer.get_image_as_array(order='RGB')
+            assert np.array_equal(frames[i], expected)
+        # not just background
+        assert frames[5].max() > 0
+
+    def test_frame_sequence(self, cube_image, tmp_path):
+        viewer = make_viewer(cube_image)
+        exporter = movie.MovieExporter(logger, viewer)
+        size = exporter.get_frame_size(cube_image)
+        sink = videosink.get_video_sink(size, str(tmp_path / 'cube.png'))
+        exporter.export(cube_image, sink, 0, 3)
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            'cube_00000.png', 'cube_00001.png', 'cube_00002.png']
+
+    def test_error(self, cube_image, tmp_path):
+        viewer = make_viewer(cube_image)
+        exporter = movie.MovieExporter(logger, viewer)
+        sink = videosink.RawSink((40, 50), str(tmp_path / 'cube.raw'))
+        with pytest.raises(IndexError):
+            exporter.export(cube_image, sink, 4, 8)
+        # frames before the error were written, and the sink was closed
+        assert sink.out_f is None
+        assert len(read_raw(str(tmp_path / 'cube.raw'), (40, 50), 2)) == 2
+
+    def test_ffmpeg_not_running(self, tmp_path):
+        # e.g. after ffmpeg exited and the sink was closed
+        sink = videosink.FFmpegSink((40, 50), str(tmp_path / 'cube.mp4'))
+        with pytest.raises(IOError):
+            sink.write(np.zeros((40, 50, 3), dtype=np.uint8))
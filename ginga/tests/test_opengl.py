@@ -0,0 +1,140 @@
+"""Tests of the OpenGL renderer, using a headless EGL context.
+
+Requires PyOpenGL and an EGL implementation that can create a surfaceless
+OpenGL 3.3 core context (Mesa llvmpipe suffices).
+"""
+import ctypes
+import logging
+import os
+
+import numpy as np
+import pytest
+
+# must be set before OpenGL is imported
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+pytest.importorskip('OpenGL')
+from OpenGL import EGL                      # noqa: E402
+from ginga import ImageView, AstroImage     # noqa: E402
+from ginga.opengl.CanvasRenderGL import CanvasRenderer  # noqa: E402
+from ginga.opengl.GlHelp import get_transforms          # noqa: E402
+
+logger = logging.getLogger('test_opengl')
+
+
+def make_egl_context():
+    dpy = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    EGL.eglInitialize(dpy, ctypes.pointer(major), ctypes.pointer(minor))
+    attrs = (EGL.EGLint * 5)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                             EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                             EGL.EGL_NONE)
+    config, num = EGL.EGLConfig(), EGL.EGLint()
+    EGL.eglChooseConfig(dpy, attrs, ctypes.pointer(config), 1,
+                        ctypes.pointer(num))
+    if num.value < 1:
+        raise RuntimeError("no EGL config")
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    ctx_attrs = (EGL.EGLint * 7)(EGL.EGL_CONTEXT_MAJOR_VERSION, 3,
+                                 EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+                                 EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK,
+                                 EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+                                 EGL.EGL_NONE)
+    ctx = EGL.eglCreateContext(dpy, config, EGL.EGL_NO_CONTEXT, ctx_attrs)
+    if not EGL.eglMakeCurrent(dpy, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE,
+                              ctx):
+        raise RuntimeError("can't make EGL context current")
+    return ctx
+
+
+@pytest.fixture(scope='module')
+def egl_context():
+    try:
+        return make_egl_context()
+    except Exception as e:
+        pytest.skip("no usable EGL/OpenGL context: %s" % e)
+
+
+class GLView(ImageView.ImageViewBase):
+    """A minimal, invisible ImageView backed by the OpenGL renderer."""
+
+    def __init__(self, logger=None, settings=None):
+        super().__init__(logger=logger, settings=settings)
+        self.rgb_order = 'RGBA'
+        self.defer_redraw = False
+        self.renderer = CanvasRenderer(self)
+        # we replace some transforms in the catalog for OpenGL rendering
+        self.tform = get_transforms(self)
+
+    def get_widget(self):
+        return None
+
+    def make_context_current(self):
+        # the EGL context is always current
+        return None
+
+    def reschedule_redraw(self, time_sec):
+        self.delayed_redraw()
+
+    def update_widget(self):
+        pass
+
+
+def make_viewer(**settings):
+    v = GLView(logger=logger)
+    v.get_settings().set(**settings)
+    v.enable_autozoom('off')
+    v.enable_autocuts('off')
+    v.renderer.dims = (80, 60)
+    v.renderer.gl_initialize()
+    v.configure(80, 60)
+    return v
+
+
+def render(viewer, data, scale=1.0):
+    img = AstroImage.AstroImage(logger=logger)
+    img.set_data(data)
+    viewer.set_image(img)
+    viewer.cut_levels(0, 400)
+    viewer.scale_to(scale, scale)
+    viewer.redraw_now(whence=0)
+    return viewer.renderer.get_surface_as_array('RGBA')
+
+
+@pytest.mark.parametrize('interp', ['basic', 'bilinear'])
+@pytest.mark.parametrize('scale', [1.0, 3.0, 0.3])
+def test_tiled_matches_single_texture(egl_context, interp, scale):
+    data = np.random.RandomState(0).rand(50, 45).astype(np.float32) * 400
+    v1 = make_viewer(gl_texture_tile_size=4096, gl_texture_mipmaps=False,
+                     interpolation=interp)
+    arr1 = render(v1, data, scale=scale)
+    v2 = make_viewer(gl_texture_tile_size=7, gl_texture_mipmaps=False,
+                     interpolation=interp)
+    arr2 = render(v2, data, scale=scale)
+
+    tileset = list(v2.renderer._tile_cache.values())[0]
+    assert len(tileset.tiles) == 8 * 7
+    # no seams between tiles
+    assert np.array_equal(arr1, arr2)
+
+
+def test_tile_size_limited_by_max_texture(egl_context):
+    v = make_viewer(gl_texture_tile_size=100000)
+    assert v.renderer.get_tile_size() < v.renderer.max_texture_dim
+
+
+def test_partial_reupload(egl_context):
+    v = make_viewer(gl_texture_tile_size=16, gl_texture_mipmaps=True)
+    data = np.random.RandomState(1).rand(50, 45).astype(np.float32) * 400
+    render(v, data)
+    tileset = list(v.renderer._tile_cache.values())[0]
+    assert tileset.uploads == len(tileset.tiles) == 4 * 3
+
+    # change data within a single tile's interior
+    data = data.copy()
+    data[20:24, 20:24] = 0.0
+    arr = render(v, data)
+    assert tileset is list(v.renderer._tile_cache.values())[0]
+    assert tileset.uploads == len(tileset.tiles) + 1
+    assert arr.shape == (60, 80, 4)
@@ -0,0 +1,95 @@
+import logging
+
+import numpy as np
+
+from ginga import AstroImage
+from ginga.pilw.ImageViewPil import CanvasView
+from ginga.util.overview import get_overview, OverviewCanvas
+
+logger = logging.getLogger("TestOverview")
+
+
+def make_viewer(wd, ht):
+    viewer = CanvasView(logger=logger)
+    viewer.configure(wd, ht)
+    return viewer
+
+
+def make_image(wd, ht):
+    yi, xi = np.mgrid[0:ht, 0:wd]
+    data = (xi + yi).astype(np.float32)
+    return AstroImage.AstroImage(data_np=data, logger=logger)
+
+
+class TestOverview:
+
+    def test_get_overview(self):
+        image = make_image(2000, 1000)
+        assert get_overview(image, 2000) is None
+
+        ov = get_overview(image, 256)
+        assert ov.step == 8
+        assert ov.image.get_size() == (250, 125)
+        assert ov.image.get_data()[1, 2] == 8 + 16
+        # kept and shared
+        assert get_overview(image, 256) is ov
+
+        image.set_data(np.zeros((1000, 2000), dtype=np.float32))
+        ov2 = get_overview(image, 256)
+        assert ov2 is not ov
+        assert ov2.image.get_data().max() == 0
+
+    def test_overview_canvas(self):
+        image = make_image(2000, 1000)
+        main = make_viewer(400, 400)
+        main.set_image(image)
+        main.set_autocut_params('minmax')
+        main.scale_to(4, 4)
+
+        pan = make_viewer(100, 100)
+        pan.set_canvas(OverviewCanvas(main.get_canvas(), max_size=200))
+        main.copy_attributes(pan, ['cutlevels', 'limits'])
+        pan.zoom_fit()
+        assert pan.get_image() is image
+
+        ref = make_viewer(100, 100)
+        ref.set_canvas(main.get_canvas())
+        main.copy_attributes(ref, ['cutlevels', 'limits'])
+        ref.zoom_fit()
+
+        arr1 = pan.get_image_as_array().astype(int)
+        arr2 = ref.get_image_as_array().astype(int)
+        assert np.max(np.abs(arr1 - arr2)) <= 3
+
+        # only settings that changed are copied
+        main.set_pan(500, 500)
+        assert main.copy_attributes(pan, ['cutlevels', 'limits'],
+                                    only_changed=True) == []
+        main.cut_levels(100.0, 500.0)
+        assert main.copy_attributes(pan, ['cutlevels', 'limits'],
+                                    only_changed=True) == ['cuts']
+
+    def test_overview_canvas_objects(self):
+        main = make_viewer(400, 400)
+        main.set_image(make_image(200, 100))
+        canvas = OverviewCanvas(main.get_canvas(), max_size=200)
+        Box = canvas.get_draw_class('box')
+        num_objs = len(canvas.objects)
+
+        # objects of the overview canvas, on top of those of the source
+        box1, box2 = Box(10, 10, 5, 5), Box(20, 20, 5, 5)
+        canvas.add(box1, tag='box1')
+        canvas.add(box2)
+        assert canvas.objects[num_objs:] == [box1, box2]
+        assert canvas.get_object_by_tag('box1') is box1
+        assert len(main.get_canvas().objects) == num_objs
+
+        canvas.delete_object_by_tag('box1')
+        assert canvas.objects[num_objs:] == [box2]
+        assert 'box1' not in canvas.tags
+        canvas.delete_object(box2)
+        assert len(canvas.objects) == num_objs and len(canvas.tags) == 0
+
+        canvas.add(box1)
+        canvas.delete_all_objects()
+        assert len(canvas.objects) == num_objs
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ginga import AstroImage
+from ginga.pilw.ImageViewPil import CanvasView
+from ginga.util.prefetch import Prefetcher
+
+logger = logging.getLogger("TestPrefetch")
+
+
+def wait_loaded(pf, count, timeout=5.0):
+    t_end = time.time() + timeout
+    while time.time() < t_end:
+        stats = pf.get_stats()
+        if stats.loaded + stats.failed >= count and stats.pending == 0:
+            break
+        time.sleep(0.01)
+
+
+def make_image(value, shape=(100, 100)):
+    image = AstroImage.AstroImage(logger=logger)
+    image.set_data(np.full(shape, value, dtype=np.float32))
+    return image
+
+
+@pytest.fixture
+def make_prefetcher():
+    pfs = []
+
+    def _make(*args, **kwargs):
+        pf = Prefetcher(logger, *args, **kwargs)
+        pfs.append(pf)
+        return pf
+
+    yield _make
+    for pf in pfs:
+        pf.shutdown()
+
+
+class TestPrefetcher:
+
+    def test_hits(self, make_prefetcher):
+        loaded = []
+
+        def load_fn(arg):
+            if arg < 0:
+                raise ValueError("bad")
+            loaded.append(arg)
+            return make_image(arg)
+
+        pf = make_prefetcher(load_fn, num_workers=2)
+        pf.prefetch([('a', 1), ('b', 2), ('c', -1)])
+        wait_loaded(pf, 3)
+        stats = pf.get_stats()
+        assert (stats.loaded, stats.failed, stats.count) == (2, 1, 2)
+        assert stats.num_bytes == 2 * 100 * 100 * 4
+
+        # items loaded or being loaded are not loaded again
+        pf.prefetch([('b', 2), ('a', 1)])
+        assert pf.get('a').get_data()[0, 0] == 1
+        assert pf.get('a') is None
+        assert pf.get('c') is None
+        stats = pf.get_stats()
+        assert (stats.hits, stats.misses, stats.count) == (1, 2, 1)
+        assert sorted(loaded) == [1, 2]
+
+    def test_budget(self, make_prefetcher):
+        pf = make_prefetcher(make_image, num_workers=1,
+                             max_bytes=2 * 100 * 100 * 4)
+        pf.prefetch([('a', 1), ('b', 2)])
+        wait_loaded(pf, 2)
+        # items no longer wanted are dropped first
+        pf.prefetch([('b', 2), ('c', 3)])
+        wait_loaded(pf, 3)
+        assert pf.get('a') is None
+        # then the least wanted ones
+        pf.prefetch([('d', 4), ('c', 3), ('b', 2)])
+        wait_loaded(pf, 4)
+        stats = pf.get_stats()
+        assert (stats.count, stats.evicted) == (2, 2)
+        assert pf.get('b') is None
+        assert pf.get('d') is not None
+
+    def test_late(self, make_prefetcher):
+        ev_go = threading.Event()
+        results = []
+
+        def load_fn(arg):
+            ev_go.wait(5.0)
+            return make_image(arg)
+
+        pf = make_prefetcher(load_fn)
+        pf.prefetch([('a', 1)])
+        assert pf.get('a', callback=results.append) is None
+        assert pf.is_pending('a')
+        ev_go.set()
+        wait_loaded(pf, 1)
+        assert len(results) == 1
+        assert results[0].get_data()[0, 0] == 1
+        stats = pf.get_stats()
+        # handed to the callback, not kept
+        assert (stats.late, stats.count, stats.hit_rate) == (1, 0, 1.0)
+
+    def test_cut_levels_hint(self):
+        viewer = CanvasView(logger=logger)
+        viewer.configure(100, 100)
+        viewer.set_autocut_params('minmax')
+        data = np.ones((100, 100), dtype=np.float32)
+        data[0, :2] = (0.0, 5.0)
+        image = AstroImage.AstroImage(data_np=data, logger=logger)
+        viewer.calc_cut_levels_hint(image)
+        # pretend the levels were calculated differently
+        image.set(cut_levels_hint=(image.get('cut_levels_hint')[0],
+                                   (1.0, 2.0)))
+        viewer.set_image(image)
+        assert viewer.get_cut_levels() == (1.0, 2.0)
+        # used once
+        assert image.get('cut_levels_hint') is None
+        viewer.auto_levels()
+        assert viewer.get_cut_levels() == (0.0, 5.0)
@@ -0,0 +1,114 @@
+import json
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from ginga.misc import Callback
+from ginga.util import pipeline, profiler
+from ginga.util.stages.base import Stage
+from ginga.gw.GwMain import GwMain
+
+logger = logging.getLogger("TestProfiler")
+
+
+class SleepStage(Stage):
+
+    _stagename = 'sleep'
+
+    def run(self, prev_stage):
+        time.sleep(0.002)
+
+
+@pytest.fixture
+def prof():
+    prof = profiler.enable(window=100)
+    yield prof
+    profiler.disable()
+
+
+class TestProfiler:
+
+    def test_callbacks(self, prof):
+        obj = Callback.Callbacks()
+        obj.enable_callback('changed')
+
+        def slow_cb(obj, val):
+            time.sleep(0.002)
+
+        def fast_cb(obj, val):
+            return True
+
+        obj.add_callback('changed', slow_cb)
+        obj.add_callback('changed', fast_cb)
+        for i in range(5):
+            obj.make_callback('changed', i)
+
+        stats = {st.name: st for st in prof.get_stats(cat='callback')}
+        slow = stats['changed -> %s' % slow_cb.__qualname__]
+        fast = stats['changed -> %s' % fast_cb.__qualname__]
+        assert slow.count == 5 and fast.count == 5
+        assert slow.p50 >= 0.002 and slow.p50 > fast.p99
+        assert slow.p50 <= slow.p90 <= slow.p99 <= slow.max
+        # slowest first
+        assert prof.get_stats()[0].name == slow.name
+
+    def test_disabled(self):
+        prof = profiler.enable()
+        profiler.disable()
+        obj = Callback.Callbacks()
+        obj.enable_callback('changed')
+        obj.add_callback('changed', lambda obj: None)
+        obj.make_callback('changed')
+        assert profiler.get_profiler() is None
+        assert len(prof.events) == 0
+
+    def test_pipeline_and_gui(self, prof):
+        pipe = pipeline.Pipeline(logger, [SleepStage(), SleepStage()],
+                                 name='test')
+        pipe.run_all()
+        st = prof.get_stats(cat='stage')[0]
+        assert (st.name, st.count) == ('sleep', 2)
+
+        main = GwMain(logger=logger)
+        main.gui_do(np.sum, [1, 2])
+        future = main.gui_queue.get()
+        main._execute_future(future)
+        assert future.get_value() == 3
+        st = prof.get_stats(cat='gui')[0]
+        assert st.count == 1
+        assert prof.events[-1][-1]['wait_ms'] >= 0
+
+    def test_rolling_window(self, prof):
+        for i in range(150):
+            prof.record('test', 'ev', 0.0, float(i))
+        st = prof.get_stats(cat='test')[0]
+        # count and total cover all events, percentiles the last 100
+        assert st.count == 150
+        assert st.total == sum(range(150))
+        assert st.max == 149.0
+        assert st.p50 == np.median(np.arange(50, 150))
+        assert 'ev' in prof.report(cat='test')
+
+    def test_save_trace(self, prof, tmp_path):
+        with prof.span('redraw', 'viewer', args=dict(whence=0)):
+            time.sleep(0.001)
+        path = str(tmp_path / 'trace.json')
+        n = prof.save_trace(path)
+        with open(path) as in_f:
+            trace = json.load(in_f)
+        events = trace['traceEvents']
+        assert len(events) == n
+        meta = [ev for ev in events if ev['ph'] == 'M']
+        spans = [ev for ev in events if ev['ph'] == 'X']
+        assert meta[0]['name'] == 'thread_name'
+        assert len(spans) == 1
+        ev = spans[0]
+        assert (ev['cat'], ev['name'], ev['args']) == ('redraw', 'viewer',
+                                                       {'whence': 0})
+        assert ev['dur'] >= 1000.0 and ev['ts'] >= 0.0
+        assert ev['tid'] == meta[0]['tid']
+
+        prof.clear()
+        assert len(prof.events) == 0 and prof.get_stats() == []
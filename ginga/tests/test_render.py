@@ -0,0 +1,98 @@
+import io
+import os
+import logging
+
+import numpy as np
+import pytest
+from astropy.io import fits
+from PIL import Image
+
+from ginga.util import render
+
+logger = logging.getLogger("TestRender")
+
+
+@pytest.fixture
+def files(tmp_path):
+    hdr = fits.Header()
+    hdr.update(CTYPE1='RA---TAN', CTYPE2='DEC--TAN', CRVAL1=10.0,
+               CRVAL2=20.0, CRPIX1=50.0, CRPIX2=40.0, CDELT1=-0.001,
+               CDELT2=0.001)
+    paths = []
+    for i in range(3):
+        data = np.arange(80 * 100, dtype=np.float32).reshape(80, 100) * i
+        path = str(tmp_path / 'img{}.fits'.format(i))
+        fits.writeto(path, data, hdr)
+        paths.append(path)
+    bad = tmp_path / 'bad.fits'
+    bad.write_text('not a FITS file')
+    return paths + [str(bad)]
+
+
+def read_png(path):
+    with open(path, 'rb') as in_f:
+        return np.array(Image.open(io.BytesIO(in_f.read())))
+
+
+class TestRender:
+
+    def test_renderer(self, files):
+        renderer = render.Renderer(logger=logger, size=(120, 90),
+                                   profile=dict(color_map='gray'),
+                                   cuts=(0.0, 8000.0), zoom=1.0,
+                                   fitspkg='astropy')
+        image = renderer.load(files[1])
+        buf = renderer.render_image(image)
+        arr = np.array(Image.open(io.BytesIO(buf)))
+        assert arr.shape == (90, 120, 3)
+        # rows of increasing values, lowest at the bottom of the window
+        assert arr[-10, 60, 0] < arr[45, 60, 0] < arr[10, 60, 0]
+
+        with pytest.raises(ValueError):
+            render.Renderer(overlays=['foo'])
+
+    @pytest.mark.parametrize('num_workers', [0, 2])
+    def test_render_files(self, files, tmp_path, num_workers):
+        outdir = str(tmp_path / 'out')
+        done = []
+        stats = render.render_files(
+            files, outdir, num_workers=num_workers, size=(64, 48),
+            overlays=['name', 'colorbar', 'compass'], fitspkg='astropy',
+            progress_cb=lambda *args: done.append(args))
+        assert (stats.num_files, stats.num_done) == (4, 3)
+        assert len(done) == 4
+        assert [err[0] for err in stats.errors] == [files[3]]
+        lat = stats.latency
+        assert 0 < lat.p50 <= lat.p90 <= lat.p99 <= lat.max
+        assert stats.rate > 0
+        assert 'rendered 3 of 4 files' in render.format_stats(stats)
+
+        for path in files[:3]:
+            outpath = render.get_output_path(path, outdir)
+            assert read_png(outpath).shape == (48, 64, 3)
+
+    def test_same_names(self, files, tmp_path):
+        # files with the same name in different directories
+        (tmp_path / 'b').mkdir()
+        path = str(tmp_path / 'b' / 'img1.fits')
+        with open(files[2], 'rb') as in_f, open(path, 'wb') as out_f:
+            out_f.write(in_f.read())
+        outdir = str(tmp_path / 'out')
+        outpaths = render.get_output_paths(files[1:3] + [path], outdir)
+        assert [os.path.basename(outpath) for outpath in outpaths] == [
+            'img1.png', 'img2.png', 'img1_2.png']
+
+        stats = render.render_files(
+            [files[1], path], outdir, num_workers=0, size=(64, 48),
+            cuts=(0.0, 8000.0), fitspkg='astropy')
+        assert stats.num_done == 2
+        assert not np.array_equal(read_png(outpaths[0]),
+                                  read_png(outpaths[2]))
+
+    def test_load_profile(self, tmp_path):
+        path = tmp_path / 'profile.cfg'
+        path.write_text("color_map = 'heat'\nautocut_method = 'minmax'\n")
+        profile = render.load_profile(str(path))
+        assert profile == dict(color_map='heat', autocut_method='minmax')
+        renderer = render.Renderer(profile=profile)
+        assert renderer.viewer.get_settings().get('color_map') == 'heat'
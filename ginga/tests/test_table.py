@@ -0,0 +1,119 @@
+import logging
+
+import numpy as np
+import pytest
+
+from ginga.table.AstroTable import AstroTable, TableColumns
+
+pyfits = pytest.importorskip('astropy.io.fits')
+
+logger = logging.getLogger("TestTable")
+
+
+@pytest.fixture(scope='module')
+def fits_table(tmp_path_factory):
+    rs = np.random.RandomState(42)
+    n = 10000
+    cols = [pyfits.Column(name='ID', format='K', array=np.arange(n)),
+            pyfits.Column(name='MAG', format='E', unit='mag',
+                          array=rs.uniform(10, 20, n).astype(np.float32)),
+            pyfits.Column(name='FLAG', format='J',
+                          array=rs.randint(0, 4, n))]
+    hdu = pyfits.BinTableHDU.from_columns(cols)
+    path = str(tmp_path_factory.mktemp('table') / 'tab.fits')
+    hdu.writeto(path)
+    return path
+
+
+def load_columnar(path):
+    from ginga.util.io import io_fits
+    opener = io_fits.AstropyFitsFileHandler(logger)
+    return opener.load_file(path, numhdu=1, columnar=True)
+
+
+class TestColumnarTable:
+
+    def test_empty_hdu(self):
+        cols = TableColumns.from_fits_hdu(pyfits.BinTableHDU())
+        assert (len(cols), cols.colnames) == (0, [])
+
+        hdu = pyfits.BinTableHDU.from_columns(
+            [pyfits.Column(name='MAG', format='E')], nrows=0)
+        tab = AstroTable(logger=logger)
+        tab.set_columns(TableColumns.from_fits_hdu(hdu))
+        assert tab.rows == 0
+        assert len(tab.get_column('MAG')) == 0
+        assert len(tab.filter_rows(('MAG', '<', 12))) == 0
+
+    def test_lazy_load(self, fits_table):
+        tab = load_columnar(fits_table)
+        assert tab.kind == 'table-columnar'
+        assert tab.is_columnar()
+        assert tab.colnames == ['ID', 'MAG', 'FLAG']
+        assert tab.rows == 10000
+        cols = tab.get_data()
+        assert not any(cols.is_loaded(name) for name in tab.colnames)
+
+        mag = tab.get_column('MAG')
+        assert cols.is_loaded('MAG') and not cols.is_loaded('ID')
+        assert len(mag) == 10000
+        # astropy Table-like access used by the plotting plugins
+        col = cols['MAG']
+        assert col.name == 'MAG' and str(col.unit) == 'mag'
+        assert np.array_equal(col.data, mag)
+
+    def test_filter_rows(self, fits_table):
+        tab = load_columnar(fits_table)
+        mag = tab.get_column('MAG')
+        flag = tab.get_column('FLAG')
+        expected = np.flatnonzero((mag >= 12) & (mag <= 13) & (flag == 2))
+
+        rows = tab.filter_rows(('MAG', 'between', (12, 13)),
+                               ('FLAG', '==', 2))
+        assert np.array_equal(rows, expected)
+
+        # same result using indexes
+        tab.create_index('MAG', kind='sorted')
+        rows = tab.filter_rows(('MAG', 'between', (12, 13)),
+                               ('FLAG', '==', 2))
+        assert np.array_equal(rows, expected)
+
+        tab.drop_index('MAG')
+        tab.create_index('FLAG', kind='bucket')
+        rows = tab.filter_rows(('FLAG', '==', 2),
+                               ('MAG', 'between', (12, 13)))
+        assert np.array_equal(rows, expected)
+
+        rows = tab.filter_rows(('FLAG', 'in', [0, 3]), ('MAG', '<', 11))
+        assert np.array_equal(
+            rows, np.flatnonzero(np.isin(flag, [0, 3]) & (mag < 11)))
+
+        # callable predicate
+        rows = tab.filter_rows(
+            lambda t, rows: t.get_column('ID')[rows] % 1000 == 0)
+        assert np.array_equal(rows, np.arange(0, 10000, 1000))
+
+    @pytest.mark.parametrize('op', ['<', '<=', '>', '>=', '=='])
+    def test_sorted_index_ops(self, op):
+        values = np.array([3, 1, 2, 2, 5, 4, 2])
+        tab = AstroTable(logger=logger)
+        tab.set_columns(TableColumns(['A'], len(values), lambda name: values))
+        expected = tab.filter_rows(('A', op, 2))
+        tab.create_index('A')
+        assert np.array_equal(tab.filter_rows(('A', op, 2)), expected)
+
+    def test_row_view(self, fits_table):
+        tab = load_columnar(fits_table)
+        view = tab.get_row_view(0, 100)
+        assert set(view.keys()) == {'ID', 'MAG', 'FLAG'}
+        assert np.array_equal(view['ID'], np.arange(100))
+
+        rows = tab.filter_rows(('ID', '>=', 9990))
+        view = tab.get_row_view(0, 5, rows=rows)
+        assert np.array_equal(view['ID'], np.arange(9990, 9995))
+
+    def test_take(self, fits_table):
+        tab = load_columnar(fits_table)
+        sub = tab.get_data()[np.array([5, 7, 9])]
+        assert len(sub) == 3
+        assert np.array_equal(sub.get_column('ID'), [5, 7, 9])
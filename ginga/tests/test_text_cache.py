@@ -0,0 +1,96 @@
+import logging
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from ginga.misc import Bunch
+from ginga.fonts import font_asst
+from ginga.canvas.types.all import Text
+from ginga.pilw.ImageViewPil import CanvasView
+from ginga.pilw import PilHelp
+
+logger = logging.getLogger("TestTextCache")
+
+
+class TestTextCache:
+
+    def test_lru(self):
+        cache = font_asst.TextCache(max_bytes=100)
+        assert cache.get('a') is None
+        cache.put('a', 'A', 40)
+        cache.put('b', 'B', 40)
+        assert cache.get('a') == 'A'
+        # 'b' is the least recently used
+        cache.put('c', 'C', 40)
+        assert cache.get('b') is None
+        assert cache.get('c') == 'C'
+        # too big to keep
+        cache.put('d', 'D', 200)
+        assert cache.get('d') is None
+
+        stats = cache.get_stats()
+        assert (stats.hits, stats.misses, stats.count) == (2, 3, 2)
+        assert stats.hit_rate == 0.4
+        assert stats.num_bytes == 80
+
+        cache.set_limit(50)
+        assert cache.get_stats().count == 1
+        cache.clear()
+        stats = cache.get_stats()
+        assert (stats.count, stats.num_bytes, stats.hit_rate) == (0, 0, None)
+
+    def test_renderer(self):
+        viewer = CanvasView(logger=logger)
+        viewer.configure(200, 100)
+        canvas = viewer.get_canvas()
+        canvas.add(Text(20, 30, text='Hello', color='yellow'))
+        canvas.add(Text(120, 60, text='World', color='red', rot_deg=30.0))
+
+        cache = font_asst.get_text_cache()
+        cache.clear()
+        viewer.redraw_now(whence=0)
+        arr1 = viewer.get_image_as_array()
+        assert np.any(arr1 > 0)
+        stats = cache.get_stats()
+        assert (stats.hits, stats.misses) == (0, 2)
+
+        # drawn again from the cache, the same
+        viewer.redraw_now(whence=0)
+        stats = cache.get_stats()
+        assert (stats.hits, stats.misses) == (2, 2)
+        assert np.array_equal(viewer.get_image_as_array(), arr1)
+
+    @pytest.mark.parametrize('fill_color,line', [
+        ((255, 255, 0, 255), None),
+        ((255, 255, 0, 128), None),
+        ((255, 255, 0, 77), None),
+        ((255, 255, 0, 128), (2, (0, 0, 0, 128))),
+        ((255, 255, 0, 77), (1, (255, 0, 0, 200))),
+        ((255, 255, 0, 128), (2, (255, 255, 0, 128))),
+    ])
+    def test_pil_text_same_as_direct(self, fill_color, line):
+        """Cached text is blended exactly as ImageDraw.text draws it."""
+        font = Bunch.Bunch(fontname='sans', fontsize=16,
+                           render=Bunch.Bunch(
+                               font=PilHelp.get_font('sans', 16)))
+        fill = Bunch.Bunch(render=Bunch.Bunch(color=fill_color))
+        kwargs = dict(font=font.render.font, fill=fill_color)
+        if line is not None:
+            linewidth, color = line
+            line = Bunch.Bunch(linewidth=linewidth,
+                               render=Bunch.Bunch(color=color))
+            kwargs.update(stroke_width=linewidth, stroke_fill=color)
+
+        expected = Image.new('RGB', (200, 60), (20, 60, 200))
+        ImageDraw.Draw(expected, 'RGBA').text((10, 12), 'Hello Wg', **kwargs)
+        expected = np.asarray(expected)
+
+        font_asst.get_text_cache().clear()
+        for i in range(2):
+            # first drawn from new masks, then from the cached ones
+            surface = Image.new('RGB', (200, 60), (20, 60, 200))
+            ctx = PilHelp.PilContext(surface)
+            ctx.text((10, 12), 'Hello Wg', font, line, fill)
+            assert np.array_equal(np.asarray(surface), expected)
+        assert font_asst.get_text_cache().get_stats().hits == 1
@@ -0,0 +1,82 @@
+import logging
+
+import numpy as np
+import pytest
+
+from ginga.canvas import transform
+from ginga.pilw.ImageViewPil import CanvasView
+
+logger = logging.getLogger("TestTransform")
+
+
+def chain(viewer, *tforms):
+    res = tforms[0](viewer)
+    for tform in tforms[1:]:
+        res = res + tform(viewer)
+    return res
+
+
+@pytest.fixture
+def viewer():
+    viewer = CanvasView(logger=logger)
+    viewer.configure(300, 200)
+    return viewer
+
+
+class TestAffineTransform:
+
+    @pytest.mark.parametrize('change', [
+        lambda v: None,
+        lambda v: v.set_pan(37.2, -12.7),
+        lambda v: v.scale_to(2.5, 0.75),
+        lambda v: v.rotate(33.0),
+        lambda v: v.transform(True, False, True),
+        lambda v: v.configure(123, 457),
+    ])
+    def test_matches_chain(self, viewer, change):
+        data_to_cart = [transform.DataCartesianTransform,
+                        transform.ScaleTransform,
+                        transform.RotationFlipTransform]
+        native = chain(viewer, *data_to_cart,
+                       transform.CartesianNativeTransform)
+        window = chain(viewer, *data_to_cart,
+                       transform.CartesianWindowTransform)
+        pts = np.random.default_rng(1).uniform(-500, 500, size=(50, 2))
+
+        # state is picked up after compiling
+        viewer.tform['data_to_native'].to_(pts)
+        change(viewer)
+
+        for name, tr in (('data_to_native', native),
+                         ('data_to_window', window)):
+            res = viewer.tform[name].to_(pts)
+            assert res.dtype.kind == 'i'
+            # only values at halfway between pixels may round differently
+            assert np.abs(res - tr.to_(pts)).max() <= 1
+            win = viewer.tform[name].to_(pts[:3]).astype(float)
+            assert np.allclose(viewer.tform[name].from_(win), tr.from_(win))
+
+        # a single point
+        x, y = viewer.tform['data_to_native'].to_((10.0, 20.0))
+        assert (x, y) == tuple(native.to_((10.0, 20.0)))
+
+        # points with a Z coordinate go through the chain
+        pts3 = np.hstack((pts, np.ones((len(pts), 1))))
+        res = viewer.tform['data_to_native'].to_(pts3)
+        assert np.array_equal(res, native.to_(pts3))
+
+    def test_matrix(self, viewer):
+        viewer.set_pan(50.0, 60.0)
+        viewer.scale_to(2.0, 2.0)
+        mapper = viewer.get_coordmap('native')
+        mtx = mapper.get_matrix()
+        assert mapper.get_matrix() is mtx
+        # pan position maps to the window center
+        assert np.allclose(mtx.dot([50.0, 60.0, 1.0]),
+                           viewer.get_center())
+        assert np.allclose(mtx[:, :2], [[2.0, 0.0], [0.0, -2.0]])
+
+        viewer.rotate(90.0)
+        mtx = mapper.get_matrix()
+        assert np.allclose(mtx[:, :2], [[0.0, -2.0], [-2.0, 0.0]],
+                           atol=1e-9)
@@ -58,3 +58,83 @@ class TestTrcalc:
         m = hashlib.sha256()
         m.update(str(new_data.tolist()).encode())
         assert m.hexdigest() == res
+
+    def _overlay_ref(self, dstarr, pos, srcarr):
+        # straightforward floating point alpha blend of RGBA arrays
+        x, y = pos
+        ht, wd = srcarr.shape[:2]
+        max_val = float(np.iinfo(dstarr.dtype).max)
+        res = dstarr.astype(float)
+        alpha = srcarr[..., 3:4] / max_val
+        _dst = res[y:y + ht, x:x + wd, :3]
+        _dst[...] = alpha * srcarr[..., :3] + (1.0 - alpha) * _dst
+        return np.floor(res + 0.5)
+
+    def test_overlay_image_2d_fixed_point(self):
+        rs = np.random.RandomState(42)
+        for dtype in (np.uint8, np.uint16):
+            max_val = np.iinfo(dtype).max
+            dstarr = rs.randint(0, max_val, (70, 90, 4)).astype(dtype)
+            srcarr = rs.randint(0, max_val, (40, 50, 4)).astype(dtype)
+            expected = self._overlay_ref(dstarr, (30, 20), srcarr)
+
+            res = trcalc.overlay_image_2d_np(dstarr, (30, 20), srcarr,
+                                             copy=True)
+            assert res.dtype == dtype
+            assert np.array_equal(res, expected)
+
+            # in place
+            trcalc.overlay_image_2d_np(dstarr, (30, 20), srcarr)
+            assert np.array_equal(dstarr, expected)
+
+    def test_overlay_image_2d_scalar_alpha(self):
+        dstarr = np.full((10, 10, 3), 200, dtype=np.uint8)
+        srcarr = np.full((4, 4, 3), 100, dtype=np.uint8)
+        trcalc.overlay_image_2d_np(dstarr, (-2, 8), srcarr, dst_order='RGB',
+                                   src_order='RGB', alpha=0.25)
+        # only the visible part is blended
+        assert np.all(dstarr[8:, :2] == 175)
+        assert np.all(dstarr[:8] == 200) and np.all(dstarr[:, 2:] == 200)
+
+        # fully opaque and fully transparent sources
+        srcarr = np.zeros((4, 4, 4), dtype=np.uint8)
+        trcalc.overlay_image_2d_np(dstarr, (0, 0), srcarr, dst_order='RGB')
+        assert np.all(dstarr[:4, :4] == 200)
+        srcarr[..., 3] = 255
+        trcalc.overlay_image_2d_np(dstarr, (0, 0), srcarr, dst_order='RGB')
+        assert np.all(dstarr[:4, :4] == 0)
+
+    def test_overlay_image_2d_float(self):
+        dstarr = np.full((6, 6, 4), 0.5)
+        srcarr = np.ones((6, 6, 3))
+        trcalc.overlay_image_2d_np(dstarr, (0, 0), srcarr, src_order='RGB',
+                                   alpha=0.5, fill=True)
+        assert np.allclose(dstarr[..., :3], 0.75)
+        assert np.all(dstarr[..., 3] == np.finfo(float).max)
+
+    def test_overlay_images_2d(self):
+        rs = np.random.RandomState(7)
+        dstarr = rs.randint(0, 255, (300, 200, 4)).astype(np.uint8)
+        layers = [((-10, -5), rs.randint(0, 255, (120, 80, 4)).astype(np.uint8)),
+                  ((50, 100), rs.randint(0, 255, (250, 190, 4)).astype(np.uint8)),
+                  ((30, 40), rs.randint(0, 255, (100, 100, 3)).astype(np.uint8),
+                   0.6)]
+        expected = np.copy(dstarr)
+        for layer in layers:
+            alpha = layer[2] if len(layer) > 2 else 1.0
+            order = 'RGBA' if layer[1].shape[2] == 4 else 'RGB'
+            trcalc.overlay_image_2d_np(expected, layer[0], layer[1],
+                                       src_order=order, alpha=alpha,
+                                       fill=True)
+
+        # small bands, so that layers span several of them
+        band_size = trcalc.blend_band_size
+        trcalc.blend_band_size = 200 * 4 * 7
+        try:
+            res = trcalc.overlay_images_2d(dstarr, layers[:2], fill=True,
+                                           copy=True)
+            res = trcalc.overlay_images_2d(res, layers[2:], src_order='RGB',
+                                           fill=True)
+        finally:
+            trcalc.blend_band_size = band_size
+        assert np.array_equal(res, expected)
@@ -571,3 +571,44 @@ def test_text_bg_box_constant_under_zoom_in_3d(viewer):
 
     assert s1[0] > 0 and s1[1] > 0                # the box rendered
     assert s1 == s3                              # constant pixel size at any zoom
+
+
+def test_pipelined_frames(viewer):
+    arr1 = _render(viewer, np.full((10, 10), 100.0, dtype=np.float32))
+    renderer = viewer.renderer
+    # two frames in flight; each reads back as rendered
+    f1 = renderer.render_frame()
+    img = viewer.get_image()
+    img.set_data(np.full((10, 10), 900.0, dtype=np.float32))
+    viewer.redraw_now(whence=0)
+    f2 = renderer.render_frame()
+    assert f2 == f1 + 1
+    a1 = renderer.read_frame(f1, 'RGBA')
+    a2 = renderer.read_frame(f2, 'RGBA')
+    assert np.array_equal(a1, arr1)
+    assert not np.array_equal(a1, a2)
+
+
+def test_partial_texture_update(viewer):
+    data = np.zeros((40, 40), dtype=np.float32)
+    data[::2] = 1000.0
+    img = AstroImage.AstroImage(logger=logger)
+    img.set_data(data)
+    viewer.set_image(img)
+    viewer.enable_autocuts('off')
+    try:
+        viewer.cut_levels(0.0, 1000.0)
+        viewer.redraw_now(whence=0)
+        viewer.renderer.get_surface_as_array('RGBA')
+        # change a small region of the same image in place
+        data[10:14, 20:30] = 500.0
+        img.set_data(data)
+        viewer.redraw_now(whence=0)
+        arr = viewer.renderer.get_surface_as_array('RGBA')
+        # same result as a fresh upload
+        viewer.renderer._ensure_engine(0, 0)
+        viewer.redraw_now(whence=0)
+        expected = viewer.renderer.get_surface_as_array('RGBA')
+        assert np.array_equal(arr, expected)
+    finally:
+        viewer.enable_autocuts('on')
@@ -53,3 +53,69 @@ def test_buffer_roundtrip(ctx):
     finally:
         vk.vkDestroyBuffer(ctx.device, buf, None)
         vk.vkFreeMemory(ctx.device, mem, None)
+
+
+def test_staging_ring_reuse(ctx):
+    ring = vkcore.StagingRing(ctx, size=4096)
+    try:
+        # many more uploads than fit in the ring at once
+        for i in range(20):
+            data = np.full(1000, i, dtype=np.uint8)
+            off = ring.write(data)
+            assert off % ring.align == 0 and off + 1000 <= ring.size
+            cmd = ctx.begin_commands()
+            ctx.submit(cmd)
+        ctx.wait_idle()
+        assert ctx.completed_serial == ctx.submit_serial
+        # an upload bigger than the ring grows it
+        off = ring.write(np.zeros(10000, dtype=np.uint8))
+        assert ring.size >= 10000 and off == 0
+        ctx.submit(ctx.begin_commands())
+        ctx.wait_idle()
+    finally:
+        ring.destroy()
+
+
+def test_texture_partial_update(ctx):
+    import vulkan as vk
+    data = np.arange(16 * 12 * 4, dtype=np.uint32).astype(np.uint8).reshape(
+        12, 16, 4)
+    img, mem, view = ctx.create_texture_2d(16, 12, vk.VK_FORMAT_R8G8B8A8_UNORM,
+                                           data)
+    try:
+        sub = np.full((3, 5, 4), 255, dtype=np.uint8)
+        ctx.update_texture_2d(img, 4, 2, 5, 3, sub)
+        expected = data.copy()
+        expected[2:5, 4:9] = sub
+        arr = ctx.read_texture_2d(img, 16, 12, 4)
+        assert np.array_equal(arr.reshape(12, 16, 4), expected)
+    finally:
+        ctx.wait_idle()
+        vk.vkDestroyImageView(ctx.device, view, None)
+        vk.vkDestroyImage(ctx.device, img, None)
+        vk.vkFreeMemory(ctx.device, mem, None)
+
+
+def test_release_later(ctx):
+    released = []
+    cmd = ctx.begin_commands()
+    serial = ctx.submit(cmd)
+    ctx.release_later(released.append, 1)
+    ctx.wait_serial(serial)
+    assert released == [1]
+    # nothing in flight: released right away
+    ctx.release_later(released.append, 2)
+    assert released == [1, 2]
+
+
+def test_changed_tiles():
+    from ginga.vulkan.pipelines import _tile_checksums, _changed_bbox
+    data = np.zeros((300, 500), dtype=np.float32)
+    sums = _tile_checksums(data, 128)
+    assert sums.shape == (3, 4)
+    assert _changed_bbox(sums, sums, 128, data.shape) is None
+    data[130:140, 260:270] = 1.0
+    data[299, 499] = 1.0
+    new_sums = _tile_checksums(data, 128)
+    assert _changed_bbox(sums, new_sums, 128, data.shape) == (256, 128,
+                                                              500, 300)
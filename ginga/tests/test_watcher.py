@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from ginga.util import watcher
+
+logger = logging.getLogger("TestWatcher")
+
+
+def read_file(path):
+    if path.endswith('.bad'):
+        raise ValueError("bad file")
+    with open(path, 'rb') as in_f:
+        return in_f.read()
+
+
+class Collector:
+
+    def __init__(self, fw):
+        self.results = []
+        self.ev_done = threading.Event()
+        self.count = 0
+        fw.add_callback('loaded', self.loaded_cb)
+        fw.add_callback('failed', self.failed_cb)
+
+    def loaded_cb(self, fw, path, data):
+        self.results.append((path, data))
+        self.ev_done.set()
+
+    def failed_cb(self, fw, path, errmsg):
+        self.results.append((path, errmsg))
+        self.ev_done.set()
+
+    def wait(self, count, timeout=10.0):
+        t_end = time.time() + timeout
+        while len(self.results) < count and time.time() < t_end:
+            self.ev_done.wait(0.05)
+            self.ev_done.clear()
+        return len(self.results)
+
+
+@pytest.fixture
+def make_watcher():
+    watchers = []
+
+    def _make(load_fn=read_file, **kwargs):
+        fw = watcher.FolderWatcher(logger, load_fn, **kwargs)
+        fw.start()
+        watchers.append(fw)
+        return fw, Collector(fw)
+
+    yield _make
+    for fw in watchers:
+        fw.stop()
+
+
+class TestFolderWatcher:
+
+    def test_settle(self, make_watcher, tmp_path):
+        fw, coll = make_watcher(settle_time=0.3, poll_interval=0.05)
+        path = str(tmp_path / 'a.fits')
+        with open(path, 'wb') as out_f:
+            for i in range(4):
+                out_f.write(b'x' * 100)
+                out_f.flush()
+                # events for a file being written are merged
+                fw.notify(path)
+                time.sleep(0.1)
+        assert len(coll.results) == 0
+        assert coll.wait(1) == 1
+        assert coll.results[0] == (path, b'x' * 400)
+
+        # no more loads for the same version of the file
+        fw.notify(path, closed=True)
+        time.sleep(0.2)
+        assert len(coll.results) == 1
+        stats = fw.get_stats()
+        assert (stats.settling, stats.loaded) == (0, 1)
+        assert stats.latency_p50 >= 0.3
+        # and the file is forgotten a while after it was loaded
+        time.sleep(0.3)
+        assert len(fw._taken) == 0
+
+    def test_order(self, make_watcher, tmp_path):
+        ev_slow = threading.Event()
+
+        def load_fn(path):
+            if path.endswith('0.fits'):
+                # first file is slow to load
+                ev_slow.wait(5.0)
+            return read_file(path)
+
+        fw, coll = make_watcher(load_fn=load_fn, num_workers=3,
+                                settle_time=10.0, poll_interval=0.02)
+        paths = [str(tmp_path / '{}.fits'.format(i)) for i in range(3)]
+        paths.append(str(tmp_path / '3.bad'))
+        for path in paths:
+            with open(path, 'wb') as out_f:
+                out_f.write(path.encode())
+            # closed files need not settle
+            fw.notify(path, closed=True)
+            time.sleep(0.05)
+
+        time.sleep(0.2)
+        # later files wait for the first one
+        stats = fw.get_stats()
+        assert len(coll.results) == 0
+        assert (stats.loading, stats.waiting) == (1, 3)
+        ev_slow.set()
+        assert coll.wait(4) == 4
+        assert [res[0] for res in coll.results] == paths
+        assert coll.results[3][1] == "bad file"
+        stats = fw.get_stats()
+        assert (stats.loaded, stats.failed, stats.waiting) == (3, 1, 0)
+
+    def test_check_and_pause(self, make_watcher, tmp_path):
+        checked = []
+
+        def check_fn(path):
+            checked.append(path)
+            return path.endswith('.fits')
+
+        fw, coll = make_watcher(settle_time=1.0, poll_interval=0.02,
+                                check_fn=check_fn)
+        for name in ('a.txt', 'b.fits'):
+            path = str(tmp_path / name)
+            with open(path, 'wb') as out_f:
+                out_f.write(b'x')
+            fw.notify(path, closed=True)
+        fw.paused = True
+        path = str(tmp_path / 'c.fits')
+        with open(path, 'wb') as out_f:
+            out_f.write(b'x')
+        fw.notify(path, closed=True)
+
+        assert coll.wait(1) == 1
+        time.sleep(0.1)
+        assert [res[0] for res in coll.results] == [str(tmp_path / 'b.fits')]
+        # files already taken are not checked again
+        fw.paused = False
+        fw.notify(str(tmp_path / 'b.fits'), closed=True)
+        assert checked == [str(tmp_path / name) for name in ('a.txt',
+                                                             'b.fits')]
+
+    @pytest.mark.skipif(not watcher.have_watchdog, reason="no watchdog")
+    def test_watch_folder(self, make_watcher, tmp_path):
+        fw, coll = make_watcher(num_workers=2, settle_time=0.5,
+                                poll_interval=0.05)
+        fw.watch(str(tmp_path))
+        time.sleep(0.1)
+        for i in range(10):
+            with open(str(tmp_path / '{:02d}.fits'.format(i)), 'wb') as out_f:
+                for j in range(3):
+                    out_f.write(b'y' * 1000)
+                    out_f.flush()
+        assert coll.wait(10) == 10
+        time.sleep(0.2)
+        # each file loaded once, complete
+        assert len(coll.results) == 10
+        assert sorted(res[0] for res in coll.results) == sorted(
+            str(tmp_path / '{:02d}.fits'.format(i)) for i in range(10))
+        assert all(res[1] == b'y' * 3000 for res in coll.results)
@@ -0,0 +1,130 @@
+import logging
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from ginga import AstroImage
+from ginga.canvas.types.astro import WCSAxes
+from ginga.pilw.ImageViewPil import CanvasView
+from ginga.util import wcs, wcsmod
+wcsmod.use('astropy')
+
+logger = logging.getLogger("TestWCSAxes")
+
+
+@pytest.fixture
+def viewer():
+    viewer = CanvasView(logger=logger)
+    viewer.configure(200, 200)
+    hdu = fits.PrimaryHDU(np.zeros((400, 400), dtype=np.float32))
+    hdu.header.update(wcs.simple_wcs(200.0, 200.0, 10.0, 20.0,
+                                     0.001, 30.0))
+    image = AstroImage.AstroImage(logger=logger)
+    image.load_hdu(hdu)
+    viewer.set_image(image)
+    return viewer
+
+
+def add_axes(viewer):
+    axes = WCSAxes()
+    calls = []
+    calc_grid = axes._calc_grid
+
+    def _calc_grid(*args):
+        calls.append(args)
+        return calc_grid(*args)
+
+    axes._calc_grid = _calc_grid
+    viewer.get_canvas().add(axes)
+    return axes, calls
+
+
+class TestWCSAxes:
+
+    def test_grid_cached(self, viewer):
+        axes, calls = add_axes(viewer)
+        viewer.get_image_as_array()
+        assert len(calls) == 1
+        num_objs = len(axes.objects)
+        assert num_objs > 0
+        text_objs = [obj for obj in axes.objects if obj.kind == 'text']
+        angles = [obj.rot_deg for obj in text_objs]
+
+        # panning, zooming and rotating do not recalculate the grid
+        viewer.set_pan(150, 250)
+        viewer.get_image_as_array()
+        viewer.scale_to(2.0, 2.0)
+        viewer.get_image_as_array()
+        viewer.rotate(45.0)
+        viewer.get_image_as_array()
+        assert len(calls) == 1
+        assert len(axes.objects) == num_objs
+        # ...but rotating turns the labels
+        assert np.allclose([obj.rot_deg for obj in text_objs],
+                           np.array(angles) + 45.0)
+
+        axes.reset_grid()
+        viewer.get_canvas().update_canvas()
+        viewer.get_image_as_array()
+        assert len(calls) == 2
+
+    def test_refine(self, viewer):
+        axes, calls = add_axes(viewer)
+        viewer.get_image_as_array()
+        grid = axes._grid
+        line = grid.lines[0]
+        num_pts = len(line.path_obj.points)
+
+        # zoomed in closely, the lines in view get more points
+        x, y = line.pts[grid.num_pts // 2]
+        viewer.set_pan(x, y)
+        viewer.scale_to(40.0, 40.0)
+        viewer.get_image_as_array()
+        pts = line.path_obj.points
+        assert len(pts) > 2 * axes._chunk_size
+        # which follow the line (of constant RA) closely
+        crds = viewer.get_image().wcs.datapt_to_wcspt(
+            pts, naxispath=[])
+        assert np.allclose(np.asarray(crds)[:, 0], line.crds[0, 0])
+        x1, y1, x2, y2 = viewer.get_data_rect()
+        image_pts = np.asarray(pts)
+        inside = ((image_pts[:, 0] >= x1) & (image_pts[:, 0] <= x2) &
+                  (image_pts[:, 1] >= y1) & (image_pts[:, 1] <= y2))
+        assert np.any(inside)
+        assert np.max(np.abs(np.diff(image_pts[inside], axis=0))) * 40 < 50
+
+        # and back again when zoomed out
+        viewer.scale_to(1.0, 1.0)
+        viewer.get_image_as_array()
+        assert len(line.path_obj.points) == num_pts
+
+    def test_refine_images(self, viewer):
+        # refined lines are kept per grid, so switching back to an image
+        # (reusing its grid) does not draw those of another image
+        axes, calls = add_axes(viewer)
+        image1 = viewer.get_image()
+        hdu = fits.PrimaryHDU(np.zeros((400, 400), dtype=np.float32))
+        hdu.header.update(wcs.simple_wcs(200.0, 200.0, 10.01, 20.01,
+                                         0.001, 30.0))
+        image2 = AstroImage.AstroImage(logger=logger)
+        image2.load_hdu(hdu)
+
+        viewer.get_image_as_array()
+        grid = axes._grid
+        x, y = grid.lines[0].pts[grid.num_pts // 2]
+        for image in (image1, image2, image1):
+            viewer.set_image(image)
+            viewer.set_pan(x, y)
+            viewer.scale_to(40.0, 40.0)
+            viewer.get_image_as_array()
+        assert len(calls) == 2
+
+        lines = [line for line in axes._grid.lines
+                 if line.get('refined', False)]
+        assert len(lines) > 0
+        for line in lines:
+            pts = line.path_obj.points
+            crds = np.asarray(image1.wcs.datapt_to_wcspt(pts, naxispath=[]))
+            assert np.allclose(crds[:, 1 - line.axis],
+                               line.crds[0, 1 - line.axis], rtol=0, atol=1e-9)
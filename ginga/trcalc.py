@@ -6,6 +6,7 @@
 #
 import sys
 import math
+import threading
 import numpy as np
 
 _use = None
@@ -653,10 +654,115 @@ def overlay_image_2d_pil(dstarr, pos, srcarr, dst_order='RGBA',
     dstarr[:, :, :] = res_arr
 
 
-def overlay_image_2d_np(dstarr, pos, srcarr, dst_order='RGBA',
-                        src_order='RGBA',
-                        alpha=1.0, copy=False, fill=False, flipy=False):
+# thread-local scratch buffers for alpha blending
+_scratch = threading.local()
+
+# number of elements in a band of rows blended at a time; this keeps the
+# working set of a blend in the CPU cache and bounds the scratch buffers
+blend_band_size = 1 << 18
+
+
+def _get_scratch(shape, dtype, idx):
+    """Return a scratch array of `shape` and `dtype`.  The memory is
+    reused by later calls in the same thread with the same `dtype` and
+    `idx`, so the contents are valid only until then.
+    """
+    bufs = getattr(_scratch, 'bufs', None)
+    if bufs is None:
+        bufs = _scratch.bufs = dict()
+    size = int(np.prod(shape))
+    key = (np.dtype(dtype).str, idx)
+    buf = bufs.get(key, None)
+    if buf is None or buf.size < size:
+        buf = np.empty(max(size, 1), dtype=dtype)
+        bufs[key] = buf
+    return buf[:size].reshape(shape)
+
+
+def _get_blend_band(wd, ch):
+    return max(1, blend_band_size // max(1, wd * ch))
 
+
+def _blend_rows(_dst, _src, alpha, alpha_max):
+    """Alpha blend `_src` into `_dst` in place.
+
+    `alpha` is either a scalar (with `alpha_max` 1.0) or a 2D array of
+    the same height and width as `_dst`, with values between 0 and
+    `alpha_max`.
+    """
+    dst_type = _dst.dtype
+    if (dst_type in (np.uint8, np.uint16) and _src.dtype == dst_type and
+            (np.isscalar(alpha) or alpha.dtype == dst_type)):
+        # fixed-point blend in integer arithmetic:
+        #   Co = (Ca * a + Cb * (M - a) + M / 2) / M
+        # where M is the max value of the type.  The intermediate sums
+        # fit in an integer type twice the width of the data type.
+        if dst_type == np.uint8:
+            acc_type, nbits = np.uint16, 8
+        else:
+            acc_type, nbits = np.uint32, 16
+        max_val = (1 << nbits) - 1
+
+        acc = _get_scratch(_dst.shape, acc_type, 0)
+        tmp = _get_scratch(_dst.shape, acc_type, 1)
+        if np.isscalar(alpha):
+            a = int(round(alpha * max_val))
+            np.multiply(_src, a, out=acc, dtype=acc_type)
+            np.multiply(_dst, max_val - a, out=tmp, dtype=acc_type)
+        else:
+            a = alpha[..., np.newaxis]
+            np.multiply(_src, a, out=acc, dtype=acc_type)
+            inv_a = _get_scratch(a.shape, acc_type, 2)
+            np.subtract(max_val, a, out=inv_a, dtype=acc_type)
+            np.multiply(_dst, inv_a, out=tmp, dtype=acc_type)
+        acc += tmp
+        # divide by M = 2**nbits - 1, rounded to nearest, with shifts:
+        #   x / M ~= (y + (y >> nbits)) >> nbits, where y = x + M / 2
+        acc += (max_val + 1) >> 1
+        np.right_shift(acc, nbits, out=tmp)
+        acc += tmp
+        np.right_shift(acc, nbits, out=acc)
+        np.copyto(_dst, acc, casting='unsafe')
+
+    else:
+        # general case in floating point
+        if not np.isscalar(alpha):
+            alpha = alpha[..., np.newaxis] / float(alpha_max)
+        #   Co = CaAa + CbAb(1 - Aa)
+        _dst[...] = (alpha * _src) + (1.0 - alpha) * _dst
+
+
+def _blend(_dst, _src, alpha, alpha_max):
+    """Alpha blend `_src` into `_dst` in place (see `_blend_rows`),
+    a band of rows at a time.
+    """
+    if np.isscalar(alpha):
+        if alpha >= 1.0:
+            # optimization to avoid alpha blending
+            _dst[...] = _src
+            return
+        if alpha <= 0.0:
+            return
+
+    ht, wd, ch = _dst.shape
+    band = _get_blend_band(wd, ch)
+    for y in range(0, ht, band):
+        _alpha = alpha
+        if not np.isscalar(alpha):
+            _alpha = alpha[y:y + band]
+        _blend_rows(_dst[y:y + band], _src[y:y + band], _alpha, alpha_max)
+
+
+def _prep_overlay_2d(dstarr, pos, srcarr, dst_order, src_order, alpha,
+                     fill, flipy):
+    """Prepare to overlay `srcarr` on `dstarr` at `pos`.
+
+    Returns None if nothing of `srcarr` is visible, otherwise a tuple
+    ``(dst_y, dst_x, slc, _src, alpha, alpha_max)``, where `_src` is the
+    visible part of `srcarr` (reordered to `dst_order`, without alpha),
+    `slc` the slice of the color channels in `dstarr`, and `alpha` either
+    a scalar or a 2D array with values between 0 and `alpha_max`.
+    """
     dst_ht, dst_wd, dst_ch = dstarr.shape
     dst_type = dstarr.dtype
     _, dst_max_val = get_minmax_dtype(dst_type)
@@ -696,10 +802,7 @@ def overlay_image_2d_np(dstarr, pos, srcarr, dst_order='RGBA',
 
     if src_wd <= 0 or src_ht <= 0:
         # nothing to do
-        return dstarr
-
-    if copy:
-        dstarr = np.copy(dstarr, order='C')
+        return None
 
     # Figure out the position of the alpha channel, if one is present
     da_idx = -1
@@ -720,15 +823,18 @@ def overlay_image_2d_np(dstarr, pos, srcarr, dst_order='RGBA',
 
     # if overlay source contains an alpha channel, extract it
     # and use it, otherwise use scalar keyword parameter
+    alpha_max = 1.0
     if (src_ch > 3) and ('A' in src_order):
         sa_idx = src_order.index('A')
         alpha = srcarr[:src_ht, :src_wd, sa_idx]
-        if np.all(np.isclose(alpha, src_max_val)):
+        if alpha.min() >= src_max_val:
             # optimization to avoid blending if all alpha elements are max
             alpha = 1.0
+        elif alpha.max() <= 0:
+            # fully transparent
+            alpha = 0.0
         else:
-            alpha = alpha / float(src_max_val)
-            alpha = np.dstack((alpha, alpha, alpha))
+            alpha_max = src_max_val
 
     # reorder srcarr if necessary to match dstarr for alpha merge
     get_order = dst_order
@@ -737,18 +843,106 @@ def overlay_image_2d_np(dstarr, pos, srcarr, dst_order='RGBA',
     if get_order != src_order:
         srcarr = reorder_image(get_order, srcarr, src_order)
 
-    # define the two subarrays we are blending
-    _dst = dstarr[dst_y:dst_y + src_ht, dst_x:dst_x + src_wd, slc]
     _src = srcarr[:src_ht, :src_wd, slc]
+    return (dst_y, dst_x, slc, _src, alpha, alpha_max)
 
-    if np.isscalar(alpha) and alpha == 1.0:
-        # optimization to avoid alpha blending
-        # Place our srcarr into this dstarr at dst offsets
-        _dst[:, :, :] = _src
-    else:
-        # calculate alpha blending
-        #   Co = CaAa + CbAb(1 - Aa)
-        _dst[:, :, :] = (alpha * _src) + (1.0 - alpha) * _dst
+
+def overlay_image_2d_np(dstarr, pos, srcarr, dst_order='RGBA',
+                        src_order='RGBA',
+                        alpha=1.0, copy=False, fill=False, flipy=False):
+    """Overlay `srcarr` on `dstarr` with its upper left corner at `pos`,
+    alpha blending it by its alpha channel, if it has one, or else by
+    `alpha`.
+
+    The blending is done in place (unless `copy` is True), in fixed point
+    arithmetic if both arrays are the same 8 or 16 bit unsigned integer
+    type, and a band of rows at a time with reused scratch buffers,
+    avoiding full size temporary arrays.
+    """
+    if copy:
+        dstarr = np.copy(dstarr, order='C')
+
+    res = _prep_overlay_2d(dstarr, pos, srcarr, dst_order, src_order,
+                           alpha, fill, flipy)
+    if res is None:
+        return dstarr
+    dst_y, dst_x, slc, _src, alpha, alpha_max = res
+    src_ht, src_wd = _src.shape[:2]
+
+    # define the destination subarray we are blending
+    _dst = dstarr[dst_y:dst_y + src_ht, dst_x:dst_x + src_wd, slc]
+    _blend(_dst, _src, alpha, alpha_max)
+
+    return dstarr
+
+
+def overlay_images_2d(dstarr, layers, dst_order='RGBA', src_order='RGBA',
+                      copy=False, fill=False, flipy=False):
+    """Overlay several images on `dstarr` in one pass.
+
+    This gives the same result as calling `overlay_image_2d` for each
+    layer in turn, but visits each band of rows of `dstarr` only once,
+    blending all the layers that overlap it while it is in the CPU cache.
+
+    Parameters
+    ----------
+    dstarr : ndarray
+        Destination RGB(A) array
+
+    layers : sequence of tuple
+        Each item is ``(pos, srcarr)`` or ``(pos, srcarr, alpha)``, as
+        the parameters of `overlay_image_2d`, in order from bottom to top
+
+    dst_order, src_order, copy, fill, flipy
+        As for `overlay_image_2d` (`src_order` and `flipy` apply to all
+        layers)
+
+    Returns
+    -------
+    dstarr : ndarray
+        The composited array
+    """
+    if copy:
+        dstarr = np.copy(dstarr, order='C')
+
+    preps = []
+    for layer in layers:
+        pos, srcarr = layer[:2]
+        alpha = layer[2] if len(layer) > 2 else 1.0
+        res = _prep_overlay_2d(dstarr, pos, srcarr, dst_order, src_order,
+                               alpha, fill, flipy)
+        if res is None:
+            continue
+        dst_y, dst_x, slc, _src, alpha, alpha_max = res
+        if np.isscalar(alpha) and alpha <= 0.0:
+            continue
+        preps.append(res)
+
+    if len(preps) == 0:
+        return dstarr
+
+    dst_ht, dst_wd, dst_ch = dstarr.shape
+    band = _get_blend_band(dst_wd, dst_ch)
+    y_lo = min([res[0] for res in preps])
+    y_hi = max([res[0] + res[3].shape[0] for res in preps])
+
+    for y1 in range(y_lo, y_hi, band):
+        y2 = y1 + band
+        for dst_y, dst_x, slc, _src, alpha, alpha_max in preps:
+            src_ht, src_wd = _src.shape[:2]
+            # rows of this layer in the band
+            r1, r2 = max(y1, dst_y), min(y2, dst_y + src_ht)
+            if r1 >= r2:
+                continue
+            s1, s2 = r1 - dst_y, r2 - dst_y
+            _dst = dstarr[r1:r2, dst_x:dst_x + src_wd, slc]
+            if np.isscalar(alpha):
+                if alpha >= 1.0:
+                    _dst[...] = _src[s1:s2]
+                else:
+                    _blend_rows(_dst, _src[s1:s2], alpha, alpha_max)
+            else:
+                _blend_rows(_dst, _src[s1:s2], alpha[s1:s2], alpha_max)
 
     return dstarr
 
@@ -7,11 +7,17 @@
 """
 This module provides Ginga support for DS9 type region files and objects via
 the ``astropy-regions`` package.
+
+For large numbers of regions, use the functions converting (or adding)
+many at once, `astropy_regions_to_ginga_canvas_objects`, `add_regions` and
+`ginga_canvas_objects_to_astropy_regions`, which are much faster than
+converting them one by one.
 """
 import numpy as np
 
 from astropy import units as u
-from astropy.coordinates import SkyCoord
+from astropy.coordinates import (SkyCoord, SphericalRepresentation,
+                                 UnitSphericalRepresentation)
 
 from ginga.canvas.CanvasObject import get_canvas_types
 
@@ -24,7 +30,9 @@ except ImportError:
 
 
 __all__ = ['astropy_region_to_ginga_canvas_object', 'add_region',
-           'ginga_canvas_object_to_astropy_region']
+           'ginga_canvas_object_to_astropy_region',
+           'astropy_regions_to_ginga_canvas_objects', 'add_regions',
+           'ginga_canvas_objects_to_astropy_regions']
 
 
 # mappings of point styles
@@ -201,6 +209,11 @@ def astropy_region_to_ginga_canvas_object(r, logger=None):
         else:
             raise ValueError(errmsg)
 
+    _set_object_attrs(obj, r)
+    return obj
+
+
+def _set_object_attrs(obj, r):
     # Set visual styling attributes
     obj.color = r.visual.get('edgecolor', r.visual.get('color', 'green'))
     if hasattr(obj, 'font'):
@@ -222,8 +235,6 @@ def astropy_region_to_ginga_canvas_object(r, logger=None):
     # needed for compound objects like annulus
     obj.sync_state()
 
-    return obj
-
 
 def add_region(canvas, r, tag=None, redraw=True):
     """
@@ -254,6 +265,156 @@ def add_region(canvas, r, tag=None, redraw=True):
         return obj
 
 
+def _to_deg(quantities):
+    # convert a sequence of angular quantities to degrees in one go
+    return u.Quantity(quantities).to_value(u.deg)
+
+
+def _get_radec_deg(coords):
+    # return arrays of the RA and Dec (deg) of a sequence of scalar
+    # SkyCoords, or None if they do not have them.  Getting the .ra and
+    # .dec of each coordinate is slow, because each access converts its
+    # representation, so we read the stored longitudes and latitudes
+    frames = {}
+    for c in coords:
+        frames.setdefault(type(c.frame), c.frame)
+    for frame in frames.values():
+        names = frame.representation_component_names
+        if names.get('ra', None) != 'lon' or names.get('dec', None) != 'lat':
+            return None
+    reps = [c.data for c in coords]
+    for rep in reps:
+        if not isinstance(rep, (UnitSphericalRepresentation,
+                                SphericalRepresentation)):
+            return None
+    return (_to_deg([rep.lon for rep in reps]),
+            _to_deg([rep.lat for rep in reps]))
+
+
+def _sky_regions_to_objects(rs, ra, dec):
+    # convert sky regions of one type, with centers at `ra` and `dec`;
+    # returns None for types not handled here
+    dc = get_canvas_types()
+    cls = type(rs[0])
+    if cls is regions.CircleSkyRegion:
+        radius = _to_deg([r.radius for r in rs])
+        return [dc.Circle(ra[i], dec[i], radius[i], coord='wcs')
+                for i in range(len(rs))]
+
+    if cls in (regions.EllipseSkyRegion, regions.RectangleSkyRegion):
+        klass = dc.Ellipse if cls is regions.EllipseSkyRegion else dc.Box
+        xradius = _to_deg([r.width for r in rs]) * 0.5
+        yradius = _to_deg([r.height for r in rs]) * 0.5
+        rot_deg = _to_deg([r.angle for r in rs])
+        return [klass(ra[i], dec[i], xradius[i], yradius[i],
+                      rot_deg=rot_deg[i], coord='wcs')
+                for i in range(len(rs))]
+
+    if cls is regions.TextSkyRegion:
+        return [dc.Text(ra[i], dec[i], text=r.text, font='sans',
+                        rot_deg=float(r.visual.get('textangle', 0.0)),
+                        coord='wcs')
+                for i, r in enumerate(rs)]
+
+    if cls is regions.PointSkyRegion:
+        # see astropy_region_to_ginga_canvas_object()
+        radius = 0.001
+        return [dc.Point(ra[i], dec[i], radius,
+                         style=pt_ginga.get(r.visual.get('symbol', '*'),
+                                            'diamond'),
+                         coord='wcs')
+                for i, r in enumerate(rs)]
+
+    return None
+
+
+def astropy_regions_to_ginga_canvas_objects(regs, logger=None):
+    """
+    Convert many astropy-region objects to Ginga canvas objects.
+
+    The result is the same as converting each region with
+    `astropy_region_to_ginga_canvas_object`, but the regions are converted
+    in groups of the same type, with the coordinates and sizes of each
+    group of sky regions converted in one call, which is much faster for
+    large numbers of regions.
+
+    Parameters
+    ----------
+    regs : sequence of subclasses of `~regions.Region`
+        The region objects to be converted (e.g. a `~regions.Regions`)
+
+    logger : a Python logger (optional, default: None)
+        A logger to which errors will be written
+
+    Returns
+    -------
+    objs : list of subclasses of `~ginga.canvas.CanvasObject`
+        The corresponding Ginga canvas objects, in the same order
+
+    """
+    if not HAVE_REGIONS:
+        raise ValueError("Please install the Astropy 'regions' package to use this function")
+
+    regs = list(regs)
+    objs = [None] * len(regs)
+    groups = {}
+    for i, r in enumerate(regs):
+        groups.setdefault(type(r), []).append(i)
+
+    for idxs in groups.values():
+        rs = [regs[i] for i in idxs]
+        res = None
+        if isinstance(rs[0], regions.SkyRegion) and hasattr(rs[0], 'center'):
+            radec = _get_radec_deg([r.center for r in rs])
+            if radec is not None:
+                res = _sky_regions_to_objects(rs, *radec)
+        if res is None:
+            res = [astropy_region_to_ginga_canvas_object(r, logger=logger)
+                   for r in rs]
+        else:
+            for obj, r in zip(res, rs):
+                _set_object_attrs(obj, r)
+
+        for i, obj in zip(idxs, res):
+            objs[i] = obj
+
+    return objs
+
+
+def add_regions(canvas, regs, redraw=True, logger=None):
+    """
+    Convenience function to plot many astropy-regions objects on a Ginga
+    canvas at once (see `add_region`).
+
+    The regions are converted with `astropy_regions_to_ginga_canvas_objects`
+    and added together, with one update of the canvas.
+
+    Parameters
+    ----------
+    canvas : `~ginga.canvas.types.layer.DrawingCanvas`
+        The Ginga canvas on which the regions should be plotted.
+
+    regs : sequence of subclasses of `~regions.Region`
+        The region objects to be plotted
+
+    redraw : bool (optional, default: True)
+        True if the viewers of the canvas should be updated
+
+    logger : a Python logger (optional, default: None)
+        A logger to which errors will be written
+
+    Returns
+    -------
+    objs : list of subclasses of `~ginga.canvas.CanvasObject`
+        The Ginga canvas objects added
+
+    """
+    objs = astropy_regions_to_ginga_canvas_objects(regs, logger=logger)
+    tags = [obj.get_data('name') for obj in objs]
+    canvas.add_objects(objs, tags=tags, redraw=redraw)
+    return objs
+
+
 def ginga_canvas_object_to_astropy_region(obj, frame='icrs', logger=None):
     """
     Convert a Ginga canvas object to an astropy-region object.
@@ -423,6 +584,11 @@ def ginga_canvas_object_to_astropy_region(obj, frame='icrs', logger=None):
         else:
             raise ValueError(errmsg)
 
+    _set_region_attrs(r, obj)
+    return r
+
+
+def _set_region_attrs(r, obj):
     # Set visual styling attributes
     r.visual['color'] = obj.color
     r.visual['edgecolor'] = obj.color
@@ -445,7 +611,97 @@ def ginga_canvas_object_to_astropy_region(obj, frame='icrs', logger=None):
     if meta is not None and meta.get('name', None) is not None:
         r.meta['name'] = meta.get('name')
 
-    return r
+
+def _wcs_objects_to_regions(objs, frame):
+    # convert canvas objects of one type in WCS coordinates, with their
+    # centers converted together; returns None for types not handled here
+    dc = get_canvas_types()
+    cls = type(objs[0])
+    if cls not in (dc.Circle, dc.Ellipse, dc.Box, dc.Text, dc.Point):
+        return None
+
+    x, y = np.array([(obj.x, obj.y) for obj in objs]).T
+    centers = SkyCoord(x, y, unit='deg', frame=frame)
+    if cls is dc.Circle:
+        radius = np.array([obj.radius for obj in objs]) * u.deg
+        return [regions.CircleSkyRegion(center=centers[i], radius=radius[i])
+                for i in range(len(objs))]
+
+    if cls in (dc.Ellipse, dc.Box):
+        klass = (regions.EllipseSkyRegion if cls is dc.Ellipse
+                 else regions.RectangleSkyRegion)
+        width = np.array([obj.xradius * 2 for obj in objs]) * u.deg
+        height = np.array([obj.yradius * 2 for obj in objs]) * u.deg
+        angle = np.array([obj.rot_deg for obj in objs]) * u.deg
+        return [klass(center=centers[i], width=width[i], height=height[i],
+                      angle=angle[i])
+                for i in range(len(objs))]
+
+    res = []
+    for i, obj in enumerate(objs):
+        if cls is dc.Text:
+            r = regions.TextSkyRegion(center=centers[i], text=obj.text)
+            r.visual['textangle'] = str(obj.rot_deg)
+        else:
+            r = regions.PointSkyRegion(center=centers[i])
+            r.visual['symbol'] = pt_regions.get(obj.style, '*')
+        res.append(r)
+    return res
+
+
+def ginga_canvas_objects_to_astropy_regions(objs, frame='icrs',
+                                            logger=None):
+    """
+    Convert many Ginga canvas objects to astropy-region objects.
+
+    The result is the same as converting each object with
+    `ginga_canvas_object_to_astropy_region`, but the objects are converted
+    in groups of the same type, with the sky coordinates of each group
+    made in one call, which is much faster for large numbers of objects.
+
+    Parameters
+    ----------
+    objs : seq of subclasses of `~ginga.canvas.CanvasObject.CanvasObjectBase`
+        The Ginga canvas objects to be converted
+
+    frame : str (optional, default: 'icrs')
+        The type of astropy frame that should be generated for Sky regions
+
+    logger : a Python logger (optional, default: None)
+        A logger to which errors will be written
+
+    Returns
+    -------
+    regs : list of subclasses of `~regions.PixelRegion` or `~regions.SkyRegion`
+        The corresponding astropy-region objects, in the same order
+
+    """
+    if not HAVE_REGIONS:
+        raise ValueError("Please install the Astropy 'regions' package to use this function")
+
+    objs = list(objs)
+    regs = [None] * len(objs)
+    groups = {}
+    for i, obj in enumerate(objs):
+        groups.setdefault((type(obj), obj.coord == 'wcs'), []).append(i)
+
+    for (cls, is_wcs), idxs in groups.items():
+        _objs = [objs[i] for i in idxs]
+        res = None
+        if is_wcs:
+            res = _wcs_objects_to_regions(_objs, frame)
+        if res is None:
+            res = [ginga_canvas_object_to_astropy_region(obj, frame=frame,
+                                                         logger=logger)
+                   for obj in _objs]
+        else:
+            for r, obj in zip(res, _objs):
+                _set_region_attrs(r, obj)
+
+        for i, r in zip(idxs, res):
+            regs[i] = r
+
+    return regs
 
 
 def import_regions(regions_file, format='ds9', logger=None):
@@ -472,8 +728,7 @@ def import_regions(regions_file, format='ds9', logger=None):
     """
     regs = regions.Regions.read(regions_file, format=format)
 
-    return [astropy_region_to_ginga_canvas_object(r, logger=logger)
-            for r in regs]
+    return astropy_regions_to_ginga_canvas_objects(regs, logger=logger)
 
 
 def export_regions(objs, logger=None):
@@ -495,10 +750,8 @@ def export_regions(objs, logger=None):
     regions : `~regions.Regions` object
         Returns an astropy-regions object
     """
-    def _g2r(obj):
-        return ginga_canvas_object_to_astropy_region(obj, logger=logger)
-    regs = regions.Regions(map(_g2r, objs))
-    return regs
+    regs = ginga_canvas_objects_to_astropy_regions(objs, logger=logger)
+    return regions.Regions(regs)
 
 
 def export_regions_canvas(canvas, logger=None):
@@ -521,7 +774,6 @@ def export_regions_canvas(canvas, logger=None):
         Returns an astropy-regions object
     """
     # TODO: support nested canvases, etc?
-    def _g2r(obj):
-        return ginga_canvas_object_to_astropy_region(obj, logger=logger)
     objs = canvas.objects
-    return regions.Regions(map(_g2r, objs))
+    regs = ginga_canvas_objects_to_astropy_regions(objs, logger=logger)
+    return regions.Regions(regs)
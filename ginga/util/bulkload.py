@@ -0,0 +1,238 @@
+#
+# bulkload.py -- load many files concurrently, delivering them in order
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Load many files at once with a bounded pool of worker threads.
+
+`BulkLoader` loads a list of files
+
+* with at most ``num_workers`` loads running at the same time, and at
+  most ``max_pending`` files loaded or being loaded but not yet delivered,
+  so that opening a thousand files does not read them all into memory
+  before the first one is used,
+* delivers the results in the order of the list, regardless of which load
+  finished first, and
+* delivers them in batches (the ``'batch'`` callback), so that a GUI can
+  be updated once per batch rather than once per file.
+
+`BulkLoader.get_stats` reports the progress and throughput.
+
+Example::
+
+    from ginga.util import bulkload, loader
+
+    bl = bulkload.BulkLoader(logger, loader.load_data, num_workers=4)
+    bl.add_callback('batch', lambda bl, results: print(results))
+    bl.add_callback('done', lambda bl, stats: print(stats.rate))
+    bl.start(sorted(paths))
+
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ginga.misc import Bunch, Callback
+
+__all__ = ['BulkLoader']
+
+
+class BulkLoader(Callback.Callbacks):
+    """Loads a list of files concurrently, delivering them in order.
+
+    Callbacks
+    ---------
+    ``'batch'`` is called as ``cb(loader, results)``, where `results` is
+    a list of ``(filepath, ok, result)`` tuples in the order the files
+    were given; `result` is the return value of ``load_fn`` if `ok` is
+    True, otherwise the error message.  ``'done'`` is called as
+    ``cb(loader, stats)`` after the last batch (see `get_stats`).  Both are
+    called from a worker thread.
+
+    Parameters
+    ----------
+    logger : :py:class:`~logging.Logger`
+        Logger for tracing and debugging.
+
+    load_fn : callable
+        Called as ``load_fn(filepath)`` in a worker thread to load a file
+
+    num_workers : int
+        Number of worker threads loading files
+
+    max_pending : int or None
+        Maximum number of files being loaded or waiting to be delivered
+        (defaults to twice `num_workers` or twice `batch_size`, whichever
+        is larger)
+
+    batch_size : int
+        Number of files delivered together
+
+    batch_interval : float
+        Seconds after which the files loaded so far are delivered, even
+        if there are fewer than `batch_size`
+    """
+
+    def __init__(self, logger, load_fn, num_workers=4, max_pending=None,
+                 batch_size=16, batch_interval=0.5):
+        super().__init__()
+
+        self.logger = logger
+        self.load_fn = load_fn
+        self.num_workers = max(1, num_workers)
+        self.batch_size = max(1, batch_size)
+        if max_pending is None:
+            max_pending = 2 * max(self.num_workers, self.batch_size)
+        self.max_pending = max(1, max_pending)
+        self.batch_interval = batch_interval
+
+        self.lock = threading.RLock()
+        self._deliver_lock = threading.Lock()
+        self.executor = None
+        self._paths = []
+        # seq -> (path, ok, result) of finished loads
+        self._done = {}
+        self._next_seq = 0
+        self._deliver_seq = 0
+        self._num_loading = 0
+        self._cancelled = False
+        self._num_loaded = 0
+        self._num_failed = 0
+        self._num_bytes = 0
+        self._t_start = None
+        self._t_end = None
+        self._t_delivered = None
+
+        for name in ('batch', 'done'):
+            self.enable_callback(name)
+
+    def start(self, filepaths):
+        """Start loading the files `filepaths`, in this order."""
+        with self.lock:
+            if self.executor is not None:
+                raise ValueError("loader has already been started")
+            self._paths = list(filepaths)
+            self._t_start = self._t_delivered = time.time()
+            self.executor = ThreadPoolExecutor(max_workers=self.num_workers)
+            if len(self._paths) == 0:
+                self._t_end = self._t_start
+            else:
+                self._submit()
+        if len(self._paths) == 0:
+            self.make_callback('done', self.get_stats())
+
+    def cancel(self):
+        """Stop loading; files not yet loaded are not delivered."""
+        with self.lock:
+            self._cancelled = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    def is_done(self):
+        """Return True if all files were delivered (or loading was
+        cancelled)."""
+        with self.lock:
+            return self._cancelled or self._deliver_seq >= len(self._paths)
+
+    def _submit(self):
+        # start loads, keeping at most max_pending files in flight
+        while (not self._cancelled and self._next_seq < len(self._paths) and
+               self._num_loading + len(self._done) < self.max_pending):
+            seq = self._next_seq
+            self._next_seq += 1
+            self._num_loading += 1
+            self.executor.submit(self._load, seq, self._paths[seq])
+
+    def _load(self, seq, path):
+        try:
+            res = (True, self.load_fn(path))
+        except Exception as e:
+            self.logger.error("Error loading '{}': {}".format(path, e))
+            res = (False, str(e))
+        try:
+            nbytes = os.path.getsize(path)
+        except OSError:
+            nbytes = 0
+        with self.lock:
+            self._num_loading -= 1
+            self._num_bytes += nbytes
+            self._done[seq] = (path,) + res
+        self._deliver()
+
+    def _get_batch(self):
+        # return the next batch of results to deliver, if it is time
+        with self.lock:
+            if self._cancelled:
+                return []
+            seq = self._deliver_seq
+            while seq in self._done:
+                seq += 1
+            num = seq - self._deliver_seq
+            if num == 0:
+                return []
+            finished = seq >= len(self._paths)
+            # no loads running: nothing more arrives until we deliver
+            stalled = self._num_loading == 0
+            due = time.time() - self._t_delivered >= self.batch_interval
+            if not (num >= self.batch_size or finished or stalled or due):
+                return []
+            num = min(num, self.batch_size)
+            batch = [self._done.pop(self._deliver_seq + i)
+                     for i in range(num)]
+            self._deliver_seq += num
+            for path, ok, result in batch:
+                if ok:
+                    self._num_loaded += 1
+                else:
+                    self._num_failed += 1
+            self._t_delivered = time.time()
+            if self._deliver_seq >= len(self._paths):
+                self._t_end = self._t_delivered
+            return batch
+
+    def _deliver(self):
+        # deliver batches in sequence; the delivery lock keeps the
+        # callbacks in order when loads finish in several threads at once
+        with self._deliver_lock:
+            while True:
+                batch = self._get_batch()
+                if len(batch) == 0:
+                    break
+                self.make_callback('batch', batch)
+                if self._t_end is not None:
+                    self.executor.shutdown(wait=False)
+                    self.make_callback('done', self.get_stats())
+        with self.lock:
+            self._submit()
+
+    def get_stats(self):
+        """Return the progress and throughput of the loading.
+
+        Returns
+        -------
+        stats : `~ginga.misc.Bunch.Bunch`
+            With attributes ``num_files``, ``loaded`` and ``failed``
+            (delivered so far), ``loading``, ``waiting`` (loaded, waiting
+            to be delivered), ``num_bytes`` (size of the files loaded),
+            ``elapsed`` (sec since the start, until the last delivery if
+            done), ``rate`` (files delivered per sec) and ``byte_rate``
+            (bytes loaded per sec)
+        """
+        with self.lock:
+            t_end = self._t_end if self._t_end is not None else time.time()
+            elapsed = 0.0 if self._t_start is None else t_end - self._t_start
+            num_done = self._num_loaded + self._num_failed
+            stats = Bunch.Bunch(num_files=len(self._paths),
+                                loaded=self._num_loaded,
+                                failed=self._num_failed,
+                                loading=self._num_loading,
+                                waiting=len(self._done),
+                                num_bytes=self._num_bytes,
+                                elapsed=elapsed)
+        stats.setvals(rate=num_done / elapsed if elapsed > 0 else 0.0,
+                      byte_rate=(stats.num_bytes / elapsed
+                                 if elapsed > 0 else 0.0))
+        return stats
@@ -8,6 +8,10 @@ import os.path
 import tempfile
 import re
 import time
+import json
+import pickle
+import hashlib
+import threading
 import warnings
 import importlib.util
 from urllib.request import Request, urlopen, urlretrieve
@@ -16,6 +20,7 @@ from urllib.error import URLError, HTTPError
 from ginga.misc import Bunch
 from ginga.util import wcs
 
+import numpy as np
 from astropy import coordinates, units
 
 # Do we have astroquery installed?  Its submodules (Vizier, SkyView,
@@ -90,6 +95,24 @@ class SourceError(Exception):
     pass
 
 
+def _get_radec_deg(ra, dec):
+    ra, dec = str(ra), str(dec)
+    if ':' not in ra:
+        # Assume RA and DEC are in degrees
+        return float(ra), float(dec)
+    # Assume RA and DEC are in standard string notation
+    return wcs.hmsStrToDeg(ra), wcs.dmsStrToDeg(dec)
+
+
+def _ang_sep_deg(ra1_deg, dec1_deg, ra2_deg, dec2_deg):
+    # great circle distance (haversine); vectorized over numpy arrays
+    ra1, dec1 = np.radians(ra1_deg), np.radians(dec1_deg)
+    ra2, dec2 = np.radians(ra2_deg), np.radians(dec2_deg)
+    a = (np.sin((dec2 - dec1) * 0.5) ** 2 +
+         np.cos(dec1) * np.cos(dec2) * np.sin((ra2 - ra1) * 0.5) ** 2)
+    return np.degrees(2.0 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))))
+
+
 class Star:
     def __init__(self, **kwdargs):
         starInfo = {}
@@ -115,6 +138,12 @@ class AstroqueryCatalogServer:
 
     kind = 'astroquery.catalog'
 
+    # results are complete cones, so a cached larger cone can serve a
+    # smaller one (see CatalogCache)
+    cone_search = True
+    # maximum number of rows the service returns (None: unlimited)
+    row_limit = None
+
     @classmethod
     def get_params_metadata(cls):
         from ginga.misc.ParamSet import Param
@@ -148,6 +177,23 @@ class AstroqueryCatalogServer:
     def getParams(self):
         return self.get_params_metadata()
 
+    def get_cone(self, params):
+        """Describe the search defined by `params` as a cone.
+
+        Returns
+        -------
+        cone : `~ginga.misc.Bunch.Bunch` or None
+            With attributes ``ra_deg``, ``dec_deg``, ``radius_deg`` and
+            ``extra`` (a dict of any other parameters that affect the
+            result), or None if the search is not a cone search
+        """
+        if not self.cone_search:
+            return None
+        ra_deg, dec_deg = _get_radec_deg(params['ra'], params['dec'])
+        return Bunch.Bunch(ra_deg=ra_deg, dec_deg=dec_deg,
+                           radius_deg=float(params['r']) / 60.0,
+                           extra=dict(catalog=self.full_name))
+
     def toStar(self, data, ext, magfield):
         try:
             mag = float(data[magfield])
@@ -312,6 +358,8 @@ class AstroqueryVizierCatalogServer(AstroqueryCatalogServer):
 
     kind = 'astroquery.vizier'
 
+    row_limit = 5000
+
     @classmethod
     def get_params_metadata(cls):
         from ginga.misc.ParamSet import Param
@@ -343,11 +391,20 @@ class AstroqueryVizierCatalogServer(AstroqueryCatalogServer):
     def getParams(self):
         return self.get_params_metadata()
 
+    def get_cone(self, params):
+        if params.get('radius', 1) != 1 and params.get('box', 0) == 1:
+            # box search
+            return None
+        cone = super().get_cone(params)
+        cone.extra.update(columns=self.cat_columns,
+                          column_filters=self.cat_column_filters)
+        return cone
+
     def _search_radius(self, center, radius, catalog, columns, column_filters):
         # override this method to pass some special kwargs to the search
         from astroquery.vizier import Vizier
         # limit the number of rows in the vizier query to 5000
-        Vizier.ROW_LIMIT = 5000
+        Vizier.ROW_LIMIT = self.row_limit
 
         if columns:
             columns.insert(0, self.mapping['id'])
@@ -717,6 +774,8 @@ class URLServer:
         self.base_url = url
         self.reqtype = 'get'
         self.description = description
+        # timeout (sec) for blocking network operations; None for default
+        self.timeout = None
 
         self.params = self._parse_params(url)
 
@@ -744,15 +803,17 @@ class URLServer:
             d[key] = bnch.convert(params[key])
         return d
 
-    def fetch(self, url, filepath=None):
+    def fetch(self, url, filepath=None, timeout=None):
         data = ""
+        if timeout is None:
+            timeout = self.timeout
 
         req = Request(url)
 
         try:
             self.logger.info("Opening url=%s" % (url))
             try:
-                response = urlopen(req)  # nosec
+                response = urlopen(req, timeout=timeout)  # nosec
 
             except HTTPError as e:
                 self.logger.error("Server returned error code %s" % (e.code))
@@ -764,11 +825,12 @@ class URLServer:
                 self.logger.error("URL fetch failure: %s" % (str(e)))
                 raise e
 
-            self.logger.debug("getting HTTP headers")
-            info = response.info()  # noqa
+            with response:
+                self.logger.debug("getting HTTP headers")
+                info = response.info()  # noqa
 
-            self.logger.debug("getting data")
-            data = response.read()
+                self.logger.debug("getting data")
+                data = response.read()
             self.logger.debug("fetched %d bytes" % (len(data)))
             # data = data.decode('ascii')
 
@@ -864,15 +926,38 @@ class CatalogServer(URLServer):
         self.index = {'name': 0, 'ra': 1, 'dec': 2, 'mag': 10}
         self.format = 'str'
         self.equinox = 2000.0
+        # URL templates are opaque, so by default we can't assume a query
+        # is a plain cone search (e.g. the 'r2' outer radius)
+        self.cone_search = False
+        self.row_limit = None
 
     def set_index(self, **kwdargs):
         self.index.update(kwdargs)
 
-    def search(self, **params):
+    def set_cone_search(self, tf, row_limit=None):
+        """Declare whether this server's queries are cone searches on the
+        'ra', 'dec' and 'r' (arcmin) parameters, returning every source
+        (up to `row_limit`) in the cone.  This allows cached results of a
+        larger cone to be reused for a smaller one.
+        """
+        self.cone_search = tf
+        self.row_limit = row_limit
+
+    def get_cone(self, params):
+        if not self.cone_search:
+            return None
+        ra_deg, dec_deg = _get_radec_deg(params['ra'], params['dec'])
+        extra = {key: str(params[key]) for key in self.params.keys()
+                 if key not in ('ra', 'dec', 'r')}
+        return Bunch.Bunch(ra_deg=ra_deg, dec_deg=dec_deg,
+                           radius_deg=float(params['r']) / 60.0,
+                           extra=extra)
+
+    def search(self, timeout=None, **params):
         self.logger.debug("search params=%s" % (str(params)))
         url = self.base_url % params
 
-        data = self.fetch(url, filepath=None)
+        data = self.fetch(url, filepath=None, timeout=timeout)
         data = data.decode("utf8")
 
         lines = data.split('\n')
@@ -945,10 +1030,241 @@ class CatalogServer(URLServer):
         return (results, info)
 
 
+class CatalogCache:
+    """On-disk cache of catalog query results.
+
+    Results are keyed by (server, center, radius, other parameters).  A
+    query for a cone that lies entirely within a cached, complete cone from
+    the same server (and with the same other parameters) is answered from
+    the cached result by selecting the sources within the smaller cone.
+    Queries that the server does not describe as a cone (see the servers'
+    ``get_cone()`` method) are only answered from an exact match.
+
+    Entries older than `ttl_sec` are not used, and the least recently
+    used entries are evicted when the total size of the cache exceeds
+    `max_bytes`.
+
+    Parameters
+    ----------
+    logger : :py:class:`~logging.Logger`
+        Logger for tracing and debugging.
+
+    cache_dir : str
+        Directory for the cache files (created if it does not exist)
+
+    ttl_sec : float or None
+        Time to live for cached results; None for no limit
+
+    max_bytes : int or None
+        Maximum total size of the cached results; None for no limit
+    """
+
+    # tolerance (deg) for containment of a cone in another
+    tolerance = 1.0e-9
+
+    def __init__(self, logger, cache_dir, ttl_sec=86400.0,
+                 max_bytes=100 * 1024 ** 2):
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+
+        self.lock = threading.RLock()
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.stats = Bunch.Bunch(hits=0, contained_hits=0, misses=0,
+                                 stores=0, evictions=0)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as in_f:
+                return json.load(in_f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            self.logger.warning("error reading catalog cache index '{}': "
+                                "{}".format(self.index_path, e))
+            return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as out_f:
+            json.dump(self.index, out_f)
+        os.replace(tmp_path, self.index_path)
+
+    def _get_query(self, srvkey, srvobj, params):
+        get_cone = getattr(srvobj, 'get_cone', None)
+        cone = get_cone(params) if get_cone is not None else None
+        if cone is None:
+            extra = {key: str(val) for key, val in params.items()}
+        else:
+            extra = cone.extra
+        extra = json.dumps(extra, sort_keys=True, default=str)
+        return cone, extra
+
+    def _remove(self, name):
+        entry = self.index.pop(name, None)
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+        return entry
+
+    def lookup(self, srvkey, srvobj, params):
+        """Look up the result of querying server `srvobj` (registered under
+        `srvkey`) with `params`.
+
+        Returns
+        -------
+        result : tuple or None
+            ``(starlist, info)``, as returned by the server's ``search()``
+            method, or None if the result is not in the cache
+        """
+        cone, extra = self._get_query(srvkey, srvobj, params)
+        now = time.time()
+
+        with self.lock:
+            found = None
+            for name, entry in list(self.index.items()):
+                if entry['server'] != srvkey or entry['extra'] != extra:
+                    continue
+                if (self.ttl_sec is not None and
+                        now - entry['time'] > self.ttl_sec):
+                    self._remove(name)
+                    continue
+                if cone is None:
+                    if entry['cone'] is None:
+                        found = name
+                        break
+                    continue
+                if entry['cone'] is None:
+                    continue
+                ra_deg, dec_deg, radius_deg = entry['cone']
+                sep = _ang_sep_deg(ra_deg, dec_deg,
+                                   cone.ra_deg, cone.dec_deg)
+                if abs(sep) <= self.tolerance and \
+                   abs(radius_deg - cone.radius_deg) <= self.tolerance:
+                    # exact match
+                    found = name
+                    break
+                if (entry['complete'] and
+                        sep + cone.radius_deg <= radius_deg + self.tolerance):
+                    # contained in a larger cone; prefer the smallest
+                    if (found is None or
+                            radius_deg < self.index[found]['cone'][2]):
+                        found = name
+
+            if found is None:
+                self.stats.misses += 1
+                return None
+
+            entry = self.index[found]
+            try:
+                with open(os.path.join(self.cache_dir, found), 'rb') as in_f:
+                    starlist, info = pickle.load(in_f)  # nosec
+
+            except Exception as e:
+                self.logger.warning("error reading cached catalog result: "
+                                    "{}".format(e))
+                self._remove(found)
+                self.stats.misses += 1
+                return None
+
+            entry['atime'] = now
+            contained = (cone is not None and
+                         entry['cone'][2] > cone.radius_deg + self.tolerance)
+            if contained:
+                self.stats.contained_hits += 1
+            else:
+                self.stats.hits += 1
+
+        if contained:
+            # filter the sources to the requested cone
+            if len(starlist) > 0:
+                ra = np.array([star['ra_deg'] for star in starlist])
+                dec = np.array([star['dec_deg'] for star in starlist])
+                sep = _ang_sep_deg(cone.ra_deg, cone.dec_deg, ra, dec)
+                keep = np.flatnonzero(sep <= cone.radius_deg)
+                starlist = [starlist[i] for i in keep]
+
+        self.logger.debug("catalog query answered from cache ({} sources)".format(
+            len(starlist)))
+        return starlist, info
+
+    def store(self, srvkey, srvobj, params, starlist, info):
+        """Store the result of querying server `srvobj` (registered under
+        `srvkey`) with `params`.
+        """
+        cone, extra = self._get_query(srvkey, srvobj, params)
+        data = pickle.dumps((starlist, info), protocol=pickle.HIGHEST_PROTOCOL)
+        if cone is None:
+            cone_t = None
+        else:
+            cone_t = [cone.ra_deg, cone.dec_deg, cone.radius_deg]
+        key = json.dumps([srvkey, extra, cone_t])
+        name = hashlib.sha1(key.encode()).hexdigest() + '.pkl'
+        row_limit = getattr(srvobj, 'row_limit', None)
+        now = time.time()
+
+        with self.lock:
+            with open(os.path.join(self.cache_dir, name), 'wb') as out_f:
+                out_f.write(data)
+            self.index[name] = dict(server=srvkey, extra=extra, cone=cone_t,
+                                    complete=(row_limit is None or
+                                              len(starlist) < row_limit),
+                                    size=len(data), time=now, atime=now)
+            self.stats.stores += 1
+            self._prune()
+            self._save_index()
+
+    def _prune(self):
+        now = time.time()
+        if self.ttl_sec is not None:
+            for name, entry in list(self.index.items()):
+                if now - entry['time'] > self.ttl_sec:
+                    self._remove(name)
+                    self.stats.evictions += 1
+
+        if self.max_bytes is not None:
+            total = sum(entry['size'] for entry in self.index.values())
+            # evict least recently used entries first
+            names = sorted(self.index.keys(),
+                           key=lambda name: self.index[name]['atime'])
+            for name in names:
+                if total <= self.max_bytes:
+                    break
+                total -= self._remove(name)['size']
+                self.stats.evictions += 1
+
+    def prune(self):
+        """Remove expired entries, and evict entries down to the size limit."""
+        with self.lock:
+            self._prune()
+            self._save_index()
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self.lock:
+            for name in list(self.index.keys()):
+                self._remove(name)
+            self._save_index()
+
+    def get_stats(self):
+        """Return a dict of cache statistics."""
+        with self.lock:
+            d = dict(self.stats)
+            d.update(entries=len(self.index),
+                     size=sum(entry['size'] for entry in self.index.values()))
+        return d
+
+
 class ServerBank:
 
     def __init__(self, logger):
         self.logger = logger
+        # optional CatalogCache for catalog query results
+        self.cache = None
 
         self.clear()
 
@@ -991,10 +1307,55 @@ class ServerBank:
 
         return obj.search(filepath, **params)
 
-    def get_catalog(self, key, filepath, **params):
+    def set_cache(self, cache):
+        """Set a `CatalogCache` for catalog query results (None to disable
+        caching).
+        """
+        self.cache = cache
+
+    def get_catalog(self, key, filepath, timeout=None, **params):
+        """Query a catalog server, or return the cached result.
+
+        Parameters
+        ----------
+        key : str
+            Name of the catalog server
+
+        filepath : str or None
+            Unused
+
+        timeout : float or None
+            Timeout (sec) for the blocking network operations of this
+            query, for servers that support one (those queried by URL);
+            if None, the server's own timeout is used
+
+        params : dict
+            Query parameters
+
+        Returns
+        -------
+        starlist, info : tuple
+            List of stars and information about the table
+        """
         obj = self.ctbank[key]
+        kwargs = {}
+        if timeout is not None and isinstance(obj, URLServer):
+            kwargs['timeout'] = timeout
+
+        cache = self.cache
+        if cache is None:
+            return obj.search(**params, **kwargs)
 
-        return obj.search(**params)
+        res = cache.lookup(key, obj, params)
+        if res is not None:
+            return res
+
+        starlist, info = obj.search(**params, **kwargs)
+        try:
+            cache.store(key, obj, params, starlist, info)
+        except Exception as e:
+            self.logger.warning("error caching catalog result: {}".format(e))
+        return starlist, info
 
 
 # ---- SET UP DEFAULT SOURCES ----
@@ -5,6 +5,34 @@
 # Please see the file LICENSE.txt for details.
 #
 
+"""
+Support for drawing contours on ginga canvases.
+
+`get_contours` and `calc_contours` compute the contours of an array
+directly.  `ContourEngine` computes the contours of several levels
+concurrently, keeps the results of recent calls (per array, levels and
+region) and simplifies them to the resolution at which they are shown,
+so that redrawing the contours of a large image at a new zoom level does
+not calculate them again, and does not draw more vertices than can be
+seen.  `create_contour_levels_obj` makes one compound object per level.
+
+Example::
+
+    from ginga.util import contour
+
+    engine = contour.ContourEngine()
+    tol = contour.get_display_tolerance(viewer)
+    contour_groups = engine.get_contours(data, levels, tolerance=tol)
+    obj = contour.create_contour_levels_obj(canvas, contour_groups,
+                                            colors=['yellow', 'cyan'])
+    canvas.add(obj)
+
+"""
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 # THIRD-PARTY
 import numpy as np
 
@@ -64,4 +92,237 @@ def create_contours_obj(canvas, contour_groups, colors=None, **kwargs):
     contours_obj = Compound(*objs)
     return contours_obj
 
+
+def create_contour_levels_obj(canvas, contour_groups, colors=None, **kwargs):
+    """Create and return a compound object for ginga `canvas`, consisting
+    of one compound object of contour paths for each level.
+    `contour_groups` is a list (one item per level) of lists of numpy
+    arrays of points, such as returned by `ContourEngine.get_contours`.
+    `colors` (if provided) is a list of colors for each level.
+    Any other keyword parameters are passed on to the Path class.
+    """
+    if colors is None:
+        colors = ['black']
+    Path = canvas.get_draw_class('path')
+    Compound = canvas.get_draw_class('compoundobject')
+    levels_obj = Compound()
+    for i, contours in enumerate(contour_groups):
+        color = colors[i % len(colors)]
+        objs = [Path(contour, color=color, **kwargs)
+                for contour in contours]
+        levels_obj.objects.append(Compound(*objs))
+    return levels_obj
+
+
+def simplify_path(points, tolerance):
+    """Simplify a polyline with the Douglas-Peucker algorithm.
+
+    Parameters
+    ----------
+    points : array-like
+        Array of shape (N, 2) of the points of the polyline
+
+    tolerance : float
+        Maximum distance of the removed points from the simplified line
+
+    Returns
+    -------
+    points : ndarray
+        The points of the simplified polyline; the first and last points
+        are always kept
+    """
+    points = np.asarray(points)
+    num = len(points)
+    if num <= 2 or tolerance <= 0:
+        return points
+    keep = np.zeros(num, dtype=bool)
+    keep[0] = keep[-1] = True
+    tol2 = tolerance * tolerance
+    stack = [(0, num - 1)]
+    while len(stack) > 0:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        seg = points[i + 1:j]
+        p1, p2 = points[i], points[j]
+        dx, dy = p2 - p1
+        len2 = dx * dx + dy * dy
+        if len2 < tol2:
+            # (nearly) closed loop: distance from the end point
+            d2 = np.sum(np.square(seg - p1), axis=1)
+        else:
+            # squared distance from the line through p1 and p2
+            cross = dx * (seg[:, 1] - p1[1]) - dy * (seg[:, 0] - p1[0])
+            d2 = cross * cross / len2
+        k = int(np.argmax(d2))
+        if d2[k] > tol2:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+    return points[keep]
+
+
+def get_display_tolerance(viewer, pixels=0.5):
+    """Return the distance in data pixels of `viewer` that is shown as
+    `pixels` screen pixels at its current scale, for use as the
+    simplification tolerance of contours drawn in it.
+    """
+    scale = max(viewer.get_scale_xy())
+    return pixels / scale
+
+
+class ContourEngine:
+    """Computes, caches and simplifies the contours of arrays.
+
+    Parameters
+    ----------
+    num_workers : int
+        Number of threads computing the contours of different levels
+        concurrently
+
+    cache_size : int
+        Number of results (contours of a set of levels of an array, and
+        their simplifications) to keep
+    """
+
+    def __init__(self, num_workers=4, cache_size=16):
+        if not have_skimage:
+            raise Exception("Please install scikit-image > 0.13"
+                            "to use this function")
+        self.num_workers = max(1, num_workers)
+        self.cache_size = cache_size
+        self.executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        self.lock = threading.RLock()
+        # key -> (weakref of array, contour groups)
+        self._cache = OrderedDict()
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        self.executor.shutdown(wait=True)
+
+    def clear(self):
+        """Forget all cached contours."""
+        with self.lock:
+            self._cache.clear()
+
+    def _find_contours(self, data, level, x0, y0):
+        contours = []
+        for arr in measure.find_contours(data, level):
+            if len(arr) < 3:
+                continue
+            # (row, col) -> (x, y), in the coordinates of the whole array
+            arr = arr[:, ::-1]
+            if x0 != 0 or y0 != 0:
+                arr = arr + (x0, y0)
+            contours.append(arr)
+        return contours
+
+    def _lookup(self, key, data):
+        with self.lock:
+            item = self._cache.get(key, None)
+            if item is None:
+                return None
+            ref, res = item
+            if ref is not None and ref() is not data:
+                # a different array with a recycled id
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return res
+
+    def _store(self, key, data, res):
+        try:
+            ref = None if data is None else weakref.ref(data)
+        except TypeError:
+            ref = None
+        with self.lock:
+            self._cache[key] = (ref, res)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get_contours(self, data, levels, region=None, tolerance=0.0,
+                     key=None):
+        """Get sets of contour points for numpy array `data`.
+
+        Parameters
+        ----------
+        data : ndarray
+            2D array
+
+        levels : sequence of float
+            Values around which to calculate the contours
+
+        region : tuple of int or None
+            ``(x1, y1, x2, y2)`` (inclusive) of the part of `data` to
+            contour, or None for all of it; the points are in the
+            coordinates of `data` either way
+
+        tolerance : float
+            Simplify the contours to this distance (in data pixels), e.g.
+            as returned by `get_display_tolerance`; 0 for no
+            simplification
+
+        key : object or None
+            Key identifying `data` in the cache (defaults to the identity
+            of `data`); use e.g. the name of an image to share results
+            between copies of its data.  The caller must then make sure
+            that a key is not reused for different data
+
+        Returns
+        -------
+        contour_groups : list
+            One list per level of arrays of shape (N, 2) of (x, y) points
+            --each array makes a path if plotted as such
+        """
+        levels = tuple(float(level) for level in levels)
+        if region is not None:
+            region = tuple(int(v) for v in region)
+        # an array identified by its id is checked to be the one cached,
+        # but a key given by the caller may be shared by other arrays
+        ref_data = data
+        if key is None:
+            key = id(data)
+        else:
+            ref_data = None
+        base_key = (key, levels, region)
+
+        res = self._lookup(base_key, ref_data)
+        if res is None:
+            if region is None:
+                x0, y0, arr = 0, 0, data
+            else:
+                x1, y1, x2, y2 = region
+                x0, y0 = max(0, x1), max(0, y1)
+                arr = data[y0:y2 + 1, x0:x2 + 1]
+            futures = [self.executor.submit(self._find_contours, arr,
+                                            level, x0, y0)
+                       for level in levels]
+            res = [future.result() for future in futures]
+            self._store(base_key, ref_data, res)
+
+        if tolerance <= 0:
+            return res
+
+        # round the tolerance down to a power of two so that nearby zoom
+        # levels share the same simplification
+        tolerance = 2.0 ** np.floor(np.log2(tolerance))
+        simp_key = base_key + (tolerance,)
+        simp = self._lookup(simp_key, ref_data)
+        if simp is None:
+            simp = [[simplify_path(arr, tolerance) for arr in contours]
+                    for contours in res]
+            self._store(simp_key, ref_data, simp)
+        return simp
+
+    def calc_contours(self, data, num_contours, **kwargs):
+        """Like `calc_contours`, with the caching and simplification of
+        `get_contours` (to which the keyword parameters are passed).
+        """
+        mn = np.nanmean(data)
+        top = np.nanmax(data)
+        levels = np.linspace(mn, top, num_contours)
+        return self.get_contours(data, levels, **kwargs)
+
 # END
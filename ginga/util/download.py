@@ -0,0 +1,632 @@
+#
+# download.py -- file download manager for Ginga
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Download manager for fetching files by URL.
+
+`DownloadManager` downloads HTTP(S) URLs over a pool of persistent
+(keep-alive) connections, with a limit on the number of concurrent
+transfers.  Interrupted transfers are resumed with HTTP ``Range``
+requests, and completed downloads are recorded in a local cache so that
+requesting the same URL again revalidates the cached copy (using the
+server's ``ETag``/``Last-Modified`` validators) instead of transferring it
+again.  Downloads with the same content (by SHA-256 checksum) share a
+single local file.  Concurrent requests for the same URL share a single
+transfer.
+
+Other URL schemes (e.g. ``ftp:``), and URLs that must go through a proxy,
+are fetched with `urllib` without these features.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import http.client
+import urllib.parse
+import urllib.request
+
+from ginga.misc import Bunch
+
+__all__ = ['DownloadError', 'ConnectionPool', 'DownloadManager']
+
+
+class DownloadError(Exception):
+    """For exceptions raised by the `~ginga.util.download` module."""
+    pass
+
+
+class ConnectionPool:
+    """A pool of persistent HTTP(S) connections, keyed by host.
+
+    Parameters
+    ----------
+    max_idle : int
+        Maximum number of idle connections kept per host
+
+    timeout : float or None
+        Timeout (sec) for blocking socket operations
+    """
+
+    def __init__(self, max_idle=4, timeout=60.0):
+        self.max_idle = max_idle
+        self.timeout = timeout
+
+        self.lock = threading.Lock()
+        self.idle = dict()
+        self.stats = Bunch.Bunch(created=0, reused=0)
+
+    def get_connection(self, scheme, host, port):
+        """Get an idle connection to `host`, or make a new one."""
+        key = (scheme, host, port)
+        with self.lock:
+            conns = self.idle.get(key, [])
+            if len(conns) > 0:
+                self.stats.reused += 1
+                return key, conns.pop()
+            self.stats.created += 1
+
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port,
+                                               timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(host, port,
+                                              timeout=self.timeout)
+        return key, conn
+
+    def release(self, key, conn, reuse=True):
+        """Return a connection to the pool, or close it if `reuse` is False
+        (or there are already enough idle connections to this host).
+        """
+        if reuse:
+            with self.lock:
+                conns = self.idle.setdefault(key, [])
+                if len(conns) < self.max_idle:
+                    conns.append(conn)
+                    return
+        conn.close()
+
+    def close(self):
+        """Close all idle connections."""
+        with self.lock:
+            for conns in self.idle.values():
+                for conn in conns:
+                    conn.close()
+            self.idle = dict()
+
+
+class DownloadManager:
+    """Manages downloads of files by URL.
+
+    Parameters
+    ----------
+    logger : :py:class:`~logging.Logger`
+        Logger for tracing and debugging.
+
+    cache_dir : str or None
+        Directory in which to keep the index of downloaded files, so that
+        the cache persists across sessions.  If None, the cache only lasts
+        for the lifetime of this object.
+
+    max_concurrent : int
+        Maximum number of concurrent transfers; further downloads wait
+        for a transfer to finish
+
+    timeout : float or None
+        Timeout (sec) for blocking network operations
+
+    retries : int
+        Number of times to resume a transfer that is interrupted
+
+    use_cache : bool
+        If False, always transfer the file instead of using a completed
+        download (interrupted transfers are still resumed)
+    """
+
+    chunk_size = 64 * 1024
+    max_redirects = 5
+
+    def __init__(self, logger, cache_dir=None, max_concurrent=4,
+                 timeout=60.0, retries=3, use_cache=True):
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.max_concurrent = max_concurrent
+        self.retries = retries
+        self.use_cache = use_cache
+
+        self.pool = ConnectionPool(max_idle=max_concurrent, timeout=timeout)
+        self.lock = threading.RLock()
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.inflight = dict()
+        self.active = dict()
+        self.stats = Bunch.Bunch(downloads=0, bytes=0, cache_hits=0,
+                                 shared=0, resumed=0, failed=0, queued=0,
+                                 time=0.0)
+
+        self.index_path = None
+        self.index = dict()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.index_path = os.path.join(cache_dir, 'downloads.json')
+            self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as in_f:
+                return json.load(in_f)
+        except FileNotFoundError:
+            return dict()
+        except Exception as e:
+            self.logger.warning("error reading download index '{}': "
+                                "{}".format(self.index_path, e))
+            return dict()
+
+    def _save_index(self):
+        if self.index_path is None:
+            return
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as out_f:
+            json.dump(self.index, out_f)
+        os.replace(tmp_path, self.index_path)
+
+    def _update_entry(self, url, **kwargs):
+        with self.lock:
+            entry = self.index.setdefault(url, dict())
+            entry.update(kwargs)
+            self._save_index()
+            return dict(entry)
+
+    def download(self, url, localpath, progress_cb=None, stats=None):
+        """Download `url` to `localpath`.
+
+        Parameters
+        ----------
+        url : str
+            The URL to download
+
+        localpath : str
+            The local file path to write the downloaded data to
+
+        progress_cb : callable or None
+            Called as ``progress_cb(fraction)`` as the download proceeds
+
+        stats : `~ginga.misc.Bunch.Bunch` or None
+            If given, updated during the transfer with ``nbytes``,
+            ``total`` (None if unknown), ``rate`` (bytes/sec),
+            ``elapsed`` (sec), ``resumed`` and ``status`` (one of
+            ``'queued'``, ``'downloading'``, ``'cached'``, ``'done'`` or
+            ``'failed'``)
+
+        Returns
+        -------
+        filepath : str
+            Path of the local file.  This is `localpath`, unless the
+            content is already in the cache, in which case it is the path
+            of the cached file.
+        """
+        if stats is None:
+            stats = Bunch.Bunch()
+        stats.setvals(url=url, nbytes=0, total=None, rate=0.0, elapsed=0.0,
+                      resumed=False, status='queued')
+
+        # share a transfer of the same URL that is already in progress
+        with self.lock:
+            shared = self.inflight.get(url, None)
+            if shared is None:
+                shared = Bunch.Bunch(event=threading.Event(), result=None,
+                                     error=None)
+                self.inflight[url] = shared
+                owner = True
+            else:
+                self.stats.shared += 1
+                owner = False
+
+        if not owner:
+            self.logger.debug("waiting on shared download of '{}'".format(url))
+            shared.event.wait()
+            if shared.error is not None:
+                stats.status = 'failed'
+                raise shared.error
+            stats.setvals(status='cached', nbytes=os.path.getsize(shared.result))
+            if progress_cb is not None:
+                progress_cb(1.0)
+            return shared.result
+
+        try:
+            shared.result = self._download(url, localpath, progress_cb, stats)
+            return shared.result
+
+        except Exception as e:
+            stats.status = 'failed'
+            with self.lock:
+                self.stats.failed += 1
+            shared.error = e
+            raise
+
+        finally:
+            with self.lock:
+                del self.inflight[url]
+            shared.event.set()
+
+    def _download(self, url, localpath, progress_cb, stats):
+        with self.lock:
+            self.stats.queued += 1
+        try:
+            self.slots.acquire()
+        finally:
+            with self.lock:
+                self.stats.queued -= 1
+
+        with self.lock:
+            self.active[id(stats)] = stats
+        try:
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            if (scheme not in ('http', 'https') or
+                    self._uses_proxy(scheme, parts.hostname)):
+                return self._download_urllib(url, localpath, progress_cb,
+                                             stats)
+            return self._download_http(url, localpath, progress_cb, stats)
+
+        finally:
+            with self.lock:
+                self.active.pop(id(stats), None)
+            self.slots.release()
+
+    def _uses_proxy(self, scheme, host):
+        proxies = urllib.request.getproxies()
+        return (scheme in proxies and
+                not urllib.request.proxy_bypass(host or ''))
+
+    def _get_cached(self, url, partial_only=False):
+        # Return the entry of a completed download of `url` whose file is
+        # intact, or of a partial download that may be resumed; only the
+        # latter if `partial_only` is True.  Partial downloads are tracked
+        # even if the cache is not used, so that they can be resumed.
+        with self.lock:
+            entry = self.index.get(url, None)
+            if entry is None:
+                return None
+            entry = dict(entry)
+        if entry.get('complete', False):
+            if partial_only:
+                return None
+            if self._is_intact(entry):
+                return entry
+            # the file was changed or removed since it was downloaded
+            # (e.g. overwritten by a download of another URL)
+            with self.lock:
+                if self.index.get(url, None) is not None:
+                    del self.index[url]
+                    self._save_index()
+            return None
+        if (not entry.get('complete', False) and
+                os.path.exists(entry['path'] + '.part')):
+            # partial download that may be resumed
+            return entry
+        return None
+
+    def _is_intact(self, entry):
+        # True if the file of a completed download is still as written
+        try:
+            st = os.stat(entry['path'])
+        except OSError:
+            return False
+        return (st.st_size == entry.get('size', None) and
+                st.st_mtime_ns == entry.get('mtime', None))
+
+    def _download_http(self, url, localpath, progress_cb, stats):
+        time_start = time.time()
+        entry = self._get_cached(url, partial_only=not self.use_cache)
+        offset, hasher, headers = 0, None, {}
+        if entry is not None:
+            if entry['complete']:
+                # revalidate the cached copy, if we can
+                headers = self._validators(entry, 'If-None-Match',
+                                           'If-Modified-Since')
+            else:
+                # resume an interrupted transfer
+                localpath = entry['path']
+                offset, hasher, headers = self._resume(entry)
+
+        tries = 0
+        while True:
+            resp, conn = self._request(url, headers)
+            try:
+                if resp.status == 304:
+                    resp.read()
+                    self.logger.info("'{}' is cached in '{}'".format(
+                        url, entry['path']))
+                    with self.lock:
+                        self.stats.cache_hits += 1
+                    stats.setvals(status='cached', nbytes=entry['size'],
+                                  total=entry['size'])
+                    if progress_cb is not None:
+                        progress_cb(1.0)
+                    return entry['path']
+
+                return self._transfer(url, localpath, resp, offset, hasher,
+                                      progress_cb, stats, time_start)
+
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                tries += 1
+                entry = self._get_cached(url, partial_only=True)
+                if tries > self.retries or entry is None:
+                    raise
+                self.logger.warning("download of '{}' interrupted ({}); "
+                                    "resuming".format(url, e))
+                localpath = entry['path']
+                offset, hasher, headers = self._resume(entry)
+
+            finally:
+                conn.release()
+
+    def _validators(self, entry, etag_hdr, date_hdr):
+        headers = {}
+        if entry.get('etag', None):
+            headers[etag_hdr] = entry['etag']
+        elif entry.get('last_modified', None):
+            headers[date_hdr] = entry['last_modified']
+        return headers
+
+    def _resume(self, entry):
+        # we can only resume safely if the server gave us a validator to
+        # check that the content has not changed
+        headers = self._validators(entry, 'If-Range', 'If-Range')
+        if len(headers) == 0:
+            return 0, None, {}
+        offset, hasher = self._hash_part(entry['path'] + '.part')
+        if offset == 0:
+            return 0, None, {}
+        headers['Range'] = 'bytes=%d-' % (offset)
+        return offset, hasher, headers
+
+    def _hash_part(self, part_path):
+        hasher = hashlib.sha256()
+        offset = 0
+        try:
+            with open(part_path, 'rb') as in_f:
+                while True:
+                    buf = in_f.read(self.chunk_size * 16)
+                    if len(buf) == 0:
+                        break
+                    hasher.update(buf)
+                    offset += len(buf)
+        except FileNotFoundError:
+            pass
+        return offset, hasher
+
+    def _request(self, url, headers):
+        """Make a GET request for `url`, following redirects.
+
+        Returns the response and a handle with ``release()`` and
+        ``close()`` methods for the connection.
+        """
+        for i in range(self.max_redirects + 1):
+            parts = urllib.parse.urlsplit(url)
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            key, conn = self.pool.get_connection(parts.scheme.lower(),
+                                                 parts.hostname, parts.port)
+            try:
+                conn.request('GET', path, headers=headers)
+                resp = conn.getresponse()
+            except (OSError, http.client.HTTPException):
+                # stale keep-alive connection: retry once on a new one
+                conn.close()
+                key, conn = self.pool.get_connection(parts.scheme.lower(),
+                                                     parts.hostname,
+                                                     parts.port)
+                conn.request('GET', path, headers=headers)
+                resp = conn.getresponse()
+
+            handle = _ConnectionHandle(self.pool, key, conn, resp)
+            if resp.status in (301, 302, 303, 307, 308):
+                location = resp.getheader('Location')
+                resp.read()
+                handle.release()
+                if location is None:
+                    break
+                url = urllib.parse.urljoin(url, location)
+                continue
+
+            if resp.status not in (200, 206, 304, 416):
+                resp.read()
+                handle.release()
+                raise DownloadError("Server returned error code %d (%s) "
+                                    "for '%s'" % (resp.status, resp.reason,
+                                                  url))
+            return resp, handle
+
+        raise DownloadError("Too many redirects for '%s'" % (url))
+
+    def _transfer(self, url, localpath, resp, offset, hasher, progress_cb,
+                  stats, time_start):
+        part_path = localpath + '.part'
+
+        if resp.status == 416:
+            # range not satisfiable--forget the partial download
+            resp.read()
+            with self.lock:
+                self.index.pop(url, None)
+                self._save_index()
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            raise DownloadError("Can't resume download of '%s'" % (url))
+
+        if resp.status == 206 and offset > 0:
+            # resuming a partial download
+            crange = resp.getheader('Content-Range', '')
+            if not crange.startswith('bytes %d-' % (offset)):
+                raise DownloadError("Unexpected Content-Range '%s' for '%s'" % (
+                    crange, url))
+            mode = 'ab'
+            with self.lock:
+                self.stats.resumed += 1
+            stats.resumed = True
+            self.logger.info("resuming download of '{}' at {} bytes".format(
+                url, offset))
+        else:
+            mode, offset, hasher = 'wb', 0, None
+        if hasher is None:
+            hasher = hashlib.sha256()
+
+        clen = resp.getheader('Content-Length', None)
+        total = int(clen) + offset if clen is not None else None
+        etag = resp.getheader('ETag', None)
+        last_modified = resp.getheader('Last-Modified', None)
+        with self.lock:
+            prev_entry = dict(self.index.get(url, {}))
+        self._update_entry(url, path=localpath, complete=False, etag=etag,
+                           last_modified=last_modified, size=total)
+
+        stats.setvals(status='downloading', total=total, nbytes=offset)
+        nbytes = offset
+        rate_start, rate_nbytes = time.time(), offset
+        with open(part_path, mode) as out_f:
+            while True:
+                buf = resp.read(self.chunk_size)
+                if len(buf) == 0:
+                    break
+                out_f.write(buf)
+                hasher.update(buf)
+                nbytes += len(buf)
+                with self.lock:
+                    self.stats.bytes += len(buf)
+
+                cur_time = time.time()
+                stats.setvals(nbytes=nbytes, elapsed=cur_time - time_start,
+                              rate=((nbytes - rate_nbytes) /
+                                    max(cur_time - rate_start, 1.0e-6)))
+                if progress_cb is not None and total:
+                    progress_cb(min(1.0, nbytes / total))
+
+        if total is not None and nbytes < total:
+            raise http.client.IncompleteRead(b'', total - nbytes)
+
+        checksum = hasher.hexdigest()
+        elapsed = time.time() - time_start
+        stats.setvals(status='done', total=nbytes, elapsed=elapsed)
+        with self.lock:
+            self.stats.downloads += 1
+            self.stats.time += elapsed
+
+            # is the same content already downloaded?
+            filepath = None
+            entries = [prev_entry] + [entry for _url, entry in self.index.items()
+                                      if _url != url]
+            for entry in entries:
+                if (entry.get('complete', False) and
+                        entry.get('sha256', None) == checksum and
+                        self._is_intact(entry)):
+                    filepath = entry['path']
+                    break
+
+        if filepath is not None:
+            self.logger.info("content of '{}' is the same as '{}'".format(
+                url, filepath))
+            os.remove(part_path)
+        else:
+            filepath = localpath
+            os.replace(part_path, filepath)
+            # forget downloads of other URLs whose file was overwritten
+            with self.lock:
+                overwritten = [_url for _url, entry in self.index.items()
+                               if _url != url and entry.get('path') == filepath]
+                for _url in overwritten:
+                    self.logger.debug("'{}' overwrote the download of "
+                                      "'{}'".format(url, _url))
+                    del self.index[_url]
+
+        self._update_entry(url, path=filepath, complete=True, sha256=checksum,
+                           size=nbytes, mtime=os.stat(filepath).st_mtime_ns)
+        if progress_cb is not None:
+            progress_cb(1.0)
+        self.logger.info("download of '{}' finished ({} bytes in {:.2f} "
+                         "sec)".format(url, nbytes, elapsed))
+        return filepath
+
+    def _download_urllib(self, url, localpath, progress_cb, stats):
+        time_start = time.time()
+        stats.status = 'downloading'
+
+        def _dl_indicator(count, blksize, totalsize):
+            nbytes = int(count * blksize)
+            elapsed = time.time() - time_start
+            stats.setvals(nbytes=nbytes, elapsed=elapsed,
+                          total=(totalsize if totalsize > 0 else None),
+                          rate=nbytes / max(elapsed, 1.0e-6))
+            if progress_cb is not None and totalsize > 0:
+                progress_cb(min(1.0, float(nbytes) / float(totalsize)))
+
+        filepath, info = urllib.request.urlretrieve(url, localpath,
+                                                    _dl_indicator)  # nosec
+        nbytes = os.path.getsize(filepath)
+        elapsed = time.time() - time_start
+        stats.setvals(status='done', nbytes=nbytes, total=nbytes,
+                      elapsed=elapsed)
+        with self.lock:
+            self.stats.downloads += 1
+            self.stats.bytes += nbytes
+            self.stats.time += elapsed
+        return filepath
+
+    def get_stats(self):
+        """Return a dict of download statistics.
+
+        Includes counts of ``downloads``, ``cache_hits``, ``shared``
+        (requests that shared a transfer in progress), ``resumed`` and
+        ``failed`` transfers, total ``bytes`` transferred, the number of
+        ``active`` and ``queued`` transfers, the current aggregate
+        transfer ``rate`` (bytes/sec) and the average ``throughput``
+        (bytes/sec) of completed transfers.
+        """
+        with self.lock:
+            d = dict(self.stats)
+            active = list(self.active.values())
+            d['active'] = len(active)
+            d['rate'] = sum(stats.rate for stats in active
+                            if stats.status == 'downloading')
+            d['throughput'] = d['bytes'] / max(d.pop('time'), 1.0e-6)
+            d['connections_created'] = self.pool.stats.created
+            d['connections_reused'] = self.pool.stats.reused
+        return d
+
+    def clear_cache(self):
+        """Forget all cached downloads (the files are not removed)."""
+        with self.lock:
+            self.index = dict()
+            self._save_index()
+
+    def close(self):
+        """Close any idle connections."""
+        self.pool.close()
+
+
+class _ConnectionHandle:
+    # returns a connection to the pool after a response has been read
+
+    def __init__(self, pool, key, conn, resp):
+        self.pool = pool
+        self.key = key
+        self.conn = conn
+        self.resp = resp
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        reuse = self.resp.isclosed() and not self.resp.will_close
+        self.pool.release(self.key, self.conn, reuse=reuse)
+
+    def close(self):
+        self.released = True
+        self.conn.close()
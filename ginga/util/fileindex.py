@@ -0,0 +1,353 @@
+#
+# fileindex.py -- persistent index of metadata about image files
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+A persistent index of metadata about image files.
+
+`FileIndex` keeps, in a small SQLite database, the header keywords, the
+shape, the minimum and maximum values and the auto cut levels of images
+that were loaded from files, keyed by the path of the file, its
+modification time and the index (e.g. HDU) of the image in the file.
+This information can then be had for a file that was loaded before
+without opening it again: a lookup costs a ``stat`` of the file and a
+query.  Entries for files that were changed (or deleted) since are
+ignored, and replaced when the file is loaded again.
+
+Example::
+
+    from ginga.util import fileindex
+
+    index = fileindex.FileIndex(logger, '/path/to/fileindex.sqlite')
+    index.add_image(image)
+    ...
+    entry = index.get('/path/to/image.fits[1]')
+    if entry is not None:
+        print(entry.header.get('OBJECT'), entry.shape, entry.minmax)
+
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+
+from ginga.misc import Bunch
+
+__all__ = ['FileIndex']
+
+_schema = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT NOT NULL,
+    idx TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    header TEXT,
+    shape TEXT,
+    minval REAL,
+    maxval REAL,
+    cuts TEXT,
+    time_added REAL,
+    PRIMARY KEY (path, idx)
+)
+"""
+
+
+class FileIndex:
+    """A persistent index of metadata about image files.
+
+    The index can be used from several threads at once.
+
+    Parameters
+    ----------
+    logger : :py:class:`~logging.Logger`
+        Logger for tracing and debugging.
+
+    dbpath : str
+        Path of the SQLite database file; created if it does not exist
+        (``':memory:'`` for an index that is not kept)
+    """
+
+    def __init__(self, logger, dbpath):
+        self.logger = logger
+        self.dbpath = dbpath
+
+        dirpath = os.path.dirname(dbpath)
+        if dbpath != ':memory:' and len(dirpath) > 0:
+            os.makedirs(dirpath, exist_ok=True)
+
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(dbpath, check_same_thread=False)
+        with self.lock:
+            if dbpath != ':memory:':
+                # fewer syncs to disk; the index can always be rebuilt
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(_schema)
+            self.conn.commit()
+
+    def _get_key(self, path, idx):
+        # return the (path, idx) key of a file (spec) and index
+        match = re.match(r'^(.+)\[(.+)\]$', path)
+        if match and idx is None:
+            path, idx = match.groups()
+        if idx is None:
+            idx = ''
+        elif isinstance(idx, tuple):
+            idx = ','.join([str(val) for val in idx])
+        else:
+            idx = str(idx)
+        idx = ','.join([val.strip() for val in idx.split(',')])
+        return os.path.abspath(path), idx
+
+    def _stat(self, path):
+        # return the modification time and size of a file, or None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _get_row(self, path, idx, st, exact=False):
+        # return the current row for `path` and `idx`, or None; unless
+        # `exact`, an empty `idx` matches the image with the lowest
+        # numbered index, which is the one loaded by default
+        cur = self.conn.execute(
+            "SELECT idx, header, shape, minval, maxval, cuts FROM files"
+            " WHERE path = ? AND mtime = ? AND size = ?", (path,) + st)
+        rows = cur.fetchall()
+        if exact or len(idx) > 0 or len(rows) == 0:
+            for row in rows:
+                if row[0] == idx:
+                    return row
+            return None
+
+        def _order(row):
+            return (0, int(row[0])) if row[0].isdigit() else (1, 0)
+
+        return min(rows, key=_order)
+
+    def get(self, path, idx=None):
+        """Return the metadata kept about an image in a file.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file; may end with an index in brackets
+            (e.g. ``'image.fits[1]'``)
+
+        idx : int, str, tuple or None
+            Index of the image in the file; if None (and there is none
+            in `path`), the image loaded by default
+
+        Returns
+        -------
+        entry : `~ginga.misc.Bunch.Bunch` or None
+            With attributes ``path``, ``idx``, ``header`` (a dict of the
+            header keywords), ``shape``, ``minmax`` (or None) and ``cuts``
+            (a dict of auto cut levels, by auto cuts parameters key, see
+            `get_cut_levels`); None if the image is not in the index or
+            the file has changed since it was added
+        """
+        path, idx = self._get_key(path, idx)
+        st = self._stat(path)
+        if st is None:
+            return None
+        with self.lock:
+            row = self._get_row(path, idx, st)
+        if row is None:
+            return None
+
+        idx, header, shape, minval, maxval, cuts = row
+        minmax = None
+        if minval is not None and maxval is not None:
+            minmax = (minval, maxval)
+        return Bunch.Bunch(path=path, idx=idx,
+                           header=json.loads(header),
+                           shape=tuple(json.loads(shape)),
+                           minmax=minmax,
+                           cuts=json.loads(cuts))
+
+    def get_cut_levels(self, path, key, idx=None):
+        """Return the auto cut levels kept for an image in a file.
+
+        Parameters
+        ----------
+        path : str
+            Path of the file (see `get`)
+
+        key : tuple
+            Key of the auto cuts algorithm and parameters the levels were
+            calculated with (see `~ginga.AutoCuts.AutoCutsBase.get_params_key`)
+
+        idx : int, str, tuple or None
+            Index of the image in the file (see `get`)
+
+        Returns
+        -------
+        cuts : tuple of (float, float) or None
+            The cut levels, or None if there are none for `key`
+        """
+        entry = self.get(path, idx=idx)
+        if entry is None:
+            return None
+        cuts = entry.cuts.get(json.dumps(key), None)
+        if cuts is None:
+            return None
+        return tuple(cuts)
+
+    def add_image(self, image, path=None, idx=None):
+        """Add the metadata about an image to the index.
+
+        The header keywords, shape and minimum and maximum values of the
+        image are kept, and its auto cut levels if it has the metadata item
+        ``auto_cut_levels`` (a tuple of the auto cuts parameters key and
+        the cut levels).  The cut levels kept for other auto cuts
+        parameters are kept, if the file did not change.
+
+        Parameters
+        ----------
+        image : `~ginga.BaseImage.BaseImage`
+            The image
+
+        path : str or None
+            Path of the file; if None, the ``'path'`` of the image
+
+        idx : int, str, tuple or None
+            Index of the image in the file; if None (and `path` is None),
+            the ``'idx'`` of the image
+
+        Returns
+        -------
+        added : bool
+            False if the image does not come from a local file
+        """
+        if path is None:
+            path, idx = image.get('path', None), image.get('idx', None)
+        if path is None or '://' in path:
+            return False
+        path, idx = self._get_key(path, idx)
+        st = self._stat(path)
+        if st is None:
+            return False
+
+        header = {}
+        for key, val in image.get_header().items():
+            if val is None or isinstance(val, (str, int, float, bool)):
+                header[key] = val
+            else:
+                header[key] = str(val)
+        shape = list(image.get_shape())
+        minval = maxval = None
+        if hasattr(image, 'get_minmax'):
+            minval, maxval = [float(val) for val in image.get_minmax()]
+
+        with self.lock:
+            row = self._get_row(path, idx, st, exact=True)
+            cuts = {} if row is None else json.loads(row[5])
+            cuts.update(self._get_image_cuts(image))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?,?,?,?,?,?,?,?,?,?)",
+                (path, idx) + st + (json.dumps(header), json.dumps(shape),
+                                    minval, maxval, json.dumps(cuts),
+                                    time.time()))
+            self.conn.commit()
+        return True
+
+    def _get_image_cuts(self, image):
+        auto_cuts = image.get('auto_cut_levels', None)
+        if auto_cuts is None:
+            return {}
+        key, cuts = auto_cuts
+        return {json.dumps(key): [float(val) for val in cuts]}
+
+    def add_cut_levels(self, path, key, cuts, idx=None):
+        """Add auto cut levels of an image in a file to the index.
+
+        The image must already be in the index (see `add_image`).
+
+        Parameters
+        ----------
+        path : str
+            Path of the file (see `get`)
+
+        key : tuple
+            Key of the auto cuts algorithm and parameters the levels were
+            calculated with
+
+        cuts : tuple of (float, float)
+            The cut levels
+
+        idx : int, str, tuple or None
+            Index of the image in the file (see `get`)
+
+        Returns
+        -------
+        added : bool
+            False if the image is not in the index
+        """
+        path, idx = self._get_key(path, idx)
+        st = self._stat(path)
+        if st is None:
+            return False
+        key = json.dumps(key)
+        cuts = [float(val) for val in cuts]
+        with self.lock:
+            row = self._get_row(path, idx, st)
+            if row is None:
+                return False
+            _cuts = json.loads(row[5])
+            if _cuts.get(key, None) != cuts:
+                _cuts[key] = cuts
+                self.conn.execute(
+                    "UPDATE files SET cuts = ? WHERE path = ? AND idx = ?",
+                    (json.dumps(_cuts), path, row[0]))
+                self.conn.commit()
+        return True
+
+    def remove(self, path, idx=None):
+        """Remove an image in a file (or, if `idx` is None and `path`
+        has no index, all images in the file) from the index."""
+        path, idx = self._get_key(path, idx)
+        with self.lock:
+            if len(idx) == 0:
+                self.conn.execute("DELETE FROM files WHERE path = ?",
+                                  (path,))
+            else:
+                self.conn.execute("DELETE FROM files WHERE path = ? AND"
+                                  " idx = ?", (path, idx))
+            self.conn.commit()
+
+    def purge(self):
+        """Remove the entries of files that were changed or deleted.
+
+        Returns
+        -------
+        num : int
+            Number of entries removed
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT path, mtime, size FROM files").fetchall()
+            stale = [(path, mtime, size) for path, mtime, size in rows
+                     if self._stat(path) != (mtime, size)]
+            num = 0
+            for args in stale:
+                cur = self.conn.execute("DELETE FROM files WHERE path = ?"
+                                        " AND mtime = ? AND size = ?", args)
+                num += cur.rowcount
+            self.conn.commit()
+        return num
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        """Close the index."""
+        with self.lock:
+            self.conn.close()
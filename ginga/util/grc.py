@@ -4,18 +4,65 @@
 # This is open-source software licensed under a BSD license.
 # Please see the file LICENSE.txt for details.
 #
+"""
+Ginga remote control client and server.
+
+Calls are made by XML-RPC.  Image data can also be sent by one of two
+faster transports:
+
+* ``'shm'``: the array is placed in a named shared memory block
+  (`multiprocessing.shared_memory`) and only the name, shape and data type
+  are passed in the call; the server copies the data straight out of the
+  block.  This only works if the client and server are on the same host.
+
+* ``'binary'``: the array is sent as raw bytes, optionally compressed,
+  over a plain socket (see `BinaryServer`), without the XML encoding.
+
+`RemoteClient` chooses ``'shm'`` for a local server by default, and falls
+back to XML-RPC if the server does not support the fast path.
+"""
+import bz2
+import json
+import socket
+import socketserver
+import struct
 import threading
 from io import BytesIO
 
+import numpy as np
+
 from ginga.misc import Task, log
 
 import xmlrpc.client as xmlrpclib  # nosec
 import xmlrpc.server as SimpleXMLRPCServer  # nosec
 
+try:
+    from multiprocessing import shared_memory, resource_tracker
+    have_shm = True
+except ImportError:
+    have_shm = False
+
+try:
+    import lz4.frame
+    have_lz4 = True
+except ImportError:
+    have_lz4 = False
+
+try:
+    import zstandard
+    have_zstd = True
+except ImportError:
+    have_zstd = False
+
 # undefined passed value--for a data type that cannot be converted
 undefined = '#UNDEFINED'
 
 default_rc_port = 11771
+# largest frame (info plus payload) accepted by the binary protocol server
+default_max_frame_size = 1 << 31
+
+# hosts for which the shared memory transport can be used
+local_hosts = ('localhost', '127.0.0.1', '::1', '')
 
 
 class _ginga_proxy:
@@ -86,12 +133,8 @@ class _channel_proxy:
         """
         # future: handle imtype
 
-        load_buffer = self._client.lookup_attr('load_buffer')
-
-        return load_buffer(imname, self._chname,
-                           Blob(data_np.tobytes()),
-                           data_np.shape, str(data_np.dtype),
-                           header, {}, False)
+        return self._client.load_array(imname, self._chname, data_np,
+                                       header, {})
 
     def load_hdu(self, imname, hdulist, num_hdu):
         """Display an astropy.io.fits HDU in a remote Ginga reference viewer.
@@ -118,11 +161,8 @@ class _channel_proxy:
         buf_io = BytesIO()
         hdulist.writeto(buf_io)
 
-        load_fits_buffer = self._client.lookup_attr('load_fits_buffer')
-
-        return load_fits_buffer(imname, self._chname,
-                                Blob(buf_io.getvalue()),
-                                num_hdu, {})
+        return self._client.load_fits_buffer(imname, self._chname,
+                                             buf_io.getbuffer(), num_hdu, {})
 
     def load_fitsbuf(self, imname, fitsbuf, num_hdu):
         """Display a FITS file buffer in a remote Ginga reference viewer.
@@ -149,20 +189,60 @@ class _channel_proxy:
         -----
         * The "RC" plugin needs to be started in the viewer for this to work.
         """
-        load_fits_buffer = self._client_.lookup_attr('load_fits_buffer')
-
-        return load_fits_buffer(imname, self._chname,
-                                Blob(fitsbuf),
-                                num_hdu, {})
+        return self._client.load_fits_buffer(imname, self._chname,
+                                             fitsbuf, num_hdu, {})
 
 
 class RemoteClient:
+    """Client for a Ginga reference viewer running the RC plugin.
+
+    Parameters
+    ----------
+    host : str
+        Host of the RC server
+
+    port : int
+        Port of the RC (XML-RPC) server
+
+    transport : str
+        How image data is sent: 'xmlrpc', 'shm' (shared memory), 'binary'
+        (binary socket protocol, see `BinaryServer`) or 'auto' ('shm' if
+        the server is on this host, otherwise 'binary' if `data_port` is
+        given, otherwise 'xmlrpc')
+
+    data_port : int or None
+        Port of the RC binary data server, for the 'binary' transport
 
-    def __init__(self, host, port):
+    codec : str or None
+        Compression for image data sent by the 'binary' or 'xmlrpc'
+        transports: None, 'bz2', 'lz4' or 'zstd'
+    """
+
+    def __init__(self, host, port, transport='auto', data_port=None,
+                 codec=None):
         self.host = host
         self.port = port
+        self.data_port = data_port
+        if transport == 'auto':
+            if have_shm and host in local_hosts:
+                transport = 'shm'
+            elif data_port is not None:
+                transport = 'binary'
+            else:
+                transport = 'xmlrpc'
+        if transport not in ('xmlrpc', 'shm', 'binary'):
+            raise ValueError("Unknown transport: '{}'".format(transport))
+        self.transport = transport
+        if codec is not None:
+            # check that it is available
+            get_codec(codec)
+        self.codec = codec
 
         self._proxy = None
+        self._lock = threading.RLock()
+        self._shm = None
+        self._shm_arr = None
+        self._sock = None
 
     def __connect(self):
         # Get proxy to server
@@ -193,6 +273,140 @@ class RemoteClient:
             return unmarshall(res)
         return call
 
+    def load_array(self, imname, chname, data_np, header, metadata):
+        """Load a numpy array as an image in a channel of the viewer,
+        sending the data by the transport of this client.
+        """
+        with self._lock:
+            if self.transport == 'shm':
+                try:
+                    return self._load_array_shm(imname, chname, data_np,
+                                                header, metadata)
+                except xmlrpclib.Fault as e:
+                    if 'load_shm' not in e.faultString:
+                        raise
+                    # older server without shared memory support
+                    self.transport = 'xmlrpc'
+                    self._close_shm()
+
+            if self.transport == 'binary':
+                info = dict(kind='array', imname=imname, chname=chname,
+                            dims=list(data_np.shape),
+                            dtype=data_np.dtype.str, header=header,
+                            metadata=metadata)
+                return self._send_binary(info, _as_buffer(data_np))
+
+            metadata = dict(metadata)
+            buf = np.ascontiguousarray(data_np).tobytes()
+            if self.codec is not None:
+                buf = compress_buffer(buf, self.codec)
+                metadata['decompress'] = self.codec
+            load_buffer = self.lookup_attr('load_buffer')
+            return load_buffer(imname, chname, Blob(buf),
+                               data_np.shape, data_np.dtype.str,
+                               header, metadata, False)
+
+    def load_fits_buffer(self, imname, chname, fitsbuf, num_hdu, metadata):
+        """Load a FITS file buffer in a channel of the viewer."""
+        with self._lock:
+            if self.transport == 'binary':
+                info = dict(kind='fits', imname=imname, chname=chname,
+                            num_hdu=num_hdu, metadata=metadata)
+                return self._send_binary(info, fitsbuf)
+
+            metadata = dict(metadata)
+            fitsbuf = bytes(fitsbuf)
+            if self.codec is not None:
+                fitsbuf = compress_buffer(fitsbuf, self.codec)
+                metadata['decompress'] = self.codec
+            load_fits_buffer = self.lookup_attr('load_fits_buffer')
+            return load_fits_buffer(imname, chname, Blob(fitsbuf),
+                                    num_hdu, metadata)
+
+    def get_shared_array(self, shape, dtype):
+        """Get an array in this client's shared memory block.
+
+        An array filled in place and then passed to `load_array` (or
+        ``load_np``) is sent to a local server without first copying it
+        into the shared memory block (the server still copies it out).
+        The array is only valid until the next call to this method.
+        """
+        if not have_shm:
+            raise ValueError("shared memory is not supported")
+        with self._lock:
+            dtype = np.dtype(dtype)
+            nbytes = max(1, int(np.prod(shape)) * dtype.itemsize)
+            if self._shm is None or self._shm.size < nbytes:
+                self._close_shm()
+                self._shm = shared_memory.SharedMemory(create=True,
+                                                       size=nbytes)
+                _created_shm.add(self._shm.name)
+            self._shm_arr = np.ndarray(shape, dtype=dtype,
+                                       buffer=self._shm.buf)
+            return self._shm_arr
+
+    def _load_array_shm(self, imname, chname, data_np, header, metadata):
+        arr = self._shm_arr
+        if not (arr is not None and data_np is arr):
+            # copy the data into the shared memory block
+            arr = self.get_shared_array(data_np.shape, data_np.dtype)
+            arr[...] = data_np
+        load_shm = self.lookup_attr('load_shm')
+        return load_shm(imname, chname, self._shm.name, arr.shape,
+                        arr.dtype.str, header, metadata)
+
+    def _send_binary(self, info, payload):
+        if self.data_port is None:
+            raise ValueError("No data port set for the binary transport")
+        if self.codec is not None:
+            payload = compress_buffer(payload, self.codec)
+            info['codec'] = self.codec
+
+        for attempt in (0, 1):
+            if self._sock is None:
+                self._sock = socket.create_connection((self.host,
+                                                       self.data_port))
+            try:
+                send_frame(self._sock, info, payload)
+                res = recv_frame(self._sock)
+                if res is None:
+                    raise ConnectionError("connection closed by server")
+                break
+
+            except (ConnectionError, OSError):
+                self._sock.close()
+                self._sock = None
+                if attempt > 0:
+                    raise
+
+        res_info, _ = res
+        if 'error' in res_info:
+            raise RemoteError(res_info['error'])
+        return res_info.get('result', None)
+
+    def _close_shm(self):
+        self._shm_arr = None
+        if self._shm is not None:
+            shm, self._shm = self._shm, None
+            try:
+                shm.close()
+            except BufferError:
+                # an array returned by get_shared_array() is still alive
+                pass
+            shm.unlink()
+            _created_shm.discard(shm.name)
+
+    def close(self):
+        """Release the shared memory block and close the connections."""
+        with self._lock:
+            self._close_shm()
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+            if self._proxy is not None:
+                self._proxy('close')()
+                self._proxy = None
+
 
 class RemoteServer:
 
@@ -218,11 +432,15 @@ class RemoteServer:
             ev_quit = threading.Event()
         self.ev_quit = ev_quit
 
+    def make_server(self):
+        server = SimpleXMLRPCServer.SimpleXMLRPCServer((self.host,
+                                                        self.port),
+                                                       allow_none=True)
+        server.register_function(self.dispatch_call)
+        return server
+
     def start(self, thread_pool=None):
-        self.server = SimpleXMLRPCServer.SimpleXMLRPCServer((self.host,
-                                                             self.port),
-                                                            allow_none=True)
-        self.server.register_function(self.dispatch_call)
+        self.server = self.make_server()
         if thread_pool is not None:
             t1 = Task.FuncTask2(self.monitor_shutdown)
             thread_pool.addTask(t1)
@@ -270,6 +488,214 @@ class RemoteServer:
         raise AttributeError("No such method: '%s'" % (method_name))
 
 
+class RemoteError(Exception):
+    pass
+
+
+class BinaryServer(RemoteServer):
+    """Server for the binary data protocol of the RC plugin.
+
+    Each message is a frame made of a fixed header (``b'GRC1'``, the
+    length of the info and the length of the payload, as network order
+    uint32 and uint64), a JSON encoded info dict and the payload bytes.
+    For an info ``kind`` of 'array' the payload is the array data (with
+    ``dims`` and ``dtype`` in the info) and ``load_buffer`` is called on
+    the remote object; for 'fits' it is a FITS file and
+    ``load_fits_buffer`` is called.  If the info has a ``codec``, the
+    payload is decompressed first.  Each message is answered by a frame
+    with an info of ``{'result': ...}`` or ``{'error': msg}``.
+    Connections can be kept open for many messages.
+
+    The payload of each frame is read into a new buffer.  Frames larger
+    than `max_frame_size` bytes are refused before anything is allocated
+    and the connection is closed.
+    """
+
+    def __init__(self, obj, host='localhost', port=None, ev_quit=None,
+                 logger=None, max_frame_size=None):
+        super(BinaryServer, self).__init__(obj, host=host, port=port,
+                                           ev_quit=ev_quit, logger=logger)
+        if max_frame_size is None:
+            max_frame_size = default_max_frame_size
+        self.max_frame_size = max_frame_size
+
+    def make_server(self):
+        server = _ThreadingTCPServer((self.host, self.port), _FrameHandler)
+        server.rcserver = self
+        return server
+
+    def dispatch_frame(self, info, payload):
+        codec = info.get('codec', None)
+        if codec is not None:
+            payload = decompress_buffer(payload, codec)
+        kind = info.get('kind', 'array')
+        if kind == 'array':
+            return self.robj.load_buffer(info['imname'], info['chname'],
+                                         payload, tuple(info['dims']),
+                                         info['dtype'],
+                                         info.get('header', {}),
+                                         info.get('metadata', {}), False)
+        if kind == 'fits':
+            return self.robj.load_fits_buffer(info['imname'],
+                                              info['chname'], payload,
+                                              info.get('num_hdu', 0),
+                                              info.get('metadata', {}))
+        raise ValueError("Unknown kind of data: '{}'".format(kind))
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _FrameHandler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        rcserver = self.server.rcserver
+        sock = self.request
+        while True:
+            try:
+                frame = recv_frame(sock, max_size=rcserver.max_frame_size)
+            except (ConnectionError, OSError, ValueError) as e:
+                rcserver.logger.error("error reading frame: {}".format(e))
+                return
+            if frame is None:
+                return
+
+            info, payload = frame
+            try:
+                res = rcserver.dispatch_frame(info, payload)
+                res_info = dict(result=marshall(res))
+            except Exception as e:
+                rcserver.logger.error("error processing frame: {}".format(e),
+                                      exc_info=True)
+                res_info = dict(error=str(e))
+            send_frame(sock, res_info)
+
+
+_frame_hdr = struct.Struct('!4sIQ')
+_frame_magic = b'GRC1'
+
+
+def send_frame(sock, info, payload=b''):
+    """Send a frame of the binary protocol (see `BinaryServer`)."""
+    info_buf = json.dumps(info, default=str).encode('utf-8')
+    payload = memoryview(payload).cast('B')
+    sock.sendall(_frame_hdr.pack(_frame_magic, len(info_buf), len(payload)) +
+                 info_buf)
+    if len(payload) > 0:
+        sock.sendall(payload)
+
+
+def recv_frame(sock, max_size=None):
+    """Receive a frame of the binary protocol (see `BinaryServer`).
+
+    Returns None if the connection was closed, otherwise a tuple of
+    the info dict and the payload (a bytearray).  If `max_size` is not
+    None, a `ValueError` is raised for a frame whose info and payload
+    together are larger than `max_size` bytes, before reading them.
+    """
+    hdr = _recv_exactly(sock, _frame_hdr.size, eof_ok=True)
+    if hdr is None:
+        return None
+    magic, info_len, payload_len = _frame_hdr.unpack(hdr)
+    if magic != _frame_magic:
+        raise ValueError("bad frame header")
+    if max_size is not None and info_len + payload_len > max_size:
+        raise ValueError("frame of {} bytes exceeds the maximum of {} "
+                         "bytes".format(info_len + payload_len, max_size))
+    info = json.loads(_recv_exactly(sock, info_len).decode('utf-8'))
+    payload = _recv_exactly(sock, payload_len)
+    return info, payload
+
+
+def _recv_exactly(sock, n, eof_ok=False):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    pos = 0
+    while pos < n:
+        nread = sock.recv_into(view[pos:], n - pos)
+        if nread == 0:
+            if pos == 0 and eof_ok:
+                return None
+            raise ConnectionError("connection closed mid-frame")
+        pos += nread
+    return buf
+
+
+def _as_buffer(data_np):
+    """Return a buffer of the bytes of `data_np` (copying only if it is
+    not contiguous).
+    """
+    data_np = np.ascontiguousarray(data_np)
+    return memoryview(data_np.reshape(-1).view(np.uint8))
+
+
+def get_codec(name):
+    """Get the ``(compress, decompress)`` functions for codec `name`
+    ('bz2', 'lz4' or 'zstd').
+    """
+    if name == 'bz2':
+        return (bz2.compress, bz2.decompress)
+    if name == 'lz4':
+        if not have_lz4:
+            raise ValueError("Please install 'lz4' to use the lz4 codec")
+        return (lz4.frame.compress, lz4.frame.decompress)
+    if name == 'zstd':
+        if not have_zstd:
+            raise ValueError("Please install 'zstandard' to use the "
+                             "zstd codec")
+        return (zstandard.ZstdCompressor().compress,
+                zstandard.ZstdDecompressor().decompress)
+    raise ValueError("Unknown codec: '{}'".format(name))
+
+
+def get_codecs():
+    """Return the names of the codecs that are available."""
+    names = ['bz2']
+    if have_lz4:
+        names.append('lz4')
+    if have_zstd:
+        names.append('zstd')
+    return names
+
+
+def compress_buffer(buf, codec):
+    return get_codec(codec)[0](buf)
+
+
+def decompress_buffer(buf, codec):
+    return get_codec(codec)[1](buf)
+
+
+# names of shared memory blocks created by this process
+_created_shm = set()
+
+
+def read_shared_array(name, shape, dtype):
+    """Copy an array out of the shared memory block `name`.
+
+    This is the server side of the shared memory transport.
+    """
+    if not have_shm:
+        raise ValueError("shared memory is not supported")
+    shm = shared_memory.SharedMemory(name=name)
+    if name not in _created_shm:
+        # The block belongs to the client, but attaching registers it
+        # with our resource tracker, which would unlink it when we exit
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+    try:
+        arr = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        data = arr.copy()
+        del arr
+    finally:
+        shm.close()
+    return data
+
+
 # List of XML-RPC types
 base_types = [str, int, float, bool]
 compound_types = [list, tuple, dict]
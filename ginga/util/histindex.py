@@ -0,0 +1,226 @@
+#
+# histindex.py -- tiled histogram index for fast region histograms
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Histograms and statistics of arbitrary boxes of a large image, without
+reading every pixel of the box.
+
+`TiledHistogram` divides an image into square tiles and precomputes, for
+each tile, the histogram of its pixel values over one fixed binning for
+the whole image, and the count, sum, sum of squares, minimum and maximum
+of its finite values.  The histograms and sums are stored as prefix sums
+over the tile grid (an "integral histogram"), so the totals for any block
+of whole tiles take four lookups.  A box is answered from the block of
+tiles inside it plus the pixels of the partial tiles along its edges.
+
+The results are exact for the fixed binning; only the binning differs
+from a histogram computed from the box alone (e.g. by
+``AutoCuts.Histogram.calc_histogram``).
+
+Example::
+
+    from ginga.util.histindex import TiledHistogram
+
+    index = TiledHistogram(data, numbins=2048)
+    res = index.histogram(x1, y1, x2, y2)
+    stats = index.stats(x1, y1, x2, y2)
+
+"""
+import numpy as np
+
+from ginga.misc import Bunch
+
+__all__ = ['TiledHistogram']
+
+
+class TiledHistogram:
+    """A tiled histogram index of a 2D array.
+
+    Parameters
+    ----------
+    data : ndarray
+        2D array of the image data
+
+    numbins : int
+        Number of bins of the fixed binning, which spans the range of the
+        finite values of `data`
+
+    tile_size : int
+        Width and height of the tiles in pixels
+    """
+
+    def __init__(self, data, numbins=2048, tile_size=256):
+        if data.ndim != 2:
+            raise ValueError("data must be 2D, not %dD" % (data.ndim))
+        self.data = data
+        self.numbins = numbins
+        self.tile_size = tile_size
+        self.ht, self.wd = data.shape
+        self.nty = (self.ht + tile_size - 1) // tile_size
+        self.ntx = (self.wd + tile_size - 1) // tile_size
+
+        finite = np.isfinite(data)
+        if np.any(finite):
+            self.lo = float(np.min(data, where=finite, initial=np.inf))
+            self.hi = float(np.max(data, where=finite, initial=-np.inf))
+        else:
+            self.lo = self.hi = 0.0
+        if self.hi <= self.lo:
+            self.hi = self.lo + 1.0
+        self.bins = np.linspace(self.lo, self.hi, numbins + 1)
+        self._scale = numbins / (self.hi - self.lo)
+
+        self._build()
+
+    def _bin_index(self, arr):
+        # bin numbers of the finite values of arr (as np.histogram, the
+        # last bin includes the upper edge)
+        arr = arr[np.isfinite(arr)]
+        idx = ((arr - self.lo) * self._scale).astype(np.intp)
+        return np.clip(idx, 0, self.numbins - 1), arr
+
+    def _build(self):
+        ts, nty, ntx, numbins = self.tile_size, self.nty, self.ntx, self.numbins
+        # counts are at most the number of pixels
+        dtype = np.int32 if self.ht * self.wd < 2**31 else np.int64
+        counts = np.zeros((nty + 1, ntx + 1, numbins), dtype=dtype)
+        moments = np.zeros((nty + 1, ntx + 1, 3), dtype=np.float64)
+        self.tile_min = np.full((nty, ntx), np.inf)
+        self.tile_max = np.full((nty, ntx), -np.inf)
+
+        # column number of the tile of each pixel in a row
+        tile_x = np.arange(self.wd) // ts
+        pad = ntx * ts - self.wd
+        for ty in range(nty):
+            strip = self.data[ty * ts:(ty + 1) * ts]
+            finite = np.isfinite(strip)
+            cols = np.broadcast_to(tile_x, strip.shape)[finite]
+            idx, vals = self._bin_index(strip)
+            hist = np.bincount(cols * numbins + idx,
+                               minlength=ntx * numbins)
+            counts[ty + 1, 1:] = hist.reshape(ntx, numbins)
+
+            moments[ty + 1, 1:, 0] = np.bincount(cols, minlength=ntx)
+            moments[ty + 1, 1:, 1] = np.bincount(cols, weights=vals,
+                                                 minlength=ntx)
+            moments[ty + 1, 1:, 2] = np.bincount(cols, weights=vals * vals,
+                                                 minlength=ntx)
+            for arr, fill, fn in ((self.tile_min, np.inf, np.min),
+                                  (self.tile_max, -np.inf, np.max)):
+                vals = np.where(finite, strip, fill)
+                if pad > 0:
+                    vals = np.pad(vals, ((0, 0), (0, pad)),
+                                  constant_values=fill)
+                arr[ty] = fn(vals.reshape(len(strip), ntx, ts), axis=(0, 2))
+
+        # prefix sums over the tile grid
+        self._counts = counts.cumsum(axis=0, dtype=dtype).cumsum(
+            axis=1, dtype=dtype)
+        self._moments = moments.cumsum(axis=0).cumsum(axis=1)
+
+    def _split(self, x1, y1, x2, y2):
+        # clip the box (inclusive pixel coords) to the image and split it
+        # into the block of whole tiles inside it and the edge strips
+        x1, y1 = max(0, int(x1)), max(0, int(y1))
+        x2, y2 = min(self.wd - 1, int(x2)), min(self.ht - 1, int(y2))
+        if x2 < x1 or y2 < y1:
+            return None, []
+        ts = self.tile_size
+        tx1, ty1 = -(-x1 // ts), -(-y1 // ts)
+        tx2, ty2 = (x2 + 1) // ts, (y2 + 1) // ts
+        if x2 + 1 == self.wd:
+            tx2 = self.ntx
+        if y2 + 1 == self.ht:
+            ty2 = self.nty
+        if tx2 <= tx1 or ty2 <= ty1:
+            # no whole tiles
+            return None, [(slice(y1, y2 + 1), slice(x1, x2 + 1))]
+
+        # pixel bounds of the block of whole tiles
+        bx1, by1 = tx1 * ts, ty1 * ts
+        bx2, by2 = min(tx2 * ts, self.wd), min(ty2 * ts, self.ht)
+        strips = [(slice(y1, by1), slice(x1, x2 + 1)),
+                  (slice(by2, y2 + 1), slice(x1, x2 + 1)),
+                  (slice(by1, by2), slice(x1, bx1)),
+                  (slice(by1, by2), slice(bx2, x2 + 1))]
+        strips = [(sy, sx) for sy, sx in strips
+                  if sy.stop > sy.start and sx.stop > sx.start]
+        return (tx1, ty1, tx2, ty2), strips
+
+    def _block_sum(self, arr, block):
+        tx1, ty1, tx2, ty2 = block
+        return arr[ty2, tx2] - arr[ty1, tx2] - arr[ty2, tx1] + arr[ty1, tx1]
+
+    def histogram(self, x1, y1, x2, y2, trim=True):
+        """Return the histogram of the box with corners ``(x1, y1)`` and
+        ``(x2, y2)`` (inclusive, in pixels).
+
+        Parameters
+        ----------
+        trim : bool
+            If True, leave out the empty bins below the lowest and above
+            the highest value in the box
+
+        Returns
+        -------
+        res : `~ginga.misc.Bunch.Bunch`
+            With attributes ``dist`` (the counts) and ``bins`` (the bin
+            edges, one more than ``dist``), as from
+            ``AutoCuts.Histogram.calc_histogram``
+        """
+        block, strips = self._split(x1, y1, x2, y2)
+        dist = np.zeros(self.numbins, dtype=np.int64)
+        if block is not None:
+            dist += self._block_sum(self._counts, block)
+        for sy, sx in strips:
+            idx, vals = self._bin_index(self.data[sy, sx])
+            dist += np.bincount(idx, minlength=self.numbins)
+
+        bins = self.bins
+        if trim:
+            nz = np.flatnonzero(dist)
+            if len(nz) > 0:
+                i, j = nz[0], nz[-1] + 1
+                dist, bins = dist[i:j], bins[i:j + 1]
+        return Bunch.Bunch(dist=dist, bins=bins)
+
+    def stats(self, x1, y1, x2, y2):
+        """Return statistics of the finite values in the box with corners
+        ``(x1, y1)`` and ``(x2, y2)`` (inclusive, in pixels).
+
+        Returns
+        -------
+        res : `~ginga.misc.Bunch.Bunch`
+            With attributes ``count``, ``minval``, ``maxval``, ``mean``
+            and ``rms`` (the last four None if ``count`` is 0)
+        """
+        block, strips = self._split(x1, y1, x2, y2)
+        count, total, sumsq = 0, 0.0, 0.0
+        minval, maxval = np.inf, -np.inf
+        if block is not None:
+            count, total, sumsq = self._block_sum(self._moments, block)
+            tx1, ty1, tx2, ty2 = block
+            minval = self.tile_min[ty1:ty2, tx1:tx2].min()
+            maxval = self.tile_max[ty1:ty2, tx1:tx2].max()
+        for sy, sx in strips:
+            arr = self.data[sy, sx]
+            arr = arr[np.isfinite(arr)]
+            if len(arr) == 0:
+                continue
+            count += len(arr)
+            arr = arr.astype(np.float64, copy=False)
+            total += arr.sum()
+            sumsq += np.dot(arr, arr)
+            minval = min(minval, arr.min())
+            maxval = max(maxval, arr.max())
+
+        count = int(count)
+        if count == 0:
+            return Bunch.Bunch(count=0, minval=None, maxval=None,
+                               mean=None, rms=None)
+        return Bunch.Bunch(count=count, minval=minval, maxval=maxval,
+                           mean=total / count,
+                           rms=np.sqrt(max(sumsq / count, 0.0)))
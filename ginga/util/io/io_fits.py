@@ -22,7 +22,7 @@ from io import BytesIO
 import numpy as np
 
 from ginga.AstroImage import AstroImage, AstroHeader
-from ginga.table.AstroTable import AstroTable
+from ginga.table.AstroTable import AstroTable, TableColumns
 
 from ginga.misc import Bunch
 from ginga.util import iohelper
@@ -233,6 +233,9 @@ class AstropyFitsFileHandler(BaseFitsFileHandler):
 
         super(AstropyFitsFileHandler, self).__init__(logger)
         self.kind = 'pyfits'
+        # binary tables with at least this many rows are loaded in
+        # columnar mode (see AstroTable.set_columns())
+        self.columnar_min_rows = 1000000
 
     def copy_header(self, hdu, ahdr):
         """Copy a FITS header from an astropy.io.fits.PrimaryHDU object
@@ -266,7 +269,7 @@ class AstropyFitsFileHandler(BaseFitsFileHandler):
 
     def load_hdu(self, hdu, dstobj=None, fobj=None, naxispath=None,
                  save_primary_header=False, inherit_primary_header=False,
-                 **kwargs):
+                 columnar=None, **kwargs):
         if fobj is None:
             fobj = self.fits_f
 
@@ -338,6 +341,22 @@ class AstropyFitsFileHandler(BaseFitsFileHandler):
             dstobj.set(primary_header=primary_hdr,
                        inherit_primary_header=inherit_primary_header)
 
+            # large binary tables are loaded in columnar mode: columns are
+            # read lazily, from the (memory-mapped) file
+            if columnar is None:
+                columnar = (isinstance(hdu, pyfits.BinTableHDU) and
+                            hdu.header.get('NAXIS2', 0) >= self.columnar_min_rows)
+            if columnar:
+                try:
+                    dstobj.set_columns(TableColumns.from_fits_hdu(hdu))
+
+                except Exception as e:
+                    self.logger.error("Error reading table from hdu: {0}".format(e),
+                                      exc_info=True)
+
+                dstobj.io = self
+                return dstobj
+
             if 'format' not in kwargs:
                 kwargs['format'] = 'fits'
 
@@ -359,7 +378,7 @@ class AstropyFitsFileHandler(BaseFitsFileHandler):
 
     def load_file(self, filespec, numhdu=None, dstobj=None, memmap=None,
                   save_primary_header=False, inherit_primary_header=False,
-                  **kwargs):
+                  columnar=None, **kwargs):
 
         opener = self.get_factory()
         opener.open_file(filespec, memmap=memmap, **kwargs)
@@ -367,7 +386,8 @@ class AstropyFitsFileHandler(BaseFitsFileHandler):
             return opener.get_hdu(
                 numhdu, dstobj=dstobj,
                 save_primary_header=save_primary_header,
-                inherit_primary_header=inherit_primary_header)
+                inherit_primary_header=inherit_primary_header,
+                columnar=columnar)
         finally:
             opener.close()
 
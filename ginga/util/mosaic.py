@@ -13,7 +13,10 @@ import numpy as np
 from ginga import AstroImage, trcalc
 from ginga.util import wcs, loader, dp, iqcalc
 from ginga.util.io import io_fits
-from ginga.misc import Callback, Settings
+from ginga.misc import Bunch, Callback, Settings
+from ginga.canvas.CanvasObject import get_canvas_types
+from ginga.canvas.types.layer import Canvas
+from ginga.canvas.types.image import ImageP
 
 
 def get_warp_indexes(shape_in, wcs_in, wcs_out):
@@ -872,6 +875,159 @@ class ImageMosaicer(Callback.Callbacks):
         return self.baseimage
 
 
+class CollageTiles(Canvas):
+    """Canvas holding the tiles of a collage.
+
+    Drawing each tile separately is slow when a large part of a collage
+    of many tiles is in view.  This canvas keeps flattened copies of its
+    tiles at reduced resolutions (every 2nd, 4th, 8th... pixel), and when
+    the viewer is zoomed out far enough that more than `min_tiles` tiles
+    are in view, draws the copy at the resolution of the viewer instead.
+    The copies are made when first needed and updated with tiles added
+    since then; tiles are drawn separately when few are in view, and
+    always if any tile is a color image (the copies are monochrome).
+
+    Parameters
+    ----------
+    below_scale : float
+        Flattened copies are used only at viewer scales at most this
+
+    min_tiles : int
+        Flattened copies are used only if more tiles than this are in view
+
+    max_size : int
+        Largest width or height of a flattened copy, in pixels
+    """
+
+    def __init__(self, below_scale=0.5, min_tiles=16, max_size=4096,
+                 **kwdargs):
+        super().__init__(**kwdargs)
+
+        self.below_scale = below_scale
+        self.min_tiles = min_tiles
+        self.max_size = max_size
+        # step -> Bunch of flattened copy at that resolution
+        self._levels = {}
+
+    def get_tiles(self):
+        return [obj for obj in self.objects if isinstance(obj, ImageP)]
+
+    def _get_level(self, viewer, tiles):
+        # return the flattened copy to draw instead of the tiles, if any
+        scale = max(viewer.get_scale_xy())
+        if scale > self.below_scale or len(tiles) <= self.min_tiles:
+            return None
+        # coarsest copy with pixels no larger than the screen pixels
+        step = 2 ** int(np.floor(np.log2(1.0 / scale)))
+
+        x1, y1, x2, y2 = viewer.get_data_rect()
+        bboxes = np.array([tile.get_llur() for tile in tiles])
+        in_view = np.count_nonzero((bboxes[:, 0] < x2) & (bboxes[:, 2] > x1) &
+                                   (bboxes[:, 1] < y2) & (bboxes[:, 3] > y1))
+        if in_view <= self.min_tiles:
+            return None
+        if any(self._is_color(tile) for tile in tiles):
+            return None
+
+        x0, y0 = bboxes[:, :2].min(axis=0)
+        x3, y3 = bboxes[:, 2:].max(axis=0)
+        wd, ht = (int(np.ceil((x3 - x0) / step)),
+                  int(np.ceil((y3 - y0) / step)))
+        if max(wd, ht) > self.max_size:
+            return None
+
+        level = self._levels.get(step, None)
+        if (level is None or level.tiles != tiles[:len(level.tiles)] or
+                x0 < level.x0 or y0 < level.y0 or
+                x3 > level.x0 + level.wd * step or
+                y3 > level.y0 + level.ht * step):
+            # (re)make the copy covering all the tiles
+            level = Bunch.Bunch(step=step, x0=x0, y0=y0, wd=wd, ht=ht,
+                                tiles=[])
+            level.data = np.zeros((ht, wd, 2), dtype=np.float32)
+            dc = get_canvas_types()
+            level.cvs_img = dc.NormImage(x0 + 0.5, y0 + 0.5,
+                                         AstroImage.AstroImage(),
+                                         scale_x=step, scale_y=step)
+            level.cvs_img.initialize(self, viewer, self.logger)
+            self._levels[step] = level
+
+        if len(level.tiles) < len(tiles):
+            for tile in tiles[len(level.tiles):]:
+                self._add_tile(level, tile)
+            level.tiles = list(tiles)
+            level.cvs_img.get_image().set_data(level.data)
+            level.cvs_img.reset_optimize()
+        return level
+
+    def _is_color(self, tile):
+        # True if the tile has more than one band (besides alpha)
+        image = tile.get_image()
+        if len(image.get_data().shape) <= 2:
+            return False
+        return len(image.get_order().replace('A', '')) > 1
+
+    def _add_tile(self, level, tile):
+        # copy the tile pixels nearest the centers of the copy's pixels
+        image = tile.get_image()
+        data = image.get_data()
+        step = level.step
+        tx1, ty1, tx2, ty2 = tile.get_llur()
+        j1 = max(int(np.floor((tx1 - level.x0) / step)), 0)
+        j2 = min(int(np.ceil((tx2 - level.x0) / step)), level.wd)
+        k1 = max(int(np.floor((ty1 - level.y0) / step)), 0)
+        k2 = min(int(np.ceil((ty2 - level.y0) / step)), level.ht)
+        xi = np.floor(level.x0 + (np.arange(j1, j2) + 0.5) * step -
+                      tx1).astype(int)
+        yi = np.floor(level.y0 + (np.arange(k1, k2) + 0.5) * step -
+                      ty1).astype(int)
+        ht, wd = data.shape[:2]
+        xok, yok = (xi >= 0) & (xi < wd), (yi >= 0) & (yi < ht)
+        j1, j2 = j1 + np.argmax(xok), j2 - np.argmax(xok[::-1])
+        k1, k2 = k1 + np.argmax(yok), k2 - np.argmax(yok[::-1])
+        xi, yi = xi[xok], yi[yok]
+        if len(xi) == 0 or len(yi) == 0:
+            return
+        view = data[np.ix_(yi, xi)]
+
+        if len(view.shape) > 2:
+            order = image.get_order()
+            if 'A' in order:
+                valid = view[..., order.index('A')] > 0
+            else:
+                valid = np.ones(view.shape[:2], dtype=bool)
+            view = view[..., 0]
+        else:
+            valid = np.ones(view.shape, dtype=bool)
+        valid &= np.isfinite(view)
+
+        dst = level.data[k1:k2, j1:j2]
+        dst[..., 0][valid] = view[valid]
+        # opaque in the alpha layer
+        dst[..., 1][valid] = np.finfo(np.float32).max
+
+    def _get_draw_objects(self, viewer):
+        tiles = self.get_tiles()
+        level = self._get_level(viewer, tiles)
+        if level is None:
+            return self.objects
+        return [level.cvs_img] + [obj for obj in self.objects
+                                  if not isinstance(obj, ImageP)]
+
+    def prepare_image(self, viewer, whence):
+        for obj in self._get_draw_objects(viewer):
+            if hasattr(obj, 'prepare_image'):
+                obj.prepare_image(viewer, whence)
+
+    def draw(self, viewer):
+        for obj in self._get_draw_objects(viewer):
+            obj.draw(viewer)
+
+    def reset_levels(self):
+        """Forget the flattened copies of the tiles."""
+        self._levels = {}
+
+
 class CanvasMosaicer(Callback.Callbacks):
     """Class for creating collages on a Ginga canvas.
 
@@ -886,6 +1042,10 @@ class CanvasMosaicer(Callback.Callbacks):
 
     where ``images`` is a list of `~ginga.AstroImage.AstroImage` that
     should be plotted in ``viewer``.
+
+    The tiles are plotted on a `CollageTiles` canvas, which draws
+    flattened copies of them at reduced resolution when zoomed out (see
+    the ``flatten_*`` settings).
     """
     def __init__(self, logger, settings=None):
         super(CanvasMosaicer, self).__init__()
@@ -901,7 +1061,9 @@ class CanvasMosaicer(Callback.Callbacks):
                              annotate_fontsize=10.0, ann_fits_kwd=None,
                              ann_tag_pfx='ann_',
                              match_bg=False, collage_method='simple',
-                             center_image=False)
+                             center_image=False, flatten_tiles=True,
+                             flatten_below_scale=0.5, flatten_min_tiles=16,
+                             flatten_max_size=4096)
 
         self.ingest_count = 0
         # holds processed images to be inserted into mosaic image
@@ -917,6 +1079,8 @@ class CanvasMosaicer(Callback.Callbacks):
         self.limits = None
         self.ref_image = None
         self.image_list = []
+        # canvas of the tiles
+        self.tiles = None
 
         for name in ['progress', 'finished']:
             self.enable_callback(name)
@@ -1130,6 +1294,25 @@ class CanvasMosaicer(Callback.Callbacks):
 
         canvas.update_canvas(whence=3)
 
+    def get_tiles_canvas(self, canvas):
+        """Return the canvas to plot the tiles on, added to ``canvas``.
+
+        This is typically called internally.
+        """
+        if self.tiles is None:
+            if self.t_['flatten_tiles']:
+                self.tiles = CollageTiles(
+                    below_scale=self.t_['flatten_below_scale'],
+                    min_tiles=self.t_['flatten_min_tiles'],
+                    max_size=self.t_['flatten_max_size'])
+            else:
+                self.tiles = Canvas()
+        if not canvas.has_object(self.tiles):
+            canvas.add(self.tiles, redraw=False)
+            # below any annotations
+            canvas.lower_object(self.tiles)
+        return self.tiles
+
     def plot_image(self, canvas, image):
         """Plot a new image created by ``transform_image()`` on ``canvas``.
 
@@ -1140,7 +1323,8 @@ class CanvasMosaicer(Callback.Callbacks):
                                                'name', 'tag')
         img = dc.NormImage(xpos, ypos, image)
         img.is_data = True
-        canvas.add(img, tag=tag, redraw=False)
+        tiles = self.get_tiles_canvas(canvas)
+        tiles.add(img, tag=tag, redraw=False)
 
     def reset(self):
         """Prepare for a new mosaic.
@@ -1150,6 +1334,7 @@ class CanvasMosaicer(Callback.Callbacks):
         self.ingest_count = 0
         self.total_images = 0
         self.image_list = []
+        self.tiles = None
 
     def ingest_one(self, canvas, image):
         """Plot ``image`` in the right place on the ``canvas``.
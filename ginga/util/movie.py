@@ -0,0 +1,255 @@
+#
+# movie.py -- export slices of a data cube as a movie
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Export the slices of a data cube as the frames of a movie.
+
+`MovieExporter` renders the slices along one axis of a data cube, one
+slice at a time, with the cut levels, color map and color distribution of
+a viewer, and writes the frames to a sink from `ginga.util.videosink`.
+Slices are rendered by a small pool of worker threads and written in
+order, with only a few frames in memory at any time, so that cubes much
+larger than memory (e.g. memory-mapped FITS files) can be exported.
+
+Example::
+
+    from ginga.util import movie, videosink
+
+    exporter = movie.MovieExporter(logger, viewer)
+    size = exporter.get_frame_size(image)
+    sink = videosink.get_video_sink(size, 'cube.mp4', rate=10)
+    exporter.export(image, sink, 0, 100, progress_cb=print)
+
+"""
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ginga import AstroImage, RGBMap, trcalc
+from ginga.misc import Bunch
+
+__all__ = ['MovieExporter']
+
+
+class MovieExporter:
+    """Renders the slices of a data cube as the frames of a movie.
+
+    The rendering settings (cut levels, color map, intensity map, color
+    distribution, contrast, flips and swap, and, if `use_viewer` is True,
+    also zoom, pan, rotation and interpolation) are taken from `viewer` at
+    the time the exporter is created.
+
+    Parameters
+    ----------
+    logger : :py:class:`~logging.Logger`
+        Logger for tracing and debugging.
+
+    viewer : `~ginga.ImageView.ImageViewBase`
+        Viewer whose rendering settings should be used
+
+    num_workers : int
+        Number of threads rendering frames
+
+    max_pending : int or None
+        Maximum number of frames being rendered or waiting to be written
+        (defaults to twice `num_workers`); this bounds the memory used
+
+    use_viewer : bool
+        If True, frames are rendered as shown in the viewer (at the
+        viewer's window size, zoom, pan and rotation).  Otherwise frames
+        are the full slice, one pixel per data pixel.
+    """
+
+    def __init__(self, logger, viewer, num_workers=2, max_pending=None,
+                 use_viewer=False):
+        self.logger = logger
+        self.num_workers = max(1, num_workers)
+        if max_pending is None:
+            max_pending = 2 * self.num_workers
+        self.max_pending = max(1, max_pending)
+        self.use_viewer = use_viewer
+
+        # snapshot the viewer's rendering settings
+        self.cuts = viewer.get_cut_levels()
+        self.transforms = viewer.get_transforms()
+        self.autocuts = viewer.autocuts
+        self.rgbmap = RGBMap.RGBMapper(logger)
+        viewer.get_rgbmap().copy_attributes(self.rgbmap)
+        self.window_size = viewer.get_window_size()
+        self.viewer = None
+        if use_viewer:
+            self.viewer = self._make_viewer()
+            viewer.copy_attributes(self.viewer,
+                                   ['transforms', 'rotation', 'cutlevels',
+                                    'rgbmap', 'zoom', 'pan', 'limits',
+                                    'interpolation'])
+
+        self._local = threading.local()
+        self.stats = Bunch.Bunch(frames=0)
+
+    def _make_viewer(self):
+        from ginga.pilw.ImageViewPil import CanvasView
+
+        v = CanvasView(logger=self.logger)
+        v.enable_autozoom('off')
+        v.enable_autocuts('off')
+        v.enable_autocenter('off')
+        v.configure(*self.window_size)
+        return v
+
+    def get_slice_view(self, image, idx, axis=2, naxispath=None):
+        """Return the index tuple for slice `idx` along `axis`.
+
+        `axis` counts from 0 in FITS order, so 2 is NAXIS3; the indices
+        along the other axes beyond the first two are given by
+        `naxispath` (as in `~ginga.AstroImage.AstroImage.set_naxispath`),
+        defaulting to those of the slice currently set in `image`.
+        """
+        if naxispath is None:
+            naxispath = image.naxispath
+        ndim = len(image.get_mddata().shape)
+        path = list(naxispath) + [0] * (ndim - 2 - len(naxispath))
+        path[axis - 2] = idx
+        path.reverse()
+        return tuple(path) + (slice(None), slice(None))
+
+    def get_frame_size(self, image):
+        """Return the ``(ht, wd)`` of the frames for `image`."""
+        if self.use_viewer:
+            wd, ht = self.window_size
+            return (ht, wd)
+        ht, wd = image.get_mddata().shape[-2:]
+        if self.transforms[2]:
+            # swap_xy
+            ht, wd = wd, ht
+        return (ht, wd)
+
+    def render_slice(self, image, idx, axis=2, naxispath=None):
+        """Render slice `idx` along `axis` of `image`.
+
+        Returns
+        -------
+        frame : ndarray
+            ``(ht, wd, 3)`` RGB array of ``uint8``
+        """
+        view = self.get_slice_view(image, idx, axis=axis, naxispath=naxispath)
+        # NOTE: for a memory-mapped cube this reads just the one slice
+        data = np.asarray(image.get_mddata()[view])
+
+        if self.use_viewer:
+            return self._render_viewer(data)
+        return self._render_data(data)
+
+    def _render_data(self, data):
+        local = self._local
+        if getattr(local, 'rgbmap', None) is None:
+            # RGBMappers are not thread safe, so each thread has its own
+            local.rgbmap = RGBMap.RGBMapper(self.logger)
+            self.rgbmap.copy_attributes(local.rgbmap)
+        rgbmap = local.rgbmap
+
+        loval, hival = self.cuts
+        vmax = rgbmap.get_hash_size() - 1
+        idx = self.autocuts.cut_levels(data, loval, hival, vmin=0, vmax=vmax)
+        idx = idx.astype(np.uint, copy=False)
+        rgb = rgbmap.get_rgb_array(idx, order='RGB')
+
+        flip_x, flip_y, swap_xy = self.transforms
+        rgb = trcalc.transform(rgb, flip_x=flip_x, flip_y=flip_y,
+                               swap_xy=swap_xy)
+        # data origin is at the lower left
+        rgb = np.flipud(rgb)
+        if rgb.dtype != np.uint8:
+            # deeper color depth
+            rgb = (rgb >> (8 * (rgb.dtype.itemsize - 1))).astype(np.uint8)
+        return np.ascontiguousarray(rgb)
+
+    def _render_viewer(self, data):
+        local = self._local
+        if getattr(local, 'viewer', None) is None:
+            local.viewer = self._make_viewer()
+            local.initialized = False
+        v = local.viewer
+
+        image = AstroImage.AstroImage(logger=self.logger)
+        image.set_data(data)
+        v.set_image(image)
+        if not local.initialized:
+            self.viewer.copy_attributes(v, ['transforms', 'rotation',
+                                            'cutlevels', 'rgbmap', 'zoom',
+                                            'pan', 'limits',
+                                            'interpolation'])
+            local.initialized = True
+        v.redraw_now(whence=0)
+        return np.ascontiguousarray(v.get_image_as_array(order='RGB'))
+
+    def export(self, image, sink, start, stop, axis=2, naxispath=None,
+               progress_cb=None):
+        """Export slices ``start`` up to (not including) ``stop`` along
+        `axis` of `image` as frames written to `sink`.
+
+        Parameters
+        ----------
+        image : `~ginga.AstroImage.AstroImage`
+            The image with the data cube
+
+        sink : a sink object from `ginga.util.videosink`
+            Where the frames are written; it is opened and closed here
+
+        start, stop : int
+            Range of slices to export
+
+        axis : int
+            Axis along which to take the slices (2 is NAXIS3)
+
+        naxispath : list of int or None
+            Indices along the other axes beyond the first two (see
+            `get_slice_view`)
+
+        progress_cb : callable or None
+            Called as ``progress_cb(fraction)`` as each frame is written
+        """
+        indices = range(start, stop)
+        num_frames = len(indices)
+        pending = deque()
+        count = 0
+
+        sink.open()
+        try:
+            with ThreadPoolExecutor(max_workers=self.num_workers,
+                                    thread_name_prefix='movie') as executor:
+                try:
+                    for idx in indices:
+                        pending.append(executor.submit(self.render_slice,
+                                                       image, idx, axis,
+                                                       naxispath))
+                        if len(pending) >= self.max_pending:
+                            count = self._write_next(sink, pending, count,
+                                                     num_frames, progress_cb)
+                    while len(pending) > 0:
+                        count = self._write_next(sink, pending, count,
+                                                 num_frames, progress_cb)
+                except Exception:
+                    for future in pending:
+                        future.cancel()
+                    raise
+        finally:
+            sink.close()
+
+        self.logger.info("exported {} frames".format(count))
+        return count
+
+    def _write_next(self, sink, pending, count, num_frames, progress_cb):
+        # frames are written in order, as they are done
+        frame = pending.popleft().result()
+        sink.write(frame)
+        count += 1
+        self.stats.frames += 1
+        if progress_cb is not None:
+            progress_cb(count / num_frames)
+        return count
@@ -0,0 +1,182 @@
+#
+# overview.py -- reduced copies of images for overview displays
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Reduced copies of images, for viewers that show a whole image in a small
+window (e.g. the ``Pan`` plugin).
+
+Drawing a large image fitted to a small window means reading every pixel
+of it at each redraw, to show only a few of them.  `get_overview` makes a
+copy with only every Nth pixel once, and keeps it for all the viewers
+showing the image; `OverviewCanvas` shows the canvas of another viewer
+with the image replaced by its overview.
+"""
+import math
+import weakref
+
+from ginga.misc import Bunch
+from ginga.canvas.types.layer import DrawingCanvas
+
+__all__ = ['get_overview', 'OverviewCanvas']
+
+# image -> Bunch of its overview, shared by all viewers
+_overviews = weakref.WeakKeyDictionary()
+# images whose modifications we watch
+_watched = weakref.WeakSet()
+
+
+def get_overview(image, max_size):
+    """Return a reduced copy of `image` for an overview.
+
+    The copy has every Nth pixel of the image in each direction, with N
+    the smallest step that makes it at most `max_size` pixels wide and
+    high.  Copies are kept (until the image is modified or no longer
+    used) and shared.
+
+    Parameters
+    ----------
+    image : `~ginga.BaseImage.BaseImage`
+        The image
+
+    max_size : int
+        Largest width or height of the copy
+
+    Returns
+    -------
+    res : `~ginga.misc.Bunch.Bunch` or None
+        With attributes ``image`` (the copy) and ``step`` (N); None if
+        the image is no larger than `max_size`.
+    """
+    wd, ht = image.get_size()
+    step = int(math.ceil(max(wd, ht) / max_size))
+    if step <= 1:
+        return None
+    res = _overviews.get(image, None)
+    if res is not None and res.step == step:
+        return res
+
+    data = image.get_data()[::step, ::step].copy()
+    ov_image = image.__class__(logger=image.logger)
+    ov_image.set_data(data, order=image.get_order())
+    res = Bunch.Bunch(image=ov_image, step=step)
+    if image not in _watched:
+        _watched.add(image)
+        image.add_callback('modified', _overview_modified_cb)
+    _overviews[image] = res
+    return res
+
+
+def _overview_modified_cb(image):
+    _overviews.pop(image, None)
+
+
+class OverviewCanvas(DrawingCanvas):
+    """A read-only view of a viewer's canvas, for another viewer showing
+    the whole image: the objects of the canvas are shown, but the image
+    (the object tagged `img_tag`) is replaced by its overview (see
+    `get_overview`).  Objects can be added to (and deleted from) this
+    canvas as usual; they are drawn on top of those of `src_canvas`.
+
+    Parameters
+    ----------
+    src_canvas : `~ginga.canvas.types.layer.Canvas`
+        The canvas to show
+
+    max_size : int
+        Largest width or height of the overview
+
+    img_tag : str
+        Tag of the image in `src_canvas`
+    """
+
+    def __init__(self, src_canvas, max_size=1024, img_tag='__image',
+                 **kwdargs):
+        self._objects = []
+        super().__init__(**kwdargs)
+
+        self.src_canvas = src_canvas
+        self.max_size = max_size
+        self.img_tag = img_tag
+        self._ov_img = None
+        src_canvas.add_callback('modified', self.subcanvas_updated_cb)
+
+    def _get_objects(self):
+        objects = list(self.src_canvas.objects)
+        try:
+            img_obj = self.src_canvas.get_object_by_tag(self.img_tag)
+        except KeyError:
+            return objects + self._objects
+        image = img_obj.get_image()
+        ov = None if image is None else get_overview(image, self.max_size)
+        if ov is None:
+            return objects + self._objects
+
+        if self._ov_img is None:
+            NormImage = self.get_draw_class('normimage')
+            self._ov_img = NormImage(img_obj.x, img_obj.y, None,
+                                     interpolation=None)
+            # not for reading data values, which come from the image
+            self._ov_img.is_data = False
+            self._ov_img.crdmap = img_obj.crdmap
+        if self._ov_img.get_image() is not ov.image:
+            self._ov_img.set_image(ov.image)
+            self._ov_img.set_scale(img_obj.scale_x * ov.step,
+                                   img_obj.scale_y * ov.step)
+        return [self._ov_img if obj is img_obj else obj
+                for obj in objects] + self._objects
+
+    def _set_objects(self, objects):
+        self._objects = objects
+
+    objects = property(_get_objects, _set_objects)
+
+    # objects of this canvas, as opposed to those of the source canvas
+
+    def add_object(self, obj, belowThis=None):
+        if obj in self._objects:
+            raise ValueError("object is already in this compound object")
+
+        self._insert_object(obj, belowThis=belowThis)
+
+    def _insert_object(self, obj, belowThis=None):
+        obj.initialize(self, self.viewer, self.logger)
+
+        if belowThis is None:
+            self._objects.append(obj)
+        else:
+            index = self._objects.index(belowThis)
+            self._objects.insert(index, obj)
+
+    def delete_objects_by_tag(self, tags, redraw=True):
+        for tag in tags:
+            obj = self.tags.pop(tag, None)
+            if obj is not None and obj in self._objects:
+                self._objects.remove(obj)
+
+        if redraw:
+            self.update_canvas(whence=3)
+
+    def delete_objects(self, objects, redraw=True):
+        for obj in objects:
+            tags = [tag for tag, _obj in self.tags.items() if _obj is obj]
+            for tag in tags:
+                del self.tags[tag]
+            self._objects.remove(obj)
+
+        if redraw:
+            self.update_canvas(whence=3)
+
+    def delete_all_objects(self, redraw=True):
+        self.tags.clear()
+        self._objects.clear()
+
+        if redraw:
+            self.update_canvas(whence=3)
+
+    def get_object_by_tag(self, tag):
+        if tag in self.tags:
+            return self.tags[tag]
+        return self.src_canvas.get_object_by_tag(tag)
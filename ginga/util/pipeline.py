@@ -7,7 +7,7 @@
 import time
 
 from ginga.misc import Bunch, Callback
-from ginga.util import action
+from ginga.util import action, profiler
 
 __all__ = ['Pipeline']
 
@@ -71,13 +71,23 @@ class Pipeline(Callback.Callbacks):
         self.cur_stage = stage
         self.make_callback('stage-executing', stage)
         start_time = time.time()
+        prof = profiler.active
+        if prof is not None:
+            t1 = time.perf_counter()
         try:
             stage.run(prev_stage)
             stop_time = time.time()
+            if prof is not None:
+                prof.record('stage', stage._stagename, t1,
+                            time.perf_counter(), args=dict(pipeline=self.name))
             self.make_callback('stage-done', stage)
 
         except Exception as e:
             stop_time = time.time()
+            if prof is not None:
+                prof.record('stage', stage._stagename, t1,
+                            time.perf_counter(),
+                            args=dict(pipeline=self.name, error=str(e)))
             self.logger.error("Error running stage %d (%s): %s" % (
                 i, str(stage), e), exc_info=True)
             self.stop()
@@ -0,0 +1,239 @@
+#
+# prefetch.py -- load data objects in the background before they are needed
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Load data objects in the background, ahead of their use.
+
+`Prefetcher` is told, in order of priority, which items are likely to be
+wanted next (e.g. the next few images of a channel in the direction the
+user is stepping through them).  It loads those not yet loaded with a
+small pool of worker threads and keeps the results, within a memory
+budget, until they are taken with `Prefetcher.get`.  Items that are no
+longer wanted are dropped first when the budget is exceeded.
+
+Example::
+
+    from ginga.util.prefetch import Prefetcher
+
+    pf = Prefetcher(logger, load_fn, max_bytes=256 * 1024**2)
+    pf.prefetch([('img2', path2), ('img3', path3)])
+    ...
+    image = pf.get('img2')
+    if image is None:
+        # not prefetched
+        image = load_fn(path2)
+
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from ginga.misc import Bunch
+
+__all__ = ['Prefetcher']
+
+
+def get_nbytes(obj):
+    """Return the approximate size of data object `obj` in bytes."""
+    try:
+        return obj.get_data().nbytes
+    except Exception:
+        return 0
+
+
+class Prefetcher:
+    """Loads items in the background before they are wanted.
+
+    Parameters
+    ----------
+    logger : :py:class:`~logging.Logger`
+        Logger for tracing and debugging.
+
+    load_fn : callable
+        Called as ``load_fn(arg)`` in a worker thread to load an item
+        (see `prefetch`); it should return the loaded object or raise an
+        exception
+
+    prepare_fn : callable or None
+        If given, called as ``prepare_fn(obj)`` in the worker thread after
+        an item is loaded, for any further work that can be done ahead
+        (e.g. calculating cut levels)
+
+    num_workers : int
+        Number of worker threads
+
+    max_bytes : int
+        Memory budget for the loaded items kept, in bytes
+
+    size_fn : callable or None
+        Called as ``size_fn(obj)`` to get the size of a loaded object in
+        bytes (defaults to the size of its data array)
+    """
+
+    def __init__(self, logger, load_fn, prepare_fn=None, num_workers=2,
+                 max_bytes=256 * 1024**2, size_fn=None):
+        self.logger = logger
+        self.load_fn = load_fn
+        self.prepare_fn = prepare_fn
+        self.max_bytes = max_bytes
+        if size_fn is None:
+            size_fn = get_nbytes
+        self.size_fn = size_fn
+
+        self.lock = threading.RLock()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, num_workers))
+        # key -> (obj, nbytes) of loaded items, least recently wanted first
+        self._cache = OrderedDict()
+        # key -> list of callbacks of items being loaded
+        self._pending = {}
+        # keys wanted, in order of priority
+        self._wanted = []
+        self._num_bytes = 0
+        self._stats = Bunch.Bunch(hits=0, late=0, misses=0, loaded=0,
+                                  failed=0, evicted=0)
+
+    def prefetch(self, items):
+        """Set the items wanted next and start loading those that are not
+        loaded or being loaded.
+
+        Parameters
+        ----------
+        items : list of tuple
+            ``(key, arg)`` pairs, in order of priority; ``arg`` is passed
+            to ``load_fn``
+        """
+        with self.lock:
+            self._wanted = [key for key, arg in items]
+            for key in self._wanted:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+            for key, arg in items:
+                if key in self._cache or key in self._pending:
+                    continue
+                self._pending[key] = []
+                self.executor.submit(self._load, key, arg)
+
+    def _load(self, key, arg):
+        try:
+            obj = self.load_fn(arg)
+            if self.prepare_fn is not None:
+                self.prepare_fn(obj)
+        except Exception as e:
+            self.logger.warning("Error prefetching '{}': {}".format(key, e))
+            obj = None
+
+        with self.lock:
+            callbacks = self._pending.pop(key, [])
+            if obj is None:
+                self._stats.failed += 1
+            else:
+                self._stats.loaded += 1
+                if len(callbacks) == 0:
+                    # keep it until it is wanted
+                    nbytes = self.size_fn(obj)
+                    self._cache[key] = (obj, nbytes)
+                    self._num_bytes += nbytes
+                    self._evict()
+
+        for callback in callbacks:
+            try:
+                callback(obj)
+            except Exception as e:
+                self.logger.error("Error in prefetch callback: {}".format(e),
+                                  exc_info=True)
+
+    def _evict(self):
+        # drop the items not wanted, then the least wanted ones, until
+        # the items kept fit in the memory budget
+        wanted = self._wanted
+        while self._num_bytes > self.max_bytes and len(self._cache) > 0:
+            keys = [key for key in self._cache if key not in wanted]
+            if len(keys) > 0:
+                key = keys[0]
+            else:
+                key = max(self._cache, key=wanted.index)
+            obj, nbytes = self._cache.pop(key)
+            self._num_bytes -= nbytes
+            self._stats.evicted += 1
+
+    def get(self, key, callback=None):
+        """Take a prefetched item.
+
+        Parameters
+        ----------
+        key : str
+            Key of the item
+
+        callback : callable or None
+            If given and the item is still being loaded, called as
+            ``callback(obj)`` from the worker thread when it is done
+            (``obj`` is None if the load failed)
+
+        Returns
+        -------
+        obj : object or None
+            The loaded item, which the prefetcher no longer keeps, or None
+            if it is not loaded (yet)
+        """
+        with self.lock:
+            if key in self._cache:
+                obj, nbytes = self._cache.pop(key)
+                self._num_bytes -= nbytes
+                self._stats.hits += 1
+                return obj
+            if key in self._pending and callback is not None:
+                self._pending[key].append(callback)
+                self._stats.late += 1
+                return None
+            self._stats.misses += 1
+            return None
+
+    def is_pending(self, key):
+        """Return True if item `key` is being loaded."""
+        with self.lock:
+            return key in self._pending
+
+    def discard(self, key):
+        """Forget the prefetched item `key`, if any."""
+        with self.lock:
+            if key in self._cache:
+                obj, nbytes = self._cache.pop(key)
+                self._num_bytes -= nbytes
+
+    def clear(self):
+        """Forget all prefetched items."""
+        with self.lock:
+            self._cache.clear()
+            self._num_bytes = 0
+            self._wanted = []
+
+    def get_stats(self):
+        """Return the counts of the prefetcher.
+
+        Returns
+        -------
+        stats : `~ginga.misc.Bunch.Bunch`
+            With attributes ``hits`` (items taken that were loaded),
+            ``late`` (items wanted while they were still being loaded),
+            ``misses`` (items wanted that were not prefetched), ``loaded``,
+            ``failed``, ``evicted`` (loaded items dropped for the memory
+            budget), ``count`` and ``num_bytes`` (of the items kept),
+            ``pending`` and ``hit_rate`` (of hits and late hits among all
+            items wanted, or None)
+        """
+        with self.lock:
+            stats = Bunch.Bunch(self._stats)
+            stats.setvals(count=len(self._cache), num_bytes=self._num_bytes,
+                          pending=len(self._pending))
+        total = stats.hits + stats.late + stats.misses
+        stats.hit_rate = ((stats.hits + stats.late) / total
+                          if total > 0 else None)
+        return stats
+
+    def shutdown(self):
+        """Stop the worker threads, and forget all prefetched items."""
+        self.executor.shutdown(wait=False)
+        self.clear()
@@ -0,0 +1,215 @@
+#
+# profiler.py -- timing of callbacks, pipeline stages, GUI tasks and redraws
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Opt-in timing instrumentation for finding out where time goes in a
+running Ginga session.
+
+When a profiler is enabled (see `enable`), Ginga records the duration and
+thread of
+
+* every callback handler invoked by ``Callbacks.make_callback`` (category
+  ``callback``),
+* every pipeline stage run (category ``stage``),
+* every task run on the GUI thread via ``gui_do`` and friends (category
+  ``gui``), and
+* every viewer redraw (category ``redraw``).
+
+Durations are kept in rolling windows per ``(category, name)``, from which
+percentiles are computed (`Profiler.get_stats`), and the most recent
+events can be saved as a Chrome trace JSON file (`Profiler.save_trace`)
+for viewing in ``chrome://tracing`` or https://ui.perfetto.dev .
+
+When no profiler is enabled, the instrumentation costs one attribute
+lookup per event.
+
+Example::
+
+    from ginga.util import profiler
+
+    prof = profiler.enable()
+    ...
+    print(prof.report())
+    prof.save_trace('ginga-trace.json')
+    profiler.disable()
+
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+from ginga.misc import Bunch
+
+__all__ = ['Profiler', 'enable', 'disable', 'get_profiler']
+
+# the enabled profiler, or None.  Instrumented code checks this directly.
+active = None
+
+
+class Profiler:
+    """Records timed events and keeps rolling statistics about them.
+
+    Parameters
+    ----------
+    max_events : int
+        Number of the most recent events kept for the trace
+
+    window : int
+        Number of the most recent durations per ``(category, name)`` used
+        for the statistics
+    """
+
+    def __init__(self, max_events=100000, window=1000):
+        self.max_events = max_events
+        self.window = window
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.clear()
+
+    def clear(self):
+        """Forget all recorded events and statistics."""
+        with self.lock:
+            # (cat, name, tid, start, duration, args) with times in sec
+            self.events = deque([], self.max_events)
+            # (cat, name) -> Bunch of count, total and durations
+            self._stats = {}
+            self._threads = {}
+            self.t0 = time.perf_counter()
+
+    def record(self, cat, name, start, end, args=None):
+        """Record an event of category `cat` and name `name`, which ran
+        from `start` to `end` (``time.perf_counter`` values) in the
+        calling thread.  `args` is an optional dict of details, shown in
+        the trace viewer."""
+        tid = threading.get_ident()
+        dur = end - start
+        with self.lock:
+            self.events.append((cat, name, tid, start, dur, args))
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+            st = self._stats.get((cat, name), None)
+            if st is None:
+                st = Bunch.Bunch(count=0, total=0.0,
+                                 durations=deque([], self.window))
+                self._stats[(cat, name)] = st
+            st.count += 1
+            st.total += dur
+            st.durations.append(dur)
+
+    @contextmanager
+    def span(self, cat, name, args=None):
+        """Context manager recording the time spent in its block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(cat, name, start, time.perf_counter(), args=args)
+
+    def get_stats(self, cat=None):
+        """Get statistics of the recorded events.
+
+        Parameters
+        ----------
+        cat : str or None
+            Only return statistics for this category
+
+        Returns
+        -------
+        stats : list of `~ginga.misc.Bunch.Bunch`
+            One per ``(category, name)``, with attributes ``cat``, ``name``,
+            ``count``, ``total`` (all events, in sec) and ``mean``, ``p50``,
+            ``p90``, ``p99`` and ``max`` (over the rolling window, in sec),
+            sorted by decreasing total time
+        """
+        with self.lock:
+            items = [(key, st.count, st.total, np.array(st.durations))
+                     for key, st in self._stats.items()
+                     if cat is None or key[0] == cat]
+        res = []
+        for (_cat, name), count, total, durs in items:
+            p50, p90, p99 = np.percentile(durs, [50, 90, 99])
+            res.append(Bunch.Bunch(cat=_cat, name=name, count=count,
+                                   total=total, mean=durs.mean(),
+                                   p50=p50, p90=p90, p99=p99,
+                                   max=durs.max()))
+        res.sort(key=lambda st: st.total, reverse=True)
+        return res
+
+    def report(self, cat=None, limit=20):
+        """Return a text table of the statistics for the `limit` events
+        with the most total time (times in msec)."""
+        lines = ["{:9s} {:40s} {:>7s} {:>9s} {:>8s} {:>8s} {:>8s} {:>8s}".format(
+            'category', 'name', 'count', 'total', 'p50', 'p90', 'p99', 'max')]
+        for st in self.get_stats(cat=cat)[:limit]:
+            lines.append(
+                "{:9s} {:40s} {:7d} {:9.1f} {:8.2f} {:8.2f} {:8.2f} {:8.2f}".format(
+                    st.cat, st.name[:40], st.count, st.total * 1000,
+                    st.p50 * 1000, st.p90 * 1000, st.p99 * 1000,
+                    st.max * 1000))
+        return '\n'.join(lines)
+
+    def get_trace(self):
+        """Return the recorded events in the Chrome trace event format
+        (a dict which can be written as JSON)."""
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+            t0 = self.t0
+        trace = [dict(name='thread_name', ph='M', pid=self.pid, tid=tid,
+                      args=dict(name=name))
+                 for tid, name in threads.items()]
+        for cat, name, tid, start, dur, args in events:
+            d = dict(name=name, cat=cat, ph='X', pid=self.pid, tid=tid,
+                     ts=round((start - t0) * 1e6, 3),
+                     dur=round(dur * 1e6, 3))
+            if args is not None:
+                d['args'] = args
+            trace.append(d)
+        return dict(traceEvents=trace, displayTimeUnit='ms')
+
+    def save_trace(self, path):
+        """Save the recorded events as a Chrome trace JSON file."""
+        trace = self.get_trace()
+        with open(path, 'w') as out_f:
+            json.dump(trace, out_f, default=str)
+        return len(trace['traceEvents'])
+
+
+def get_name(obj):
+    """Return a descriptive name for a callable, for use as an event name."""
+    name = getattr(obj, '__qualname__', None)
+    if name is None:
+        # e.g. a functools.partial
+        func = getattr(obj, 'func', obj)
+        name = getattr(func, '__qualname__', None) or type(func).__name__
+    return name
+
+
+def enable(max_events=100000, window=1000):
+    """Enable profiling, with a new `Profiler` if one is not enabled
+    already.  Returns the enabled profiler."""
+    global active
+    if active is None:
+        active = Profiler(max_events=max_events, window=window)
+    return active
+
+
+def disable():
+    """Disable profiling.  Returns the profiler that was enabled (or None),
+    whose statistics are still available."""
+    global active
+    prof, active = active, None
+    return prof
+
+
+def get_profiler():
+    """Return the enabled `Profiler`, or None."""
+    return active
@@ -0,0 +1,362 @@
+#
+# render.py -- headless batch rendering of preview images
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Render quick-look previews (PNG or JPEG) of many files, without a GUI.
+
+`Renderer` holds an offscreen viewer which is reused for every file: each
+file is loaded through the loader registry (`ginga.util.loader`), shown
+with the viewer settings of a profile (cut levels, color map, zoom, etc.,
+as in a channel preferences file, which are the settings of the viewer),
+optionally decorated with overlays, and written with
+``get_rgb_image_as_bytes``.
+
+`render_files` renders a list of files with a pool of worker processes,
+each holding its own `Renderer`, and returns statistics about the
+throughput and the time taken per file.  The ``ginga-render`` command
+(see ``ginga/misc/render.py``) is a command line interface to it.
+
+Example::
+
+    from ginga.util import render
+
+    profile = dict(color_map='heat', autocut_method='zscale')
+    stats = render.render_files(['a.fits', 'b.fits'], 'previews',
+                                profile=profile, size=(512, 512),
+                                overlays=['name', 'colorbar'])
+    print(render.format_stats(stats))
+
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from ginga.misc import Bunch, Settings, log
+from ginga.util import iohelper, loader
+
+__all__ = ['Renderer', 'load_profile', 'get_output_path',
+           'get_output_paths', 'render_files', 'format_stats']
+
+overlay_names = ('name', 'colorbar', 'compass')
+
+# the Renderer of a worker process
+_worker_renderer = None
+
+
+class Renderer:
+    """Renders images to preview files with a reusable offscreen viewer.
+
+    Parameters
+    ----------
+    logger : :py:class:`~logging.Logger` or None
+        Logger for tracing and debugging (a null logger if None)
+
+    profile : dict, `~ginga.misc.Settings.SettingGroup` or None
+        Viewer settings (e.g. ``color_map``, ``intensity_map``,
+        ``color_algorithm``, ``autocut_method``, ``autozoom``), as in a
+        channel preferences file
+
+    size : tuple of int
+        ``(width, height)`` of the rendered images
+
+    zoom : float, str or None
+        Zoom level, or 'fit' or None to zoom to fit the window
+
+    cuts : tuple of float or None
+        Fixed ``(lo, hi)`` cut levels; if None, the auto cut levels of the
+        profile are used
+
+    overlays : list of str or None
+        Overlays drawn on the images: any of 'name' (the image name),
+        'colorbar' and 'compass' (for images with a WCS)
+
+    format : str
+        Output format, 'png' or 'jpeg'
+
+    quality : int
+        Quality of JPEG output
+
+    backend : str
+        Rendering backend of the viewer: 'pil' or 'agg'
+
+    fitspkg : str or None
+        FITS package to prefer for loading FITS files ('astropy' or
+        'fitsio'), as the ``--fitspkg`` option of the reference viewer
+    """
+
+    def __init__(self, logger=None, profile=None, size=(512, 512),
+                 zoom=None, cuts=None, overlays=None, format='png',
+                 quality=90, backend='pil', fitspkg=None):
+        if logger is None:
+            logger = log.get_logger(null=True)
+        self.logger = logger
+        if overlays is None:
+            overlays = []
+        for name in overlays:
+            if name not in overlay_names:
+                raise ValueError("overlay '%s' not one of %s" % (
+                    name, str(overlay_names)))
+        self.overlays = list(overlays)
+        self.zoom = zoom
+        self.cuts = cuts
+        self.format = format
+        self.quality = quality
+
+        if fitspkg is not None:
+            from ginga.util.io import io_fits
+            io_fits.use(fitspkg)
+
+        settings = Settings.SettingGroup(name='render', logger=logger)
+        if profile is not None:
+            if isinstance(profile, Settings.SettingGroup):
+                profile = profile.get_dict()
+            settings.set_dict(profile, callback=False)
+        if zoom not in (None, 'fit'):
+            settings.set(autozoom='off', callback=False)
+        if cuts is not None:
+            settings.set(autocuts='off', callback=False)
+
+        self.viewer = self._make_viewer(backend, settings)
+        self.viewer.configure(*size)
+        self._add_overlays()
+
+    def _make_viewer(self, backend, settings):
+        if backend == 'pil':
+            from ginga.pilw.ImageViewPil import CanvasView
+        elif backend == 'agg':
+            from ginga.aggw.ImageViewAgg import CanvasView
+        else:
+            raise ValueError("backend '%s' not one of ('pil', 'agg')" % (
+                backend))
+        viewer = CanvasView(logger=self.logger, settings=settings)
+        viewer.enable_autocenter('on')
+        return viewer
+
+    def _add_overlays(self):
+        viewer = self.viewer
+        canvas = viewer.get_private_canvas()
+        if 'colorbar' in self.overlays:
+            Cbar = canvas.get_draw_class('colorbar')
+            canvas.add(Cbar(side='bottom'), tag='_$color_bar', redraw=False)
+        if 'name' in self.overlays:
+            Text = canvas.get_draw_class('text')
+            canvas.add(Text(8, 20, text='', color='white', fontsize=12,
+                            bgcolor='black', bgalpha=0.5, coord='window'),
+                       tag='_$name', redraw=False)
+
+    def _update_overlays(self, image):
+        viewer = self.viewer
+        canvas = viewer.get_private_canvas()
+        if 'name' in self.overlays:
+            obj = canvas.get_object_by_tag('_$name')
+            obj.text = image.get('name', '')
+        if 'compass' in self.overlays:
+            canvas.delete_object_by_tag('_$compass')
+            if image.has_valid_wcs():
+                x, y = viewer.get_pan()
+                wd, ht = viewer.get_window_size()
+                radius = min(wd, ht) * 0.1 / viewer.get_scale()
+                Compass = canvas.get_draw_class('compass')
+                canvas.add(Compass(x, y, radius, color='skyblue'),
+                           tag='_$compass', redraw=False)
+
+    def load(self, filespec):
+        """Load `filespec` (path or URL, optionally with an index in
+        brackets, e.g. ``file.fits[1]``) with the loader registry."""
+        info = iohelper.get_fileinfo(filespec)
+        image = loader.load_data(filespec, logger=self.logger)
+        if image.get('name', None) is None:
+            image.set(name=info.name)
+        return image
+
+    def render_image(self, image):
+        """Render `image` and return the contents of the output file as
+        bytes."""
+        viewer = self.viewer
+        with viewer.suppress_redraw:
+            viewer.set_image(image)
+            if self.zoom not in (None, 'fit'):
+                viewer.zoom_to(self.zoom)
+            if self.cuts is not None:
+                viewer.cut_levels(*self.cuts)
+            self._update_overlays(image)
+        viewer.redraw_now(whence=0)
+        return viewer.get_rgb_image_as_bytes(format=self.format,
+                                             quality=self.quality)
+
+    def render(self, filespec, outpath):
+        """Render the file `filespec` to the file `outpath`.
+
+        Returns
+        -------
+        res : `~ginga.misc.Bunch.Bunch`
+            Time (in sec) spent in ``load``, ``render`` and ``write``
+        """
+        t1 = time.perf_counter()
+        image = self.load(filespec)
+        t2 = time.perf_counter()
+        buf = self.render_image(image)
+        t3 = time.perf_counter()
+        with open(outpath, 'wb') as out_f:
+            out_f.write(buf)
+        t4 = time.perf_counter()
+        return Bunch.Bunch(load=t2 - t1, render=t3 - t2, write=t4 - t3)
+
+
+def load_profile(path):
+    """Load viewer settings from a settings file (e.g. a copy of
+    ``channel_Image.cfg``) and return them as a dict."""
+    settings = Settings.SettingGroup(name='profile', preffile=path)
+    settings.load(onError='raise')
+    return settings.get_dict()
+
+
+def get_output_path(filespec, outdir, format='png'):
+    """Return the path of the preview of `filespec` in `outdir`."""
+    info = iohelper.get_fileinfo(filespec)
+    ext = 'jpg' if format == 'jpeg' else format
+    return os.path.join(outdir, '{}.{}'.format(info.name, ext))
+
+
+def get_output_paths(filespecs, outdir, format='png'):
+    """Return the paths of the previews of `filespecs` in `outdir`.
+
+    As `get_output_path`, except that files with the same name (e.g.
+    ``a/x.fits`` and ``b/x.fits``) get distinct paths, by adding a
+    number to the names of the later ones (``x.png``, ``x_2.png``).
+    """
+    outpaths, used = [], set([])
+    for filespec in filespecs:
+        outpath = get_output_path(filespec, outdir, format=format)
+        root, ext = os.path.splitext(outpath)
+        num = 1
+        while outpath in used:
+            num += 1
+            outpath = '{}_{}{}'.format(root, num, ext)
+        used.add(outpath)
+        outpaths.append(outpath)
+    return outpaths
+
+
+def _init_worker(kwargs):
+    global _worker_renderer
+    _worker_renderer = Renderer(**kwargs)
+
+
+def _render_file(filespec, outpath):
+    try:
+        times = _worker_renderer.render(filespec, outpath)
+        return filespec, outpath, times, None
+    except Exception as e:
+        return filespec, outpath, None, str(e)
+
+
+def render_files(filespecs, outdir, num_workers=None, progress_cb=None,
+                 **kwargs):
+    """Render previews of many files in parallel.
+
+    Parameters
+    ----------
+    filespecs : list of str
+        Files to render (paths or URLs, optionally with an index)
+
+    outdir : str
+        Directory for the previews, which are named after the files (see
+        `get_output_paths`)
+
+    num_workers : int or None
+        Number of worker processes (the number of CPUs if None); if 0,
+        the files are rendered in this process
+
+    progress_cb : callable or None
+        Called as ``progress_cb(filespec, outpath, error)`` as each file
+        is done; `error` is None or a message
+
+    kwargs : dict
+        Parameters for `Renderer`, except `logger`, e.g. `profile`,
+        `size`, `zoom`, `cuts`, `overlays`, `format`
+
+    Returns
+    -------
+    stats : `~ginga.misc.Bunch.Bunch`
+        With attributes ``num_files``, ``num_done``, ``errors`` (list of
+        ``(filespec, message)``), ``elapsed`` and ``rate`` (files per
+        sec of wall time) and, over the rendered files, ``latency`` (a
+        Bunch of ``mean``, ``p50``, ``p90``, ``p99`` and ``max`` of the
+        time per file) and ``mean_load``, ``mean_render`` and
+        ``mean_write`` (in sec)
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    os.makedirs(outdir, exist_ok=True)
+    fmt = kwargs.get('format', 'png')
+    tasks = list(zip(filespecs,
+                     get_output_paths(filespecs, outdir, format=fmt)))
+
+    results = []
+    t_start = time.perf_counter()
+    if num_workers == 0:
+        _init_worker(kwargs)
+        for filespec, outpath in tasks:
+            res = _render_file(filespec, outpath)
+            results.append(res)
+            if progress_cb is not None:
+                progress_cb(res[0], res[1], res[3])
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers,
+                                 initializer=_init_worker,
+                                 initargs=(kwargs,)) as executor:
+            futures = [executor.submit(_render_file, filespec, outpath)
+                       for filespec, outpath in tasks]
+            for future in as_completed(futures):
+                res = future.result()
+                results.append(res)
+                if progress_cb is not None:
+                    progress_cb(res[0], res[1], res[3])
+    elapsed = time.perf_counter() - t_start
+
+    errors = [(filespec, err) for filespec, outpath, times, err in results
+              if err is not None]
+    times = [times for filespec, outpath, times, err in results
+             if err is None]
+    stats = Bunch.Bunch(num_files=len(tasks), num_done=len(times),
+                        errors=errors, elapsed=elapsed,
+                        rate=len(times) / elapsed if elapsed > 0 else 0.0,
+                        latency=None, mean_load=0.0, mean_render=0.0,
+                        mean_write=0.0)
+    if len(times) > 0:
+        load = np.array([t.load for t in times])
+        rndr = np.array([t.render for t in times])
+        write = np.array([t.write for t in times])
+        total = load + rndr + write
+        p50, p90, p99 = np.percentile(total, [50, 90, 99])
+        stats.latency = Bunch.Bunch(mean=total.mean(), p50=p50, p90=p90,
+                                    p99=p99, max=total.max())
+        stats.setvals(mean_load=load.mean(), mean_render=rndr.mean(),
+                      mean_write=write.mean())
+    return stats
+
+
+def format_stats(stats):
+    """Return a text summary of the statistics from `render_files`."""
+    lines = ["rendered {} of {} files in {:.2f} sec ({:.1f} files/sec)".format(
+        stats.num_done, stats.num_files, stats.elapsed, stats.rate)]
+    if stats.latency is not None:
+        lat = stats.latency
+        lines.append(
+            "per file (msec): mean {:.1f} p50 {:.1f} p90 {:.1f} "
+            "p99 {:.1f} max {:.1f}".format(
+                lat.mean * 1000, lat.p50 * 1000, lat.p90 * 1000,
+                lat.p99 * 1000, lat.max * 1000))
+        lines.append(
+            "mean load {:.1f} render {:.1f} write {:.1f} msec".format(
+                stats.mean_load * 1000, stats.mean_render * 1000,
+                stats.mean_write * 1000))
+    for filespec, err in stats.errors:
+        lines.append("error: {}: {}".format(filespec, err))
+    return '\n'.join(lines)
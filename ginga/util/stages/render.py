@@ -403,17 +403,26 @@ class Scale(Stage):
         dst_x, dst_y = img.crdmap.to_data((img.x, img.y))
 
         ht, wd = data_np.shape[:2]
-        # TODO: think we need to apply scaling factors to wd/ht
-        # BEFORE we calculate merge clip
         a1, b1, a2, b2 = 0, 0, wd - 1, ht - 1
 
+        # the merge clip is calculated in pixels of the image, so if the
+        # image is scaled, express the extent of our coverage in those
+        if img.scale_x != 1.0 or img.scale_y != 1.0:
+            xmin = int(np.floor(dst_x + (xmin - dst_x) / img.scale_x))
+            ymin = int(np.floor(dst_y + (ymin - dst_y) / img.scale_y))
+            xmax = int(np.ceil(dst_x + (xmax - dst_x) / img.scale_x))
+            ymax = int(np.ceil(dst_y + (ymax - dst_y) / img.scale_y))
+
         # calculate the cutout that we can make and scale to merge
         # onto the final image--by only cutting out what is necessary
         # this speeds scaling greatly at zoomed in sizes
-        ((dst_x, dst_y), (a1, b1), (a2, b2)) = \
+        ((_dst_x, _dst_y), (a1, b1), (a2, b2)) = \
             trcalc.calc_image_merge_clip((xmin, ymin), (xmax, ymax),
                                          (dst_x, dst_y),
                                          (a1, b1), (a2, b2))
+        # back to data coordinates
+        dst_x += (_dst_x - dst_x) * img.scale_x
+        dst_y += (_dst_y - dst_y) * img.scale_y
 
         # is image completely off the screen?
         if (a2 - a1 <= 0) or (b2 - b1 <= 0):
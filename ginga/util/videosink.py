@@ -1,13 +1,33 @@
 # Uses Voki Codder's solution
 # http://vokicodder.blogspot.in/2011/02/numpy-arrays-to-video.html
+"""
+Sinks for writing a sequence of frames (numpy arrays) as a video.
 
+All sinks have the same interface: ``open()``, ``write(frame)`` for each
+frame and ``close()``.  Frames are ``(ht, wd)`` (grayscale, for
+``VideoSink`` with the default ``Y8`` format) or ``(ht, wd, 3)`` RGB
+arrays of ``uint8``.  Use `get_video_sink` to get the best sink available
+for a file.
+"""
+import os
 import subprocess  # nosec
+from shutil import which
+
+import numpy as np
+
+have_mencoder = which("mencoder") is not None
+have_ffmpeg = which("ffmpeg") is not None
+
+__all__ = ['VideoSink', 'FFmpegSink', 'FrameSequenceSink', 'RawSink',
+           'get_video_sink', 'have_mencoder', 'have_ffmpeg']
 
 
 class VideoSink:
+    """Writes frames to a video by piping them to ``mencoder``."""
 
     def __init__(self, size, filename="output", rate=2, byteorder="Y8"):
         self.size = size
+        self.filename = filename
         self.cmdstring = (
             'mencoder', '/dev/stdin', '-demuxer', 'rawvideo', '-rawvideo',
             'w=%i:h=%i' % size[::-1] + ":fps=%i:format=%s" % (rate, byteorder),
@@ -18,8 +38,150 @@ class VideoSink:
                                   shell=False)  # nosec
 
     def write(self, image):
-        assert image.shape == self.size
-        self.p.stdin.write(image.tostring())
+        assert image.shape[:2] == self.size
+        self.p.stdin.write(np.ascontiguousarray(image).tobytes())
 
     def close(self):
         self.p.stdin.close()
+        self.p.wait()
+
+
+class FFmpegSink:
+    """Writes RGB frames to a video by piping them to ``ffmpeg``.
+
+    The video format is determined by ffmpeg from the file extension.
+    """
+
+    def __init__(self, size, filename="output.mp4", rate=2):
+        self.size = size
+        self.filename = filename
+        ht, wd = size
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+               '-s', '%dx%d' % (wd, ht), '-r', str(rate), '-i', '-']
+        if not filename.lower().endswith('.gif'):
+            # most codecs need even dimensions for yuv420p, which is the
+            # pixel format most widely supported by players
+            cmd.extend(['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                        '-pix_fmt', 'yuv420p'])
+        cmd.append(filename)
+        self.cmdstring = tuple(cmd)
+        self.p = None
+
+    def open(self):
+        self.p = subprocess.Popen(self.cmdstring, stdin=subprocess.PIPE,
+                                  stderr=subprocess.PIPE,
+                                  shell=False)  # nosec
+
+    def write(self, image):
+        assert image.shape == self.size + (3,)
+        if self.p is None:
+            raise IOError("ffmpeg is not running for '{}'".format(
+                self.filename))
+        try:
+            self.p.stdin.write(np.ascontiguousarray(image).tobytes())
+        except BrokenPipeError:
+            self.close()
+
+    def close(self):
+        if self.p is None:
+            return
+        p, self.p = self.p, None
+        p.stdin.close()
+        err = p.stderr.read()
+        p.wait()
+        if p.returncode != 0:
+            raise IOError("ffmpeg failed writing '{}': {}".format(
+                self.filename, err.decode(errors='replace').strip()))
+
+
+class FrameSequenceSink:
+    """Writes frames as a sequence of image files.
+
+    If `filename` is ``movie.png``, the frames are written to
+    ``movie_00000.png``, ``movie_00001.png``, etc.
+    """
+
+    def __init__(self, size, filename="output.png", rate=None):
+        from PIL import Image
+        self._image = Image
+
+        self.size = size
+        pfx, ext = os.path.splitext(filename)
+        if len(ext) == 0:
+            ext = '.png'
+        self.template = pfx + '_%05d' + ext
+        self.count = 0
+
+    def open(self):
+        self.count = 0
+
+    def write(self, image):
+        assert image.shape[:2] == self.size
+        img = self._image.fromarray(np.ascontiguousarray(image))
+        img.save(self.template % (self.count))
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class RawSink:
+    """Writes frames, concatenated, as raw bytes to a file.
+
+    For RGB frames this is the ``rgb24`` raw video format, which can be
+    encoded later, e.g. by ffmpeg.
+    """
+
+    def __init__(self, size, filename="output.raw", rate=None):
+        self.size = size
+        self.filename = filename
+        self.out_f = None
+
+    def open(self):
+        self.out_f = open(self.filename, 'wb')
+
+    def write(self, image):
+        assert image.shape[:2] == self.size
+        self.out_f.write(np.ascontiguousarray(image).tobytes())
+
+    def close(self):
+        if self.out_f is not None:
+            self.out_f.close()
+            self.out_f = None
+
+
+def get_video_sink(size, filename, rate=2):
+    """Get a sink for writing RGB frames to `filename`.
+
+    Image file extensions (e.g. ``.png``) give a `FrameSequenceSink`, and
+    ``.raw`` or ``.rgb`` a `RawSink`.  Anything else is encoded as a video
+    by ffmpeg or mencoder, if one is installed; otherwise we fall back to
+    writing a PNG sequence.
+
+    Parameters
+    ----------
+    size : tuple of int
+        ``(ht, wd)`` of the frames
+
+    filename : str
+        Path of the output file
+
+    rate : int
+        Frames per second, for videos
+
+    Returns
+    -------
+    sink : a sink object
+        Not yet opened
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp'):
+        return FrameSequenceSink(size, filename)
+    if ext in ('.raw', '.rgb'):
+        return RawSink(size, filename)
+    if have_ffmpeg:
+        return FFmpegSink(size, filename, rate=rate)
+    if have_mencoder:
+        return VideoSink(size, filename, rate=rate, byteorder='rgb24')
+    return FrameSequenceSink(size, os.path.splitext(filename)[0] + '.png')
@@ -0,0 +1,360 @@
+#
+# watcher.py -- watch a folder and load new files as they are completed
+#
+# This is open-source software licensed under a BSD license.
+# Please see the file LICENSE.txt for details.
+#
+"""
+Watch a folder for new files and load them once they are complete.
+
+`FolderWatcher` takes file system events (from the ``watchdog`` package,
+or from whoever calls `FolderWatcher.notify`) and
+
+* merges the events for each file, so that a file written in many chunks
+  is loaded once,
+* waits until each file is complete: either it was closed after being
+  written, or its size and modification time did not change for
+  ``settle_time`` seconds,
+* loads the completed files with a bounded pool of worker threads, and
+* delivers the loaded files (the ``'loaded'`` callback) in the order they
+  were completed, regardless of which load finished first.
+
+`FolderWatcher.get_stats` reports the number of files at each stage and
+the latency from the first event for a file to its delivery.
+
+Example::
+
+    from ginga.util import loader, watcher
+
+    fw = watcher.FolderWatcher(logger, loader.load_data, num_workers=4)
+    fw.add_callback('loaded', lambda fw, path, data_obj: print(path))
+    fw.add_callback('failed', lambda fw, path, errmsg: print(errmsg))
+    fw.start()
+    fw.watch('/data/incoming')
+    ...
+    fw.stop()
+
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ginga.misc import Bunch, Callback
+
+# pip install watchdog
+have_watchdog = False
+try:
+    from watchdog.observers import Observer
+    from watchdog.observers.polling import PollingObserver
+    from watchdog.events import FileSystemEventHandler
+    have_watchdog = True
+except ImportError:
+    pass
+
+__all__ = ['FolderWatcher']
+
+
+class FolderWatcher(Callback.Callbacks):
+    """Loads the files appearing in a folder once they are complete.
+
+    Callbacks
+    ---------
+    ``'loaded'`` is called as ``cb(watcher, filepath, result)`` and
+    ``'failed'`` as ``cb(watcher, filepath, errmsg)`` for each file, in
+    the order the files were completed, from a worker thread.
+
+    Parameters
+    ----------
+    logger : :py:class:`~logging.Logger`
+        Logger for tracing and debugging.
+
+    load_fn : callable
+        Called as ``load_fn(filepath)`` in a worker thread to load a file;
+        its return value is passed to the ``'loaded'`` callbacks
+
+    num_workers : int
+        Number of worker threads loading files
+
+    max_pending : int or None
+        Maximum number of files being loaded or waiting to be delivered
+        (defaults to twice `num_workers`); this bounds the memory used
+
+    settle_time : float
+        Seconds without a change in size or modification time after which
+        a file that was not seen to be closed is taken to be complete
+
+    poll_interval : float
+        Seconds between checks of the files not yet complete
+
+    use_polling : bool
+        If True, watch folders by polling rather than with the notification
+        mechanism of the operating system (e.g. for network drives)
+
+    check_fn : callable or None
+        If given, called as ``check_fn(filepath)`` for each new file; the
+        file is ignored unless it returns True
+    """
+
+    def __init__(self, logger, load_fn, num_workers=4, max_pending=None,
+                 settle_time=1.0, poll_interval=0.1, use_polling=False,
+                 check_fn=None):
+        super().__init__()
+
+        self.logger = logger
+        self.load_fn = load_fn
+        self.num_workers = max(1, num_workers)
+        if max_pending is None:
+            max_pending = 2 * self.num_workers
+        self.max_pending = max(1, max_pending)
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.use_polling = use_polling
+        self.check_fn = check_fn
+        self.paused = False
+
+        self.lock = threading.RLock()
+        self.ev_quit = threading.Event()
+        self.ev_quit.set()
+        self.ev_wake = threading.Event()
+        # path -> Bunch of files not yet complete
+        self._settling = {}
+        # (path, first event time) of completed files waiting for a worker
+        self._queue = deque()
+        # seq -> (path, first event time, ok, result) of finished loads
+        self._done = {}
+        self._next_seq = 0
+        self._deliver_seq = 0
+        self._num_loading = 0
+        # path -> (size, mtime) of the files already taken, and
+        # (expiry time, path, (size, mtime)) of those already delivered
+        self._taken = {}
+        self._forget = deque()
+        # latencies of the most recent deliveries
+        self._latency = deque([], 1000)
+        self._num_loaded = 0
+        self._num_failed = 0
+        self._deliver_lock = threading.Lock()
+
+        self.executor = None
+        self.thread = None
+        self.observer = None
+        self._watches = {}
+
+        for name in ('loaded', 'failed'):
+            self.enable_callback(name)
+
+    def start(self):
+        """Start the worker threads and the watching of folders."""
+        if not self.ev_quit.is_set():
+            return
+        self.ev_quit.clear()
+        self.executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        self.thread = threading.Thread(target=self._check_loop,
+                                       name='FolderWatcher', daemon=True)
+        self.thread.start()
+        if have_watchdog:
+            self.observer = PollingObserver() if self.use_polling else Observer()
+            self.observer.start()
+
+    def stop(self):
+        """Stop watching; files not yet loaded are forgotten."""
+        with self.lock:
+            if self.ev_quit.is_set():
+                return
+            self.ev_quit.set()
+        self.ev_wake.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+        self._watches = {}
+        self.thread.join()
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            self._settling.clear()
+            self._queue.clear()
+            self._taken.clear()
+            self._forget.clear()
+
+    def watch(self, folder):
+        """Start watching `folder` (not recursively) for new files."""
+        if self.observer is None:
+            raise ValueError("Install 'watchdog' and start the watcher "
+                             "to watch folders")
+        if folder in self._watches:
+            return
+        handler = FileSystemEventHandler()
+        handler.on_created = lambda event: self._event_cb(event, False)
+        handler.on_modified = lambda event: self._event_cb(event, False)
+        handler.on_closed = lambda event: self._event_cb(event, True)
+        handler.on_moved = lambda event: self._moved_cb(event, folder)
+        self._watches[folder] = self.observer.schedule(handler, folder,
+                                                       recursive=False)
+
+    def unwatch(self, folder):
+        """Stop watching `folder`."""
+        watch = self._watches.pop(folder, None)
+        if watch is not None and self.observer is not None:
+            self.observer.unschedule(watch)
+
+    def _event_cb(self, event, closed):
+        if not event.is_directory:
+            self.notify(event.src_path, closed=closed)
+
+    def _moved_cb(self, event, folder):
+        # a file written elsewhere and moved in is complete
+        if (not event.is_directory and
+                os.path.dirname(os.path.abspath(event.dest_path)) ==
+                os.path.abspath(folder)):
+            self.notify(event.dest_path, closed=True)
+
+    def notify(self, filepath, closed=False):
+        """Tell the watcher that `filepath` was created or written to
+        (`closed` False), or closed after being written to (`closed`
+        True).  Ignored while the watcher is paused."""
+        if self.paused or self.ev_quit.is_set():
+            return
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            # file was removed again
+            return
+        with self.lock:
+            if self._taken.get(filepath, None) == (st.st_size, st.st_mtime):
+                # already loaded this version of the file
+                return
+            is_new = filepath not in self._settling
+        if (is_new and self.check_fn is not None and
+                not self.check_fn(filepath)):
+            return
+        now = time.time()
+        with self.lock:
+            info = self._settling.get(filepath, None)
+            if info is None:
+                info = Bunch.Bunch(path=filepath, first=now, changed=now,
+                                   size=st.st_size, mtime=st.st_mtime,
+                                   closed=False)
+                self._settling[filepath] = info
+            elif (st.st_size, st.st_mtime) != (info.size, info.mtime):
+                info.setvals(changed=now, size=st.st_size,
+                             mtime=st.st_mtime)
+            info.closed = closed
+        if closed:
+            self.ev_wake.set()
+
+    def _check_loop(self):
+        while not self.ev_quit.is_set():
+            self.ev_wake.wait(self.poll_interval)
+            self.ev_wake.clear()
+            try:
+                self.check_files()
+            except Exception as e:
+                self.logger.error("Error checking files: {}".format(e),
+                                  exc_info=True)
+
+    def check_files(self):
+        """Check the files not yet complete, and start loading those
+        completed.  Called periodically by the watcher's thread."""
+        now = time.time()
+        with self.lock:
+            # forget the files delivered a while ago; events for them
+            # arriving later than this are taken to be new versions
+            while len(self._forget) > 0 and self._forget[0][0] <= now:
+                _, path, key = self._forget.popleft()
+                if self._taken.get(path, None) == key:
+                    del self._taken[path]
+            for path, info in list(self._settling.items()):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    del self._settling[path]
+                    continue
+                if (st.st_size, st.st_mtime) != (info.size, info.mtime):
+                    # still being written
+                    info.setvals(changed=now, size=st.st_size,
+                                 mtime=st.st_mtime, closed=False)
+                    continue
+                if info.closed or now - info.changed >= self.settle_time:
+                    del self._settling[path]
+                    self._taken[path] = (info.size, info.mtime)
+                    self._queue.append((path, info.first,
+                                        (info.size, info.mtime)))
+            self._submit()
+
+    def _submit(self):
+        # start loads, keeping at most max_pending files in flight
+        if self.ev_quit.is_set():
+            return
+        while (len(self._queue) > 0 and
+               self._num_loading + len(self._done) < self.max_pending):
+            path, t_first, key = self._queue.popleft()
+            seq = self._next_seq
+            self._next_seq += 1
+            self._num_loading += 1
+            self.executor.submit(self._load, seq, path, t_first, key)
+
+    def _load(self, seq, path, t_first, key):
+        try:
+            res = (True, self.load_fn(path))
+        except Exception as e:
+            self.logger.error("Error loading '{}': {}".format(path, e))
+            res = (False, str(e))
+        with self.lock:
+            self._num_loading -= 1
+            self._done[seq] = (path, t_first, key) + res
+        self._deliver()
+
+    def _deliver(self):
+        # deliver finished loads in sequence; the delivery lock keeps the
+        # callbacks in order when loads finish in several threads at once
+        with self._deliver_lock:
+            while True:
+                with self.lock:
+                    item = self._done.pop(self._deliver_seq, None)
+                    if item is None:
+                        break
+                    self._deliver_seq += 1
+                    path, t_first, key, ok, result = item
+                    self._forget.append((time.time() + self.settle_time,
+                                         path, key))
+                if ok:
+                    self._num_loaded += 1
+                    self.make_callback('loaded', path, result)
+                else:
+                    self._num_failed += 1
+                    self.make_callback('failed', path, result)
+                self._latency.append(time.time() - t_first)
+        with self.lock:
+            self._submit()
+
+    def get_stats(self):
+        """Return the number of files at each stage and the latencies.
+
+        Returns
+        -------
+        stats : `~ginga.misc.Bunch.Bunch`
+            With attributes ``settling`` (files not yet complete),
+            ``queued`` (waiting for a worker), ``loading``, ``waiting``
+            (loaded, waiting for an earlier file to be delivered),
+            ``loaded`` and ``failed`` (delivered so far), and
+            ``latency_p50`` and ``latency_max``, the time in sec from the
+            first event for a file to its delivery, over recent files
+            (None if there are none)
+        """
+        with self.lock:
+            latency = np.array(self._latency)
+            stats = Bunch.Bunch(settling=len(self._settling),
+                                queued=len(self._queue),
+                                loading=self._num_loading,
+                                waiting=len(self._done),
+                                loaded=self._num_loaded,
+                                failed=self._num_failed,
+                                latency_p50=None, latency_max=None)
+        if len(latency) > 0:
+            stats.setvals(latency_p50=np.median(latency),
+                          latency_max=latency.max())
+        return stats
@@ -158,26 +158,41 @@ class VulkanReplayEngine:
     Usage: :meth:`set_colormap`, then :meth:`begin`, :meth:`record_image`
     and/or :meth:`record_shapes`, then :meth:`end`, then
     :meth:`get_surface_as_array`.
+
+    Frames are double buffered: each of two slots has its own render target
+    and readback buffer.  :meth:`end` submits the frame (drawing and the
+    copy to the readback buffer) without waiting and returns a frame
+    number; the next frame can be recorded and submitted while the GPU is
+    still working on it, and :meth:`get_surface_as_array` waits only for
+    the frame it reads.
     """
 
+    num_slots = 2
+
     def __init__(self, ctx, width, height):
         if not have_vulkan:
             raise VulkanError("the 'vulkan' Python package is not installed")
         self.ctx = ctx
         self.width = width
         self.height = height
-        self.target = OffscreenColorTarget(ctx, width, height)
+        self.targets = [OffscreenColorTarget(ctx, width, height)
+                        for i in range(self.num_slots)]
+        self.target = self.targets[0]
         self.shape = ShapePipeline(ctx, self.target)
         self.image = MultiImagePipeline(ctx, self.target)
         self.glyph = GlyphPipeline(ctx, self.target)
         self._make_render_pass()
         self._cmd = None
         self._push = None
+        # number of frames submitted, and the serial of the submission of
+        # the last frame in each slot
+        self.frame_count = 0
+        self._slot_serial = [0] * self.num_slots
 
     def _make_render_pass(self):
-        ctx, target = self.ctx, self.target
+        ctx = self.ctx
         att = vk.VkAttachmentDescription(
-            format=target.fmt, samples=vk.VK_SAMPLE_COUNT_1_BIT,
+            format=self.targets[0].fmt, samples=vk.VK_SAMPLE_COUNT_1_BIT,
             loadOp=vk.VK_ATTACHMENT_LOAD_OP_CLEAR,
             storeOp=vk.VK_ATTACHMENT_STORE_OP_STORE,
             stencilLoadOp=vk.VK_ATTACHMENT_LOAD_OP_DONT_CARE,
@@ -200,11 +215,12 @@ class VulkanReplayEngine:
                 sType=_s('RENDER_PASS_CREATE_INFO'), attachmentCount=1,
                 pAttachments=[att], subpassCount=1, pSubpasses=[subpass],
                 dependencyCount=1, pDependencies=[dep]), None)
-        self.framebuffer = vk.vkCreateFramebuffer(
+        self.framebuffers = [vk.vkCreateFramebuffer(
             ctx.device, vk.VkFramebufferCreateInfo(
                 sType=_s('FRAMEBUFFER_CREATE_INFO'), renderPass=self.render_pass,
                 attachmentCount=1, pAttachments=[target.view],
                 width=self.width, height=self.height, layers=1), None)
+            for target in self.targets]
 
     def set_colormap(self, cmap_key, rgba_u8):
         self.image.set_colormap(cmap_key, rgba_u8)
@@ -215,10 +231,14 @@ class VulkanReplayEngine:
     def begin(self, bg_color=(0.0, 0.0, 0.0, 1.0), push=None):
         self._push = (push if push is not None
                       else ortho_2d_push(self.width, self.height))
+        slot = self.frame_count % self.num_slots
+        # the last frame in this slot must be done before its target and
+        # readback buffer are reused
+        self.ctx.wait_serial(self._slot_serial[slot])
         cmd = self.ctx.begin_commands()
         vk.vkCmdBeginRenderPass(cmd, vk.VkRenderPassBeginInfo(
             sType=_s('RENDER_PASS_BEGIN_INFO'), renderPass=self.render_pass,
-            framebuffer=self.framebuffer, renderArea=vk.VkRect2D(
+            framebuffer=self.framebuffers[slot], renderArea=vk.VkRect2D(
                 offset=vk.VkOffset2D(0, 0),
                 extent=vk.VkExtent2D(self.width, self.height)),
             clearValueCount=1, pClearValues=[vk.VkClearValue(
@@ -252,16 +272,40 @@ class VulkanReplayEngine:
             self.glyph.record(self._cmd, rgba, quad_pos, quad_uv, p)
 
     def end(self):
+        """Submit the frame, including the copy to its readback buffer,
+        without waiting.  Returns the frame number, for
+        :meth:`get_surface_as_array`."""
+        slot = self.frame_count % self.num_slots
+        target = self.targets[slot]
         vk.vkCmdEndRenderPass(self._cmd)
-        self.ctx.submit_wait(self._cmd)
-        self.target.layout = vk.VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL
+        target.layout = vk.VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL
+        target.record_readback(self._cmd)
+        self._slot_serial[slot] = self.ctx.submit(self._cmd)
+        # scratch resources are freed when the frame is done
         self.image.free_scratch()
         self.shape.free_scratch()
         self.glyph.free_scratch()
         self._cmd = None
-
-    def get_surface_as_array(self, order='RGBA'):
-        arr = self.target.read_rgba()
+        self.frame_count += 1
+        return self.frame_count - 1
+
+    def is_frame_done(self, frame):
+        """True if the frame ``frame`` can be read without waiting."""
+        slot = frame % self.num_slots
+        return self.ctx.is_complete(self._slot_serial[slot])
+
+    def get_surface_as_array(self, order='RGBA', frame=None):
+        """Return frame ``frame`` (the last one submitted, by default),
+        waiting for it if necessary.  Only the last :attr:`num_slots` frames
+        can be read."""
+        if frame is None:
+            frame = self.frame_count - 1
+        if frame < 0 or not (self.frame_count - self.num_slots <= frame <
+                             self.frame_count):
+            raise VulkanError("frame {} is not available".format(frame))
+        slot = frame % self.num_slots
+        self.ctx.wait_serial(self._slot_serial[slot])
+        arr = self.targets[slot].read_mapped()
         order = order.upper()
         if order == 'RGBA':
             return arr
@@ -270,12 +314,15 @@ class VulkanReplayEngine:
 
     def destroy(self):
         d = self.ctx.device
-        vk.vkDestroyFramebuffer(d, self.framebuffer, None)
+        self.ctx.wait_idle()
+        for fb in self.framebuffers:
+            vk.vkDestroyFramebuffer(d, fb, None)
         vk.vkDestroyRenderPass(d, self.render_pass, None)
         self.glyph.destroy()
         self.image.destroy()
         self.shape.destroy()
-        self.target.destroy()
+        for target in self.targets:
+            target.destroy()
 
 
 def _norm_alpha(a_channel, dtype):
@@ -843,6 +890,21 @@ class CanvasRendererGPU(vec.VectorRenderMixin, render.StandardPipelineRenderer):
     # ---- GPU paint / readback --------------------------------------------
 
     def get_surface_as_array(self, order=None):
+        """Render a frame and return it as an array.
+
+        This is synchronous: it submits the frame and waits for its
+        readback before returning.  The viewer does not overlap the
+        readback of one frame with the rendering of the next.
+        """
+        return self.read_frame(self.render_frame(), order=order)
+
+    def render_frame(self):
+        """Replay the render list and submit the frame to the GPU without
+        waiting for it.  Returns a frame number for :meth:`read_frame`.
+
+        The viewer does not use this directly (see
+        :meth:`get_surface_as_array`).
+        """
         wd, ht = self.dims[:2]
         self._ensure_engine(wd, ht)
         if self._engine is None:
@@ -874,7 +936,8 @@ class CanvasRendererGPU(vec.VectorRenderMixin, render.StandardPipelineRenderer):
                 self._engine.set_colormap(ckey, self._make_cmap_rgba(im.rgbmap))
                 self._cmap_dirty.discard(ckey)
             # upload a texture only when its data changed (or the engine was
-            # reallocated); zoom/pan reuse the cached texture
+            # reallocated); zoom/pan reuse the cached texture, and only the
+            # changed region of a texture is transferred
             if (im.image_id in self._img_dirty or
                     not self._engine.has_image(im.image_id)):
                 self._engine.upload_image(im.image_id, im.data, im.image_type)
@@ -890,9 +953,14 @@ class CanvasRendererGPU(vec.VectorRenderMixin, render.StandardPipelineRenderer):
             ortho = ortho_2d_push(wd, ht)
             self._engine.record_shapes(self._shapes_screen, push=ortho)
             self._engine.record_texts(self._texts_screen, push=ortho)
-        self._engine.end()
+        return self._engine.end()
 
-        arr = self._engine.get_surface_as_array('RGBA')
+    def read_frame(self, frame, order=None):
+        """Return frame ``frame`` from :meth:`render_frame` as an array,
+        waiting for the GPU to finish it if necessary."""
+        if self._engine is None:
+            raise render.RenderError("no Vulkan surface (zero-size window)")
+        arr = self._engine.get_surface_as_array('RGBA', frame=frame)
         dst = 'RGBA' if order is None else order.upper()
         if dst == 'RGBA':
             return arr
@@ -12,6 +12,8 @@ Provides :class:`ShapePipeline` (solid-colour polygons, lines and paths),
 in-shader like the OpenGL image path) and :class:`GlyphPipeline` (RGBA text
 tiles).  :class:`~ginga.vulkan.CanvasRenderVk.CanvasRendererGPU` drives these.
 """
+import hashlib
+
 import numpy as np
 
 from .vkcore import have_vulkan, _s, VulkanError
@@ -27,6 +29,49 @@ if have_vulkan:
     LINE_LIST = vk.VK_PRIMITIVE_TOPOLOGY_LINE_LIST
 
 
+def _free_buffers(ctx, buffers):
+    for vbuf, vmem in buffers:
+        vk.vkDestroyBuffer(ctx.device, vbuf, None)
+        vk.vkFreeMemory(ctx.device, vmem, None)
+
+
+def _tile_checksums(arr, tile_size):
+    """Return an array of checksums of the ``tile_size`` square tiles of
+    the 2D (or 2D + channels) array ``arr``."""
+    h, w = arr.shape[:2]
+    nty, ntx = -(-h // tile_size), -(-w // tile_size)
+    sums = np.empty((nty, ntx), dtype=np.uint64)
+    for i in range(nty):
+        band = arr[i * tile_size:(i + 1) * tile_size]
+        for j in range(ntx):
+            tile = np.ascontiguousarray(
+                band[:, j * tile_size:(j + 1) * tile_size])
+            digest = hashlib.blake2b(tile, digest_size=8).digest()
+            sums[i, j] = int.from_bytes(digest, 'little')
+    return sums
+
+
+def _changed_bbox(old_sums, new_sums, tile_size, shape):
+    """Return the bounding box (x1, y1, x2, y2) in texels of the tiles whose
+    checksums differ, or None if none do."""
+    changed = old_sums != new_sums
+    rows = np.flatnonzero(np.any(changed, axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(np.any(changed, axis=0))
+    h, w = shape[:2]
+    y1, y2 = rows[0] * tile_size, min((rows[-1] + 1) * tile_size, h)
+    x1, x2 = cols[0] * tile_size, min((cols[-1] + 1) * tile_size, w)
+    return int(x1), int(y1), int(x2), int(y2)
+
+
+def _free_textures(ctx, textures):
+    for img, mem, view in textures:
+        vk.vkDestroyImageView(ctx.device, view, None)
+        vk.vkDestroyImage(ctx.device, img, None)
+        vk.vkFreeMemory(ctx.device, mem, None)
+
+
 def _verts3(pts):
     """Return an ``(N, 3)`` float32 array from ``(N, 2)`` or ``(N, 3)`` input
     (2D points get z=0)."""
@@ -260,9 +305,8 @@ class ShapePipeline:
             vk.vkCmdDraw(cmd, len(v), 1, 0, 0)
 
     def free_scratch(self):
-        for vbuf, vmem in self._scratch:
-            vk.vkDestroyBuffer(self.ctx.device, vbuf, None)
-            vk.vkFreeMemory(self.ctx.device, vmem, None)
+        """Free the vertex buffers once the frame using them is done."""
+        self.ctx.release_later(_free_buffers, self.ctx, self._scratch)
         self._scratch = []
 
     def render(self, shapes, clear_color=(0.0, 0.0, 0.0, 1.0),
@@ -303,8 +347,10 @@ class ShapePipeline:
 class GlyphPipeline:
     """Blits many pre-colored RGBA tiles (e.g. rasterized text) in a single
     render pass, each with its own texture + descriptor set allocated per
-    draw (an arbitrary number of tiles per frame); the descriptor pool is
-    reset and the scratch textures freed by :meth:`free_scratch`.
+    draw (an arbitrary number of tiles per frame); the scratch textures are
+    freed by :meth:`free_scratch` once the frame is done.  Frames alternate
+    between two descriptor pools, so that a frame can be recorded while the
+    previous one is still in flight.
 
     Uses ``image.vert`` + ``blit.frag`` (RGBA sampler, alpha blended), a
     linear sampler for smooth text, and the shared view/projection push
@@ -319,6 +365,9 @@ class GlyphPipeline:
         self._scratch_tex = []      # (image, mem, view) per tile
         self._scratch_buf = []      # (buffer, mem) vertex buffers
         self._nsets = 0
+        # serial of the last frame that used each pool
+        self._pool_serial = [0, 0]
+        self._pool_idx = 0
 
         att = vk.VkAttachmentDescription(
             format=target.fmt, samples=vk.VK_SAMPLE_COUNT_1_BIT,
@@ -359,12 +408,13 @@ class GlyphPipeline:
                     stageFlags=vk.VK_SHADER_STAGE_FRAGMENT_BIT,
                     descriptorType=vk.VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER
                 )]), None)
-        self.pool = vk.vkCreateDescriptorPool(
+        self.pools = [vk.vkCreateDescriptorPool(
             ctx.device, vk.VkDescriptorPoolCreateInfo(
                 sType=_s('DESCRIPTOR_POOL_CREATE_INFO'), maxSets=max_tiles,
                 poolSizeCount=1, pPoolSizes=[vk.VkDescriptorPoolSize(
                     type=vk.VK_DESCRIPTOR_TYPE_COMBINED_IMAGE_SAMPLER,
                     descriptorCount=max_tiles)]), None)
+            for i in range(2)]
         self.layout = vk.vkCreatePipelineLayout(
             ctx.device, vk.VkPipelineLayoutCreateInfo(
                 sType=_s('PIPELINE_LAYOUT_CREATE_INFO'), setLayoutCount=1,
@@ -390,9 +440,15 @@ class GlyphPipeline:
         img, mem, view = ctx.create_texture_2d(
             w, h, vk.VK_FORMAT_R8G8B8A8_UNORM, arr)
         self._scratch_tex.append((img, mem, view))
+        pool = self.pools[self._pool_idx]
+        if self._nsets == 0:
+            # first tile of the frame: the sets in this pool were last used
+            # two frames ago; make sure that frame is done before reusing them
+            ctx.wait_serial(self._pool_serial[self._pool_idx])
+            vk.vkResetDescriptorPool(ctx.device, pool, 0)
         dset = vk.vkAllocateDescriptorSets(
             ctx.device, vk.VkDescriptorSetAllocateInfo(
-                sType=_s('DESCRIPTOR_SET_ALLOCATE_INFO'), descriptorPool=self.pool,
+                sType=_s('DESCRIPTOR_SET_ALLOCATE_INFO'), descriptorPool=pool,
                 descriptorSetCount=1, pSetLayouts=[self.dsl]))[0]
         self._nsets += 1
         vk.vkUpdateDescriptorSets(ctx.device, 1, [vk.VkWriteDescriptorSet(
@@ -424,28 +480,28 @@ class GlyphPipeline:
         vk.vkCmdDraw(cmd, len(verts), 1, 0, 0)
 
     def free_scratch(self):
-        d = self.ctx.device
-        for img, mem, view in self._scratch_tex:
-            vk.vkDestroyImageView(d, view, None)
-            vk.vkDestroyImage(d, img, None)
-            vk.vkFreeMemory(d, mem, None)
-        for vbuf, vmem in self._scratch_buf:
-            vk.vkDestroyBuffer(d, vbuf, None)
-            vk.vkFreeMemory(d, vmem, None)
+        """Free this frame's tiles once it is done (call after submitting
+        it); the next frame allocates from the other descriptor pool."""
+        ctx = self.ctx
+        ctx.release_later(_free_textures, ctx, self._scratch_tex)
+        ctx.release_later(_free_buffers, ctx, self._scratch_buf)
         self._scratch_tex = []
         self._scratch_buf = []
         if self._nsets > 0:
-            vk.vkResetDescriptorPool(d, self.pool, 0)
+            self._pool_serial[self._pool_idx] = ctx.submit_serial
+            self._pool_idx = 1 - self._pool_idx
             self._nsets = 0
 
     def destroy(self):
         d = self.ctx.device
         self.free_scratch()
+        self.ctx.wait_idle()
         vk.vkDestroyPipeline(d, self.pipeline, None)
         vk.vkDestroyShaderModule(d, self.vmod, None)
         vk.vkDestroyShaderModule(d, self.fmod, None)
         vk.vkDestroyPipelineLayout(d, self.layout, None)
-        vk.vkDestroyDescriptorPool(d, self.pool, None)
+        for pool in self.pools:
+            vk.vkDestroyDescriptorPool(d, pool, None)
         vk.vkDestroyDescriptorSetLayout(d, self.dsl, None)
         vk.vkDestroySampler(d, self.sampler, None)
         vk.vkDestroyFramebuffer(d, self.framebuffer, None)
@@ -469,6 +525,9 @@ class MultiImagePipeline:
     interpolation (nearest/bilinear) is packed into bit 4 of image_type.
     """
 
+    # size (texels) of the tiles compared to find what changed in a re-upload
+    tile_size = 128
+
     def __init__(self, ctx, target, max_images=64):
         self.ctx = ctx
         self.target = target
@@ -556,6 +615,8 @@ class MultiImagePipeline:
         old = self._cmaps.get(cmap_key)
         gen = 0 if old is None else old['gen'] + 1
         if old is not None:
+            # the old buffer may be in use by a frame in flight
+            self.ctx.wait_idle()
             self._destroy_cmap(cmap_key)
         buf, mem = self.ctx.create_buffer(
             cm.nbytes, vk.VK_BUFFER_USAGE_UNIFORM_TEXEL_BUFFER_BIT,
@@ -576,7 +637,13 @@ class MultiImagePipeline:
         """(Re)create the texture for ``image_id``.  ``data`` is a 2D float32
         array (image_type 0, mono), an ``(H, W, 4)`` uint8 array (1, native
         RGBA) or an ``(H, W, 4)`` float32 array (2, RGB normimage -- raw
-        values, cut/colormapped per channel in the shader)."""
+        values, cut/colormapped per channel in the shader).
+
+        If the texture exists with the same size and format, only the
+        bounding box of the tiles (``tile_size`` texels square) that changed
+        since the last upload is transferred (nothing, if none did).  Only a
+        checksum of each tile is kept to find them, not a copy of the data.
+        """
         ctx = self.ctx
         if image_type == 1:
             arr = np.ascontiguousarray(data, dtype=np.uint8)
@@ -588,8 +655,15 @@ class MultiImagePipeline:
             arr = np.ascontiguousarray(data, dtype=np.float32)
             fmt = vk.VK_FORMAT_R32_SFLOAT
         h, w = arr.shape[:2]
-        img, mem, view = ctx.create_texture_2d(w, h, fmt, arr)
         ent = self._images.get(image_id)
+        if ent is not None and ent['view'] is not None:
+            if ent['shape'] == arr.shape and ent['dtype'] == arr.dtype:
+                self._update_image(ent, arr)
+                return
+            # the old texture and descriptor set may be in use by a frame
+            # in flight
+            ctx.wait_idle()
+        img, mem, view = ctx.create_texture_2d(w, h, fmt, arr)
         if ent is None:
             if len(self._images) >= self.max_images:
                 # out of descriptor sets; drop the texture and skip
@@ -603,11 +677,15 @@ class MultiImagePipeline:
                     descriptorPool=self.pool, descriptorSetCount=1,
                     pSetLayouts=[self.dsl]))[0]
             ent = dict(dset=dset, image=None, mem=None, view=None,
+                       shape=None, dtype=None, sums=None,
                        cmap_key=None, cmap_gen=-1)
             self._images[image_id] = ent
         else:
             self._destroy_tex(ent)
         ent['image'], ent['mem'], ent['view'] = img, mem, view
+        # keep tile checksums, to find what changed in the next upload
+        ent['shape'], ent['dtype'] = arr.shape, arr.dtype
+        ent['sums'] = _tile_checksums(arr, self.tile_size)
         vk.vkUpdateDescriptorSets(ctx.device, 1, [vk.VkWriteDescriptorSet(
             sType=_s('WRITE_DESCRIPTOR_SET'), dstSet=ent['dset'], dstBinding=0,
             descriptorCount=1,
@@ -617,6 +695,18 @@ class MultiImagePipeline:
                 imageLayout=vk.VK_IMAGE_LAYOUT_SHADER_READ_ONLY_OPTIMAL)])],
             0, None)
 
+    def _update_image(self, ent, arr):
+        # partial update of the texture with the changed tiles of arr
+        sums = _tile_checksums(arr, self.tile_size)
+        bbox = _changed_bbox(ent['sums'], sums, self.tile_size, arr.shape)
+        ent['sums'] = sums
+        if bbox is None:
+            return
+        x1, y1, x2, y2 = bbox
+        sub = np.ascontiguousarray(arr[y1:y2, x1:x2])
+        self.ctx.update_texture_2d(ent['image'], x1, y1, x2 - x1, y2 - y1,
+                                   sub)
+
     def record(self, cmd, image_id, quad_pos, quad_uv, loval, hival,
                image_type, obj_alpha, cmap_key, interp, mats_bytes):
         """Record one image draw (image must have been uploaded, and its
@@ -629,6 +719,9 @@ class MultiImagePipeline:
         cm = self._cmaps.get(cmap_key)
         if cm is not None and (ent['cmap_key'] != cmap_key or
                                ent['cmap_gen'] != cm['gen']):
+            if ent['cmap_key'] is not None:
+                # the descriptor set may be in use by a frame in flight
+                ctx.wait_idle()
             vk.vkUpdateDescriptorSets(ctx.device, 1, [vk.VkWriteDescriptorSet(
                 sType=_s('WRITE_DESCRIPTOR_SET'), dstSet=ent['dset'],
                 dstBinding=1, descriptorCount=1,
@@ -665,9 +758,8 @@ class MultiImagePipeline:
         vk.vkCmdDraw(cmd, len(verts), 1, 0, 0)
 
     def free_scratch(self):
-        for vbuf, vmem in self._scratch:
-            vk.vkDestroyBuffer(self.ctx.device, vbuf, None)
-            vk.vkFreeMemory(self.ctx.device, vmem, None)
+        """Free the vertex buffers once the frame using them is done."""
+        self.ctx.release_later(_free_buffers, self.ctx, self._scratch)
         self._scratch = []
 
     def _destroy_tex(self, ent):
@@ -677,6 +769,7 @@ class MultiImagePipeline:
             vk.vkDestroyImage(d, ent['image'], None)
             vk.vkFreeMemory(d, ent['mem'], None)
             ent['image'] = ent['mem'] = ent['view'] = None
+            ent['shape'] = ent['dtype'] = ent['sums'] = None
 
     def _destroy_cmap(self, cmap_key):
         d = self.ctx.device
@@ -688,6 +781,7 @@ class MultiImagePipeline:
     def destroy(self):
         d = self.ctx.device
         self.free_scratch()
+        self.ctx.wait_idle()
         for ent in self._images.values():
             self._destroy_tex(ent)
         self._images = {}
@@ -10,7 +10,15 @@ A minimal device/queue :class:`VulkanContext` and an
 :class:`OffscreenColorTarget` (a color ``VkImage`` render target with CPU
 readback).  There is no window or surface here -- this is the headless core
 the renderer (and CI, via Mesa Lavapipe) build on.
+
+Submissions are tracked by a serial number and a fence, so that work can be
+queued without waiting (:meth:`VulkanContext.submit`), and resources that
+in-flight work still uses are released only once it completes
+(:meth:`VulkanContext.release_later`).  Uploads go through a persistent,
+ring-buffered :class:`StagingRing` instead of a fresh staging buffer each.
 """
+from collections import deque
+
 import numpy as np
 
 try:
@@ -50,6 +58,15 @@ class VulkanContext:
         self.instance = None
         self.device = None
         self.command_pool = None
+        # submission tracking: serials of submitted and completed work,
+        # (serial, fence, cmd) of in-flight submissions, a pool of free
+        # fences and (serial, func, args) of deferred releases
+        self.submit_serial = 0
+        self.completed_serial = 0
+        self._inflight = deque()
+        self._free_fences = []
+        self._releases = deque()
+        self._staging = None
         try:
             self._init(app_name, prefer_cpu)
         except Exception:
@@ -188,40 +205,105 @@ class VulkanContext:
             cmd, vk.VK_PIPELINE_STAGE_ALL_COMMANDS_BIT,
             vk.VK_PIPELINE_STAGE_ALL_COMMANDS_BIT, 0, 0, None, 0, None, 1, [b])
 
+    @property
+    def staging(self):
+        """The :class:`StagingRing` used for uploads (created on first use)."""
+        if self._staging is None:
+            self._staging = StagingRing(self)
+        return self._staging
+
     def create_texture_2d(self, width, height, fmt, data):
-        """Create a device-local sampled 2D image, upload ``data`` via a
-        staging buffer, and leave it in SHADER_READ_ONLY_OPTIMAL.
+        """Create a device-local sampled 2D image, upload ``data`` via the
+        staging ring, and leave it in SHADER_READ_ONLY_OPTIMAL.
+
+        The upload is submitted without waiting; work submitted later to the
+        queue sees the uploaded data.
 
         Returns ``(image, memory, view)``.
         """
-        if not isinstance(data, (bytes, bytearray)):
-            data = np.ascontiguousarray(data).tobytes()
         img, mem = self.create_image(
             width, height, fmt,
-            vk.VK_IMAGE_USAGE_SAMPLED_BIT | vk.VK_IMAGE_USAGE_TRANSFER_DST_BIT,
+            vk.VK_IMAGE_USAGE_SAMPLED_BIT | vk.VK_IMAGE_USAGE_TRANSFER_DST_BIT |
+            vk.VK_IMAGE_USAGE_TRANSFER_SRC_BIT,
             vk.VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT)
-        staging, stg_mem = self.create_buffer(
-            len(data), vk.VK_BUFFER_USAGE_TRANSFER_SRC_BIT,
-            vk.VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT |
-            vk.VK_MEMORY_PROPERTY_HOST_COHERENT_BIT)
-        self.upload(stg_mem, data)
+        self._copy_to_image(img, data, 0, 0, width, height,
+                            vk.VK_IMAGE_LAYOUT_UNDEFINED)
+        return img, mem, self.create_image_view(img, fmt)
+
+    def update_texture_2d(self, image, x, y, width, height, data):
+        """Replace the ``width`` x ``height`` texels at ``(x, y)`` of a
+        texture made by :meth:`create_texture_2d` with ``data`` (a partial
+        update; only the changed region is transferred).
+
+        The update is submitted without waiting and is ordered after any
+        draws already submitted that sample the texture.
+        """
+        self._copy_to_image(image, data, x, y, width, height,
+                            vk.VK_IMAGE_LAYOUT_SHADER_READ_ONLY_OPTIMAL)
+
+    def _copy_to_image(self, image, data, x, y, width, height, old_layout):
+        offset = self.staging.write(data)
         cmd = self.begin_commands()
-        self.image_barrier(cmd, img, vk.VK_IMAGE_LAYOUT_UNDEFINED,
+        self.image_barrier(cmd, image, old_layout,
                            vk.VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL)
         vk.vkCmdCopyBufferToImage(
-            cmd, staging, img, vk.VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL, 1,
+            cmd, self.staging.buffer, image,
+            vk.VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL, 1,
             [vk.VkBufferImageCopy(
+                bufferOffset=offset, bufferRowLength=0, bufferImageHeight=0,
                 imageSubresource=vk.VkImageSubresourceLayers(
                     aspectMask=vk.VK_IMAGE_ASPECT_COLOR_BIT, mipLevel=0,
                     baseArrayLayer=0, layerCount=1),
+                imageOffset=vk.VkOffset3D(x, y, 0),
                 imageExtent=vk.VkExtent3D(width, height, 1))])
-        self.image_barrier(cmd, img,
+        self.image_barrier(cmd, image,
                            vk.VK_IMAGE_LAYOUT_TRANSFER_DST_OPTIMAL,
                            vk.VK_IMAGE_LAYOUT_SHADER_READ_ONLY_OPTIMAL)
-        self.submit_wait(cmd)
-        vk.vkDestroyBuffer(self.device, staging, None)
-        vk.vkFreeMemory(self.device, stg_mem, None)
-        return img, mem, self.create_image_view(img, fmt)
+        self.submit(cmd)
+
+    def read_texture_2d(self, image, width, height, texel_size):
+        """Read back a texture made by :meth:`create_texture_2d`, as an
+        ``(height, width * texel_size)`` uint8 array (waits; for tests and
+        debugging)."""
+        nbytes = width * height * texel_size
+        buf, mem = self.create_buffer(
+            nbytes, vk.VK_BUFFER_USAGE_TRANSFER_DST_BIT,
+            vk.VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT |
+            vk.VK_MEMORY_PROPERTY_HOST_COHERENT_BIT)
+        try:
+            cmd = self.begin_commands()
+            self.image_barrier(cmd, image,
+                               vk.VK_IMAGE_LAYOUT_SHADER_READ_ONLY_OPTIMAL,
+                               vk.VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL)
+            vk.vkCmdCopyImageToBuffer(
+                cmd, image, vk.VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL, buf, 1,
+                [vk.VkBufferImageCopy(
+                    imageSubresource=vk.VkImageSubresourceLayers(
+                        aspectMask=vk.VK_IMAGE_ASPECT_COLOR_BIT, mipLevel=0,
+                        baseArrayLayer=0, layerCount=1),
+                    imageExtent=vk.VkExtent3D(width, height, 1))])
+            self.image_barrier(cmd, image,
+                               vk.VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL,
+                               vk.VK_IMAGE_LAYOUT_SHADER_READ_ONLY_OPTIMAL)
+            self.submit_wait(cmd)
+            return self.read(mem, nbytes).reshape(height, width * texel_size)
+        finally:
+            vk.vkDestroyBuffer(self.device, buf, None)
+            vk.vkFreeMemory(self.device, mem, None)
+
+    def host_read_barrier(self, cmd, buffer):
+        """Record a barrier making transfer writes to ``buffer`` visible to
+        host reads (after the submission's fence has been waited on)."""
+        b = vk.VkBufferMemoryBarrier(
+            sType=_s('BUFFER_MEMORY_BARRIER'),
+            srcAccessMask=vk.VK_ACCESS_TRANSFER_WRITE_BIT,
+            dstAccessMask=vk.VK_ACCESS_HOST_READ_BIT,
+            srcQueueFamilyIndex=vk.VK_QUEUE_FAMILY_IGNORED,
+            dstQueueFamilyIndex=vk.VK_QUEUE_FAMILY_IGNORED,
+            buffer=buffer, offset=0, size=vk.VK_WHOLE_SIZE)
+        vk.vkCmdPipelineBarrier(
+            cmd, vk.VK_PIPELINE_STAGE_TRANSFER_BIT,
+            vk.VK_PIPELINE_STAGE_HOST_BIT, 0, 0, None, 1, [b], 0, None)
 
     def upload(self, mem, data, size=None):
         """Copy ``bytes``/ndarray ``data`` into a mapped host-visible ``mem``."""
@@ -253,17 +335,87 @@ class VulkanContext:
             flags=vk.VK_COMMAND_BUFFER_USAGE_ONE_TIME_SUBMIT_BIT))
         return cmd
 
-    def submit_wait(self, cmd):
+    def submit(self, cmd):
+        """End and submit ``cmd`` without waiting.
+
+        Returns the serial number of the submission; see :meth:`wait_serial`.
+        The command buffer is freed once the submission completes.
+        """
         vk.vkEndCommandBuffer(cmd)
+        if len(self._free_fences) > 0:
+            fence = self._free_fences.pop()
+        else:
+            fence = vk.vkCreateFence(self.device, vk.VkFenceCreateInfo(
+                sType=_s('FENCE_CREATE_INFO'), flags=0), None)
         vk.vkQueueSubmit(self.queue, 1, [vk.VkSubmitInfo(
             sType=_s('SUBMIT_INFO'), commandBufferCount=1,
-            pCommandBuffers=[cmd])], vk.VK_NULL_HANDLE)
-        vk.vkQueueWaitIdle(self.queue)
+            pCommandBuffers=[cmd])], fence)
+        self.submit_serial += 1
+        self._inflight.append((self.submit_serial, fence, cmd))
+        return self.submit_serial
+
+    def submit_wait(self, cmd):
+        self.wait_serial(self.submit(cmd))
+
+    def _fence_done(self, fence):
+        try:
+            res = vk.vkGetFenceStatus(self.device, fence)
+        except vk.VkNotReady:
+            return False
+        return res in (None, vk.VK_SUCCESS)
+
+    def _retire(self):
+        serial, fence, cmd = self._inflight.popleft()
         vk.vkFreeCommandBuffers(self.device, self.command_pool, 1, [cmd])
+        vk.vkResetFences(self.device, 1, [fence])
+        self._free_fences.append(fence)
+        self.completed_serial = serial
+        # run the releases of resources no longer in use
+        while (len(self._releases) > 0 and
+               self._releases[0][0] <= self.completed_serial):
+            _, func, args = self._releases.popleft()
+            func(*args)
+
+    def poll(self):
+        """Retire any completed submissions (does not wait)."""
+        while len(self._inflight) > 0 and self._fence_done(self._inflight[0][1]):
+            self._retire()
+        return self.completed_serial
+
+    def is_complete(self, serial):
+        return serial <= self.poll()
+
+    def wait_serial(self, serial):
+        """Wait until the submission ``serial`` (and all before it) is done."""
+        while self.completed_serial < serial and len(self._inflight) > 0:
+            fence = self._inflight[0][1]
+            vk.vkWaitForFences(self.device, 1, [fence], vk.VK_TRUE,
+                               0xFFFFFFFFFFFFFFFF)
+            self._retire()
+
+    def wait_idle(self):
+        """Wait until all submitted work is done."""
+        self.wait_serial(self.submit_serial)
+
+    def release_later(self, func, *args):
+        """Call ``func(*args)`` once all the work submitted so far is done
+        (right away if there is none), e.g. to free resources it uses."""
+        if self.poll() >= self.submit_serial:
+            func(*args)
+        else:
+            self._releases.append((self.submit_serial, func, args))
 
     def destroy(self):
         if not have_vulkan:
             return
+        if getattr(self, 'device', None) is not None:
+            self.wait_idle()
+            if self._staging is not None:
+                self._staging.destroy()
+                self._staging = None
+            for fence in self._free_fences:
+                vk.vkDestroyFence(self.device, fence, None)
+            self._free_fences = []
         if getattr(self, 'command_pool', None) is not None:
             vk.vkDestroyCommandPool(self.device, self.command_pool, None)
             self.command_pool = None
@@ -275,6 +427,100 @@ class VulkanContext:
             self.instance = None
 
 
+class StagingRing:
+    """A persistently mapped, host-visible staging buffer used as a ring.
+
+    :meth:`write` copies data into the next free region and returns its
+    offset, for a transfer recorded by the caller.  The region must be
+    consumed by the next submission (:meth:`VulkanContext.submit`); it is
+    reused only after that submission is complete, so uploads do not need
+    to wait for each other.  The ring grows if a single upload does not
+    fit in it.
+
+    Parameters
+    ----------
+    ctx : VulkanContext
+    size : int
+        Initial size of the ring in bytes.
+    """
+
+    # alignment of regions: a multiple of any texel size and of
+    # optimalBufferCopyOffsetAlignment on common devices
+    align = 256
+
+    def __init__(self, ctx, size=32 * 1024 * 1024):
+        self.ctx = ctx
+        self.buffer = None
+        self._alloc(size)
+
+    def _alloc(self, size):
+        ctx = self.ctx
+        self.size = size
+        self.buffer, self.mem = ctx.create_buffer(
+            size, vk.VK_BUFFER_USAGE_TRANSFER_SRC_BIT,
+            vk.VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT |
+            vk.VK_MEMORY_PROPERTY_HOST_COHERENT_BIT)
+        ptr = vk.vkMapMemory(ctx.device, self.mem, 0, size, 0)
+        self._view = np.frombuffer(ptr, np.uint8, count=size)
+        self.head = 0
+        # (serial, start, end) of regions, in the order written
+        self._regions = deque()
+
+    def write(self, data):
+        """Copy ``data`` (bytes or ndarray) into the ring; returns the offset."""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            flat = np.frombuffer(data, np.uint8)
+        else:
+            flat = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        n = flat.nbytes
+        if n > self.size:
+            self._grow(n)
+        start = -(-self.head // self.align) * self.align
+        if start + n > self.size:
+            # wrap around
+            start = 0
+        end = start + n
+        self._wait_region(start, end)
+        self._view[start:end] = flat
+        self.head = end
+        # consumed by the next submission
+        self._regions.append((self.ctx.submit_serial + 1, start, end))
+        return start
+
+    def _wait_region(self, start, end):
+        # wait for the submissions reading any regions overlapping
+        # [start, end)
+        ctx = self.ctx
+        serial = max([r_serial for r_serial, r_start, r_end in self._regions
+                      if r_start < end and start < r_end], default=0)
+        if serial > ctx.submit_serial:
+            raise VulkanError("staging ring overrun by unsubmitted uploads")
+        ctx.wait_serial(serial)
+        # forget the regions no longer in use
+        completed = ctx.poll()
+        while len(self._regions) > 0 and self._regions[0][0] <= completed:
+            self._regions.popleft()
+
+    def _grow(self, nbytes):
+        # wait until the old buffer is not in use
+        self.ctx.wait_idle()
+        self.destroy()
+        size = self.size
+        while size < nbytes:
+            size *= 2
+        self._alloc(size)
+
+    def destroy(self):
+        if self.buffer is None:
+            return
+        d = self.ctx.device
+        self._view = None
+        vk.vkUnmapMemory(d, self.mem)
+        vk.vkDestroyBuffer(d, self.buffer, None)
+        vk.vkFreeMemory(d, self.mem, None)
+        self.buffer = None
+
+
 class OffscreenColorTarget:
     """A ``width`` x ``height`` color image usable as a render target, with a
     host-visible readback buffer and a tracked layout.
@@ -294,10 +540,19 @@ class OffscreenColorTarget:
             vk.VK_MEMORY_PROPERTY_DEVICE_LOCAL_BIT)
         self.view = ctx.create_image_view(self.image, self.fmt)
         self._nbytes = width * height * 4
-        self.readbuf, self.readbuf_mem = ctx.create_buffer(
-            self._nbytes, vk.VK_BUFFER_USAGE_TRANSFER_DST_BIT,
-            vk.VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT |
-            vk.VK_MEMORY_PROPERTY_HOST_COHERENT_BIT)
+        host_flags = (vk.VK_MEMORY_PROPERTY_HOST_VISIBLE_BIT |
+                      vk.VK_MEMORY_PROPERTY_HOST_COHERENT_BIT)
+        try:
+            # cached host memory is much faster for the CPU to read
+            self.readbuf, self.readbuf_mem = ctx.create_buffer(
+                self._nbytes, vk.VK_BUFFER_USAGE_TRANSFER_DST_BIT,
+                host_flags | vk.VK_MEMORY_PROPERTY_HOST_CACHED_BIT)
+        except VulkanError:
+            self.readbuf, self.readbuf_mem = ctx.create_buffer(
+                self._nbytes, vk.VK_BUFFER_USAGE_TRANSFER_DST_BIT, host_flags)
+        # the readback buffer stays mapped
+        ptr = vk.vkMapMemory(ctx.device, self.readbuf_mem, 0, self._nbytes, 0)
+        self._readview = np.frombuffer(ptr, np.uint8, count=self._nbytes)
 
     def _full_range(self):
         return vk.VkImageSubresourceRange(
@@ -306,8 +561,7 @@ class OffscreenColorTarget:
 
     def transition(self, cmd, new_layout):
         """Record a conservative layout transition and update the tracked
-        layout.  (Broad access/stage masks -- correctness over speed; this
-        renderer serializes with a queue-wait per submission anyway.)"""
+        layout.  (Broad access/stage masks -- correctness over speed.)"""
         barrier = vk.VkImageMemoryBarrier(
             sType=_s('IMAGE_MEMORY_BARRIER'), oldLayout=self.layout,
             newLayout=new_layout,
@@ -331,9 +585,9 @@ class OffscreenColorTarget:
             vk.VkClearColorValue(float32=list(color)), 1, [self._full_range()])
         self.ctx.submit_wait(cmd)
 
-    def read_rgba(self):
-        """Return the image as an ``(H, W, 4)`` uint8 RGBA array."""
-        cmd = self.ctx.begin_commands()
+    def record_readback(self, cmd):
+        """Record the copy of the image into the readback buffer; once the
+        submission is done, :meth:`read_mapped` returns the image."""
         self.transition(cmd, vk.VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL)
         region = vk.VkBufferImageCopy(
             imageSubresource=vk.VkImageSubresourceLayers(
@@ -343,12 +597,24 @@ class OffscreenColorTarget:
         vk.vkCmdCopyImageToBuffer(
             cmd, self.image, vk.VK_IMAGE_LAYOUT_TRANSFER_SRC_OPTIMAL,
             self.readbuf, 1, [region])
+        self.ctx.host_read_barrier(cmd, self.readbuf)
+
+    def read_mapped(self):
+        """Return a copy of the readback buffer as an ``(H, W, 4)`` uint8
+        RGBA array."""
+        return self._readview.copy().reshape(self.height, self.width, 4)
+
+    def read_rgba(self):
+        """Return the image as an ``(H, W, 4)`` uint8 RGBA array."""
+        cmd = self.ctx.begin_commands()
+        self.record_readback(cmd)
         self.ctx.submit_wait(cmd)
-        return self.ctx.read(self.readbuf_mem, self._nbytes).reshape(
-            self.height, self.width, 4)
+        return self.read_mapped()
 
     def destroy(self):
         d = self.ctx.device
+        self._readview = None
+        vk.vkUnmapMemory(d, self.readbuf_mem)
         vk.vkDestroyImageView(d, self.view, None)
         vk.vkDestroyImage(d, self.image, None)
         vk.vkFreeMemory(d, self.image_mem, None)